@@ -23,6 +23,11 @@ AI / 人の判定:
   --since 未指定かつカーソルがあれば、その続きから増分集計する（--save-state で更新）。
   サブコマンド history / diff で過去ランの確認・差分が取れる。
 
+取得の並列化とキャッシュ:
+  MR / イシュー 1 件ごとの付随リソース（notes・changes・closes_issues・state/label events）は
+  --jobs 本まで並列に取得する。応答は --cache-dir にアイテムの updated_at と一緒に保存し、
+  次回以降 updated_at が変わっていないアイテムは取得しない（期間の重なる collect や再解析が速くなる）。
+
 サブコマンド:
   collect (既定)  集計して JSON / Markdown を出力
   history          --state-file のラン履歴を一覧
@@ -41,11 +46,15 @@ AI / 人の判定:
 """
 
 import argparse
+import hashlib
 import importlib.util
 import json
+import os
 import re
 import sys
+import threading
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
@@ -526,8 +535,76 @@ def build_output(cells, rework_cells, repos, since, until, agent_set, ai_marker_
 # GitLab からの取得
 # ---------------------------------------------------------------------------
 
-def fetch_repo(host, token, project, since, until, verbose=False, review_credit="issue-author"):
-    """1 リポジトリの MR / イシューを取得し、changes / notes / events を添付して返す。"""
+DEFAULT_FETCH_JOBS = 8
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "gitlab-efficiency-metrics"
+
+
+_MISS = object()
+
+
+class ResponseCache:
+    """MR / イシューの付随リソースの応答を、親アイテムの updated_at と一緒にディスクへ置く。
+
+    GitLab はコメント追加・ラベル変更・reopen・push のたびに親の updated_at を進めるので、
+    updated_at が同じなら付随リソースも前回と同じとみなせる。1 エンドポイント 1 ファイルで
+    上書きするため、アイテムが更新されても古い版は溜まらない。
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _path(self, host, endpoint) -> Path:
+        digest = hashlib.sha256(f"{host}\n{endpoint}".encode("utf-8")).hexdigest()
+        return self.root / digest[:2] / f"{digest}.json"
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, host, endpoint, updated_at):
+        """保存済みの応答を返す。無い・updated_at が違う・読めないときは _MISS。"""
+        if not updated_at:
+            return _MISS
+        try:
+            with open(self._path(host, endpoint), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        hit = (isinstance(entry, dict) and entry.get("endpoint") == endpoint
+               and entry.get("updated_at") == updated_at)
+        self._count(hit)
+        return entry["data"] if hit else _MISS
+
+    def put(self, host, endpoint, updated_at, data) -> None:
+        if not updated_at:
+            return
+        path = self._path(host, endpoint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"endpoint": endpoint, "updated_at": updated_at, "data": data}, f,
+                      ensure_ascii=False)
+        os.replace(tmp, path)
+
+
+def fetch_repo(host, token, project, since, until, verbose=False, review_credit="issue-author",
+               jobs=DEFAULT_FETCH_JOBS, cache=None):
+    """1 リポジトリの MR / イシューを取得し、changes / notes / events を添付して返す。
+
+    一覧 2 本を取ったあと、アイテムごとの付随リソースを 1 つのタスク列にして jobs 本で並列に
+    取得する（結果はタスク順に添付するので、jobs を変えても返す構造は同じ）。cache があれば
+    updated_at が変わっていないアイテムの付随リソースは取得しない。
+    """
     ep = GL.encode_project(project)
     since_iso = _to_utc_iso(since)
 
@@ -538,27 +615,53 @@ def fetch_repo(host, token, project, since, until, verbose=False, review_credit=
     mrs = GL.api_list(host, token, f"/projects/{ep}/merge_requests",
                       params={"state": "all", "updated_after": since_iso, "scope": "all"})
     log(f"MR {len(mrs)} 件")
+    issues = GL.api_list(host, token, f"/projects/{ep}/issues",
+                         params={"state": "all", "updated_after": since_iso, "scope": "all"})
+    log(f"イシュー {len(issues)} 件")
+
+    hits_before = cache.hits if cache is not None else 0
+    tasks = []      # (アイテム, 添付先キー, 一覧か, エンドポイント)
     for mr in mrs:
-        iid = mr.get("iid")
-        mr["_notes"] = GL.api_list(host, token, f"/projects/{ep}/merge_requests/{iid}/notes")
+        base = f"/projects/{ep}/merge_requests/{mr.get('iid')}"
+        tasks.append((mr, "_notes", True, f"{base}/notes"))
         if mr.get("state") == "merged" and _in_window(mr.get("merged_at"), since, until):
-            mr["_changes"] = GL.api(host, token, "GET",
-                                    f"/projects/{ep}/merge_requests/{iid}/changes")
+            tasks.append((mr, "_changes", False, f"{base}/changes"))
             # レビューを元イシュー作成者に帰属する場合のみ closes_issues を取得
             if review_credit == "issue-author":
-                mr["_closes_issues"] = GL.api(
-                    host, token, "GET", f"/projects/{ep}/merge_requests/{iid}/closes_issues")
-
-    issues = GL.api_list(host, token, f"/projects/{ep}/issues",
-                         params={"state": "all", "updated_after": since_iso, "scope": "all"})
-    log(f"イシュー {len(issues)} 件")
+                tasks.append((mr, "_closes_issues", False, f"{base}/closes_issues"))
     for issue in issues:
-        iid = issue.get("iid")
-        issue["_notes"] = GL.api_list(host, token, f"/projects/{ep}/issues/{iid}/notes")
-        issue["_state_events"] = GL.api_list(
-            host, token, f"/projects/{ep}/issues/{iid}/resource_state_events")
-        issue["_label_events"] = GL.api_list(
-            host, token, f"/projects/{ep}/issues/{iid}/resource_label_events")
+        base = f"/projects/{ep}/issues/{issue.get('iid')}"
+        tasks.append((issue, "_notes", True, f"{base}/notes"))
+        tasks.append((issue, "_state_events", True, f"{base}/resource_state_events"))
+        tasks.append((issue, "_label_events", True, f"{base}/resource_label_events"))
+
+    def fetch(task):
+        item, _key, is_list, endpoint = task
+        updated_at = item.get("updated_at")
+        if cache is not None:
+            data = cache.get(host, endpoint, updated_at)
+            if data is not _MISS:
+                return data
+        data = GL.api_list(host, token, endpoint) if is_list else GL.api(host, token, "GET", endpoint)
+        if cache is not None:
+            cache.put(host, endpoint, updated_at, data)
+        return data
+
+    pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+    futures = []
+    try:
+        futures = [pool.submit(fetch, t) for t in tasks]
+        for (item, key, _is_list, _endpoint), fut in zip(tasks, futures):
+            item[key] = fut.result()
+    finally:
+        # 1 件でも失敗（sys.exit を含む）したら、まだ始まっていない取得は捨てる
+        for fut in futures:
+            fut.cancel()
+        pool.shutdown(wait=True)
+    if cache is not None:
+        log(f"付随リソース {len(tasks)} 件（うちキャッシュ再利用 {cache.hits - hits_before} 件）")
+    else:
+        log(f"付随リソース {len(tasks)} 件")
 
     return {"mrs": mrs, "issues": issues}
 
@@ -750,6 +853,7 @@ def cmd_collect(args):
                                       "active_time_hours": 0.0, "active_counted": 0})
     repo_paths = []
     per_repo_since = {}
+    cache = None if args.no_cache else ResponseCache(args.cache_dir or default_cache_dir())
 
     for host, project, token in repos:
         repo_paths.append(project)
@@ -760,7 +864,8 @@ def cmd_collect(args):
             if cur:
                 since = _parse_date(cur)
         per_repo_since[repo_key(host, project)] = since
-        raw = fetch_repo(host, token, project, since, until, args.verbose, args.review_credit)
+        raw = fetch_repo(host, token, project, since, until, args.verbose, args.review_credit,
+                         jobs=args.jobs, cache=cache)
         process_repo(project, raw, since, until, agent_set, ai_res, rework_labels,
                      params, cells, rework_cells, args.review_credit, time_cells,
                      in_progress_labels)
@@ -873,6 +978,10 @@ def build_parser():
     c.add_argument("--format", choices=["json", "markdown"], default="json")
     c.add_argument("--get", help="JSON 出力から単一フィールドを抽出（例: totals.estimate.savings.mid）")
     c.add_argument("--verbose", action="store_true", help="収集過程を stderr に出力")
+    c.add_argument("--jobs", type=int, default=DEFAULT_FETCH_JOBS,
+                   help=f"付随リソース（notes・changes・events）を並列に取る本数（既定 {DEFAULT_FETCH_JOBS}、1 で逐次）")
+    c.add_argument("--cache-dir", help="応答キャッシュの置き場（既定: $XDG_CACHE_HOME/gitlab-efficiency-metrics）")
+    c.add_argument("--no-cache", action="store_true", help="応答キャッシュを使わない（読みも書きもしない）")
 
     h = sub.add_parser("history", help="状態ファイルのラン履歴を一覧")
     h.add_argument("--state-file", required=True)
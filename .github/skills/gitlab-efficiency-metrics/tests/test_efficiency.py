@@ -0,0 +1,203 @@
+"""付随リソースの並列取得と応答キャッシュの契約テスト。
+
+ローカルのスタブ GitLab（リクエスト数と同時実行数を数える）を相手に、(1) jobs を変えても
+添付される構造が同じ、(2) 同時実行数が jobs で頭打ち、(3) updated_at が変わらないアイテムは
+2 回目に取得しない、ことを確かめる。
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+MODULE_PATH = Path(__file__).resolve().parent.parent / "scripts" / "efficiency.py"
+
+SINCE = datetime(2026, 5, 1, tzinfo=timezone.utc)
+UNTIL = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+def load_module():
+    spec = importlib.util.spec_from_file_location("gitlab_efficiency", MODULE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _mr(iid, state="merged"):
+    return {"iid": iid, "state": state, "updated_at": "2026-05-10T00:00:00Z",
+            "merged_at": "2026-05-10T00:00:00Z" if state == "merged" else None,
+            "author": {"username": "bot"}}
+
+
+def _issue(iid):
+    return {"iid": iid, "state": "closed", "updated_at": "2026-05-12T00:00:00Z",
+            "created_at": "2026-05-02T00:00:00Z", "closed_at": "2026-05-12T00:00:00Z",
+            "author": {"username": "alice"}}
+
+
+class StubGitLab:
+    """一覧と付随リソースを返し、パスごとの取得回数と同時実行数のピークを数える。"""
+
+    def __init__(self, mrs, issues, delay=0.0):
+        self.mrs = mrs
+        self.issues = issues
+        self.delay = delay
+        self.hits: Counter = Counter()
+        self.in_flight = 0
+        self.peak = 0
+        lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path = self.path.partition("?")[0].replace("/api/v4/projects/ns%2Frepo", "")
+                with lock:
+                    stub.hits[path] += 1
+                    stub.in_flight += 1
+                    stub.peak = max(stub.peak, stub.in_flight)
+                try:
+                    if path not in ("/merge_requests", "/issues"):
+                        time.sleep(stub.delay)
+                    body = json.dumps(stub.route(path)).encode()
+                finally:
+                    with lock:
+                        stub.in_flight -= 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.api_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/api/v4"
+
+    def route(self, path):
+        if path == "/merge_requests":
+            return self.mrs
+        if path == "/issues":
+            return self.issues
+        kind, iid, sub = path.strip("/").split("/")
+        if sub == "notes":
+            return [{"body": f"{kind} {iid} note", "created_at": "2026-05-05T00:00:00Z",
+                     "author": {"username": "bot"}}]
+        if sub == "changes":
+            return {"changes": [{"diff": f"+line {iid}\n"}]}
+        if sub == "closes_issues":
+            return [{"author": {"username": "alice"}}]
+        return [{"state": "reopened", "created_at": "2026-05-06T00:00:00Z"}]
+
+    def sub_requests(self):
+        return sum(n for p, n in self.hits.items() if p not in ("/merge_requests", "/issues"))
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def env(monkeypatch, tmp_path):
+    monkeypatch.setenv("GITGUARD_DIR", str(tmp_path / "gitguard"))
+
+    def start(mrs, issues, delay=0.0):
+        stub = StubGitLab(mrs, issues, delay)
+        monkeypatch.setenv("GL_API_URL", stub.api_url)
+        starts.append(stub)
+        return stub
+
+    starts: list = []
+    yield start
+    for stub in starts:
+        stub.stop()
+
+
+def _fetch(eff, **kw):
+    return eff.fetch_repo("gitlab.example.com", "token", "ns/repo", SINCE, UNTIL, **kw)
+
+
+def test_parallel_fetch_attaches_the_same_structure_as_serial(env):
+    eff = load_module()
+    stub = env([_mr(1), _mr(2, "closed"), _mr(3)], [_issue(10), _issue(11)])
+
+    serial = _fetch(eff, jobs=1)
+    parallel = _fetch(eff, jobs=6)
+
+    assert parallel == serial
+    mr1 = parallel["mrs"][0]
+    assert mr1["_changes"] == {"changes": [{"diff": "+line 1\n"}]}
+    assert mr1["_closes_issues"][0]["author"]["username"] == "alice"
+    assert "_changes" not in parallel["mrs"][1], "マージされていない MR の changes は取らない"
+    assert parallel["issues"][1]["_notes"][0]["body"] == "issues 11 note"
+    assert stub.sub_requests() == 2 * (3 + 1 + 3 + 2 * 3)
+
+
+def test_concurrency_is_bounded_by_jobs(env):
+    eff = load_module()
+    stub = env([_mr(i, "closed") for i in range(12)], [], delay=0.05)
+
+    started = time.perf_counter()
+    _fetch(eff, jobs=3)
+    elapsed = time.perf_counter() - started
+
+    assert stub.peak == 3
+    assert elapsed < 12 * 0.05, "逐次より速い"
+
+
+def test_cache_skips_items_whose_updated_at_did_not_change(env, tmp_path):
+    eff = load_module()
+    issues = [_issue(10), _issue(11)]
+    stub = env([_mr(1)], issues)
+    cache = eff.ResponseCache(tmp_path / "cache")
+
+    first = _fetch(eff, cache=cache)
+    assert stub.sub_requests() == 3 + 6
+
+    again = _fetch(eff, cache=eff.ResponseCache(tmp_path / "cache"))
+    assert again == first
+    assert stub.sub_requests() == 9, "変わっていないアイテムは一覧だけ取る"
+    assert stub.hits["/issues"] == 2
+
+    issues[1]["updated_at"] = "2026-05-20T00:00:00Z"
+    warm = eff.ResponseCache(tmp_path / "cache")
+    _fetch(eff, cache=warm)
+    assert stub.sub_requests() == 9 + 3, "更新されたイシューの 3 リソースだけ取り直す"
+    assert (warm.hits, warm.misses) == (6, 3)
+
+
+def test_items_without_updated_at_are_never_cached(env, tmp_path):
+    eff = load_module()
+    mr = _mr(1, "closed")
+    del mr["updated_at"]
+    stub = env([mr], [])
+    cache = eff.ResponseCache(tmp_path / "cache")
+
+    _fetch(eff, cache=cache)
+    _fetch(eff, cache=cache)
+
+    assert stub.hits["/merge_requests/1/notes"] == 2
+    assert not any((tmp_path / "cache").rglob("*.json"))
+
+
+def test_corrupt_cache_entry_is_a_miss(env, tmp_path):
+    eff = load_module()
+    stub = env([_mr(1, "closed")], [])
+    cache = eff.ResponseCache(tmp_path / "cache")
+    _fetch(eff, cache=cache)
+    for path in (tmp_path / "cache").rglob("*.json"):
+        path.write_text("{broken", encoding="utf-8")
+
+    result = _fetch(eff, cache=eff.ResponseCache(tmp_path / "cache"))
+
+    assert result["mrs"][0]["_notes"][0]["body"] == "merge_requests 1 note"
+    assert stub.hits["/merge_requests/1/notes"] == 2
@@ -17,8 +17,15 @@ Usage:
                  --get 0.web_url             → first element's field (for arrays)
                  --get author.username       → nested field
 
+  python gl.py batch < commands.jsonl
+               Run many commands in one process. Each input line is
+               {"id": ..., "argv": ["get-issue", "12"]}; each output line is
+               {"id", "ok", "exit", "output", "error"}. Project and token are
+               resolved once and API calls reuse a keep-alive connection.
+
 Environment variables:
   GITLAB_TOKEN or GL_TOKEN  Personal Access Token (required)
+  GL_API_URL                Override the API base URL (default: https://<host>/api/v4)
 
 skill-registry.json (skill_configs.gitlab-idd.*):
   self_defer_minutes        Worker self-defer period (check-defer, default: 60 min)
@@ -28,12 +35,15 @@ skill-registry.json (skill_configs.gitlab-idd.*):
 """
 
 import argparse
+import http.client
+import io
 import json
 import os
 import re
 import secrets
 import subprocess
 import sys
+import time
 import unicodedata
 import urllib.error
 import urllib.parse
@@ -369,32 +379,120 @@ def _make_headers(token: str) -> dict:
     return {"PRIVATE-TOKEN": token, "Content-Type": "application/json", "Accept": "application/json"}
 
 
+def _api_base(host) -> str:
+    """API のベース URL。GL_API_URL で差し替えられる（非 443 の self-hosted やテスト用スタブ）。"""
+    return (os.environ.get("GL_API_URL") or f"https://{host}/api/v4").rstrip("/")
+
+
+class _ConnectionPool:
+    """batch モード用の keep-alive 接続（(scheme, netloc) ごとに 1 本）。
+
+    単発実行は urllib のまま 1 リクエスト 1 接続で、プロセスごと捨てる。batch では同じホストへ
+    数十回続けて呼ぶので、TCP/TLS の握手を最初の 1 回にまとめる。切れた接続の扱い:
+      - 冪等なメソッド（GET/PUT/DELETE）は再利用した接続で失敗したら 1 回だけ張り直して送り直す
+      - POST は送り直さない（二重作成を避ける）。代わりにしばらく遊んでいた接続は送る前に張り直す
+    """
+
+    IDLE_REUSE_SEC = 4.0
+    _IDEMPOTENT = frozenset(("GET", "HEAD", "PUT", "DELETE"))
+
+    def __init__(self, timeout: float = 30):
+        self.timeout = timeout
+        self._conns: dict = {}      # (scheme, netloc) -> [conn, last_used]
+        self.opened = 0
+
+    def _connect(self, scheme: str, netloc: str):
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = cls(netloc, timeout=self.timeout)
+        self._conns[(scheme, netloc)] = [conn, 0.0]
+        self.opened += 1
+        return conn
+
+    def _drop(self, key) -> None:
+        entry = self._conns.pop(key, None)
+        if entry:
+            entry[0].close()
+
+    def request(self, method: str, url: str, headers: dict, body=None):
+        """1 リクエストを送って (status, reason, headers, content) を返す。"""
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        entry = self._conns.get(key)
+        if entry and method not in self._IDEMPOTENT and time.monotonic() - entry[1] > self.IDLE_REUSE_SEC:
+            self._drop(key)
+            entry = None
+        reused = entry is not None
+        conn = entry[0] if entry else self._connect(*key)
+        while True:
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                resp = conn.getresponse()
+                content = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self._drop(key)
+                if not (reused and method in self._IDEMPOTENT):
+                    raise
+                reused = False
+                conn = self._connect(*key)
+                continue
+            except Exception:
+                self._drop(key)
+                raise
+            if resp.will_close:
+                self._drop(key)
+            else:
+                self._conns[key][1] = time.monotonic()
+            return resp.status, resp.reason, resp.headers, content
+
+    def close(self) -> None:
+        for key in list(self._conns):
+            self._drop(key)
+
+
+_POOL: Optional[_ConnectionPool] = None   # batch 実行中だけ立つ
+
+
+def _http(method: str, url: str, headers: dict, body=None):
+    """(status, reason, headers, content) を返す。2xx 以外の応答も例外にせずそのまま返す。"""
+    if _POOL is not None:
+        return _POOL.request(method, url, headers, body)
+    req = urllib.request.Request(url, data=body, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return getattr(resp, "status", 200), resp.reason, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        try:
+            content = e.read()
+        except Exception:
+            content = b"(no details)"
+        return e.code, e.reason, e.headers, content
+
+
+def _fail_http(g, status, reason, content) -> None:
+    if g:
+        g.http_status(status, f"HTTP {status}")   # 429/5xx だけブレーカーに数える
+    msg = content.decode("utf-8", errors="replace") if content else "(no details)"
+    sys.exit(f"ERROR: HTTP {status} {reason}\n{msg}")
+
+
 def api(host, token, method, path, data=None, params=None):
     """Make a GitLab REST API call and return parsed JSON."""
-    url = f"https://{host}/api/v4{path}"
+    url = f"{_api_base(host)}{path}"
     if params:
         url = url + "?" + urllib.parse.urlencode(
             {k: v for k, v in params.items() if v is not None}
         )
     headers = _make_headers(token)
     body = json.dumps(data).encode("utf-8") if data is not None else None
-    req = urllib.request.Request(url, data=body, headers=headers, method=method)
     try:
         with _guard(host, f"{method} {path}") as g:
-            try:
-                with urllib.request.urlopen(req, timeout=30) as resp:
-                    content = resp.read()
-                    if g:
-                        g.http_status(getattr(resp, "status", 200))
-                    return json.loads(content) if content.strip() else {}
-            except urllib.error.HTTPError as e:
-                if g:
-                    g.http_status(e.code, f"HTTP {e.code}")   # 429/5xx だけブレーカーに数える
-                try:
-                    msg = e.read().decode("utf-8", errors="replace")
-                except Exception:
-                    msg = "(no details)"
-                sys.exit(f"ERROR: HTTP {e.code} {e.reason}\n{msg}")
+            status, reason, _, content = _http(method, url, headers, body)
+            if status >= 300:
+                _fail_http(g, status, reason, content)
+            if g:
+                g.http_status(status)
+            return json.loads(content) if content.strip() else {}
     except _CircuitOpen as e:
         sys.exit(f"ERROR: gitguard circuit open for {host}（一過性障害が連続。時間をおいて再試行）: {e}")
 
@@ -435,34 +533,25 @@ def api_list(host, token, path, params=None):
     page = 1
     while True:
         params["page"] = page
-        url = f"https://{host}/api/v4{path}?" + urllib.parse.urlencode(
+        url = f"{_api_base(host)}{path}?" + urllib.parse.urlencode(
             {k: v for k, v in params.items() if v is not None}
         )
         headers = _make_headers(token)
-        req = urllib.request.Request(url, headers=headers, method="GET")
         try:
             with _guard(host, f"GET {path} p{page}") as g:
-                try:
-                    with urllib.request.urlopen(req, timeout=30) as resp:
-                        content = resp.read()
-                        if g:
-                            g.http_status(getattr(resp, "status", 200))
-                        page_data = json.loads(content) if content.strip() else []
-                        if not isinstance(page_data, list):
-                            return page_data
-                        all_results.extend(page_data)
-                        next_page = resp.headers.get("X-Next-Page", "").strip()
-                        if not next_page:
-                            break
-                        page = int(next_page)
-                except urllib.error.HTTPError as e:
-                    if g:
-                        g.http_status(e.code, f"HTTP {e.code}")
-                    try:
-                        msg = e.read().decode("utf-8", errors="replace")
-                    except Exception:
-                        msg = "(no details)"
-                    sys.exit(f"ERROR: HTTP {e.code} {e.reason}\n{msg}")
+                status, reason, resp_headers, content = _http("GET", url, headers)
+                if status >= 300:
+                    _fail_http(g, status, reason, content)
+                if g:
+                    g.http_status(status)
+                page_data = json.loads(content) if content.strip() else []
+                if not isinstance(page_data, list):
+                    return page_data
+                all_results.extend(page_data)
+                next_page = (resp_headers.get("X-Next-Page") or "").strip()
+                if not next_page:
+                    break
+                page = int(next_page)
         except _CircuitOpen as e:
             sys.exit(f"ERROR: gitguard circuit open for {host}（一過性障害が連続。時間をおいて再試行）: {e}")
     return all_results
@@ -1402,6 +1491,11 @@ def build_parser():
     )
     p.add_argument("issue_id", type=int)
 
+    sub.add_parser(
+        "batch",
+        help="Read JSONL commands on stdin and write one JSONL result per line (one process, keep-alive)",
+    )
+
     sub.add_parser("list-issue-templates",
                    help="List GitLab issue templates defined in the project")
 
@@ -1457,9 +1551,103 @@ _OFFLINE_COMMANDS = frozenset((
 ))
 
 
+_BATCH_REFUSED = frozenset(("batch", "configure"))   # 入れ子と対話入力は batch では受けない
+
+
+def _batch_output(text: str, get_field):
+    """捕まえた stdout を結果に載せる形へ。--get なしなら JSON として読めればその値。"""
+    text = text.rstrip("\n")
+    if get_field is None:
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text
+
+
+def run_batch(stdin, stdout, default_label: str = "default") -> int:
+    """JSONL のコマンド列を 1 プロセスで順に実行し、1 行 1 結果の JSONL を書く。
+
+    入力 1 行: {"id": 任意, "argv": ["--get", "iid", "get-issue", "12"]}
+    出力 1 行: {"id", "ok", "exit", "output", "error"}
+      output は --get なしならコマンドの JSON 出力そのもの、--get ありなら文字列。
+      失敗（HTTP エラー・引数誤り・ブレーカー open など sys.exit するもの）はその行だけの
+      結果になり、後続の行は続けて実行する。
+
+    単発実行との違いは「毎回払っていた固定費」を 1 回にまとめることだけ:
+      - host/project/token はラベルごとに最初の 1 回だけ解決する（git remote の子プロセスも 1 回）
+      - API 呼び出しはホストごとの keep-alive 接続を使い回す
+      - gitguard は 1 リクエストごとにこれまでどおり通す（ブレーカー・監視の粒度は変えない）
+    全行成功なら 0、1 行でも失敗があれば 1 を返す。
+    """
+    global _POOL
+    parser = build_parser()
+    parser.set_defaults(label=default_label)   # 行で --label-conn を省けば batch 自体のラベル
+    resolved: dict = {}     # label -> (host, project, token)
+    failed = False
+    _POOL = _ConnectionPool()
+    try:
+        for lineno, line in enumerate(stdin, 1):
+            if not line.strip():
+                continue
+            req_id = lineno
+            captured_out, captured_err = io.StringIO(), io.StringIO()
+            code, error, args = 0, "", None
+            try:
+                with contextlib.redirect_stdout(captured_out), contextlib.redirect_stderr(captured_err):
+                    try:
+                        request = json.loads(line)
+                    except ValueError as e:
+                        sys.exit(f"ERROR: batch の入力行を JSON として読めません: {e}")
+                    if not isinstance(request, dict) or not isinstance(request.get("argv"), list):
+                        sys.exit('ERROR: batch の 1 行は {"id": ..., "argv": [...]} の形')
+                    req_id = request.get("id", lineno)
+                    args = parser.parse_args([str(a) for a in request["argv"]])
+                    if args.command in _BATCH_REFUSED:
+                        sys.exit(f"ERROR: {args.command} は batch の中では実行できません")
+                    # stdin は batch 自身のコマンド列。`--*-file -` で読ませると残りの行を本文として
+                    # 投稿し、以降のコマンドが結果行も無しに消える。
+                    stdin_opts = [k for k, v in vars(args).items() if k.endswith("_file") and v == "-"]
+                    if stdin_opts:
+                        sys.exit(f"ERROR: --{stdin_opts[0][:-5].replace('_', '-')}-file - "
+                                 "（stdin 読み）は batch の中では使えません。ファイルを指定してください")
+                    if args.command in _OFFLINE_COMMANDS:
+                        COMMANDS[args.command](args, None, None, None)
+                    else:
+                        label = args.label or default_label
+                        if label not in resolved:
+                            host, project = get_project_info(label)
+                            resolved[label] = (host, project, get_token(label))
+                        COMMANDS[args.command](args, *resolved[label])
+            except SystemExit as e:
+                if isinstance(e.code, int) or e.code is None:
+                    code = e.code or 0
+                else:
+                    code, error = 1, str(e.code)
+            except Exception as e:  # noqa: BLE001 — 1 行の失敗で batch 全体を止めない
+                code, error = 1, f"ERROR: {type(e).__name__}: {e}"
+            error = "\n".join(x for x in (captured_err.getvalue().strip(), error) if x)
+            failed = failed or code != 0
+            result = {
+                "id": req_id,
+                "ok": code == 0,
+                "exit": code,
+                "output": _batch_output(captured_out.getvalue(), getattr(args, "get", None)),
+                "error": error,
+            }
+            stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+            stdout.flush()
+    finally:
+        _POOL.close()
+        _POOL = None
+    return 1 if failed else 0
+
+
 def main():
     args = build_parser().parse_args()
     label = getattr(args, "label", "default") or "default"
+    if args.command == "batch":
+        sys.exit(run_batch(sys.stdin, sys.stdout, label))
     if args.command == "configure":
         cmd_configure(args, None, None, None)
         return
@@ -0,0 +1,266 @@
+"""gl.py batch の契約テストとベンチ。
+
+ローカルのスタブ GitLab（/api/v4 の一部だけを返す HTTP/1.1 サーバ）を相手に、
+batch が (1) プロジェクトとトークンを 1 回だけ解決し、(2) 接続を使い回し、(3) 1 行の失敗で
+止まらず、(4) リクエストごとに gitguard を通すことを確かめる。最後の 1 本は N 回の単発起動と
+1 回の batch の所要時間を出力するベンチ（合否は結果の一致だけを見る）。
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from test_gl import MODULE_PATH, load_gl_module
+
+ISSUES = {i: {"iid": i, "title": f"issue {i}", "labels": ["status:open"]} for i in range(1, 8)}
+
+
+class StubGitLab:
+    """接続数とリクエストを数えるスタブ。keep-alive のため HTTP/1.1 で応答する。"""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests: list[tuple[str, str]] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                stub.connections += 1      # ハンドラは 1 接続に 1 つ
+                super().setup()
+
+            def _reply(self, status, obj, headers=None):
+                raw = json.dumps(obj).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def _route(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else None
+                path, _, query = self.path.partition("?")
+                stub.requests.append((method, self.path))
+                if self.headers.get("PRIVATE-TOKEN") != "stub-token":
+                    return self._reply(401, {"message": "401 Unauthorized"})
+                if path == "/api/v4/user":
+                    return self._reply(200, {"username": "bot"})
+                prefix = "/api/v4/projects/group%2Fproject/issues"
+                if path == prefix:
+                    if method == "POST":
+                        return self._reply(201, {"iid": 99, "title": body["title"]})
+                    page = 2 if "page=2" in query else 1
+                    items = [ISSUES[i] for i in ((1, 2, 3) if page == 1 else (4, 5))]
+                    return self._reply(200, items, {"X-Next-Page": "2" if page == 1 else ""})
+                if path.startswith(prefix + "/"):
+                    iid = int(path[len(prefix) + 1:])
+                    if iid in ISSUES:
+                        return self._reply(200, ISSUES[iid])
+                    return self._reply(404, {"message": "404 Not found"})
+                if path == "/api/v4/projects/flaky":
+                    return self._reply(503, {"message": "unavailable"})
+                return self._reply(404, {"message": "no route"})
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.api_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/api/v4"
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    server = StubGitLab()
+    monkeypatch.setenv("GL_API_URL", server.api_url)
+    monkeypatch.setenv("GL_PROJECT_URL", "https://gitlab.example.com/group/project")
+    monkeypatch.setenv("GITLAB_TOKEN", "stub-token")
+    monkeypatch.setenv("GITGUARD_DIR", str(tmp_path / "gitguard"))
+    yield server
+    server.stop()
+
+
+def _batch(gl, lines, label="default"):
+    stdin = io.StringIO("".join(json.dumps(x) + "\n" for x in lines))
+    stdout = io.StringIO()
+    code = gl.run_batch(stdin, stdout, label)
+    return code, [json.loads(x) for x in stdout.getvalue().splitlines()]
+
+
+def test_batch_resolves_once_and_reuses_one_connection(stub, monkeypatch):
+    gl = load_gl_module()
+    resolved = []
+    real = gl.get_project_info
+    monkeypatch.setattr(gl, "get_project_info", lambda label: resolved.append(label) or real(label))
+
+    code, results = _batch(gl, [
+        {"id": "me", "argv": ["current-user"]},
+        {"id": "one", "argv": ["get-issue", "3"]},
+        {"id": "iid", "argv": ["--get", "title", "get-issue", "5"]},
+        {"id": "all", "argv": ["list-issues"]},
+        {"id": "new", "argv": ["create-issue", "--title", "t", "--body", "b"]},
+    ])
+
+    assert code == 0
+    assert [r["id"] for r in results] == ["me", "one", "iid", "all", "new"]
+    assert all(r["ok"] for r in results), results
+    assert results[0]["output"] == {"username": "bot"}
+    assert results[1]["output"]["iid"] == 3
+    assert results[2]["output"] == "issue 5", "--get の値は文字列のまま"
+    assert [i["iid"] for i in results[3]["output"]] == [1, 2, 3, 4, 5], "ページ送りも同じ接続で"
+    assert results[4]["output"]["iid"] == 99
+    assert resolved == ["default"], "プロジェクトは最初の 1 回だけ解決する"
+    assert len(stub.requests) == 6
+    assert stub.connections == 1, "6 リクエストを 1 本の keep-alive 接続で送る"
+
+
+def test_failing_line_does_not_stop_the_batch(stub):
+    gl = load_gl_module()
+    code, results = _batch(gl, [
+        {"id": 1, "argv": ["get-issue", "404"]},
+        {"id": 2, "argv": ["get-issue", "not-a-number"]},
+        {"id": 3, "argv": ["batch"]},
+        {"id": 4, "argv": ["normalize-packet-id", "pkt-01ab"]},
+        {"id": 5, "argv": ["get-issue", "1"]},
+    ])
+    stdin_garbage = io.StringIO("not json\n")
+    out = io.StringIO()
+    assert gl.run_batch(stdin_garbage, out) == 1
+    garbage = json.loads(out.getvalue())
+
+    assert code == 1
+    assert [r["ok"] for r in results] == [False, False, False, True, True]
+    assert "HTTP 404" in results[0]["error"]
+    assert results[1]["exit"] == 2 and "invalid int value" in results[1]["error"]
+    assert "batch の中では実行できません" in results[2]["error"]
+    assert results[4]["output"]["iid"] == 1
+    assert garbage["id"] == 1 and not garbage["ok"]
+
+
+def test_body_from_stdin_is_refused_and_later_lines_still_run(stub):
+    gl = load_gl_module()
+    code, results = _batch(gl, [
+        {"id": "body", "argv": ["create-issue", "--title", "t", "--body-file", "-"]},
+        {"id": "desc", "argv": ["create-mr", "--source-branch", "f", "--title", "t",
+                                "--description-file", "-"]},
+        {"id": "next", "argv": ["get-issue", "2"]},
+    ])
+
+    assert code == 1
+    assert [r["id"] for r in results] == ["body", "desc", "next"]
+    assert [r["ok"] for r in results] == [False, False, True]
+    assert "--body-file -" in results[0]["error"]
+    assert "--description-file -" in results[1]["error"]
+    assert results[2]["output"]["iid"] == 2, "stdin の残りを本文として食べない"
+    assert not any(method == "POST" for method, _ in stub.requests)
+
+
+def test_every_request_still_goes_through_the_guard(stub, monkeypatch):
+    gl = load_gl_module()
+    ops = []
+    real = gl._guard
+
+    @contextlib.contextmanager
+    def recording_guard(host, op):
+        ops.append((host, op))
+        with real(host, op) as g:
+            yield g
+
+    monkeypatch.setattr(gl, "_guard", recording_guard)
+    _, results = _batch(gl, [
+        {"argv": ["get-issue", "1"]},
+        {"argv": ["list-issues"]},
+    ])
+
+    assert all(r["ok"] for r in results)
+    assert [op for _, op in ops] == [
+        "GET /projects/group%2Fproject/issues/1",
+        "GET /projects/group%2Fproject/issues p1",
+        "GET /projects/group%2Fproject/issues p2",
+    ]
+    assert {host for host, _ in ops} == {"gitlab.example.com"}
+
+
+def test_server_side_failure_is_reported_to_the_breaker(stub, monkeypatch):
+    gl = load_gl_module()
+    if gl._GG is None:
+        pytest.skip("gitguard が見つからない")
+    statuses = []
+    monkeypatch.setattr(gl._GG._Recorder, "http_status",
+                        lambda self, code, error="": statuses.append(code))
+    monkeypatch.setitem(gl.COMMANDS, "current-user",
+                        lambda args, host, project, token: gl.out(
+                            gl.api(host, token, "GET", "/projects/flaky"), args.get))
+
+    _, results = _batch(gl, [{"argv": ["current-user"]}, {"argv": ["get-issue", "2"]}])
+
+    assert [r["ok"] for r in results] == [False, True]
+    assert statuses == [503, 200]
+
+
+def test_dropped_keepalive_is_reopened_for_idempotent_requests(stub):
+    gl = load_gl_module()
+    pool = gl._ConnectionPool()
+    url = f"{stub.api_url}/projects/group%2Fproject/issues/1"
+    headers = gl._make_headers("stub-token")
+    try:
+        assert pool.request("GET", url, headers)[0] == 200
+        # サーバ側で切れた接続を、こちらがまだ持っている状態を作る
+        next(iter(pool._conns.values()))[0].sock.shutdown(2)
+        assert pool.request("GET", url, headers)[0] == 200
+    finally:
+        pool.close()
+    assert pool.opened == 2
+
+
+def test_bench_single_invocations_vs_one_batch(stub, capsys):
+    n = 20
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    argvs = [["get-issue", str(1 + i % 7)] for i in range(n)]
+
+    started = time.perf_counter()
+    singles = []
+    for argv in argvs:
+        proc = subprocess.run([sys.executable, str(MODULE_PATH), *argv],
+                              capture_output=True, text=True, env=env, check=True)
+        singles.append(json.loads(proc.stdout))
+    single_sec = time.perf_counter() - started
+    single_connections = stub.connections
+
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, str(MODULE_PATH), "batch"],
+                          input="".join(json.dumps({"id": i, "argv": a}) + "\n"
+                                        for i, a in enumerate(argvs)),
+                          capture_output=True, text=True, env=env, check=True)
+    batch_sec = time.perf_counter() - started
+    batched = [json.loads(line)["output"] for line in proc.stdout.splitlines()]
+
+    assert batched == singles
+    assert single_connections == n
+    assert stub.connections - single_connections == 1
+    with capsys.disabled():
+        print(f"\n  [batch] {n} commands  single {single_sec:.2f}s  batch {batch_sec:.2f}s")
@@ -67,6 +67,8 @@ class WorkflowDefinition:
     initial_context: dict[str, Any] = field(default_factory=dict)
     config: MachineConfig = field(default_factory=MachineConfig)
     description: str = ""
+    # load_workflow が作るコンパイル済みの計画。手で組んだ定義では None（run が作る）。
+    plan: "CompiledPlan | None" = field(default=None, repr=False, compare=False)
 
 
 # ─────────────────────────────────────────────
@@ -307,7 +309,7 @@ def load_workflow(path: str | Path) -> WorkflowDefinition:
         verbose=cfg_raw.get("verbose", False),
     )
 
-    return WorkflowDefinition(
+    workflow = WorkflowDefinition(
         name=data.get("name", "Unnamed Workflow"),
         description=data.get("description", ""),
         initial_state=data["initial_state"],
@@ -316,6 +318,8 @@ def load_workflow(path: str | Path) -> WorkflowDefinition:
         initial_context=data.get("context", {}),
         config=config,
     )
+    workflow.plan = compile_workflow(workflow)
+    return workflow
 
 
 def validate_workflow(wf: WorkflowDefinition) -> list[str]:
@@ -371,22 +375,27 @@ def validate_workflow(wf: WorkflowDefinition) -> list[str]:
 #  テンプレートレンダラー
 # ─────────────────────────────────────────────
 
+_PLACEHOLDER = re.compile(r"\{\{([^}]+)\}\}")
+
+
+def _lookup_placeholder(context: dict[str, Any], path: "tuple[str, ...]", original: str) -> str:
+    # Support dot notation: history.state_id, context.key
+    val: Any = context
+    for part in path:
+        if isinstance(val, dict):
+            val = val.get(part, original)  # 未定義の場合は元の文字列を保持
+        else:
+            val = original
+            break
+    return str(val)
+
+
 def render_template(template: str, context: dict[str, Any]) -> str:
     """コンテキストを使って {{variable}} プレースホルダーを置換する。"""
     def replacer(m: re.Match) -> str:
-        key = m.group(1).strip()
-        # Support dot notation: history.state_id, context.key
-        parts = key.split(".")
-        val: Any = context
-        for part in parts:
-            if isinstance(val, dict):
-                val = val.get(part, m.group(0))  # 未定義の場合は元の文字列を保持
-            else:
-                val = m.group(0)
-                break
-        return str(val)
+        return _lookup_placeholder(context, tuple(m.group(1).strip().split(".")), m.group(0))
 
-    return re.sub(r"\{\{([^}]+)\}\}", replacer, template)
+    return _PLACEHOLDER.sub(replacer, template)
 
 
 # ─────────────────────────────────────────────
@@ -450,6 +459,169 @@ def evaluate_condition_rule(rule: str, ctx: dict[str, Any]) -> bool | None:
         return None
 
 
+# ─────────────────────────────────────────────
+#  コンパイル済みの計画
+# ─────────────────────────────────────────────
+#
+#  run はステップのたびに遷移表を from_state で絞り、テンプレートを正規表現で置換し、
+#  condition_rule の文字列を割り直していた。速いローカルモデルで max_steps の大きい
+#  マシンを回すと、この解釈の手間が LLM 呼び出しと並ぶ。load_workflow の時点で
+#  ステートごとの遷移表・解析済みのルール（正規表現はコンパイル済み）・字句に割った
+#  テンプレートを作っておき、run はそれを引くだけにする。結果は render_template /
+#  evaluate_condition_rule（解釈系として残す）と同じでなければならない。
+
+class CompiledTemplate:
+    """{{variable}} を字句に割ったテンプレート。render は render_template と同じ結果を返す。"""
+
+    __slots__ = ("source", "parts", "static")
+
+    def __init__(self, template: str):
+        self.source = template
+        pieces = _PLACEHOLDER.split(template)
+        # 偶数番目は地の文、奇数番目はプレースホルダーの中身（(元の文字列, 参照パス)）
+        self.parts: "list[str | tuple[str, tuple[str, ...]]]" = [
+            piece if i % 2 == 0 else ("{{" + piece + "}}", tuple(piece.strip().split(".")))
+            for i, piece in enumerate(pieces)
+            if i % 2 == 1 or piece
+        ]
+        self.static = len(pieces) == 1
+
+    def render(self, context: dict[str, Any]) -> str:
+        if self.static:
+            return self.source
+        return "".join([
+            part if isinstance(part, str) else _lookup_placeholder(context, part[1], part[0])
+            for part in self.parts
+        ])
+
+
+def _compile_clause(rule: str) -> "tuple[str, str, Any] | None":
+    """1 節を (演算子, キー, 比較値) に割る。常に None を返す節（解析不能・未知の演算子・
+    壊れた正規表現・数値でない閾値）は None。"""
+    parts = rule.split(":", 2)
+    if len(parts) < 3:
+        return None
+    op, key, value = parts[0].strip(), parts[1].strip(), parts[2].strip()
+    try:
+        match op:
+            case "regex":
+                return op, key, re.compile(value)
+            case "lt" | "gte":
+                return op, key, float(value)
+            case ("startswith" | "contains" | "equals" | "not-startswith"
+                  | "not-contains" | "not-equals"):
+                return op, key, value
+            case _:
+                return None
+    except (ValueError, re.error):
+        return None
+
+
+def _eval_clause(clause: "tuple[str, str, Any] | None", ctx: dict[str, Any]) -> bool | None:
+    if clause is None:
+        return None
+    op, key, value = clause
+    if key not in ctx:
+        return None
+    ctx_value = str(ctx[key])
+    match op:
+        case "startswith":      return ctx_value.startswith(value)
+        case "contains":        return value in ctx_value
+        case "equals":          return ctx_value == value
+        case "regex":           return bool(value.search(ctx_value))
+        case "not-startswith":  return not ctx_value.startswith(value)
+        case "not-contains":    return value not in ctx_value
+        case "not-equals":      return ctx_value != value
+    try:
+        number = float(ctx_value)
+    except ValueError:
+        return None
+    return number < value if op == "lt" else number >= value
+
+
+class CompiledRule:
+    """解析済みの condition_rule。evaluate は evaluate_condition_rule と同じ結果を返す。"""
+
+    __slots__ = ("source", "clauses", "compound")
+
+    def __init__(self, rule: str):
+        self.source = rule
+        parts_list = [r.strip() for r in rule.split(";") if r.strip()]
+        self.compound = len(parts_list) > 1
+        # 複合でなければ、解釈系と同じく元の文字列全体を 1 節として割る
+        self.clauses = [_compile_clause(r) for r in (parts_list if self.compound else [rule])]
+
+    def evaluate(self, ctx: dict[str, Any]) -> bool | None:
+        if not self.source:
+            return None
+        if not self.compound:
+            return _eval_clause(self.clauses[0], ctx)
+        result = True
+        for clause in self.clauses:
+            verdict = _eval_clause(clause, ctx)
+            if verdict is None:
+                return None  # 解析不能なルールが含まれる場合はフォールバック
+            result = result and verdict
+        return result
+
+
+@dataclass
+class CompiledTransition:
+    config: TransitionConfig
+    rule: CompiledRule
+    condition: CompiledTemplate
+    unconditional: bool   # 条件文もルールも無い
+
+
+@dataclass
+class CompiledState:
+    on_enter: CompiledTemplate
+    action: CompiledTemplate
+    on_exit: CompiledTemplate
+
+
+@dataclass
+class CompiledPlan:
+    """ステートごとの遷移表（priority 順・ワイルドカード込み）と、解析済みのテンプレート。"""
+    transitions: dict[str, list[CompiledTransition]]
+    wildcard: list[CompiledTransition]
+    states: dict[str, CompiledState]
+
+    def transitions_from(self, state_id: str) -> list[CompiledTransition]:
+        return self.transitions.get(state_id, self.wildcard)
+
+
+def compile_transition(t: TransitionConfig) -> CompiledTransition:
+    return CompiledTransition(
+        config=t,
+        rule=CompiledRule(t.condition_rule),
+        condition=CompiledTemplate(t.condition),
+        unconditional=not t.condition.strip() and not t.condition_rule.strip(),
+    )
+
+
+def compile_workflow(wf: WorkflowDefinition) -> CompiledPlan:
+    """定義から実行計画を作る。定義を書き換えたら作り直すこと（run は wf.plan を信じる）。"""
+    compiled = [compile_transition(t) for t in wf.transitions]
+    table = {
+        state_id: [c for c in compiled if c.config.from_state in (state_id, "*")]
+        for state_id in wf.states
+    }
+    states = {
+        state_id: CompiledState(
+            on_enter=CompiledTemplate(state.on_enter),
+            action=CompiledTemplate(state.action),
+            on_exit=CompiledTemplate(state.on_exit),
+        )
+        for state_id, state in wf.states.items()
+    }
+    return CompiledPlan(
+        transitions=table,
+        wildcard=[c for c in compiled if c.config.from_state == "*"],
+        states=states,
+    )
+
+
 # ─────────────────────────────────────────────
 #  実行結果
 # ─────────────────────────────────────────────
@@ -491,11 +663,14 @@ class StateMachineEngine:
 
     llm_fn: async function (prompt: str) -> str
             ステートアクションとトランジション条件の評価の両方で呼び出される。
+    plan:   False なら実行計画を使わず、ステップごとに定義を解釈する（計画導入前の経路。
+            結果は同じで、速さの比較と切り分けに使う）。
     """
 
-    def __init__(self, llm_fn: LLMFn, verbose: bool = False):
+    def __init__(self, llm_fn: LLMFn, verbose: bool = False, plan: bool = True):
         self.llm_fn = llm_fn
         self.verbose = verbose
+        self.use_plan = plan
 
     # ── 公開エントリーポイント ──────────────────────────────────────────
 
@@ -531,18 +706,22 @@ class StateMachineEngine:
         ctx["step_count"] = 0
         ctx["last_output"] = ""
 
+        plan = (workflow.plan or compile_workflow(workflow)) if self.use_plan else None
         verbose = self.verbose or workflow.config.verbose
         steps: list[dict] = []
+        verdicts: dict[tuple[str, str], bool] = {}   # 遷移条件の判定（この run の中だけ）
         current_state_id = workflow.initial_state
 
         for step_idx in range(workflow.config.max_steps):
             state = workflow.states[current_state_id]
-            self._log(verbose, f"\n{'─'*50}")
-            self._log(verbose, f"[ステップ {step_idx+1}] ステートに入りました: {current_state_id} ({state.description})")
+            if verbose:   # 書式化もステップごとの手間になるので、出さないときは組まない
+                self._log(verbose, f"\n{'─'*50}")
+                self._log(verbose, f"[ステップ {step_idx+1}] ステートに入りました: {current_state_id} ({state.description})")
 
             # ステートアクションを実行し、宣言があれば決定的検査を通す。
             # 検査が落ちたら同じステートをやり直す（自己申告ではなく測った事実で決める）。
-            output, gate = await self._execute_gated(state, ctx, verbose)
+            output, gate = await self._execute_gated(
+                state, ctx, verbose, plan.states.get(current_state_id) if plan else None)
             ctx["last_output"] = output
             ctx["history"][current_state_id] = output
             ctx["step_count"] = step_idx + 1
@@ -589,7 +768,10 @@ class StateMachineEngine:
 
             # トランジションを評価
             next_state_id = await self._evaluate_transitions(
-                current_state_id, workflow.transitions, ctx, verbose
+                current_state_id,
+                plan.transitions_from(current_state_id) if plan else workflow.transitions,
+                ctx, verbose,
+                verdicts,
             )
 
             if next_state_id is None:
@@ -614,7 +796,8 @@ class StateMachineEngine:
                         error=f"ステート '{current_state_id}' からの一致するトランジションがなく、on_no_transition='error' です",
                     )
 
-            self._log(verbose, f"→ 遷移先: {next_state_id}")
+            if verbose:
+                self._log(verbose, f"→ 遷移先: {next_state_id}")
             current_state_id = next_state_id
 
         # 最大ステップ数に到達
@@ -630,7 +813,8 @@ class StateMachineEngine:
         elif action in workflow.states:
             # 設定されたステートへジャンプ
             state = workflow.states[action]
-            output = await self._execute_state(state, ctx, verbose)
+            output = await self._execute_state(state, ctx, verbose,
+                                               compiled=plan.states.get(action) if plan else None)
             return ExecutionResult(
                 success=True,
                 final_state=action,
@@ -651,19 +835,21 @@ class StateMachineEngine:
     # ── 内部: ステート実行 ───────────────────────────────────
 
     async def _execute_gated(
-        self, state: StateConfig, ctx: dict, verbose: bool
+        self, state: StateConfig, ctx: dict, verbose: bool,
+        compiled: "CompiledState | None" = None,
     ) -> "tuple[str, dict | None]":
         """アクションを実行し、宣言された検査を通す。落ちたら同じステートをやり直す。
 
         戻り値: (最終出力, 検査結果 | None)。検査の宣言が無ければ従来どおり 1 回だけ実行する。
         """
         if not state.check:
-            return await self._execute_state(state, ctx, verbose), None
+            return await self._execute_state(state, ctx, verbose, compiled=compiled), None
 
         attempts = max(1, state.check_retries + 1)
         note = ""
         for attempt in range(attempts):
-            output = await self._execute_state(state, ctx, verbose, check_note=note)
+            output = await self._execute_state(state, ctx, verbose, check_note=note,
+                                               compiled=compiled)
             result = run_check(state.check)
             self._log(verbose, f"  検査 [{' '.join(result['argv'])}]: "
                                f"{'✓ 通過' if result['ok'] else '✗ 失敗'} "
@@ -677,13 +863,17 @@ class StateMachineEngine:
         return "", None   # 到達しない（ループ内で必ず返る）
 
     async def _execute_state(
-        self, state: StateConfig, ctx: dict, verbose: bool, check_note: str = ""
+        self, state: StateConfig, ctx: dict, verbose: bool, check_note: str = "",
+        compiled: "CompiledState | None" = None,
     ) -> str:
+        # compiled が無ければ（plan=False）定義の文字列をその場で解釈する
         parts = []
         if state.on_enter:
-            parts.append(render_template(state.on_enter, ctx))
+            parts.append(compiled.on_enter.render(ctx) if compiled
+                         else render_template(state.on_enter, ctx))
         if state.action:
-            parts.append(render_template(state.action, ctx))
+            parts.append(compiled.action.render(ctx) if compiled
+                         else render_template(state.action, ctx))
 
         if not parts:
             return ""
@@ -702,10 +892,12 @@ class StateMachineEngine:
                     "前回の出力が Output Contract に違反しました。"
                     "指定された形式を必ず守って再実行してください。"
                 )
-            self._log(verbose, f"  アクションプロンプト (attempt {attempt+1}):\n{self._indent(prompt)}")
+            if verbose:
+                self._log(verbose, f"  アクションプロンプト (attempt {attempt+1}):\n{self._indent(prompt)}")
 
             output = (await self.llm_fn(prompt)).strip()
-            self._log(verbose, f"  アクション出力: {output[:200]}{'...' if len(output) > 200 else ''}")
+            if verbose:
+                self._log(verbose, f"  アクション出力: {output[:200]}{'...' if len(output) > 200 else ''}")
 
             if state.output_validator:
                 if self._validate_output(output, state.output_validator):
@@ -718,7 +910,9 @@ class StateMachineEngine:
                 break  # validator なしは常に成功
 
         if state.on_exit:
-            exit_prompt = render_template(state.on_exit, {**ctx, "last_output": output})
+            exit_ctx = {**ctx, "last_output": output}
+            exit_prompt = (compiled.on_exit.render(exit_ctx) if compiled
+                           else render_template(state.on_exit, exit_ctx))
             self._log(verbose, f"  on_exit プロンプト:\n{self._indent(exit_prompt)}")
             exit_output = await self.llm_fn(exit_prompt)
             self._log(verbose, f"  on_exit 出力: {exit_output.strip()[:100]}")
@@ -730,42 +924,143 @@ class StateMachineEngine:
     async def _evaluate_transitions(
         self,
         current_state_id: str,
-        transitions: list[TransitionConfig],
+        transitions: "list[TransitionConfig] | list[CompiledTransition]",
         ctx: dict,
         verbose: bool,
+        verdicts: "dict[tuple[str, str], bool] | None" = None,
     ) -> str | None:
-        """最初に一致したトランジションの遷移先ステートIDを返す。一致なしは None。"""
-        candidates = [
-            t for t in transitions
-            if t.from_state == current_state_id or t.from_state == "*"
-        ]
+        """最初に一致したトランジションの遷移先ステートIDを返す。一致なしは None。
+
+        `transitions` はコンパイル済みの遷移表（このステートの分だけ）か、生の遷移の並び
+        （from_state で絞り、ルールと条件文はその場で解釈する）。
 
-        for transition in candidates:
-            label = transition.description or f"{transition.from_state} → {transition.to_state}"
+        決定的に決まる候補（無条件・condition_rule）を先に片付け、最初に真になった
+        決定的候補より**前にある** LLM 判定の条件だけを 1 回の問い合わせにまとめる。
+        優先順（上から最初に真になったもの）は従来と同じ。`verdicts` は 1 run の中で
+        (条件文, 直前の出力) → 判定を覚えておく表で、同じ組は問い直さない。
+        """
+        if transitions and isinstance(transitions[0], CompiledTransition):
+            candidates = transitions
+        else:
+            candidates = [t for t in transitions
+                          if t.from_state == current_state_id or t.from_state == "*"]
+        if verdicts is None:
+            verdicts = {}
+
+        # (遷移, 判定 | None, 描画済みの条件文)。判定 None は LLM に聞く候補。
+        decided: list[tuple[TransitionConfig, bool | None, str]] = []
+        for candidate in candidates:
+            compiled = candidate if isinstance(candidate, CompiledTransition) else None
+            transition = compiled.config if compiled else candidate
+            label = (transition.description or f"{transition.from_state} → {transition.to_state}"
+                     if verbose else "")
 
             # 0. 無条件トランジション（条件文もルールも無い）は評価せず成立させる。
             #    空の条件文を LLM に渡すと答えが安定しない。
-            if not transition.condition.strip() and not transition.condition_rule.strip():
+            if (compiled.unconditional if compiled else
+                    not transition.condition.strip() and not transition.condition_rule.strip()):
                 self._log(verbose, f"  条件 [{label}] (無条件): ✓ 真")
-                return transition.to_state
+                decided.append((transition, True, ""))
+                break
 
             # 1. condition_rule で決定論的評価を試みる
-            rule_result = evaluate_condition_rule(transition.condition_rule, ctx)
+            rule_result = (compiled.rule.evaluate(ctx) if compiled
+                           else evaluate_condition_rule(transition.condition_rule, ctx))
             if rule_result is not None:
                 self._log(verbose, f"  条件 [{label}] (rule): {'✓ 真' if rule_result else '✗ 偽'}")
+                decided.append((transition, rule_result, ""))
                 if rule_result:
-                    return transition.to_state
+                    break   # これより後ろの候補は選ばれないので聞かない
                 continue
 
-            # 2. LLM フォールバック
-            condition = render_template(transition.condition, ctx)
-            matches = await self._evaluate_condition(condition, ctx, verbose)
-            self._log(verbose, f"  条件 [{label}] (llm): {'✓ 真' if matches else '✗ 偽'}")
-            if matches:
+            # 2. LLM フォールバック（あとでまとめて聞く）
+            decided.append((transition, None, compiled.condition.render(ctx) if compiled
+                            else render_template(transition.condition, ctx)))
+
+        last_output = str(ctx.get("last_output", ""))
+        pending = list(dict.fromkeys(
+            cond for _, verdict, cond in decided
+            if verdict is None and (cond, last_output) not in verdicts))
+        if pending:
+            answers = await self._evaluate_conditions(pending, ctx, verbose)
+            for cond, answer in zip(pending, answers):
+                verdicts[(cond, last_output)] = answer
+
+        for transition, verdict, cond in decided:
+            if verdict is None:
+                verdict = verdicts[(cond, last_output)]
+                if verbose:
+                    label = transition.description or f"{transition.from_state} → {transition.to_state}"
+                    self._log(verbose, f"  条件 [{label}] (llm): {'✓ 真' if verdict else '✗ 偽'}")
+            if verdict:
                 return transition.to_state
 
         return None
 
+    @staticmethod
+    def _condition_context(ctx: dict) -> str:
+        return json.dumps({k: v for k, v in ctx.items() if k not in ('history',)},
+                          indent=2, default=str)
+
+    async def _evaluate_conditions(
+        self, conditions: list[str], ctx: dict, verbose: bool
+    ) -> list[bool]:
+        """複数の条件を 1 回の問い合わせで評価する。条件ごとの True/False を同じ順で返す。
+
+        1 件なら従来の単独プロンプトを使う。まとめた回答が読めない（件数違い・JSON でない）
+        ときは、読めなかった条件だけを 1 件ずつ聞き直す。
+        """
+        if len(conditions) == 1:
+            return [await self._evaluate_condition(conditions[0], ctx, verbose)]
+
+        numbered = "\n".join(f"{i}. {c}" for i, c in enumerate(conditions, 1))
+        prompt = f"""あなたはステートマシンのトランジション条件を評価しています。
+
+最後のステートの出力:
+\"\"\"
+{ctx.get("last_output", "")}
+\"\"\"
+
+コンテキスト変数:
+{self._condition_context(ctx)}
+
+評価する条件（{len(conditions)} 件）:
+{numbered}
+
+各条件について、真なら "YES"、偽なら "NO" を番号順に並べた JSON 配列だけを回答してください。
+例: ["YES", "NO"]
+説明は不要です。"""
+
+        response = await self.llm_fn(prompt)
+        parsed = self._parse_verdicts(response, len(conditions))
+        self._log(verbose, f"  条件 {len(conditions)} 件をまとめて評価: {response.strip()[:100]}")
+        results: list[bool] = []
+        for cond, verdict in zip(conditions, parsed):
+            if verdict is None:
+                verdict = await self._evaluate_condition(cond, ctx, verbose)
+            results.append(verdict)
+        return results
+
+    @staticmethod
+    def _parse_verdicts(response: str, count: int) -> "list[bool | None]":
+        """まとめた回答から判定の並びを取り出す。読めない位置は None。"""
+        match = re.search(r"\[.*\]", response, re.DOTALL)
+        try:
+            items = json.loads(match.group(0)) if match else None
+        except ValueError:
+            items = None
+        if not isinstance(items, list) or len(items) != count:
+            return [None] * count
+        verdicts: list[bool | None] = []
+        for item in items:
+            if isinstance(item, bool):
+                verdicts.append(item)
+            elif isinstance(item, str) and item.strip().upper().startswith(("YES", "NO")):
+                verdicts.append(item.strip().upper().startswith("YES"))
+            else:
+                verdicts.append(None)
+        return verdicts
+
     async def _evaluate_condition(
         self, condition: str, ctx: dict, verbose: bool
     ) -> bool:
@@ -779,7 +1074,7 @@ class StateMachineEngine:
 \"\"\"
 
 コンテキスト変数:
-{json.dumps({k: v for k, v in ctx.items() if k not in ('history',)}, indent=2, default=str)}
+{self._condition_context(ctx)}
 
 評価する条件:
 {condition}
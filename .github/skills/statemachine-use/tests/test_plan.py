@@ -0,0 +1,144 @@
+"""コンパイル済みの計画の契約テスト。
+
+遷移表・解析済みのルール・字句に割ったテンプレートが、解釈系（render_template /
+evaluate_condition_rule / from_state での絞り込み）と同じ結果を返すこと。最後の 1 本は
+スタブの LLM で 10k ステップ回すマイクロベンチで、同じエンジンを計画あり（既定）と
+計画なし（plan=False、計画導入前の解釈の経路）で回し、結果が一致して計画ありが遅くないことを見る。
+"""
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.engine import (  # noqa: E402
+    CompiledRule, CompiledTemplate, StateMachineEngine, compile_workflow,
+    evaluate_condition_rule, load_workflow, render_template,
+)
+
+CTX = {"status": "PASS: ok", "score": "0.75", "bad": "n/a", "empty": "",
+       "history": {"review": "LGTM", "nested": {"x": 1}}, "count": 3}
+
+RULES = [
+    "", " ", "startswith:status:PASS", "startswith:status:FAIL", "contains:status:ok",
+    "equals:count:3", "regex:status:^PA.S", "regex:status:[", "lt:score:1",
+    "gte:score:0.8", "lt:bad:1", "lt:score:x", "not-startswith:status:P",
+    "not-contains:status:ng", "not-equals:count:4", "unknown:status:x", "startswith:missing:x",
+    "startswith:status", "startswith:status:PASS;gte:score:0.5",
+    "startswith:status:PASS;gte:score:0.9", "startswith:status:PASS;missing:k:v",
+    "startswith:status:PASS; ;", " equals : count : 3 ", "startswith:status:PASS;",
+    "regex:status:a;b", "equals:empty:", "contains:status:",
+]
+
+TEMPLATES = [
+    "", "plain text", "{{status}}", "a {{ status }} b {{count}}", "{{history.review}}",
+    "{{history.nested.x}}", "{{history.missing}}", "{{history.review.deeper}}",
+    "{{missing}} and {{status}}", "{{status}}{{status}}", "{{ }}", "{{a}", "{{}}",
+    "{{count.x}}", "multi\nline {{score}}\n",
+]
+
+
+@pytest.mark.parametrize("rule", RULES)
+def test_compiled_rule_matches_interpreter(rule):
+    assert CompiledRule(rule).evaluate(CTX) == evaluate_condition_rule(rule, CTX)
+
+
+@pytest.mark.parametrize("template", TEMPLATES)
+def test_compiled_template_matches_interpreter(template):
+    assert CompiledTemplate(template).render(CTX) == render_template(template, CTX)
+
+
+def test_random_rules_match_interpreter():
+    rng = random.Random(34)
+    ops = ["startswith", "contains", "equals", "regex", "lt", "gte", "not-startswith",
+           "not-contains", "not-equals", "bogus"]
+    values = ["PASS", "0.5", "3", "ok", "(", "^P", "", "x:y"]
+    keys = ["status", "score", "count", "bad", "missing"]
+    for _ in range(2000):
+        clauses = [f"{rng.choice(ops)}:{rng.choice(keys)}:{rng.choice(values)}"
+                   for _ in range(rng.randint(1, 3))]
+        rule = rng.choice([";", "; ", ";;"]).join(clauses)
+        assert CompiledRule(rule).evaluate(CTX) == evaluate_condition_rule(rule, CTX), rule
+
+
+WORKFLOW = """
+name: bench
+initial_state: work
+config:
+  max_steps: {steps}
+  on_max_steps: stop
+states:
+  work:
+    action: "step {{{{step_count}}}} after {{{{last_output}}}} in {{{{history.review}}}}"
+  review:
+    on_enter: "look at {{{{last_output}}}}"
+    action: "review {{{{step_count}}}}"
+  done:
+    terminal: true
+transitions:
+  - from: "*"
+    to: done
+    condition_rule: "equals:last_output:STOP;gte:step_count:0"
+  - from: work
+    to: review
+    condition_rule: "regex:last_output:^WORK \\\\d+[02468]$"
+  - from: work
+    to: work
+    condition_rule: "startswith:last_output:WORK"
+  - from: review
+    to: work
+    condition_rule: "contains:last_output:REVIEW;not-equals:last_output:STOP"
+"""
+
+
+def _stub_llm():
+    count = 0
+
+    async def llm(prompt: str) -> str:
+        nonlocal count
+        count += 1
+        return f"REVIEW {count}" if prompt.startswith("look at") else f"WORK {count}"
+
+    return llm
+
+
+def _best_of(runs: int, workflow, **engine_kw):
+    """runs 回回して最短の時間と、最後の結果を返す（1 回ごとの揺れで比較を外さない）。"""
+    best, result = float("inf"), None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = asyncio.run(StateMachineEngine(llm_fn=_stub_llm(), **engine_kw).run(workflow))
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def test_ten_thousand_steps_match_interpreter(tmp_path, capsys):
+    steps = 10_000
+    path = tmp_path / "workflow.yaml"
+    path.write_text(WORKFLOW.format(steps=steps), encoding="utf-8")
+    workflow = load_workflow(path)
+    assert workflow.plan is not None
+
+    interpreted_sec, expected = _best_of(3, workflow, plan=False)
+    compiled_sec, result = _best_of(3, workflow)
+
+    assert result.success, result.error
+    assert result.steps == expected.steps
+    assert "review" in [s["state"] for s in result.steps]
+    with capsys.disabled():
+        print(f"\n  [plan] {steps} steps  compiled {compiled_sec:.3f}s  "
+              f"interpreter {interpreted_sec:.3f}s")
+    assert compiled_sec <= interpreted_sec, (compiled_sec, interpreted_sec)
+
+
+def test_plan_table_keeps_priority_and_wildcards(tmp_path):
+    path = tmp_path / "workflow.yaml"
+    path.write_text(WORKFLOW.format(steps=5), encoding="utf-8")
+    workflow = load_workflow(path)
+    plan = compile_workflow(workflow)
+    assert [c.config.to_state for c in plan.transitions_from("work")] == ["done", "review", "work"]
+    assert [c.config.to_state for c in plan.transitions_from("review")] == ["done", "work"]
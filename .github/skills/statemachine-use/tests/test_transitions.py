@@ -0,0 +1,129 @@
+"""遷移評価の契約テスト。
+
+LLM 判定の条件は 1 ステップにつき 1 回の問い合わせへまとめ、優先順（上から最初に
+真になった遷移）は変えない。同じ (条件文, 直前の出力) は 1 run の中で問い直さない。
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.engine import (  # noqa: E402
+    StateMachineEngine, TransitionConfig, load_workflow,
+)
+
+
+class FakeLLM:
+    """条件ごとの真偽を表で返す llm_fn。まとめた問い合わせにも単独の問い合わせにも答える。"""
+
+    def __init__(self, truth: dict[str, bool], *, batch_reply: "str | None" = None,
+                 action_reply: str = "done"):
+        self.truth = truth
+        self.batch_reply = batch_reply
+        self.action_reply = action_reply
+        self.calls: list[str] = []
+
+    def conditions_in(self, prompt: str) -> list[str]:
+        return [c for c in self.truth if c in prompt]
+
+    async def __call__(self, prompt: str) -> str:
+        self.calls.append(prompt)
+        if "トランジション条件" not in prompt:
+            return self.action_reply
+        asked = self.conditions_in(prompt)
+        if "JSON 配列" in prompt:
+            if self.batch_reply is not None:
+                return self.batch_reply
+            return json.dumps(["YES" if self.truth[c] else "NO" for c in asked])
+        return "YES" if self.truth[asked[0]] else "NO"
+
+    @property
+    def condition_calls(self) -> list[str]:
+        return [p for p in self.calls if "トランジション条件" in p]
+
+
+def _t(to: str, condition: str = "", rule: str = "") -> TransitionConfig:
+    return TransitionConfig(from_state="s", to_state=to, condition=condition,
+                            condition_rule=rule)
+
+
+def evaluate(llm: FakeLLM, transitions, ctx=None, verdicts=None):
+    engine = StateMachineEngine(llm_fn=llm)
+    ctx = {"last_output": "out", **(ctx or {})}
+    return asyncio.run(engine._evaluate_transitions("s", transitions, ctx, False, verdicts))
+
+
+def test_llm_conditions_are_asked_in_one_call():
+    llm = FakeLLM({"cond-a": False, "cond-b": False, "cond-c": True, "cond-d": True})
+    transitions = [_t("a", "cond-a"), _t("b", "cond-b"), _t("c", "cond-c"), _t("d", "cond-d")]
+
+    assert evaluate(llm, transitions) == "c", "上から最初に真になった遷移を選ぶ"
+    assert len(llm.condition_calls) == 1
+
+
+def test_deterministic_match_cuts_off_later_candidates():
+    llm = FakeLLM({"cond-a": False, "cond-c": True})
+    transitions = [_t("a", "cond-a"), _t("b", rule="equals:flag:on"), _t("c", "cond-c")]
+
+    assert evaluate(llm, transitions, {"flag": "on"}) == "b"
+    assert len(llm.condition_calls) == 1
+    assert "cond-c" not in llm.condition_calls[0], "選ばれえない条件は聞かない"
+    assert "JSON 配列" not in llm.condition_calls[0], "1 件だけなら従来の単独プロンプト"
+
+
+def test_rule_only_step_makes_no_llm_call():
+    llm = FakeLLM({})
+    transitions = [_t("a", rule="equals:flag:off"), _t("b", rule="equals:flag:on")]
+
+    assert evaluate(llm, transitions, {"flag": "on"}) == "b"
+    assert llm.calls == []
+
+
+def test_unreadable_batch_reply_falls_back_per_condition():
+    llm = FakeLLM({"cond-a": False, "cond-b": True}, batch_reply="たぶん 2 番")
+    transitions = [_t("a", "cond-a"), _t("b", "cond-b")]
+
+    assert evaluate(llm, transitions) == "b"
+    assert len(llm.condition_calls) == 3, "まとめて 1 回 + 読めなかった 2 件を 1 件ずつ"
+
+
+def test_identical_condition_and_output_are_memoized():
+    llm = FakeLLM({"cond-a": False, "cond-b": True})
+    transitions = [_t("a", "cond-a"), _t("b", "cond-b")]
+    verdicts: dict = {}
+
+    assert evaluate(llm, transitions, verdicts=verdicts) == "b"
+    assert evaluate(llm, transitions, verdicts=verdicts) == "b"
+    assert len(llm.condition_calls) == 1
+    evaluate(llm, transitions, {"last_output": "changed"}, verdicts=verdicts)
+    assert len(llm.condition_calls) == 2, "直前の出力が変われば聞き直す"
+
+
+def test_loop_reuses_verdicts_within_a_run(tmp_path):
+    path = tmp_path / "workflow.yaml"
+    path.write_text("""
+name: loop
+initial_state: work
+config:
+  max_steps: 4
+  on_max_steps: stop
+states:
+  work:
+    action: "do it"
+transitions:
+  - from: work
+    to: work
+    condition: "cond-again"
+  - from: work
+    to: work
+    condition: "cond-fallback"
+""", encoding="utf-8")
+    llm = FakeLLM({"cond-again": False, "cond-fallback": True})
+
+    result = asyncio.run(StateMachineEngine(llm_fn=llm).run(load_workflow(path)))
+
+    assert result.success, result.error
+    assert len(result.steps) == 4
+    assert len(llm.condition_calls) == 1, "同じ出力・同じ条件は run の中で 1 回だけ聞く"
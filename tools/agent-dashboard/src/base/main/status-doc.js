@@ -0,0 +1,66 @@
+'use strict';
+
+// 状況ファイルの「本体＋心拍」読み（agentcore.statusdoc の読み手と対）。
+//
+// 書き手（agent-loop の status/<tool>-<pid>.json、agent-project の status.json /
+// status/<node>.json）は、本体を内容が変わったときだけ書き直して `version` を +1 し、
+// 生存信号は隣の `<name>.beat`（{version, 時刻}）へだけ書く。ここでは本体に心拍の時刻を
+// 重ねて返す。心拍の version が前回読んだ本体と同じで本体の mtime も変わらない間は本体を
+// パースし直さない（画面の定期更新のたびに全文を読まない）。内容が同じままの時刻の書き直しは
+// version を上げないので mtime で拾う。心拍が無い旧い書き手の本体は従来どおり毎回読む。
+
+const fs = require('fs');
+const path = require('path');
+
+const BEAT_SUFFIX = '.beat';
+
+// 本体のパス → { mtimeMs, doc }（最後に読んだ本体）。プロセス内で持ち回る。
+const _docs = new Map();
+
+function readJsonFile(file) {
+  try {
+    return JSON.parse(fs.readFileSync(file, 'utf8'));
+  } catch {
+    return null;
+  }
+}
+
+function isPlainObject(v) {
+  return v !== null && typeof v === 'object' && !Array.isArray(v);
+}
+
+function beatPath(file) {
+  const ext = path.extname(file);
+  return (ext ? file.slice(0, -ext.length) : file) + BEAT_SUFFIX;
+}
+
+// 本体に心拍の時刻を重ねたレコード。本体が無い・壊れていれば null。
+// 時刻は本体と心拍の新しい方（同じ書式の ISO8601 なので文字列の大小で比べられる）。
+function readStatusDoc(file) {
+  const beat = readJsonFile(beatPath(file));
+  let mtimeMs;
+  try {
+    mtimeMs = fs.statSync(file).mtimeMs;
+  } catch {
+    return null;
+  }
+  const cached = _docs.get(file);
+  let doc;
+  if (isPlainObject(beat) && cached && cached.mtimeMs === mtimeMs
+      && cached.doc.version === beat.version) {
+    doc = { ...cached.doc };
+  } else {
+    doc = readJsonFile(file);
+    if (!isPlainObject(doc)) return null;
+    if (isPlainObject(beat)) _docs.set(file, { mtimeMs, doc: { ...doc } });
+  }
+  if (isPlainObject(beat)) {
+    for (const [key, value] of Object.entries(beat)) {
+      if (key === 'version' || typeof value !== 'string') continue;
+      if (typeof doc[key] !== 'string' || value > doc[key]) doc[key] = value;
+    }
+  }
+  return doc;
+}
+
+module.exports = { BEAT_SUFFIX, beatPath, readStatusDoc };
@@ -4,6 +4,7 @@
 // 状態は agent-flow 本体と同じく「ファイルの存在」から導出する（CLI には聞かない）:
 //   results/<id>.json があれば その status（done/failed）
 //   claims/<id>/ に lease 内の claim があれば claimed
+//     （claims.log のある run はノード claim を 1 本の追記ログで持つ——readClaimLog）
 //   tasks/<id>.json（または graph.json のノード）だけなら pending
 // 依存未達の pending は表示上 waiting として区別する（agent-flow に明示状態は無い）。
 // run の生存（orchestrator が駆動中か）は meta.json の生存リース
@@ -92,13 +93,48 @@ function readInteractions(runDir) {
   });
 }
 
+// claims.log（agent-flow のローカルバスで AGENT_FLOW_CLAIM_LOG=1 として作った run）を畳んで
+// {ノード id: {who: claim}} にする。形式は agentcore.protocol.ClaimLog と同じ 1 行 1 操作:
+// {k, w, c}=書く / {k, w}=消す / {k}=ノードごと消す。改行まで書き終えた行だけを読む。
+// ログの無い run は null（claims/<id>/ のファイルを読む）。
+function readClaimLog(runDir) {
+  let text;
+  try {
+    text = fs.readFileSync(path.join(runDir, 'claims.log'), 'utf8');
+  } catch {
+    return null;
+  }
+  const table = {};
+  const lines = text.split('\n');
+  lines.pop(); // 書き込み途中かもしれない末尾
+  for (const line of lines) {
+    let op;
+    try {
+      op = JSON.parse(line);
+    } catch {
+      continue;
+    }
+    if (!op || typeof op !== 'object' || typeof op.k !== 'string') continue;
+    if (!('w' in op)) {
+      delete table[op.k];
+      continue;
+    }
+    const claims = table[op.k] || (table[op.k] = {});
+    if (op.c && typeof op.c === 'object') claims[String(op.w)] = op.c;
+    else delete claims[String(op.w)];
+  }
+  return table;
+}
+
 // claims/<id>/ から勝者を決める。agent-flow と同じ決定的タイブレーク:
-// lease 内の claim のうち (ts, who) が最小の 1 件。
-function claimWinner(claimDir, now) {
+// lease 内の claim のうち (ts, who) が最小の 1 件。logged（readClaimLog の 1 ノード分）を
+// 渡されたらファイルの代わりにそれを使う。
+function claimWinner(claimDir, now, logged = null) {
   const claims = [];
-  for (const f of safeList(claimDir)) {
-    if (!f.endsWith('.json')) continue;
-    const c = readJson(path.join(claimDir, f));
+  const records = logged
+    ? Object.values(logged)
+    : safeList(claimDir).filter((f) => f.endsWith('.json')).map((f) => readJson(path.join(claimDir, f)));
+  for (const c of records) {
     if (!c || typeof c !== 'object') continue;
     const lease = Number(c.lease_until || 0);
     if (lease && lease < now) continue; // 期限切れは無視（孤児回収）
@@ -246,6 +282,7 @@ function readRun(runDir) {
   const runTerminal = TERMINAL.has(runStatus);
   const interactions = readInteractions(runDir);
   const interactionByNode = new Map(interactions.map((item) => [String(item.node_id), item]));
+  const claimLog = readClaimLog(runDir);
 
   const nodes = {};
   // output のテキストから拾ったイシュー URL の候補（nodeId → url）。executor の証跡が
@@ -290,7 +327,8 @@ function readRun(runDir) {
       output = typeof result.output === 'string' ? result.output : null;
       data = result.data !== undefined ? result.data : null;
     } else if (!runTerminal) {
-      const winner = claimWinner(path.join(runDir, 'claims', id), now);
+      const winner = claimWinner(path.join(runDir, 'claims', id), now,
+        claimLog ? (claimLog[id] || {}) : null);
       if (winner) {
         state = 'claimed';
         who = winner.who || null;
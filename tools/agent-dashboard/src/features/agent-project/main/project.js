@@ -14,6 +14,7 @@ const { readToolConfig } = require('./toolconfig');
 const { reposFileName } = require('./authoring');
 const { agentDirCandidates, userHomeRoots } = require('../../../base/main/agent-home');
 const { extractWindowsPath } = require('../../../base/main/wsl');
+const { readStatusDoc } = require('../../../base/main/status-doc');
 
 // agent-project.py と同じ正規表現
 const HEAD_RE = /^##\s+(\S+?):\s*(.*)$/;
@@ -1320,9 +1321,10 @@ function listInstances() {
 // レジストリ）は空になる。この場合の唯一の生存根拠が、同期されてきた status.json の
 // updated_iso の新しさ。fresh_after_sec は書き手（本体）が自分の同期間隔
 // （state_git_interval / --status-interval）から計算した値なので、ビュアー側は単純比較
-// するだけでよい。存在しない/壊れていれば null。
+// するだけでよい。存在しない/壊れていれば null。本体は内容が変わったときだけ書き直されるので、
+// updated_iso は隣の心拍 status.beat と重ねて読む（readStatusDoc）。
 function readStatus(dir) {
-  const rec = readJson(path.join(dir, 'status.json'));
+  const rec = readStatusDoc(path.join(dir, 'status.json'));
   if (!rec || typeof rec !== 'object') return null;
   const updatedMs = Date.parse(rec.updated_iso || '');
   if (isNaN(updatedMs)) return null;
@@ -1363,7 +1365,7 @@ function readNodeStatuses(dir, cfg) {
   const out = [];
   for (const f of safeList(sdir)) {
     if (!f.endsWith('.json')) continue;
-    const rec = readJson(path.join(sdir, f));
+    const rec = readStatusDoc(path.join(sdir, f));    // 心拍 <node>.beat の時刻を重ねる
     if (!rec || typeof rec !== 'object') continue;
     const updatedMs = Date.parse(rec.updated_iso || '');
     const ageSec = isNaN(updatedMs) ? null : (Date.now() - updatedMs) / 1000;
@@ -12,6 +12,7 @@ const fs = require('fs');
 const os = require('os');
 const path = require('path');
 const { agentHomeSubdir } = require('../../../base/main/agent-home');
+const { readStatusDoc } = require('../../../base/main/status-doc');
 
 const LIFECYCLES = ['run', 'pause', 'stop'];
 const DELEGATION_PREFER = ['local', 'remote'];
@@ -259,6 +260,7 @@ function setLifecycle(cfg, payload) {
 }
 
 // status/*.json を読み、各記録に fresh 判定を付けて返す。欠損・破損は寛容に無視。
+// 生存時刻 ts は隣の心拍 <name>.beat の方が新しい（本体は内容が変わったときだけ書き直される）。
 function readStatus(dir) {
   const statusDir = path.join(dir, 'status');
   let names;
@@ -270,7 +272,7 @@ function readStatus(dir) {
   const now = Date.now();
   const out = [];
   for (const name of names) {
-    const rec = readJson(path.join(statusDir, name));
+    const rec = readStatusDoc(path.join(statusDir, name));
     if (!isPlainObject(rec)) continue;
     const freshAfter = Number(rec.fresh_after_sec) > 0 ? Number(rec.fresh_after_sec) : 120;
     const ts = Date.parse(rec.ts);
@@ -117,6 +117,24 @@ test('cancelRun: 既に終端した run には効かない（不可逆）が残
   assert.strictEqual(fs.existsSync(path.join(runDir, 'waits', 'n1.json')), false);
 });
 
+test('claims.log で claim を持つ run も claimed を導出する（ログの最後の操作が効く）', () => {
+  const runDir = makeRun(bus, 'run-log');
+  const lease = Date.now() / 1000 + 1000;
+  const ops = [
+    { k: 'n1', w: 'w2', c: { who: 'w2', ts: 2, lease_until: lease } },
+    { k: 'n1', w: 'w1', c: { who: 'w1', ts: 1, lease_until: lease, claimed_at: '2026-01-01T00:00:01Z' } },
+    { k: 'n1', w: 'w2' }, // 敗者の取り下げ
+  ];
+  fs.writeFileSync(path.join(runDir, 'claims.log'),
+    ops.map((op) => JSON.stringify(op)).join('\n') + '\n{"k": "n1", "w": "w0", "c"', 'utf8');
+  let run = flow.readRun(runDir);
+  assert.strictEqual(run.nodes.n1.state, 'claimed');
+  assert.strictEqual(run.nodes.n1.who, 'w1');
+  fs.appendFileSync(path.join(runDir, 'claims.log'), '\n{"k":"n1"}\n', 'utf8'); // ノードごと消す
+  run = flow.readRun(runDir);
+  assert.strictEqual(run.nodes.n1.state, 'pending');
+});
+
 test('cancelled run は残 waits があっても park 表示しない', () => {
   const runDir = makeRun(bus, 'run-park-term');
   writeJson(path.join(runDir, 'meta.json'), {
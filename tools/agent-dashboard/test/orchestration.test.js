@@ -506,6 +506,42 @@ test('制御: readStatus は status/*.json を読み fresh 判定を付ける',
   assert.deepStrictEqual(control.readStatus(tmpdir('orch-empty-')), []);
 });
 
+test('制御: readStatus は心拍 .beat の時刻を重ね、version と mtime が同じ間は本体を読み直さない', () => {
+  const dir = tmpdir('orch-ctrl-beat-');
+  const statusDir = path.join(dir, 'status');
+  fs.mkdirSync(statusDir, { recursive: true });
+  const iso = (agoSec) => new Date(Date.now() - agoSec * 1000).toISOString().replace(/\.\d{3}Z$/, 'Z');
+  const doc = path.join(statusDir, 'agent-loop-7.json');
+  const beat = path.join(statusDir, 'agent-loop-7.beat');
+  fs.writeFileSync(doc, JSON.stringify({
+    tool: 'agent-loop', pid: 7, lifecycle: 'run', fresh_after_sec: 120, ts: iso(900), version: 4,
+  }));
+  fs.writeFileSync(beat, JSON.stringify({ version: 4, ts: iso(20) }));
+  const stamp = new Date(Math.floor(Date.now() / 1000) * 1000 - 900 * 1000);
+  fs.utimesSync(doc, stamp, stamp);
+  let rows = control.readStatus(dir);
+  assert.strictEqual(rows.length, 1); // 心拍は別ノードとして数えない
+  assert.strictEqual(rows[0].fresh, true); // 本体は 900s 前でも心拍が 20s 前
+  assert.strictEqual(rows[0].version, 4);
+  // 心拍の version と本体の mtime が同じ間は本体を開かない（壊しても前回の本体が返る）
+  fs.writeFileSync(doc, '{not json');
+  fs.utimesSync(doc, stamp, stamp);
+  assert.strictEqual(control.readStatus(dir)[0].lifecycle, 'run');
+  // version 据え置きの時刻だけの書き直し（心拍は書かない）は mtime の変化で拾う
+  fs.writeFileSync(doc, JSON.stringify({
+    tool: 'agent-loop', pid: 7, lifecycle: 'run', fresh_after_sec: 120, ts: iso(1), version: 4,
+  }));
+  fs.utimesSync(doc, stamp, new Date(stamp.getTime() + 1000));
+  assert.strictEqual(control.readStatus(dir)[0].ts, iso(1));
+  // 内容が変わった（version が進んだ）ら本体を読み直す
+  fs.writeFileSync(doc, JSON.stringify({
+    tool: 'agent-loop', pid: 7, lifecycle: 'pause', fresh_after_sec: 120, ts: iso(5), version: 5,
+  }));
+  fs.writeFileSync(beat, JSON.stringify({ version: 5, ts: iso(5) }));
+  rows = control.readStatus(dir);
+  assert.strictEqual(rows[0].lifecycle, 'pause');
+});
+
 // --- エージェント CLI ドロップイン（agent-cli） ------------------------------
 
 test('エージェント: list は first-wins で同名を陰らせ、契約違反を errors に集める', () => {
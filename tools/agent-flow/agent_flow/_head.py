@@ -3,8 +3,10 @@ from __future__ import annotations
 # 単体 import しない。agent_flow/__init__.py が共有名前空間へ順に exec 合成する。
 import argparse
 import atexit
+import bisect
 import contextlib
 import hashlib
+import heapq
 import inspect
 import io
 import json
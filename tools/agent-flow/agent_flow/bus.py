@@ -6,6 +6,7 @@ from __future__ import annotations
 # Bus — メッセージバス抽象（M1: ローカルディレクトリ実装）
 # --------------------------------------------------------------------------
 from agentcore import protocol  # noqa: E402
+from agentcore import filewatch as _filewatch  # noqa: E402
 
 
 class Bus:
@@ -38,6 +39,19 @@ class Bus:
         # これが無いと、完走したのに verify NG でリトライされた run の成果記録が bus から
         # 完全に消え、viewer（agent-dashboard）がポーリングしていなければ二度と見られない。
         self.inherited_dir = os.path.join(self.run_dir, "inherited")
+        # .pulse/<run-id> … この run への書き込み（result・claim・wait・task）の通知ジャーナル。
+        # 1 行 1 ノード id を追記するだけのホストローカルなファイルで、バスの外（git にも
+        # state_git の鏡にも乗らない）。orchestrator はこれを見張って「何か変わった」で起き、
+        # 触れられたノードだけを読み直して静止判定を O(1) で済ませる（_StateLedger）。
+        self.pulse_dir = os.path.join(root, ".pulse")
+        self._ledger = None
+        # events_since の索引（events/<who>.jsonl ごとの行位置と ts）。使われたときだけ作る。
+        self._event_index: "dict[str, _EventFileIndex]" = {}
+        # claims.log … ノード claim を 1 本の追記ログで持つ run の印（agentcore.protocol.ClaimLog）。
+        # run を作るときに AGENT_FLOW_CLAIM_LOG=1 なら置き、以後その run のノード claim は
+        # claims/<node>/<who>.json ではなくこのログへ書く。ホストローカルなバス専用（GitBus は None）。
+        self.claim_log_path = os.path.join(self.run_dir, "claims.log")
+        self._claim_log = None
 
     # --- 転送フック（ローカルバスでは no-op、GitBus が上書き） ---
     def sync_pull(self) -> None:
@@ -82,6 +96,9 @@ class Bus:
                 base = _vp_result_rev(os.getcwd())
                 if base:
                     meta["base_rev"] = base
+            if self.claim_log_path and os.environ.get("AGENT_FLOW_CLAIM_LOG") == "1":
+                with open(self.claim_log_path, "a", encoding="utf-8"):
+                    pass
             write_json_atomic(self.meta_path, meta)
             return
         # 再投入（resume / inherit 後）: 投入側が今回渡してきた契約で meta の欠けを補う。
@@ -249,6 +266,7 @@ class Bus:
     # --- タスク ---
     def write_task(self, task) -> None:
         write_json_atomic(os.path.join(self.tasks_dir, f"{task['id']}.json"), task)
+        self._pulse(task["id"])
 
     def task_ids(self):
         g = self.read_graph()
@@ -291,11 +309,30 @@ class Bus:
             # 負けた自分の分だけ消してから、以下で push する。
             on_withdraw=lambda: self.sync_push(f"claim withdraw {who}"))
 
+    def _node_claims(self) -> "protocol.ClaimLog | None":
+        """この run のノード claim を追記ログで持っているなら、その ClaimLog（無ければ None）。
+
+        ログかファイルかは run を作ったときに決まり（claims.log の有無）、以後は変わらない。
+        同じホストの worker が奪い合うノード claim は、ファイル版だと 1 回ごとに claim_dir の
+        列挙 2 回と fsync 2 回を払う。ログ版は勝者表をメモリに持ち、敗者はロックにも並ばない。
+        要求 claim（inbox/claims）は run を跨ぐので常にファイル版。"""
+        if self._claim_log is None and self.claim_log_path \
+                and os.path.exists(self.claim_log_path):
+            self._claim_log = protocol.ClaimLog(self.claim_log_path)
+        return self._claim_log
+
     # 後方互換のためのノード単位ラッパ
     def _winner(self, node_id: str):
+        log = self._node_claims()
+        if log is not None:
+            return log.winner(node_id)
         return self._winner_in(self._claim_dir(node_id))
 
     def _write_claim(self, node_id: str, who: str, lease_sec: float) -> None:
+        log = self._node_claims()
+        if log is not None:
+            log.write_claim(node_id, who, lease_sec)
+            return
         self._write_claim_in(self._claim_dir(node_id), who, lease_sec)
 
     def extend_claim(self, node_id: str, who: str, lease_sec: float) -> bool:
@@ -304,19 +341,33 @@ class Bus:
         動いてしまう）。claim が消えている（release / withdraw 済み）か、lease 失効中に
         他者が勝者になっていれば延長せず False を返す——失った claim を心拍が無条件に
         書き戻すと二重実行になるため。実体は agentcore.protocol.extend_claim。"""
+        log = self._node_claims()
+        if log is not None:
+            return log.extend_claim(node_id, who, lease_sec)
         return protocol.extend_claim(self._claim_dir(node_id), who, lease_sec)
 
     def try_claim(self, node_id: str, who: str, lease_sec: float) -> bool:
         self.sync_pull()
         if self.has_result(node_id):
             return False
-        return self._try_claim_in(self._claim_dir(node_id), who, lease_sec,
-                                  f"claim {node_id} by {who}")
+        try:
+            log = self._node_claims()
+            if log is not None:      # ホストローカル専用なので転送のコールバックは要らない
+                return log.try_claim(node_id, who, lease_sec)
+            return self._try_claim_in(self._claim_dir(node_id), who, lease_sec,
+                                      f"claim {node_id} by {who}")
+        finally:
+            self._pulse(node_id)   # 勝っても負けても claims/ は書き換わっている
 
     def release_claim(self, node_id: str, who: str) -> None:
         """自分の claim ファイルを消して node を手放す（park 時に worker スロットを空けるため）。
         心拍（Heartbeat）を停止してから呼ぶこと——停止前に消すと直後の心拍が claim を書き戻す。"""
-        protocol.release_claim(self._claim_dir(node_id), who)
+        log = self._node_claims()
+        if log is not None:
+            log.release_claim(node_id, who)
+        else:
+            protocol.release_claim(self._claim_dir(node_id), who)
+        self._pulse(node_id)
         self.sync_push(f"release {node_id} by {who}")
 
     # --- human interaction（request=engine / response=human / resolution=engine） ---
@@ -390,13 +441,15 @@ class Bus:
     def write_wait(self, node_id: str, rec: dict) -> None:
         os.makedirs(self.waits_dir, exist_ok=True)
         write_json_atomic(self.wait_path(node_id), rec)
+        self._pulse(node_id)
 
     def clear_wait(self, node_id: str) -> None:
         """park 記録を消す（決着して result を書いたとき／node を pending へ戻すとき）。"""
         try:
             os.remove(self.wait_path(node_id))
         except OSError:
-            pass
+            return
+        self._pulse(node_id)
 
     def list_waits(self) -> "list[dict]":
         """この run の park 記録一覧（id を含む dict の列）。無ければ空。"""
@@ -526,6 +579,61 @@ class Bus:
         if artifacts:  # 生成した中間成果物（run_dir 相対パス）。後続が参照できる
             rec["artifacts"] = list(artifacts)
         write_json_atomic(self.result_path(node_id), rec)
+        self._pulse(node_id)
+
+    # --- 変化通知（pulse）と状態集計 ---
+    #
+    # 静止判定（_quiesced）は全ノードの result・claims・waits・task を読むので、数百ノードの
+    # run を poll 間隔ごとに回すとそれだけで I/O の大半になる。しかも静止していない間の
+    # 答えはほぼ毎回「まだ」。そこで書き手が触れたノード id を pulse に残し、読み手は
+    # 「前回から伸びた分」に載ったノードだけを読み直して状態ごとの件数を保つ。
+    # 世代（generation）は pulse の長さそのもの——追記だけなのでロックも採番も要らない。
+    # lease の失効（claimed→pending・waiting→pending）は書き込みを伴わないので pulse に
+    # 載らないが、どちらも「静止していない」のまま変わらないため判定は狂わない。それでも
+    # 取りこぼし（pulse を書かない旧版の worker・手で置いたファイル）に備え、呼び出し側は
+    # 遅い間隔で全走査（full=True）をかけ直し、静止と出たら全走査で確かめてから動く。
+    def pulse_path(self) -> str:
+        return os.path.join(self.pulse_dir, self.run_id)
+
+    def _pulse(self, *node_ids: str) -> None:
+        """node_ids に触れたことを通知する（"*" は「全ノードを読み直せ」）。失敗は握り潰す
+        ——通知は最適化でしかなく、落としても遅い全走査が拾う。"""
+        if not node_ids:
+            return
+        try:
+            os.makedirs(self.pulse_dir, exist_ok=True)
+            # O_APPEND の 1 回の write は並行する追記と行が混ざらない（短い行に限る）。
+            with open(self.pulse_path(), "ab") as f:
+                f.write("".join(f"{nid}\n" for nid in node_ids).encode("utf-8"))
+        except OSError:
+            pass
+
+    def pulse_generation(self) -> int:
+        """この run の世代。書き込みがあるたびに増える（pulse が無ければ 0）。"""
+        try:
+            return os.path.getsize(self.pulse_path())
+        except OSError:
+            return 0
+
+    def watch_pulse(self, poll_sec: float = 1.0):
+        """pulse の変化待ち（agentcore.filewatch）。`with` で使い、`wait(timeout)` で眠る。
+        inotify が使えない環境では poll_sec ごとに起きるだけ（従来の sleep と同じ）。"""
+        os.makedirs(self.pulse_dir, exist_ok=True)
+        return _filewatch.watch_dir(self.pulse_dir, match=lambda name: name == self.run_id,
+                                    poll_sec=poll_sec)
+
+    def state_counts(self, nodes: dict, full: bool = False) -> dict:
+        """nodes（graph["nodes"]）の状態ごとの件数。pending のうち依存が揃って今すぐ claim
+        できるものは "ready" にも数える。full=True は pulse を当てにせず全ノードを読み直す。"""
+        if self._ledger is None:
+            self._ledger = _StateLedger(self)
+        return self._ledger.refresh(nodes, full=full)
+
+    def quiesced_hint(self, nodes: dict) -> bool:
+        """pulse ベースの静止判定（_quiesced と同じ条件）。読むのは前回から触れられたノードだけ。
+        真を返したら、動く前に _quiesced（全走査）で確かめること。"""
+        counts = self.state_counts(nodes)
+        return not (counts.get("claimed") or counts.get("waiting") or counts.get("ready"))
 
     # --- 状態導出 ---
     def node_state(self, node_id: str) -> str:
@@ -566,7 +674,10 @@ class Bus:
                 except OSError:
                     pass
                 shutil.rmtree(self._claim_dir(nid), ignore_errors=True)   # 失効前の claim も掃除
+                if self._node_claims() is not None:
+                    self._node_claims().drop(nid)
                 reset.append(nid)
+        self._pulse(*reset)
         meta = read_json(self.meta_path) or {}
         keys = ["failure_reason", "superseded", "superseded_by",
                 "resume_count", "resume_progress"]
@@ -641,22 +752,97 @@ class Bus:
         write_json_atomic(v.meta_path, meta)
 
     def event(self, who: str, kind: str, **extra) -> None:
-        rec = {"ts": now_iso(), "who": who, "kind": kind, **extra}
+        """events/<who>.jsonl へ 1 行追記する。ファイル内の ts は非減少に保つ（recent_events の
+        末尾からの逆読みの前提）。時計が巻き戻ったら ts は直前の行の値に揃え、実際の時刻は
+        clock_ts に残す。直前の行はファイル末尾の 1 ブロックから読む。<who> の書き手は 1 プロセス
+        （名義に PC 名と worker 番号が入る）なので、読んでから書くまでの排他はプロセス内のロックで足りる。"""
         os.makedirs(self.events_dir, exist_ok=True)
-        with open(os.path.join(self.events_dir, f"{who}.jsonl"), "a", encoding="utf-8") as f:
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        path = os.path.join(self.events_dir, f"{who}.jsonl")
+        with _EVENT_APPEND_LOCK, open(path, "a+b") as f:
+            now = now_iso()
+            last = next(_events_backwards(f, 0), ("",))[0]
+            rec = {"ts": max(now, last), "who": who, "kind": kind, **extra}
+            if last > now:
+                rec["clock_ts"] = now
+            f.seek(0, os.SEEK_END)
+            f.write((json.dumps(rec, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def _event_paths(self) -> "list[str]":
+        # 列挙順は同じ ts のイベントの並び（ファイル順→行順）を決めるので、どの読み方でも共通にする
+        if not os.path.isdir(self.events_dir):
+            return []
+        return [os.path.join(self.events_dir, name) for name in os.listdir(self.events_dir)]
 
-    def recent_events(self, limit: int):
+    def all_events(self) -> list:
+        """run の全イベントを ts 昇順で（ts が同じものはファイルの列挙順→行順の安定ソート）。"""
         evs = []
-        if os.path.isdir(self.events_dir):
-            for name in os.listdir(self.events_dir):
-                with open(os.path.join(self.events_dir, name), encoding="utf-8") as f:
-                    for line in f:
-                        try:
-                            evs.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            pass
-        return sorted(evs, key=lambda e: e.get("ts", ""))[-limit:]
+        for path in self._event_paths():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        evs.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass
+        return sorted(evs, key=lambda e: e.get("ts", ""))
+
+    def recent_events(self, limit: int):
+        """直近 limit 件のイベント（ts 昇順）。all_events()[-limit:] と同じものを返す。
+
+        events/<who>.jsonl は書き手 1 人が now_iso() を付けて追記するだけなので、各ファイルは
+        ts の昇順に並んでいる。そこで各ファイルを末尾から逆に読み、(ts, ファイルの順, 位置) の
+        降順に heap で k-way マージして limit 件で止める。長い run でも読むのは各ファイルの
+        末尾の数ブロックだけで、status の再描画・doctor の走査が run の長さに比例して遅く
+        ならない。前提は「ファイル内の ts は非減少」で、event() が時計の巻き戻りでも ts を直前の
+        行より戻さないことでこれを保つ。event() を通らずに書かれたファイル（この保証の前の run・
+        手で足した行）で読んだ範囲に ts の逆行があれば全件読みに切り替える（読まずに済んだ、
+        より前の部分までは確かめない）。"""
+        if limit <= 0:
+            return self.all_events()[-limit:]
+        tail = []
+        with contextlib.ExitStack() as stack:
+            streams = [_events_backwards(stack.enter_context(open(path, "rb")), order)
+                       for order, path in enumerate(self._event_paths())]
+            try:
+                for item in heapq.merge(*streams, reverse=True):
+                    tail.append(item[3])
+                    if len(tail) >= limit:
+                        break
+            except _EventsUnordered:
+                return self.all_events()[-limit:]
+        tail.reverse()
+        return tail
+
+    def events_since(self, since: str) -> list:
+        """ts が since より後のイベントを ts 昇順で（all_events() から since 以前を除いたもの）。
+
+        ファイルごとに「行の位置と ts」の索引をこの Bus に持ち、呼ぶたびに前回の末尾から後ろ
+        （新しく追記された分）だけを読んで伸ばす。返す範囲の先頭は索引の二分探索で決まるので、
+        同じ Bus で繰り返し聞く追従表示のコストは新着分に比例する。ファイルが差し替わった
+        （git の checkout・run の作り直し）ら、そのファイルの索引は作り直す。"""
+        found = []
+        paths = self._event_paths()
+        for order, path in enumerate(paths):
+            with open(path, "rb") as f:
+                index = self._indexed_events(path, f)
+                f.seek(index.start_after(since))
+                offset = f.tell()
+                for line in f.read().split(b"\n"):
+                    rec = _parse_event_line(line)
+                    if rec is not None and rec.get("ts", "") > since:
+                        found.append((rec.get("ts", ""), order, offset, rec))
+                    offset += len(line) + 1
+        for gone in set(self._event_index) - set(paths):
+            del self._event_index[gone]
+        found.sort(key=lambda item: item[:3])
+        return [item[3] for item in found]
+
+    def _indexed_events(self, path: str, f) -> "_EventFileIndex":
+        """path の索引を、開いた f の追記分まで伸ばして返す（差し替わっていたら作り直す）。"""
+        index = self._event_index.get(path)
+        if index is None or not index.valid(f):
+            index = self._event_index[path] = _EventFileIndex()
+        index.extend(f)
+        return index
 
     # --- run 管理（gc / watch 用） ---
     def list_runs(self):
@@ -681,6 +867,10 @@ class Bus:
 
     def remove_run(self, run_id: str) -> None:
         shutil.rmtree(os.path.join(self.runs_root, run_id), ignore_errors=True)
+        try:
+            os.remove(os.path.join(self.pulse_dir, run_id))
+        except OSError:
+            pass
         # 対応する inbox 要求と claim も消す（req_id == run_id）。残すとデーモンの
         # 重複排除（run_exists ベース）が外れ、gc 後にリース失効済みの要求を拾い直して
         # 完了済みの run を再実行してしまう。
@@ -1148,3 +1338,195 @@ class Bus:
         self.sync_pull()
         return self._try_claim_in(os.path.join(self.inbox_claims_dir, req_id),
                                   who, lease_sec, f"reclaim request {req_id} by {who}")
+
+
+class _StateLedger:
+    """Bus.state_counts の中身: ノードごとの状態と状態ごとの件数を、pulse の差分で保つ。
+
+    読み直すのは pulse に載ったノードと、それが done になった／done でなくなったときの
+    後続（依存が揃ったかが変わる）だけ。graph の形（ノードと依存）が変わったとき・pulse が
+    縮んだとき・"*" が来たときは全ノードを読み直す。"""
+
+    def __init__(self, bus: Bus):
+        self.bus = bus
+        self.shape = None
+        self.offset = 0
+        self.states: "dict[str, str]" = {}
+        self.ready: "set[str]" = set()
+        self.dependents: "dict[str, set]" = {}
+        self.counts: "dict[str, int]" = {}
+
+    def refresh(self, nodes: dict, full: bool = False) -> dict:
+        shape = tuple((nid, tuple(node.get("deps", []))) for nid, node in nodes.items())
+        touched = self._drain()
+        if full or touched is None or shape != self.shape:
+            self._rebuild(nodes, shape)
+        elif touched:
+            self._apply(nodes, touched)
+        return dict(self.counts, ready=len(self.ready))
+
+    def _size(self) -> int:
+        return self.bus.pulse_generation()
+
+    def _drain(self):
+        """pulse の前回位置から後に載ったノード id の集合。全部読み直すべきなら None。"""
+        size = self._size()
+        if size < self.offset:            # run の作り直し等で pulse が縮んだ
+            self.offset = 0
+            return None
+        if size == self.offset:
+            return set()
+        try:
+            with open(self.bus.pulse_path(), "rb") as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+        except OSError:
+            return None
+        end = data.rfind(b"\n") + 1       # 書きかけの行は次回に回す
+        self.offset += end
+        ids = set(data[:end].decode("utf-8", "replace").split())
+        return None if "*" in ids else ids
+
+    def _done(self, node_id: str) -> bool:
+        if node_id in self.states:
+            return self.states[node_id] == "done"
+        return (self.bus.read_result(node_id) or {}).get("status") == "done"
+
+    def _is_ready(self, node_id: str, node: dict) -> bool:
+        return (self.states.get(node_id) == "pending"
+                and all(self._done(d) for d in node.get("deps", [])))
+
+    def _set(self, node_id: str, state: str) -> str:
+        before = self.states.get(node_id)
+        if before is not None:
+            self.counts[before] -= 1
+            if not self.counts[before]:
+                del self.counts[before]
+        self.states[node_id] = state
+        self.counts[state] = self.counts.get(state, 0) + 1
+        return before
+
+    def _rebuild(self, nodes: dict, shape) -> None:
+        # 走査より先に位置を取る（走査中に届いた書き込みは次回の差分で拾い直す）
+        self.offset = self._size()
+        self.shape = shape
+        self.states, self.counts, self.dependents = {}, {}, {}
+        for nid, node in nodes.items():
+            self._set(nid, self.bus.node_state(nid))
+            for dep in node.get("deps", []):
+                self.dependents.setdefault(dep, set()).add(nid)
+        self.ready = {nid for nid, node in nodes.items() if self._is_ready(nid, node)}
+
+    def _apply(self, nodes: dict, touched: set) -> None:
+        recheck = set()
+        for nid in touched:
+            if nid not in nodes:
+                continue
+            after = self.bus.node_state(nid)
+            before = self._set(nid, after)
+            recheck.add(nid)
+            if (before == "done") != (after == "done"):
+                recheck |= self.dependents.get(nid, set())
+        for nid in recheck:
+            if self._is_ready(nid, nodes[nid]):
+                self.ready.add(nid)
+            else:
+                self.ready.discard(nid)
+
+
+# --- イベントの逆読み（recent_events）と追記分だけ読む索引（events_since） ---
+# 逆読みの 1 回の読み込み量。イベント 1 行は数百バイトなので、直近数十件ならほぼ 1 ブロックで足りる。
+EVENTS_TAIL_BLOCK = 8192
+# event() の「直前の ts を読んで追記する」を同じプロセスのスレッド間で直列にする。
+_EVENT_APPEND_LOCK = threading.Lock()
+
+
+class _EventsUnordered(Exception):
+    """逆読み中にファイル内の ts の逆行を見つけた（末尾からの k-way マージの前提が崩れた）。"""
+
+
+def _parse_event_line(line: bytes) -> "dict | None":
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def _events_backwards(f, order: int):
+    """開いた events ファイルを末尾から行単位で読み、(ts, order, 行の位置, イベント) を降順に返す。
+
+    読めない行は全件読みと同じく読み飛ばす。ファイル内で ts が逆行していたら _EventsUnordered。"""
+    pos = f.seek(0, os.SEEK_END)
+    head = b""          # pos より後ろにある、まだ行頭の見つかっていない断片
+    later = None        # 直前に返した（ファイル上では後ろにある）イベントの ts
+    while pos > 0:
+        step = min(EVENTS_TAIL_BLOCK, pos)
+        pos -= step
+        f.seek(pos)
+        lines = (f.read(step) + head).split(b"\n")
+        head = lines[0]
+        starts = [pos]
+        for line in lines[:-1]:
+            starts.append(starts[-1] + len(line) + 1)
+        for k in range(len(lines) - 1, 0 if pos else -1, -1):
+            rec = _parse_event_line(lines[k])
+            if rec is None:
+                continue
+            ts = rec.get("ts", "")
+            if later is not None and ts > later:
+                raise _EventsUnordered(f.name)
+            later = ts
+            yield ts, order, starts[k], rec
+
+
+class _EventFileIndex:
+    """1 本の events ファイルの、改行まで書き終えた行の位置と ts（events_since 用）。
+
+    改行の無い末尾（書き込み途中かもしれない行）は索引に入れず、次の extend で読み直す。"""
+
+    _FINGERPRINT = 64   # 差し替え検知に見る、索引済み部分の末尾のバイト数
+
+    def __init__(self):
+        self.ident = None
+        self.size = 0
+        self.fingerprint = b""
+        self.offsets: "list[int]" = []
+        self.tss: "list[str]" = []
+        self.ordered = True
+
+    def valid(self, f) -> bool:
+        """索引を作ったときと同じファイルで、索引済みの部分が書き換わっていないか。"""
+        st = os.fstat(f.fileno())
+        if (st.st_dev, st.st_ino) != self.ident or st.st_size < self.size:
+            return False
+        f.seek(self.size - len(self.fingerprint))
+        return f.read(len(self.fingerprint)) == self.fingerprint
+
+    def extend(self, f) -> None:
+        st = os.fstat(f.fileno())
+        self.ident = (st.st_dev, st.st_ino)
+        f.seek(self.size)
+        data = f.read(max(0, st.st_size - self.size))
+        done = data.rfind(b"\n") + 1
+        offset = self.size
+        for line in data[:done].split(b"\n")[:-1]:
+            rec = _parse_event_line(line)
+            if rec is not None:
+                ts = rec.get("ts", "")
+                if self.tss and ts < self.tss[-1]:
+                    self.ordered = False
+                self.offsets.append(offset)
+                self.tss.append(ts)
+            offset += len(line) + 1
+        self.size = offset
+        if done:
+            f.seek(max(0, self.size - self._FINGERPRINT))
+            self.fingerprint = f.read(self.size - f.tell())
+
+    def start_after(self, since: str) -> int:
+        """ts が since より後の最初の行の位置（無ければ索引済み部分の末尾）。"""
+        if self.ordered:
+            k = bisect.bisect_right(self.tss, since)
+        else:
+            k = next((k for k, ts in enumerate(self.tss) if ts > since), len(self.tss))
+        return self.offsets[k] if k < len(self.tss) else self.size
@@ -92,8 +92,9 @@ def sweep_tmp_files(root: str, min_age_sec: float = 300.0) -> int:
     removed = 0
     now = time.time()
     for dirpath, dirs, files in os.walk(root):
-        if ".git" in dirs:
-            dirs.remove(".git")  # git 内部には踏み込まない
+        for skip in (".git", REFERENCE_DIR):
+            if skip in dirs:
+                dirs.remove(skip)  # git 内部（bare の参照リポジトリを含む）には踏み込まない
         for fn in files:
             m = _TMP_SUFFIX_RE.search(fn)
             if not m:
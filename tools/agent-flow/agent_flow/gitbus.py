@@ -36,19 +36,27 @@ class GitBus(Bus):
     push 競合は pull --rebase → 再 push のリトライで吸収する（実体は agentcore.transport）。"""
 
     def __init__(self, clone_dir: str, run_id: str, remote: str, branch: str = "main",
-                 subdir: str = ""):
+                 subdir: str = "", probe_cache: "str | None" = None,
+                 reference: "str | None" = None):
         # git の作業ツリーは clone_dir。バスのルートはその中の subdir（指定時）。
         self.workdir = clone_dir
         self.subdir = (subdir or "").strip("/")
         bus_root = os.path.join(clone_dir, self.subdir) if self.subdir else clone_dir
         super().__init__(bus_root, run_id)
+        # pulse はクローンの .git の中へ置く（作業ツリーに置くと add -A でバスに乗ってしまう）。
+        # 他ノードの書き込みはこのクローンには sync_pull でしか届かないので、pulse を書くのは
+        # このプロセス自身と sync_pull だけになる。
+        self.pulse_dir = os.path.join(clone_dir, ".git", "agent-flow-pulse")
+        # ノード claim は必ず claims/<node>/<who>.json（複数ノードが 1 本のログへ追記すると
+        # git の add/add・内容コンフリクトになる）。AGENT_FLOW_CLAIM_LOG は効かない。
+        self.claim_log_path = None
         self.remote = remote
         self.branch = branch
         self._transport = _transport.GitTransport(
             self.workdir, self.remote, branch=self.branch, subdir=self.subdir,
             sparse_paths=self._sparse_paths(), managed_flag=self.MANAGED_FLAG,
             commit_user_name="agent-flow", commit_user_email="agent-flow@local",
-            lock_stale_sec=GIT_LOCK_STALE_SEC,
+            lock_stale_sec=GIT_LOCK_STALE_SEC, probe_cache=probe_cache, reference=reference,
             on_log=lambda msg: log(os.path.basename(self.workdir), msg))
         self._ensure_clone()
 
@@ -89,7 +97,7 @@ class GitBus(Bus):
                 return
             log(os.path.basename(self.workdir),
                 f"再利用クローン {self.workdir} を回復できないため作り直します")
-            self._transport._reset_clone_dir()
+            self._transport._discard_broken_clone()
         elif os.path.isdir(self.workdir) and os.listdir(self.workdir):
             # 既存の非空ディレクトリ（ユーザーの作業チェックアウト・親/別リポジトリ等）は上書きせず中断。
             raise RuntimeError(
@@ -123,7 +131,34 @@ class GitBus(Bus):
 
     def sync_pull(self) -> None:
         # リモートに当該ブランチが無い初回などは黙って無視（transport が破損時の作り直しも担う）。
-        self._transport.sync_pull()
+        before = self._head()
+        if self._transport.sync_pull():
+            after = self._head()
+            if after and after != before:
+                # 空のリモートから始めたクローン（HEAD 未生成）は差分の基点が無い——全部読み直させる
+                self._pulse(*(self._pulled_nodes(before, after) if before else ["*"]))
+
+    def _head(self) -> str:
+        return self._git(["rev-parse", "-q", "--verify", "HEAD"], check=False).stdout.strip()
+
+    def _pulled_nodes(self, before: str, after: str) -> "list[str]":
+        """pull で動いたこの run のファイルから、触れられたノード id を拾う（pulse 用）。
+        差分が取れなければ "*"（全部読み直せ）。"""
+        rel = os.path.join(self.subdir, "runs", self.run_id) if self.subdir \
+            else f"runs/{self.run_id}"
+        d = self._git(["diff", "--name-only", "--no-renames", before, after, "--", rel],
+                      check=False)
+        if d.returncode != 0:
+            return ["*"]
+        ids = set()
+        for path in d.stdout.splitlines():
+            parts = path[len(rel):].strip("/").split("/")
+            if len(parts) >= 2 and parts[0] in ("results", "waits", "tasks") \
+                    and parts[1].endswith(".json"):
+                ids.add(parts[1][:-5])
+            elif len(parts) >= 3 and parts[0] == "claims":
+                ids.add(parts[1])
+        return sorted(ids)
 
     def sync_push(self, msg: str = "agent-flow update") -> None:
         self._transport.sync_push(msg)
@@ -145,6 +180,12 @@ def _safe(name: str) -> str:
     return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
 
 
+# make_bus が GitBus に渡す probe キャッシュ（バスフォルダ直下・ノードのクローンとは別）。
+PROBE_CACHE_DIR = ".git-probe"
+# make_bus が GitBus に渡す参照リポジトリ（bare なので `.git` を持たず、sweep_clone_dirs の
+# 孤立クローン掃除の対象にならない——借り手がいる間に消されない）。
+REFERENCE_DIR = ".git-reference"
+
 # 作業後に削除する候補の GitBus クローン（make_bus で登録し main の finally で掃除）
 _active_clones: list = []
 
@@ -154,8 +195,14 @@ def make_bus(args, node_id: str) -> Bus:
     run_id = args.run_id or "_"  # gc 等 run 横断コマンドでは run_id 不要
     if getattr(args, "git", None):
         clone_dir = os.path.join(os.path.abspath(args.bus), _safe(node_id))
+        # 同じ --bus を使うノードは同じホストのプロセス。リモート先端の probe の答えと、
+        # クローンが借りるオブジェクト（bare の参照リポジトリ）をバスフォルダ直下で共有する
+        # ——idle な worker が揃って ls-remote せず、新しい worker の clone は差分だけで済む。
+        bus_root = os.path.abspath(args.bus)
         bus = GitBus(clone_dir, run_id, remote=args.git, branch=args.git_branch,
-                     subdir=getattr(args, "git_subdir", "") or "")
+                     subdir=getattr(args, "git_subdir", "") or "",
+                     probe_cache=os.path.join(bus_root, PROBE_CACHE_DIR),
+                     reference=os.path.join(bus_root, REFERENCE_DIR))
         _active_clones.append(bus)  # 作業後に cleanup_clone で消す
         return bus
     return Bus(os.path.abspath(args.bus), run_id)
@@ -568,17 +568,31 @@ def cmd_orchestrate(args) -> int:
             return 0
         heartbeat()               # 評価・再計画は長い（LLM）ので周回ごとに更新
         graph = bus.read_graph()
-        while not _quiesced(bus, graph["nodes"]):
-            bus.sync_pull()
-            heartbeat()          # 走っている限りリースを延ばす
-            if _orch_check_canceled(bus, args, who):
-                return 0
-            graph = bus.read_graph()
-            # in-flight 差し戻し: 静止を待たず、人の指摘を待機ノードへ即時反映（実行中は不変）。
-            # ノード追加は静止時の評価役に委ねる（二重生成回避）。
-            _inflight_amend_pending(bus, graph, who, args, consumed_fb)
-            time.sleep(args.poll)
-            graph = bus.read_graph()
+        # 静止待ち: 書き込みの通知（pulse）で起き、触れられたノードだけで静止を判定する。
+        # 全ノードの読み直しは QUIESCE_FULL_SCAN_SEC ごと（と静止の確認時）だけ。
+        full_scan_at = time.monotonic() + QUIESCE_FULL_SCAN_SEC
+        amended_gen = -1
+        with bus.watch_pulse(args.poll) as pulse:
+            while True:
+                full = time.monotonic() >= full_scan_at
+                if full:
+                    full_scan_at = time.monotonic() + QUIESCE_FULL_SCAN_SEC
+                if _quiesced_fast(bus, graph["nodes"], full=full):
+                    break
+                bus.sync_pull()
+                heartbeat()          # 走っている限りリースを延ばす
+                if _orch_check_canceled(bus, args, who):
+                    return 0
+                graph = bus.read_graph()
+                # in-flight 差し戻し: 静止を待たず、人の指摘を待機ノードへ即時反映（実行中は不変）。
+                # ノード追加は静止時の評価役に委ねる（二重生成回避）。指摘は result に載るので、
+                # 読み直すのは世代が進んだとき（と全走査の周回）だけでよい。
+                gen = bus.pulse_generation()
+                if full or gen != amended_gen:
+                    _inflight_amend_pending(bus, graph, who, args, consumed_fb)
+                    amended_gen = gen
+                pulse.wait(args.poll)
+                graph = bus.read_graph()
         bus.sync_pull()
         graph = bus.read_graph()
         nodes = graph["nodes"]
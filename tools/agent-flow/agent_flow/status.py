@@ -110,6 +110,22 @@ def execution_by_pc(bus, node_ids) -> "list[tuple[str, int]]":
     return sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
 
 
+def pull_stats_line(bus) -> str:
+    """git バスの sync_pull の内訳（同じホストの全プロセス分。probe キャッシュが無ければこの
+    プロセス分）。pull を省けた割合が低いなら、idle のはずのノードが実際には毎回何かを
+    取り込んでいる——見張るべきはその書き手。ローカルバスでは空文字。"""
+    transport = getattr(bus, "_transport", None)
+    if transport is None or not hasattr(transport, "host_pull_stats"):
+        return ""
+    st = transport.host_pull_stats()
+    checks = st.get("checks", 0)
+    if not checks:
+        return ""
+    return (f"checks={checks}  skipped={st.get('skipped', 0)}"
+            f"（{100.0 * st.get('skipped', 0) / checks:.0f}%）  pulls={st.get('pulls', 0)}"
+            f"  ls-remote={st.get('probes', 0)}  cache={st.get('cache_hits', 0)}")
+
+
 def _render_status(bus, run_id, events):
     """公式 Dynamic Workflows 風のダッシュボード表示。
     進捗バー / エージェント（タスク）状態ツリー / 直近アクティビティ / 最終サマリ。"""
@@ -149,6 +165,9 @@ def _render_status(bus, run_id, events):
             # PC 別の実行内訳。1 行に PC 名が 1 つしか出ないなら分担は起きていない
             # （run 単位で 1 台に確定するのが現行仕様 — multi-pc-operations.md §4.2）。
             L.append("│  by pc   : " + "  ".join(f"{pc}={n}" for pc, n in by_pc))
+        pulls = pull_stats_line(bus)
+        if pulls:
+            L.append(f"│  git pull: {pulls}")
         L.append("├─ tasks")
         memo = {}
         ordered = sorted(nodes, key=lambda n: (_node_depth(n, nodes, memo), n))
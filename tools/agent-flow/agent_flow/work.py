@@ -99,6 +99,25 @@ def _quiesced(bus: Bus, nodes: dict) -> bool:
     return True
 
 
+# 静止待ちで全ノードを読み直す間隔（秒）。それ以外の周回は pulse に載ったノードだけを読む。
+QUIESCE_FULL_SCAN_SEC = 30.0
+
+
+def _quiesced_fast(bus: Bus, nodes: dict, full: bool = False) -> bool:
+    """_quiesced と同じ判定を、Bus の状態台帳（pulse の差分で保つ件数）で O(1) に行う。
+    台帳が「静止」と言ったときだけ _quiesced（全走査）で確かめ、食い違えば台帳を全走査で
+    合わせ直して False を返す——静止は評価・再計画の引き金なので、取りこぼしで早まらせない。
+    full=True は台帳そのものを全走査で作り直す（遅い間隔の検算）。"""
+    if full:
+        bus.state_counts(nodes, full=True)
+    if not bus.quiesced_hint(nodes):
+        return False
+    if _quiesced(bus, nodes):
+        return True
+    bus.state_counts(nodes, full=True)
+    return False
+
+
 def pick_claimable(bus: Bus):
     graph = bus.read_graph()
     if not graph:
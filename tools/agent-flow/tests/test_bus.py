@@ -326,6 +326,42 @@ class GitDistributedTests(unittest.TestCase):
         self.assertTrue(ca)
         self.assertFalse(cb)
 
+    def test_pull_pulses_only_the_nodes_it_brought_in(self):
+        # 他クローンの書き込みは pull でしか届かない。HEAD が動いたら差分のノードだけを pulse に載せる
+        a = kf.GitBus(os.path.join(self.clones, "PA"), "run1", remote=self.bare, branch="main")
+        a.write_task({"id": "t0", "goal": "g", "deps": []})
+        a.sync_push("plan")
+        b = kf.GitBus(os.path.join(self.clones, "PB"), "run1", remote=self.bare, branch="main")
+        a.write_result("t1", "nodeA", "done", "ok")
+        a.sync_push("result t1")
+        gen = b.pulse_generation()
+        b.sync_pull()
+        self.assertGreater(b.pulse_generation(), gen)
+        with open(b.pulse_path(), encoding="utf-8") as f:
+            self.assertEqual(f.read().split(), ["t1"])
+        b.sync_pull()                                        # 何も届かなければ世代は進まない
+        self.assertEqual(b.pulse_generation(), gen + len("t1\n"))
+        # pulse はバスに乗らない（作業ツリーの外）
+        tracked = subprocess.run(["git", "ls-files"], cwd=a.workdir, capture_output=True,
+                                 text=True).stdout
+        self.assertNotIn("pulse", tracked)
+
+    def test_status_reports_host_wide_pull_skips(self):
+        # 同じバスフォルダのノードは probe の答えと件数を共有し、status に省けた割合が出る
+        cache = os.path.join(self.clones, kf.PROBE_CACHE_DIR)
+        a = kf.GitBus(os.path.join(self.clones, "SA"), "run1", remote=self.bare, branch="main",
+                      probe_cache=cache)
+        a.write_task({"id": "t0", "goal": "g", "deps": []})
+        a.sync_push("plan")
+        b = kf.GitBus(os.path.join(self.clones, "SB"), "run1", remote=self.bare, branch="main",
+                      probe_cache=cache)
+        a.sync_pull()
+        b.sync_pull()
+        stats = b._transport.host_pull_stats()
+        self.assertEqual((stats["checks"], stats["skipped"]), (2, 2))
+        self.assertIn("skipped=2（100%）", kf.pull_stats_line(b))
+        self.assertEqual(kf.pull_stats_line(kf.Bus(self.root, "run1")), "")
+
     def test_run_over_git_bus_completes(self):
         # orchestrator + worker が各自の独立クローンから git バスへ push/pull して完走
         cmd = [sys.executable, str(SCRIPT), "--bus", self.clones, "--git", self.bare,
@@ -731,6 +767,19 @@ class CleanupTests(unittest.TestCase):
         self.assertEqual(kf.sweep_tmp_files(self.tmp), 0)
         self.assertTrue(os.path.exists(inside))
 
+    def test_sweep_leaves_the_shared_reference_alone(self):
+        # 参照リポジトリは bare（.git を持たない）。一時ファイル掃除もクローン掃除も触らない。
+        ref = os.path.join(self.tmp, kf.REFERENCE_DIR)
+        os.makedirs(os.path.join(ref, "objects", "pack"))
+        inside = os.path.join(ref, "objects", "pack", "tmp_pack.tmp.999999")
+        with open(inside, "w") as f:
+            f.write("x")
+        self._old(inside, 100000)
+        self._old(ref, 100000)
+        self.assertEqual(kf.sweep_tmp_files(self.tmp, min_age_sec=300.0), 0)
+        self.assertEqual(kf.sweep_clone_dirs(self.tmp, keep_basename="", min_age_sec=3600.0), 0)
+        self.assertTrue(os.path.exists(inside))
+
     def test_sweep_lock_unused_old(self):
         # 古くて誰も保持していないロックは消す。新しいロックは残す。
         d = kf._locks_root()
@@ -1371,3 +1420,226 @@ class StateGitSyncTests(unittest.TestCase):
         self.assertFalse(os.path.isdir(os.path.join(sg.clone, ".git")))
         kf.state_sync(args, force=True)                          # 次回同期で健全に作り直す
         self.assertTrue(sg._probe_integrity())
+
+
+class QuiescenceLedgerTests(unittest.TestCase):
+    """pulse（書き込み通知）と状態台帳: 触れたノードだけで _quiesced と同じ答えを出すこと。"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="kf-pulse-")
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.bus = kf.Bus(self.tmp, "run1")
+        self.bus.ensure_run("req")
+        self.nodes = {"a": {"goal": "g", "deps": []},
+                      "b": {"goal": "g", "deps": ["a"]},
+                      "c": {"goal": "g", "deps": ["b"]}}
+        self.bus.write_graph({"nodes": self.nodes, "iteration": 0})
+        for nid, node in self.nodes.items():
+            self.bus.write_task({"id": nid, **node})
+
+    def _wait_rec(self, lease):
+        return {"id": "a", "who": "w", "wait_lease_until": time.time() + lease}
+
+    def test_counts_follow_writes_from_another_bus_instance(self):
+        worker = kf.Bus(self.tmp, "run1")        # 別プロセスの worker に相当
+        self.assertEqual(self.bus.state_counts(self.nodes), {"pending": 3, "ready": 1})
+        self.assertTrue(worker.try_claim("a", "w1", 60))
+        self.assertEqual(self.bus.state_counts(self.nodes), {"pending": 2, "claimed": 1, "ready": 0})
+        worker.release_claim("a", "w1")
+        worker.write_wait("a", self._wait_rec(60))
+        self.assertEqual(self.bus.state_counts(self.nodes)["waiting"], 1)
+        worker.write_result("a", "w1", "done", "ok")
+        worker.clear_wait("a")
+        counts = self.bus.state_counts(self.nodes)
+        self.assertEqual((counts["done"], counts["ready"]), (1, 1))   # b の依存が揃った
+        worker.write_result("b", "w1", "failed", "ng")
+        self.assertTrue(self.bus.quiesced_hint(self.nodes))         # c は依存失敗で静止扱い
+        self.assertTrue(kf._quiesced(self.bus, self.nodes))
+        self.assertEqual(self.bus.retry_failed(), ["b"])
+        self.assertFalse(self.bus.quiesced_hint(self.nodes))
+
+    def test_only_touched_nodes_are_read_again(self):
+        many = {f"n{i}": {"goal": "g", "deps": []} for i in range(50)}
+        for nid, node in many.items():
+            self.bus.write_task({"id": nid, **node})
+        self.bus.state_counts(many)
+        reads = []
+        real = self.bus.node_state
+        with mock.patch.object(self.bus, "node_state", lambda nid: reads.append(nid) or real(nid)):
+            self.assertFalse(self.bus.quiesced_hint(many))
+            self.assertEqual(reads, [])                              # 書き込みが無ければ何も読まない
+            kf.Bus(self.tmp, "run1").write_result("n7", "w", "done", "ok")
+            self.bus.quiesced_hint(many)
+        self.assertEqual(reads, ["n7"])
+
+    def test_missed_pulse_is_corrected_by_the_full_scan(self):
+        self.bus.write_result("a", "w", "done", "ok")
+        self.bus.write_result("b", "w", "done", "ok")
+        self.assertFalse(kf._quiesced_fast(self.bus, self.nodes))
+        # pulse を書かない書き手（旧版の worker 等）が c を終わらせた
+        kf.write_json_atomic(self.bus.result_path("c"), {"id": "c", "status": "done"})
+        self.assertFalse(self.bus.quiesced_hint(self.nodes))         # 台帳はまだ知らない
+        self.assertTrue(kf._quiesced_fast(self.bus, self.nodes, full=True))
+        # 逆向き（台帳は静止と言うが実際は違う）は全走査の確認で止め、台帳を合わせ直す
+        os.remove(self.bus.result_path("c"))
+        self.assertTrue(self.bus.quiesced_hint(self.nodes))
+        self.assertFalse(kf._quiesced_fast(self.bus, self.nodes))
+        self.assertFalse(self.bus.quiesced_hint(self.nodes))
+
+    def test_watch_wakes_on_a_write(self):
+        worker = kf.Bus(self.tmp, "run1")
+        with self.bus.watch_pulse(poll_sec=5.0) as pulse:
+            if pulse.backend != "inotify":
+                self.skipTest("inotify が使えない環境（polling は間隔ごとに起きるだけ）")
+            gen = self.bus.pulse_generation()
+            timer = threading.Timer(0.1, worker.write_result, ("a", "w", "done", "ok"))
+            timer.start()
+            self.addCleanup(timer.cancel)
+            started = time.monotonic()
+            self.assertTrue(pulse.wait(5.0))
+            self.assertLess(time.monotonic() - started, 2.0)
+        self.assertGreater(self.bus.pulse_generation(), gen)
+
+
+class EventReaderTests(unittest.TestCase):
+    """recent_events（末尾からの逆読み＋k-way マージ）と events_since（追記分だけ読む索引）が、
+    全件を読んで ts で安定ソートする all_events と同じ答えを返すこと。"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="kf-events-")
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.bus = kf.Bus(self.tmp, "run1")
+        self.bus.ensure_dirs()
+        self.rng = __import__("random").Random(47)
+        self.clock = {}
+
+    def _append(self, who, n, raw=""):
+        """who のファイルへ n 件追記する。ts は秒単位で、ファイル間・ファイル内で頻繁に並ぶ。"""
+        with open(os.path.join(self.bus.events_dir, f"{who}.jsonl"), "a", encoding="utf-8") as f:
+            for _ in range(n):
+                self.clock[who] = self.clock.get(who, 0) + self.rng.choice((0, 0, 1, 2))
+                minutes, sec = divmod(self.clock[who], 60)
+                rec = {"ts": "2026-10-19T%02d:%02d:%02dZ" % (*divmod(minutes, 60), sec),
+                       "who": who, "kind": "k", "n": self.rng.random(), "pad": "x" * self.rng.randrange(300)}
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.write(raw)
+
+    def _populate(self):
+        for who in ("orch", "worker-1", "worker-2", "heal"):
+            self._append(who, self.rng.randrange(1, 400), raw="\n" if who == "heal" else "")
+        self._append("worker-1", 3, raw="{broken\n")     # 読めない行・空行は読み飛ばす
+        self._append("worker-2", 1, raw='{"ts": "2026-10-19T23:59:59Z", "who": "tail"}')  # 改行なしの末尾
+
+    def test_tail_matches_the_full_sort(self):
+        self._populate()
+        everything = self.bus.all_events()
+        with mock.patch.object(kf, "EVENTS_TAIL_BLOCK", 97):    # 行がブロック境界を跨ぐ
+            for limit in (1, 2, 7, 30, 250, len(everything) - 1, len(everything) + 5, 0):
+                self.assertEqual(self.bus.recent_events(limit), everything[-limit:], limit)
+        self.assertEqual(kf.Bus(self.tmp, "other").recent_events(5), [])
+
+    def test_tail_reads_only_the_end_of_long_files(self):
+        self._append("orch", 5000)
+        self._append("worker-1", 5000)
+        parsed = []
+        real = kf._parse_event_line
+        with mock.patch.object(kf, "_parse_event_line", lambda line: parsed.append(1) or real(line)):
+            evs = kf.Bus(self.tmp, "run1").recent_events(20)    # status / doctor は毎回新しい Bus
+        self.assertEqual(evs, self.bus.all_events()[-20:])
+        self.assertLess(len(parsed), 200)
+
+    def test_out_of_order_file_falls_back_to_the_full_sort(self):
+        self._append("orch", 40)
+        self.clock["orch"] = 0                  # 時計が巻き戻った後も同じファイルへ追記が続く
+        self._append("orch", 3)
+        everything = self.bus.all_events()
+        for limit in (4, 5, 100):               # 逆読みが巻き戻りの境目まで届く件数
+            self.assertEqual(self.bus.recent_events(limit), everything[-limit:])
+        self._populate()
+        everything = self.bus.all_events()
+        self.assertEqual(self.bus.events_since("2026-10-19T00:00:10Z"),
+                         [e for e in everything if e.get("ts", "") > "2026-10-19T00:00:10Z"])
+
+    def test_clock_step_back_keeps_each_file_non_decreasing(self):
+        # 逆読みが届く範囲（末尾 2 行）だけを見ると、手前の 00:30 が最新だと分からない並び
+        clock = iter(["2026-10-19T00:30:00Z", "2026-10-19T00:10:00Z", "2026-10-19T00:11:00Z",
+                      "2026-10-19T00:20:00Z"])
+        with mock.patch.object(kf, "now_iso", lambda: next(clock)):
+            for who in ("a", "a", "a", "b"):
+                self.bus.event(who, "k")
+        with open(os.path.join(self.bus.events_dir, "a.jsonl"), encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([r["ts"] for r in rows], ["2026-10-19T00:30:00Z"] * 3)
+        self.assertEqual([r.get("clock_ts") for r in rows],
+                         [None, "2026-10-19T00:10:00Z", "2026-10-19T00:11:00Z"])
+        everything = self.bus.all_events()
+        self.assertEqual(everything[-1]["ts"], "2026-10-19T00:30:00Z")
+        for limit in (1, 2, 3, 4):
+            self.assertEqual(kf.Bus(self.tmp, "run1").recent_events(limit), everything[-limit:])
+
+    def test_since_reads_only_what_was_appended(self):
+        self._populate()
+        marks = [e["ts"] for e in self.bus.all_events()[::37]] + ["", "2026-10-20T00:00:00Z"]
+        for since in marks:
+            self.assertEqual(self.bus.events_since(since),
+                             [e for e in self.bus.all_events() if e.get("ts", "") > since])
+        last = self.bus.all_events()[-1]["ts"]
+        self._append("orch", 3)
+        parsed = []
+        real = kf._parse_event_line
+        with mock.patch.object(kf, "_parse_event_line", lambda line: parsed.append(1) or real(line)):
+            got = self.bus.events_since(last)
+        self.assertEqual(got, [e for e in self.bus.all_events() if e["ts"] > last])
+        self.assertLess(len(parsed), 20)        # 索引の伸長 3 行＋返す範囲の読み直しだけ
+
+    def test_replaced_file_rebuilds_its_index(self):
+        self._populate()
+        self.bus.events_since("")
+        path = os.path.join(self.bus.events_dir, "orch.jsonl")
+        os.remove(path)                          # run の作り直し・git の checkout で差し替わる
+        self.clock.clear()
+        self._append("orch", 50)
+        self.assertEqual(self.bus.events_since(""), self.bus.all_events())
+        os.remove(path)
+        self.assertEqual(self.bus.events_since(""), self.bus.all_events())
+        self.assertNotIn(path, self.bus._event_index)
+
+
+class ClaimLogBusTests(unittest.TestCase):
+    """AGENT_FLOW_CLAIM_LOG=1 で作った run はノード claim を claims.log（ClaimLog）で持つ。"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="kf-claimlog-")
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        with mock.patch.dict(os.environ, {"AGENT_FLOW_CLAIM_LOG": "1"}):
+            self.bus = kf.Bus(self.tmp, "run1")
+            self.bus.ensure_run("req")
+        self.bus.write_task({"id": "a", "goal": "g", "deps": []})
+
+    def test_node_claims_go_to_the_log(self):
+        other = kf.Bus(self.tmp, "run1")               # 別プロセスの worker に相当
+        self.assertTrue(self.bus.try_claim("a", "w1", 60))
+        self.assertFalse(other.try_claim("a", "w2", 60))
+        self.assertEqual(other.node_state("a"), "claimed")
+        self.assertTrue(self.bus.extend_claim("a", "w1", 120))
+        self.assertFalse(other.extend_claim("a", "w2", 120))
+        self.assertEqual(os.listdir(self.bus.claims_dir), [])   # claims/<node>/ は作らない
+        self.bus.release_claim("a", "w1")
+        self.assertEqual(other.node_state("a"), "pending")
+        self.assertTrue(other.try_claim("a", "w2", 60))
+
+    def test_retry_failed_drops_the_node_claims(self):
+        self.assertTrue(self.bus.try_claim("a", "w1", 60))
+        self.bus.write_graph({"nodes": {"a": {"goal": "g", "deps": []}}, "iteration": 0})
+        self.bus.write_result("a", "w1", "failed", "boom")
+        self.assertEqual(self.bus.retry_failed(), ["a"])
+        self.assertIsNone(kf.Bus(self.tmp, "run1")._winner("a"))
+
+    def test_runs_created_without_the_switch_keep_claim_files(self):
+        bus = kf.Bus(self.tmp, "run2")
+        bus.ensure_run("req")
+        with mock.patch.dict(os.environ, {"AGENT_FLOW_CLAIM_LOG": "1"}):
+            bus.ensure_run("req")                       # 既存 run の方式は後から変わらない
+            self.assertTrue(bus.try_claim("a", "w1", 60))
+        self.assertFalse(os.path.exists(bus.claim_log_path))
+        self.assertEqual(os.listdir(os.path.join(bus.claims_dir, "a")), ["w1.json"])
@@ -243,7 +243,11 @@ class PlanGateOrchestrateTests(unittest.TestCase):
         for nid, n in graph["nodes"].items():
             if nid != "plan-gate-2":
                 self.assertTrue(n["deps"], f"{nid} が新 gate を経ずに root のまま")
-        events = [e for e in bus.recent_events(50) if e.get("kind") == "plan-gate-replan"]
+        # グラフの書き込みとイベントの記録は別の書き込み。orchestrator は書き込みの通知で即座に
+        # 起きるので、グラフだけが見えている瞬間を読まないようイベントの到着も待つ
+        events = self._wait(lambda: [e for e in bus.recent_events(50)
+                                     if e.get("kind") == "plan-gate-replan"],
+                            msg="再計画のイベントが記録されない")
         self.assertTrue(events and events[-1]["attempt"] == 1)
 
         # 差し戻し #2 は max_retries=1 を超過 → [plan-gate] で failed 終端
@@ -32,6 +32,7 @@ _FRAGMENTS = (
     "tuning",
     "control",
     "tmux_util",
+    "procstat",
     "session",
     "sandbox",
     "scheduler",
@@ -43,9 +43,11 @@ from logging.handlers import TimedRotatingFileHandler
 import math
 import os
 import re
+import select
 import shlex
 import shutil
 import signal
+import stat
 import subprocess
 import sys
 import threading
@@ -149,7 +151,7 @@ _AGENTS_DIR = Path.home() / ".kiro" / "agents"
 # inbound webhook 用定数
 # ---------------------------------------------------------------------------
 
-_WEBHOOK_QUEUE_MAX = 100           # name ごとの外部キュー上限（超過は古いものから破棄）
+_WEBHOOK_QUEUE_MAX = 100           # name ごとの外部キュー上限（超過は 429 で断る）
 _WEBHOOK_DEFAULT_HOST = "127.0.0.1"
 _WEBHOOK_DEFAULT_PATH_PREFIX = "/hooks"
 _WEBHOOK_DEFAULT_MAX_BODY = 1_048_576  # 1MB
@@ -734,6 +734,9 @@ def main() -> None:
                 secret=str(webhook_cfg.get("secret", "")),
                 secret_header=webhook_cfg.get("secret_header", "X-Gitlab-Token"),
                 max_body_bytes=int(webhook_cfg.get("max_body_bytes", _WEBHOOK_DEFAULT_MAX_BODY)),
+                max_concurrency=int(webhook_cfg.get("max_concurrency", _WEBHOOK_DEFAULT_CONCURRENCY)),
+                max_pending=int(webhook_cfg.get("max_pending", _WEBHOOK_DEFAULT_MAX_PENDING)),
+                max_connections=int(webhook_cfg.get("max_connections", _WEBHOOK_DEFAULT_MAX_CONNECTIONS)),
             )
             webhook_server.start()
             _webhook_server_ref = webhook_server
@@ -25,6 +25,9 @@ _EFFECTIVE_AGENT_MODEL: "str | None" = None
 # ファイルの最新値ではない——最新値を applied として報告すると、まだ適用していない
 # 設定が dashboard で「反映済み」に見える。
 _REVISION_APPLIED: "int | None" = None
+# status の書き手（パスごと・前回の内容ハッシュを持つ）。本体は内容が変わったときだけ、
+# 心拍 `.beat` は鮮度窓の 1/4 ごとにだけ書く（agentcore.statusdoc）。
+_STATUS_WRITERS: "dict[str, object]" = {}
 
 
 def _utc_iso() -> str:
@@ -141,6 +144,7 @@ def _apply_control_agent(config: dict) -> dict:
 # --- ノード予算（node-budget 契約 v2: トークン一次・時間は v1 互換で AND） ---------------
 # 読取・推定・state は agentcore.nodebudget に集約（C7）。記帳は本ファイルに残す。
 from agentcore import nodebudget as _nodebudget  # noqa: E402
+from agentcore import statusdoc as _statusdoc  # noqa: E402
 
 
 def _node_budget_dir() -> str:
@@ -226,8 +230,12 @@ def _write_stopped_reason(reason: str) -> None:
 def _write_status(lifecycle: str = "run", budget: "dict | None" = None,
                   fresh_after_sec: int = 120, effective_cli: str = "",
                   effective_model: str = "") -> None:
-    """status/<tool>-<pid>.json へ適用状況ハートビートを原子書換する（best-effort）。
-    書けなくても定常業務は止めない。"""
+    """status/<tool>-<pid>.json へ適用状況を、`.beat` へ心拍を原子書換する（best-effort）。
+    書けなくても定常業務は止めない。
+
+    毎 tick 呼ばれるが、本体は `ts` 以外の内容が変わったときだけ書く（`version` を +1）。
+    心拍は fresh_after_sec の 1/4 ごと、心拍を読まない旧い読み手のための本体の時刻の
+    書き直しは fresh_after_sec ごと（dashboard は 3 倍まで許容するので窓内に収まる）。"""
     ctl = _load_control()
     d = os.path.join(_control_dir(), "status")
     try:
@@ -289,9 +297,11 @@ def _write_status(lifecycle: str = "run", budget: "dict | None" = None,
             rec["budget"] = {"exceeded": bool(budget.get("exceeded")),
                              "soft": bool(budget.get("soft"))}
         target = os.path.join(d, f"{_NODE_BUDGET_TOOL}-{os.getpid()}.json")
-        tmp = target + f".tmp.{os.getpid()}"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(rec, f, ensure_ascii=False)
-        os.replace(tmp, target)
+        writer = _STATUS_WRITERS.get(target)
+        if writer is None:
+            writer = _STATUS_WRITERS[target] = _statusdoc.StatusWriter(target, stamp_key="ts")
+        writer.beat_every = fresh_after_sec / 4
+        writer.refresh_every = fresh_after_sec
+        writer.write(rec)
     except OSError:
         pass
@@ -5,6 +5,13 @@ from __future__ import annotations
 # Cron 式パーサー
 # ---------------------------------------------------------------------------
 
+import bisect
+import calendar
+
+_CRON_UPCOMING_COUNT = 8     # 1 回の計算で先読みしておく発火時刻の数
+_CRON_CACHE_MAX = 128        # 先読みを覚えておく式の数（超えたら全部捨てて作り直す）
+
+
 class CronExpression:
     """5フィールド cron 式 (分 時 日 月 曜日) のパーサー。
 
@@ -14,8 +21,15 @@ class CronExpression:
           "0 0 1 * *"     → 毎月1日0:00
 
     DOM と DOW が両方指定された場合は Vixie cron と同じ OR ロジックを使用する。
+
+    次回時刻は「月 → 日 → 時 → 分」の順に、各フィールドの一致する最小値へ直接飛んで
+    求める（1 日ずつ・1 分ずつ進める走査はしない）。スケジューラは検証・発火のたびに
+    式から作り直すので、先読みした直近の発火時刻は式の文字列ごとにクラスで共有する。
     """
 
+    _upcoming: dict[tuple[str, Any], tuple[_dt.datetime, list[_dt.datetime]]] = {}
+    _upcoming_lock = threading.Lock()
+
     def __init__(self, expr: str) -> None:
         self._expr = expr.strip()
         fields = self._expr.split()
@@ -32,6 +46,9 @@ class CronExpression:
         self._dows = {0 if v == 7 else v for v in raw_dows}  # 7 → 0 (日曜)
         self._dom_star = dom_f == "*"
         self._dow_star = dow_f == "*"
+        self._sorted_mins = sorted(self._mins)
+        self._sorted_hours = sorted(self._hours)
+        self._sorted_doms = sorted(self._doms)
 
     def _parse_field(self, field: str, lo: int, hi: int) -> set[int]:
         values: set[int] = set()
@@ -54,6 +71,90 @@ class CronExpression:
 
     def next_run(self, after: _dt.datetime) -> _dt.datetime:
         """after の1分後以降で最初に一致する時刻を返す（秒=0、ローカルタイム基準）。"""
+        key = (self._expr, after.tzinfo)
+        with self._upcoming_lock:
+            cached = self._upcoming.get(key)
+        if cached is not None:
+            anchor, upcoming = cached
+            # 先読みは anchor より後の一致を漏れなく並べたもの。after が anchor 以降で
+            # 列の末尾より前なら、after より後の最初の要素がそのまま答え。
+            if anchor <= after < upcoming[-1]:
+                return upcoming[bisect.bisect_right(upcoming, after)]
+
+        upcoming = []
+        t = after
+        for _ in range(_CRON_UPCOMING_COUNT):
+            try:
+                t = self._next_match(t)
+            except ValueError:
+                if upcoming:
+                    break
+                raise
+            upcoming.append(t)
+        with self._upcoming_lock:
+            if len(self._upcoming) >= _CRON_CACHE_MAX:
+                self._upcoming.clear()
+            self._upcoming[key] = (after, upcoming)
+        return upcoming[0]
+
+    def _next_match(self, after: _dt.datetime) -> _dt.datetime:
+        """after の1分後以降で最初に一致する時刻を、フィールドごとに飛んで求める。"""
+        t = (after + _dt.timedelta(minutes=1)).replace(second=0, microsecond=0)
+        limit = after + _dt.timedelta(days=366 * 4)
+        year, month = t.year, t.month
+        day, hour, minute = t.day, t.hour, t.minute
+
+        while (year, month) <= (limit.year, limit.month):
+            if month in self._months:
+                for d in self._days_in_month(year, month, day):
+                    found = self._time_of_day(hour, minute) if d == day else self._time_of_day(0, 0)
+                    if found is None:
+                        continue
+                    result = t.replace(year=year, month=month, day=d,
+                                       hour=found[0], minute=found[1])
+                    if result > limit:
+                        break
+                    return result
+            month += 1
+            if month > 12:
+                month, year = 1, year + 1
+            day, hour, minute = 1, 0, 0
+
+        raise ValueError(f"次回実行時刻が4年以内に見つかりません: {self._expr!r}")
+
+    def _days_in_month(self, year: int, month: int, first: int) -> list[int]:
+        """year/month の first 日以降で、日・曜日フィールドに一致する日（昇順）。"""
+        last = calendar.monthrange(year, month)[1]
+        if first > last:
+            return []
+        if self._dom_star and self._dow_star:
+            return list(range(first, last + 1))
+        by_dom: set[int] = set()
+        by_dow: set[int] = set()
+        if not self._dom_star:
+            lo = bisect.bisect_left(self._sorted_doms, first)
+            hi = bisect.bisect_right(self._sorted_doms, last)
+            by_dom = set(self._sorted_doms[lo:hi])
+        if not self._dow_star:
+            # 1 日の cron 曜日（Python Mon=0..Sun=6 → cron Sun=0..Sat=6）から各日の曜日を出す。
+            dow_first = (calendar.weekday(year, month, 1) + 1) % 7
+            by_dow = {d for d in range(first, last + 1) if (dow_first + d - 1) % 7 in self._dows}
+        return sorted(by_dom | by_dow)
+
+    def _time_of_day(self, hour: int, minute: int) -> tuple[int, int] | None:
+        """hour:minute 以降でその日のうちに一致する最初の (時, 分)。無ければ None。"""
+        i = bisect.bisect_left(self._sorted_hours, hour)
+        if i < len(self._sorted_hours) and self._sorted_hours[i] == hour:
+            j = bisect.bisect_left(self._sorted_mins, minute)
+            if j < len(self._sorted_mins):
+                return hour, self._sorted_mins[j]
+            i += 1
+        if i < len(self._sorted_hours) and self._sorted_mins:
+            return self._sorted_hours[i], self._sorted_mins[0]
+        return None
+
+    def _next_run_stepwise(self, after: _dt.datetime) -> _dt.datetime:
+        """旧来の逐次走査（照合用）。`_next_match` と同じ答えを返すことをテストが確かめる。"""
         t = (after + _dt.timedelta(minutes=1)).replace(second=0, microsecond=0)
         limit = after + _dt.timedelta(days=366 * 4)
 
@@ -225,6 +225,11 @@ def send_response_path(request_id: str, base_dir: Path | None = None) -> Path:
     return root / f"{request_id}.json"
 
 
+def send_wake_path(request_id: str, base_dir: Path | None = None) -> Path:
+    """`send --wait` の待ち手が眠る FIFO（`.<id>.wake`。*.json の走査には掛からない）。"""
+    return send_response_path(request_id, base_dir).with_name(f".{request_id}.wake")
+
+
 def write_send_response(
     request_id: str,
     status: str,
@@ -250,6 +255,7 @@ def write_send_response(
         "updated_at": time.time(),
     }
     _atomic_write_json(path, data)
+    _ring_wake(send_wake_path(request_id, base_dir), b"r")
     return path
 
 
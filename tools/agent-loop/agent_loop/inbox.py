@@ -5,6 +5,13 @@ from __future__ import annotations
 # エージェント間メッセージ受信ウォッチャー
 # ---------------------------------------------------------------------------
 
+from agentcore import filewatch as _filewatch  # noqa: E402
+
+# 受信箱が空のときの再走査の間隔。到着は inotify で即座に気付くので、これは
+# 通知を取りこぼした場合の保険でしかない（空の受信箱のために頻繁に起きない）。
+_INBOX_IDLE_RESCAN_SECONDS = 300.0
+
+
 class InboxWatcher:
     """エージェント間メッセージ受信スレッド。
 
@@ -12,6 +19,12 @@ class InboxWatcher:
     処理済みアーカイブ: ~/.kiro/agents/<agent_name>/inbox/.processed/
 
     配送は PeriodicScheduler の dispatch gate 経由。tmux 送信成功後に .processed/ へ移動する。
+
+    到着の待ちは agentcore.filewatch（Linux は inotify）。書き終わった `*.json` で即座に
+    起き、受信箱が空なら眠ったままでいる。未配送のメッセージが残っている間だけ
+    `poll_interval` ごとに走査し直す（drain 中・送信失敗で戻ったものはファイルが
+    変わらないので、通知では起きられない）。inotify が使えなければ従来どおり
+    `poll_interval` ごとの polling になる。
     """
 
     def __init__(
@@ -29,6 +42,7 @@ class InboxWatcher:
         self._processed_dir = self._inbox_dir / ".processed"
         self._stop_event = threading.Event()
         self._thread: threading.Thread | None = None
+        self._watcher = None
 
     def start(self) -> None:
         self._inbox_dir.mkdir(parents=True, exist_ok=True)
@@ -43,16 +57,36 @@ class InboxWatcher:
 
     def stop(self) -> None:
         self._stop_event.set()
+        watcher = self._watcher
+        if watcher is not None:
+            watcher.wake()
 
     def _run_loop(self) -> None:
-        while not self._stop_event.wait(self._poll_interval):
-            try:
-                self._check_inbox()
-            except Exception as exc:
-                log.error("[InboxWatcher] ポーリングエラー: %s", exc, exc_info=True)
+        watcher = _filewatch.watch_dir(
+            self._inbox_dir, mask=_filewatch.COMPLETED,
+            match=lambda name: name.endswith(".json"), poll_sec=self._poll_interval)
+        self._watcher = watcher
+        log.debug("[InboxWatcher] 到着の待ち方: %s", watcher.backend)
+        remaining = 0
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    remaining = self._check_inbox()
+                except Exception as exc:
+                    log.error("[InboxWatcher] ポーリングエラー: %s", exc, exc_info=True)
+                if self._stop_event.is_set():
+                    break
+                watcher.wait(self._poll_interval if remaining
+                             else _INBOX_IDLE_RESCAN_SECONDS)
+        finally:
+            self._watcher = None
+            watcher.close()
+
+    def _check_inbox(self) -> int:
+        """受信ボックスの未処理メッセージを走査して enqueue する。
 
-    def _check_inbox(self) -> None:
-        """受信ボックスの未処理メッセージを走査して enqueue する。"""
+        戻り値は受信箱に残っているメッセージ数（配送待ち・保留中を含む）。
+        """
         msg_files = sorted(self._inbox_dir.glob("*.json"))
         for msg_file in msg_files:
             if self._scheduler.has_pending_ack_path(str(msg_file)):
@@ -71,6 +105,7 @@ class InboxWatcher:
                 )
             else:
                 log.debug("[InboxWatcher] メッセージ保留中 (drain/busy): %s", msg_file.name)
+        return len(msg_files)
 
     def _enqueue_message(self, data: dict[str, Any], msg_file: Path) -> bool:
         """Scheduler gate へ投入する。受付できたら True。"""
@@ -295,6 +295,7 @@ def _monitor_loop(
                     "mem_paused": scheduler._mem_paused,
                     "input_recovery": scheduler._input_recovery,
                 },
+                "pane_resources": scheduler.pane_resources(),
             })
         session_mgr.write_state()
 
@@ -0,0 +1,269 @@
+from __future__ import annotations
+# procstat.py — ペインのプロセス資源（親子関係・RSS・CPU）の採取。
+# 単体 import しない。agent_loop/__init__.py が共有名前空間へ順に exec 合成する。
+# ---------------------------------------------------------------------------
+# プロセス表の採取（Linux は /proc を 1 周、それ以外は ps を 1 回）
+# ---------------------------------------------------------------------------
+#
+# health 監視はペインごとに `ps -o rss=` を、kill_process_tree は `ps -eo pid=,ppid=` を
+# fork していた。ペインの多いホストでは tick ごとの fork が CPU プロファイルに出て、
+# tick の間隔を揺らす。Linux では /proc/<pid>/stat を 1 周読めば ppid・utime/stime・RSS が
+# 一度に揃う（statm / status まで開くとファイル数が 3 倍になるだけなので読まない）。
+# 1 回の走査は同じ tick の中で使い回し、ペインごとの RSS / CPU の推移を状態ファイルへ出す。
+# /proc が無い環境（macOS 等）は従来どおり ps に頼るが、呼ぶのは tick あたり 1 回だけ。
+
+_PROC_ROOT = Path("/proc")
+_PROC_SNAPSHOT_MAX_AGE = 1.0   # この秒数以内の走査は使い回す（同じ tick の中の再走査を省く）
+_PANE_RESOURCE_HISTORY = 30    # ペインごとに状態ファイルへ残す採取点の数
+
+try:
+    _PROC_PAGE_KB = os.sysconf("SC_PAGE_SIZE") / 1024.0
+    _PROC_CLK_TCK = float(os.sysconf("SC_CLK_TCK"))
+except (AttributeError, ValueError, OSError):
+    _PROC_PAGE_KB = 4.0
+    _PROC_CLK_TCK = 100.0
+
+
+class ProcessTable:
+    """ある時点のプロセス一覧。pid → (ppid, RSS KB, CPU 秒)。
+
+    RSS / CPU は取れない採取元（ps の代替）では None。`source` は "proc" / "ps"。
+    """
+
+    def __init__(
+        self,
+        entries: dict[int, tuple[int, float | None, float | None]],
+        *,
+        taken_at: float,
+        source: str,
+    ):
+        self.entries = entries
+        self.taken_at = taken_at
+        self.source = source
+        self._children: dict[int, list[int]] | None = None
+
+    def __contains__(self, pid: object) -> bool:
+        return pid in self.entries
+
+    def children(self) -> dict[int, list[int]]:
+        if self._children is None:
+            children: dict[int, list[int]] = {}
+            for pid, (ppid, _rss, _cpu) in self.entries.items():
+                children.setdefault(ppid, []).append(pid)
+            self._children = children
+        return self._children
+
+    def descendants(self, root_pid: int) -> list[int]:
+        """root_pid と子孫 PID を深さ降順で返す（葉から kill するため）。"""
+        children = self.children()
+        depths: dict[int, int] = {root_pid: 0}
+        queue = collections.deque([root_pid])
+        while queue:
+            current = queue.popleft()
+            for child in children.get(current, []):
+                if child in depths:
+                    continue
+                depths[child] = depths[current] + 1
+                queue.append(child)
+        return sorted(depths.keys(), key=lambda p: depths[p], reverse=True)
+
+    def rss_mb(self, pid: int) -> float | None:
+        entry = self.entries.get(pid)
+        if entry is None or entry[1] is None:
+            return None
+        return entry[1] / 1024.0
+
+    def tree_usage(self, root_pid: int) -> tuple[float | None, float | None]:
+        """root_pid 以下の木の (RSS MB 合計, CPU 秒合計)。取れない値は None。"""
+        rss_kb = 0.0
+        cpu_sec = 0.0
+        has_rss = has_cpu = False
+        for pid in self.descendants(root_pid):
+            entry = self.entries.get(pid)
+            if entry is None:
+                continue
+            if entry[1] is not None:
+                rss_kb += entry[1]
+                has_rss = True
+            if entry[2] is not None:
+                cpu_sec += entry[2]
+                has_cpu = True
+        return (rss_kb / 1024.0 if has_rss else None, cpu_sec if has_cpu else None)
+
+
+def _proc_available() -> bool:
+    return sys.platform.startswith("linux") and _PROC_ROOT.is_dir()
+
+
+def _parse_proc_stat(text: str) -> tuple[int, float, float] | None:
+    """/proc/<pid>/stat 1 行から (ppid, RSS KB, CPU 秒)。
+
+    comm は空白や括弧を含みうるので、最後の ')' より後ろを欄として数える
+    （proc(5) の 3 番目 state が先頭。ppid=4, utime=14, stime=15, rss=24）。
+    """
+    _head, sep, rest = text.rpartition(")")
+    if not sep:
+        return None
+    fields = rest.split()
+    if len(fields) < 22:
+        return None
+    try:
+        ppid = int(fields[1])
+        cpu_ticks = int(fields[11]) + int(fields[12])
+        rss_pages = int(fields[21])
+    except ValueError:
+        return None
+    return ppid, rss_pages * _PROC_PAGE_KB, cpu_ticks / _PROC_CLK_TCK
+
+
+def _read_proc_table() -> ProcessTable | None:
+    try:
+        names = os.listdir(_PROC_ROOT)
+    except OSError:
+        return None
+    entries: dict[int, tuple[int, float | None, float | None]] = {}
+    for name in names:
+        if not name.isdigit():
+            continue
+        try:
+            with open(_PROC_ROOT / name / "stat", encoding="utf-8", errors="replace") as fh:
+                parsed = _parse_proc_stat(fh.read())
+        except OSError:
+            continue  # 走査中に終わったプロセス
+        if parsed is not None:
+            entries[int(name)] = parsed
+    return ProcessTable(entries, taken_at=time.monotonic(), source="proc")
+
+
+def _read_ps_table() -> ProcessTable | None:
+    try:
+        result = subprocess.run(
+            ["ps", "-eo", "pid=,ppid=,rss="],
+            capture_output=True, text=True, check=False,
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    entries: dict[int, tuple[int, float | None, float | None]] = {}
+    for line in (result.stdout or "").splitlines():
+        parts = line.split()
+        if len(parts) < 2:
+            continue
+        try:
+            pid, ppid = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        rss: float | None = None
+        if len(parts) >= 3:
+            try:
+                rss = float(parts[2])
+            except ValueError:
+                rss = None
+        entries[pid] = (ppid, rss, None)
+    return ProcessTable(entries, taken_at=time.monotonic(), source="ps")
+
+
+def _process_table() -> ProcessTable | None:
+    """今のプロセス表。/proc があればそれを、無ければ ps を 1 回だけ使う。"""
+    if _proc_available():
+        table = _read_proc_table()
+        if table is not None:
+            return table
+    return _read_ps_table()
+
+
+class PaneResourceSampler:
+    """tick ごとのプロセス表を 1 回だけ取り、ペインごとの RSS / CPU の推移を持つ。
+
+    CPU 使用率は前回の採取からの CPU 秒の増分 / 経過秒。ペインの木全体で数えるので、
+    子プロセスが途中で終わると増分が負になりうる（その回は 0 に丸める）。
+    """
+
+    def __init__(
+        self,
+        *,
+        history: int = _PANE_RESOURCE_HISTORY,
+        max_age: float = _PROC_SNAPSHOT_MAX_AGE,
+    ):
+        self._history_len = max(1, int(history))
+        self._max_age = max(0.0, float(max_age))
+        self._table: ProcessTable | None = None
+        self._history: dict[str, collections.deque[dict[str, Any]]] = {}
+        self._meta: dict[str, dict[str, Any]] = {}
+        self._last_cpu: dict[str, tuple[int, float, float]] = {}  # key → (pid, CPU 秒, 時刻)
+        self._lock = threading.Lock()
+
+    def snapshot(self, *, fresh: bool = False) -> ProcessTable | None:
+        with self._lock:
+            table = self._table
+            if (
+                not fresh
+                and table is not None
+                and time.monotonic() - table.taken_at <= self._max_age
+            ):
+                return table
+        table = _process_table()
+        with self._lock:
+            self._table = table
+        return table
+
+    def sample(
+        self,
+        targets: dict[str, tuple[str, int]],
+        table: ProcessTable | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        """targets（key → (pane_id, root pid)）を採取して推移へ足し、今回の値を返す。
+
+        targets に無い key の推移は捨てる（閉じたペインの履歴を状態ファイルに残さない）。
+        """
+        if table is None:
+            table = self.snapshot()
+        now = time.time()
+        results: dict[str, dict[str, Any]] = {}
+        with self._lock:
+            for key in list(self._history):
+                if key not in targets:
+                    self._history.pop(key, None)
+                    self._meta.pop(key, None)
+                    self._last_cpu.pop(key, None)
+            if table is None:
+                return results
+            for key, (pane_id, pid) in targets.items():
+                if pid not in table:
+                    continue
+                tree_rss, cpu_sec = table.tree_usage(pid)
+                cpu_pct: float | None = None
+                previous = self._last_cpu.get(key)
+                if cpu_sec is not None:
+                    if previous is not None and previous[0] == pid:
+                        elapsed = table.taken_at - previous[2]
+                        if elapsed > 0:
+                            cpu_pct = max(0.0, (cpu_sec - previous[1]) / elapsed * 100.0)
+                    self._last_cpu[key] = (pid, cpu_sec, table.taken_at)
+                point = {
+                    "ts": round(now, 1),
+                    "rss_mb": _round_or_none(table.rss_mb(pid)),
+                    "tree_rss_mb": _round_or_none(tree_rss),
+                    "cpu_pct": _round_or_none(cpu_pct),
+                }
+                history = self._history.get(key)
+                if history is None:
+                    history = collections.deque(maxlen=self._history_len)
+                    self._history[key] = history
+                history.append(point)
+                self._meta[key] = {"pane": pane_id, "pid": pid}
+                results[key] = {**point, "pane": pane_id, "pid": pid}
+        return results
+
+    def history(self) -> dict[str, dict[str, Any]]:
+        """状態ファイル向けの推移（key → {pane, pid, samples}）。"""
+        with self._lock:
+            return {
+                key: {**self._meta.get(key, {}), "samples": list(points)}
+                for key, points in self._history.items()
+            }
+
+
+def _round_or_none(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
@@ -312,6 +312,10 @@ def validate_entries(
     return normalized
 
 
+class ExternalQueueFull(RuntimeError):
+    """外部イベントキューが上限に達している（webhook は 429 を返して送信元に再送させる）。"""
+
+
 class PeriodicScheduler:
     """定期プロンプトのスケジュール管理。唯一の dispatch gate。"""
 
@@ -364,6 +368,9 @@ class PeriodicScheduler:
         }
         self._mem_ok_streak = 0
         self._mem_paused = False
+        # ペインの RSS / CPU の採取（tick ごとに 1 回のプロセス走査）と pane_id → PID の覚え
+        self._pane_sampler = PaneResourceSampler()
+        self._pane_pids: dict[str, int] = {}
         self._preflight_cache: dict[str, tuple[float, Any]] = {}
         # Phase 2A process-local runtime
         self._executions: dict[str, dict[str, Any]] = {}
@@ -1338,7 +1345,12 @@ class PeriodicScheduler:
             }
 
     def enqueue_external(self, name: str, prompt_text: str) -> bool:
-        """外部（webhook 等）から name 宛の完成プロンプトをキューに積む。"""
+        """外部（webhook 等）から name 宛の完成プロンプトをキューに積む。
+
+        メモリ上の deque へ積むだけでディスクには触れない（webhook の 202 はここで返る）。
+        上限に達していれば `ExternalQueueFull`。古いものを黙って捨てるより、送信元に
+        429 を返して再送させる方が取りこぼしが無い。
+        """
         key = _webhook_key(name)
         with self._lock:
             if self._draining:
@@ -1349,8 +1361,9 @@ class PeriodicScheduler:
             q = self._external_queues.setdefault(
                 key, collections.deque(maxlen=_WEBHOOK_QUEUE_MAX))
             if len(q) >= _WEBHOOK_QUEUE_MAX:
-                log.warning("[%s] 外部イベントキューが上限 (%d) に達したため最古を破棄します。",
+                log.warning("[%s] 外部イベントキューが上限 (%d) に達しているため受付を断ります。",
                             entry.get("name", key), _WEBHOOK_QUEUE_MAX)
+                raise ExternalQueueFull(entry.get("name", key))
             q.append(prompt_text)
             return True
 
@@ -2729,17 +2742,45 @@ class PeriodicScheduler:
             else:
                 self._mem_ok_streak = 0
 
+    def sample_pane_resources(self) -> dict[str, dict[str, Any]]:
+        """管理ペインの RSS / CPU を 1 回のプロセス走査で採取する（prompt_id → 今回の値）。
+
+        ペインの PID は pane_id ごとに覚え、走査に居なくなったときだけ tmux へ聞き直す
+        （ペインの数だけ display-message を fork しない）。
+        """
+        sampler = self._pane_sampler
+        with self._session_mgr._lock:
+            items = list(self._session_mgr._panes.items())
+        table = sampler.snapshot()
+        live = {pane_id for _prompt_id, pane_id in items}
+        self._pane_pids = {p: pid for p, pid in self._pane_pids.items() if p in live}
+        targets: dict[str, tuple[str, int]] = {}
+        for prompt_id, pane_id in items:
+            pid = self._pane_pids.get(pane_id)
+            if pid is None or table is None or pid not in table:
+                pid = self._session_mgr.get_pane_pid(pane_id)
+                if pid is None:
+                    self._pane_pids.pop(pane_id, None)
+                    continue
+                self._pane_pids[pane_id] = pid
+            targets[prompt_id] = (pane_id, pid)
+        return sampler.sample(targets, table)
+
+    def pane_resources(self) -> dict[str, dict[str, Any]]:
+        """状態ファイル向けのペイン資源の推移（prompt_id → {pane, pid, samples}）。"""
+        return self._pane_sampler.history()
+
     def check_pane_rss(self) -> None:
+        # 上限も推移の記録（health.pane_resources）も無ければ、プロセス表の走査自体をしない
         max_rss = int(self._health.get("max_pane_rss_mb", 0) or 0)
+        if max_rss <= 0 and not self._health.get("pane_resources", False):
+            return
+        samples = self.sample_pane_resources()
         if max_rss <= 0:
             return
-        with self._session_mgr._lock:
-            items = list(self._session_mgr._panes.items())
-        for prompt_id, pane_id in items:
-            pid = self._session_mgr.get_pane_pid(pane_id)
-            if pid is None:
-                continue
-            rss = _get_process_rss_mb(pid)
+        for prompt_id, sample in samples.items():
+            pane_id = sample["pane"]
+            rss = sample.get("rss_mb")
             if rss is None:
                 continue
             if rss <= max_rss:
@@ -2796,16 +2837,3 @@ def _get_free_memory_mb() -> float | None:
     except Exception:
         return None
     return None
-
-
-def _get_process_rss_mb(pid: int) -> float | None:
-    try:
-        r = subprocess.run(
-            ["ps", "-o", "rss=", "-p", str(pid)],
-            capture_output=True, text=True, check=False,
-        )
-        if r.returncode != 0 or not r.stdout.strip():
-            return None
-        return float(r.stdout.strip()) / 1024.0
-    except Exception:
-        return None
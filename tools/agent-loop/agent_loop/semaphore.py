@@ -287,6 +287,7 @@ class SlotMonitor:
         self._pending: dict[str, dict[str, Any]] = {}
         self._thread: threading.Thread | None = None
         self._stop_event = threading.Event()
+        self._doorbell: "_WakeChannel | None" = None
 
     def track(
         self,
@@ -350,16 +351,49 @@ class SlotMonitor:
 
     def stop(self) -> None:
         self._stop_event.set()
+        doorbell = self._doorbell
+        if doorbell is not None:
+            _ring_wake(doorbell.path)
         if self._thread is not None:
             self._thread.join(timeout=5)
 
-    def _run_loop(self) -> None:
-        while not self._stop_event.wait(self._POLL_INTERVAL):
-            with self._lock:
-                pane_ids = list(self._pending.keys())
+    def _open_doorbell(self) -> None:
+        """turn hook を使う監視が入ったら、その instance の mailbox のドアベルで眠る。
+
+        hook の CLI がイベントを置くと record_turn_hook_event が鳴らすので、完了を
+        _POLL_INTERVAL 待たずに拾える。画面監視の巡回はこれまでどおり続ける。
+        """
+        if self._doorbell is not None:
+            return
+        with self._lock:
+            instance_id = next((str(e["turn_hook"]["instance_id"])
+                                for e in self._pending.values() if e.get("turn_hook")), "")
+        if not instance_id:
+            return
+        try:
+            self._doorbell = _WakeChannel(_turn_hook_wake_path(instance_id))
+        except (OSError, ValueError) as exc:
+            log.debug("turn hook のドアベルを作れません。巡回だけで監視します: %s", exc)
 
-            for pane_id in pane_ids:
-                self._check_pane(pane_id)
+    def _run_loop(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                self._open_doorbell()
+                if self._doorbell is not None and self._doorbell.active:
+                    self._doorbell.wait(self._POLL_INTERVAL)
+                else:
+                    self._stop_event.wait(self._POLL_INTERVAL)
+                if self._stop_event.is_set():
+                    break
+                with self._lock:
+                    pane_ids = list(self._pending.keys())
+
+                for pane_id in pane_ids:
+                    self._check_pane(pane_id)
+        finally:
+            if self._doorbell is not None:
+                self._doorbell.close()
+                self._doorbell = None
 
     def _check_pane(self, pane_id: str) -> None:
         with self._lock:
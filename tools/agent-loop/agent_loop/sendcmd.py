@@ -373,39 +373,224 @@ def _resolve_send_entry_id(prompt_arg: str, prompt_text: str, target: str, cwd:
     return target, prompt_text
 
 
+# ---------------------------------------------------------------------------
+# send --wait: 待ち手と、待ち手の間で共有するペイン観測役
+# ---------------------------------------------------------------------------
+# 待ち手は send-responses/ に FIFO（.<id>.wake）を作って眠る。起こすのは:
+#   - write_send_response（daemon が request の状態を書いたとき。合図 r）
+#   - 共有のペイン観測役（ペイン消失 x / failure_pattern 一致 f / 入力待ちかスロットの busy の変化 c）
+# 観測役は待っている send プロセスの中から flock で 1 つだけ選ばれ、登録
+# （.<id>.watch.json）のあるペインを _SEND_OBSERVE_INTERVAL ごとに list-panes 1 回と
+# ペインごとの capture 1 回で見て回る。待ち手が何人いても tmux への問い合わせはこれだけ。
+# 観測役の待ち手が抜けると、flock で眠っていた次の待ち手の観測スレッドが引き継ぐ。
+# 合図を取りこぼしても _SEND_WAIT_RECHECK ごとに待ち手自身が一度見直す（保険）。
+
+_SEND_OBSERVE_INTERVAL = 0.5
+_SEND_WAIT_RECHECK = 5.0
+
+
+def _send_watch_path(wait_id: str, base_dir: Path | None = None) -> Path:
+    return send_response_path(wait_id, base_dir).with_name(f".{wait_id}.watch.json")
+
+
+def _compile_failure_pattern(pattern: str | None) -> "re.Pattern | None":
+    if not pattern:
+        return None
+    try:
+        return re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    except re.error:
+        return None
+
+
+class _SendWaiter:
+    """send --wait 1 件ぶんの待ち受け（FIFO で眠り、観測役の選出に加わる）。"""
+
+    def __init__(self, wait_id: str, *, base_dir: Path | None = None,
+                 failure_pattern: str | None = None) -> None:
+        self.wait_id = wait_id
+        self.base_dir = base_dir
+        self.failure_pattern = failure_pattern
+        self._root = send_response_path(wait_id, base_dir).parent
+        self._channel: _WakeChannel | None = None
+        self._watch: dict[str, Any] | None = None
+        self._stop = threading.Event()
+
+    def __enter__(self) -> "_SendWaiter":
+        try:
+            self._channel = _WakeChannel(send_wake_path(self.wait_id, self.base_dir))
+        except OSError as exc:
+            log.debug("send --wait の FIFO を作れません。短い間隔で見直します: %s", exc)
+            self._channel = None
+        if self.observed:
+            threading.Thread(target=self._observe, name="send-observer", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        if self._channel is not None:
+            self._channel.close()
+        try:
+            _send_watch_path(self.wait_id, self.base_dir).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    @property
+    def observed(self) -> bool:
+        """共有の観測役と FIFO で待てているか。False なら呼び出し側が毎回自分で見る。"""
+        return self._channel is not None and self._channel.active
+
+    def watch(self, pane_id: str, *, ready: bool = False, profile: Any = None) -> None:
+        """観測役に見てほしいペインを登録する（変わったときだけ書き直す）。"""
+        record: dict[str, Any] = {
+            "pid": os.getpid(),
+            "pane_id": pane_id,
+            "failure_pattern": self.failure_pattern,
+            "ready": bool(ready),
+        }
+        if ready and profile is not None:
+            record["profile"] = {"name": profile.name, "spec": profile.spec}
+        if record == self._watch or not self.observed:
+            return
+        try:
+            _atomic_write_json(_send_watch_path(self.wait_id, self.base_dir), record)
+            self._watch = record
+        except (OSError, TypeError, ValueError) as exc:
+            log.debug("send --wait の観測登録に失敗しました: %s", exc)
+
+    def wait(self, timeout: float) -> bytes:
+        if self._channel is None:
+            time.sleep(max(0.0, min(timeout, _WAKE_FALLBACK_INTERVAL)))
+            return b""
+        return self._channel.wait(min(timeout, _SEND_WAIT_RECHECK))
+
+    def _observe(self) -> None:
+        try:
+            fd = os.open(self._root / ".observer.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        except OSError:
+            return
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)      # 今の観測役が抜けるまでここで眠る
+            if self._stop.is_set():
+                return
+            observer = _PaneObserver(self._root)
+            while not self._stop.wait(_SEND_OBSERVE_INTERVAL):
+                observer.tick()
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+class _PaneObserver:
+    """登録されたペインをまとめて見て、該当する待ち手だけを起こす。"""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._ready: dict[str, tuple[bool, bool]] = {}     # wait_id → (入力待ち, スロット busy)
+        self._profiles: dict[str, CliProfile] = {}
+
+    def _profile(self, spec: Any) -> CliProfile:
+        if not isinstance(spec, dict):
+            return _CLI_PROFILE
+        key = json.dumps(spec, sort_keys=True, ensure_ascii=False, default=str)
+        profile = self._profiles.get(key)
+        if profile is None:
+            profile = self._profiles[key] = CliProfile(str(spec.get("name") or "kiro"),
+                                                       spec.get("spec"))
+        return profile
+
+    def _watches(self) -> dict[str, dict[str, Any]]:
+        watches: dict[str, dict[str, Any]] = {}
+        for path in self.root.glob(".*.watch.json"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                pid = int(data.get("pid") or 0)
+                if pid > 0:
+                    os.kill(pid, 0)
+            except ProcessLookupError:
+                path.unlink(missing_ok=True)     # 待ち手が落ちた登録
+                continue
+            except (OSError, ValueError, TypeError, AttributeError):
+                continue
+            if isinstance(data, dict) and data.get("pane_id"):
+                watches[path.name[1:-len(".watch.json")]] = data
+        return watches
+
+    def tick(self) -> None:
+        watches = self._watches()
+        self._ready = {k: v for k, v in self._ready.items() if k in watches}
+        if not watches:
+            return
+        try:
+            r = _tmux_cmd("list-panes", "-a", "-F", "#{pane_id}\t#{pane_dead}")
+        except (RuntimeError, OSError):
+            return
+        alive = set()
+        if r.returncode == 0:
+            for line in r.stdout.splitlines():
+                pane, _, dead = line.partition("\t")
+                if dead != "1":
+                    alive.add(pane)
+        contents: dict[str, str] = {}
+        for wait_id, watch in watches.items():
+            pane = str(watch["pane_id"])
+            if pane not in alive:
+                _ring_wake(send_wake_path(wait_id, self.root), b"x")
+                continue
+            fail_re = _compile_failure_pattern(watch.get("failure_pattern"))
+            if fail_re is None and not watch.get("ready"):
+                continue
+            if pane not in contents:
+                contents[pane] = _capture_pane(pane)
+            content = contents[pane]
+            if fail_re is not None and fail_re.search(content):
+                _ring_wake(send_wake_path(wait_id, self.root), b"f")
+                continue
+            if watch.get("ready"):
+                # 完了はプロンプトが戻り、かつスロットが解放されたとき。プロンプトが先に戻って
+                # スロットの解放が後から来ると画面は変わらないので、busy の変化も合図する。
+                ready = (self._profile(watch.get("profile")).is_ready(content),
+                         _pane_is_busy(pane))
+                if self._ready.get(wait_id) != ready:
+                    self._ready[wait_id] = ready
+                    _ring_wake(send_wake_path(wait_id, self.root), b"c")
+
+
 def _wait_for_pane_completion(
     pane_id: str,
     *,
     response_timeout: float,
     failure_pattern: str | None,
 ) -> int:
-    """busy→ready を待つ。0=ready, 1=death/failure, 2=timeout。"""
+    """busy→ready を待つ。0=ready, 1=death/failure, 2=timeout。
+
+    ペインを見るのは最初と、観測役に起こされたとき（入力待ち・スロットの busy の変化、消失、
+    失敗表示）と、
+    _SEND_WAIT_RECHECK ごとの見直しだけ。
+    """
     deadline = time.time() + max(response_timeout, 1.0)
     saw_busy = False
-    fail_re = None
-    if failure_pattern:
-        try:
-            fail_re = re.compile(failure_pattern, re.IGNORECASE | re.MULTILINE)
-        except re.error:
-            fail_re = None
-
-    while time.time() < deadline:
-        # pane 生存
-        r = _tmux_cmd("display-message", "-p", "-t", pane_id, "#{pane_id}")
-        if r.returncode != 0:
-            print(f"[agent-loop] ERROR: ペイン {pane_id} が終了しました", file=sys.stderr)
-            return 1
-        content = _capture_pane(pane_id)
-        if fail_re is not None and fail_re.search(content):
-            print("[agent-loop] ERROR: failure_pattern に一致しました", file=sys.stderr)
-            return 1
-        busy_slot = _pane_is_busy(pane_id)
-        ready = _pane_has_prompt(content)
-        if busy_slot or not ready:
-            saw_busy = True
-        elif saw_busy and ready:
-            return 0
-        time.sleep(0.5)
+    fail_re = _compile_failure_pattern(failure_pattern)
+
+    with _SendWaiter(f"pane-{uuid.uuid4().hex}", failure_pattern=failure_pattern) as waiter:
+        waiter.watch(pane_id, ready=True, profile=_CLI_PROFILE)
+        while time.time() < deadline:
+            # pane 生存
+            r = _tmux_cmd("display-message", "-p", "-t", pane_id, "#{pane_id}")
+            if r.returncode != 0:
+                print(f"[agent-loop] ERROR: ペイン {pane_id} が終了しました", file=sys.stderr)
+                return 1
+            content = _capture_pane(pane_id)
+            if fail_re is not None and fail_re.search(content):
+                print("[agent-loop] ERROR: failure_pattern に一致しました", file=sys.stderr)
+                return 1
+            busy_slot = _pane_is_busy(pane_id)
+            ready = _pane_has_prompt(content)
+            if busy_slot or not ready:
+                saw_busy = True
+            elif saw_busy and ready:
+                return 0
+            waiter.wait(max(0.0, deadline - time.time()))
 
     print(f"[agent-loop] ERROR: response_timeout ({int(response_timeout)}秒) を超過しました", file=sys.stderr)
     return 2
@@ -418,37 +603,44 @@ def _wait_for_send_completion(
     failure_pattern: str | None,
     base_dir: Path | None = None,
 ) -> int:
-    """自分のrequest状態だけを待つ。0=完了、1=失敗、2=timeout。"""
-    deadline = time.time() + max(response_timeout, 1.0)
-    fail_re = None
-    if failure_pattern:
-        try:
-            fail_re = re.compile(failure_pattern, re.IGNORECASE | re.MULTILINE)
-        except re.error:
-            pass
+    """自分のrequest状態だけを待つ。0=完了、1=失敗、2=timeout。
 
-    while time.time() < deadline:
-        response = read_send_response(request_id, base_dir)
-        if response is None:
-            time.sleep(0.2)
-            continue
-        status = str(response.get("status", ""))
-        pane_id = str(response.get("pane_id") or "")
-        if status == "failed":
-            remove_send_response(request_id, base_dir)
-            return 1
-        if status == "completed":
-            remove_send_response(request_id, base_dir)
-            return 0
-        if status == "processing" and pane_id:
-            if fail_re is not None and fail_re.search(_capture_pane(pane_id)):
-                remove_send_response(request_id, base_dir)
-                return 1
-            alive = _tmux_cmd("display-message", "-p", "-t", pane_id, "#{pane_id}")
-            if alive.returncode != 0:
-                remove_send_response(request_id, base_dir)
-                return 1
-        time.sleep(0.2)
+    状態ファイルは daemon が書いた合図（r）で読み直す。ペインの消失と failure_pattern は
+    共有の観測役が見て合図する。r だけで起きたときは tmux に問い合わせない。
+    """
+    deadline = time.time() + max(response_timeout, 1.0)
+    fail_re = _compile_failure_pattern(failure_pattern)
+
+    with _SendWaiter(request_id, base_dir=base_dir,
+                     failure_pattern=failure_pattern if fail_re is not None else None) as waiter:
+        look_at_pane = True
+        while True:
+            now = time.time()
+            if now >= deadline:
+                break
+            response = read_send_response(request_id, base_dir)
+            if response is not None:
+                status = str(response.get("status", ""))
+                pane_id = str(response.get("pane_id") or "")
+                if status == "failed":
+                    remove_send_response(request_id, base_dir)
+                    return 1
+                if status == "completed":
+                    remove_send_response(request_id, base_dir)
+                    return 0
+                if status == "processing" and pane_id:
+                    waiter.watch(pane_id)
+                    if look_at_pane or not waiter.observed:
+                        if fail_re is not None and fail_re.search(_capture_pane(pane_id)):
+                            remove_send_response(request_id, base_dir)
+                            return 1
+                        alive = _tmux_cmd("display-message", "-p", "-t", pane_id, "#{pane_id}")
+                        if alive.returncode != 0:
+                            remove_send_response(request_id, base_dir)
+                            return 1
+            signals = waiter.wait(deadline - now)
+            # 状態の書き換え（r）だけならペインは見に行かない。観測役の合図と見直しでは見る。
+            look_at_pane = not signals or bool(set(signals) - set(b"r"))
 
     remove_send_response(request_id, base_dir)
     print(f"[agent-loop] ERROR: response_timeout ({int(response_timeout)}秒) を超過しました", file=sys.stderr)
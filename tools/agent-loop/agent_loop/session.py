@@ -823,36 +823,15 @@ class SessionManager:
 
     @staticmethod
     def _enumerate_descendant_pids(root_pid: int) -> list[int]:
-        """ps から root_pid と子孫 PID を深さ降順で列挙する（葉から kill する）。"""
-        result = subprocess.run(
-            ["ps", "-eo", "pid=", "ppid="],
-            capture_output=True, text=True, check=False,
-        )
-        if result.returncode != 0:
-            return [root_pid]
-        children: dict[int, list[int]] = {}
-        for line in (result.stdout or "").splitlines():
-            parts = line.split()
-            if len(parts) != 2:
-                continue
-            try:
-                pid, ppid = int(parts[0]), int(parts[1])
-            except ValueError:
-                continue
-            children.setdefault(ppid, []).append(pid)
-
-        depths: dict[int, int] = {root_pid: 0}
-        queue = [root_pid]
-        while queue:
-            current = queue.pop(0)
-            for child in children.get(current, []):
-                if child in depths:
-                    continue
-                depths[child] = depths[current] + 1
-                queue.append(child)
+        """root_pid と子孫 PID を深さ降順で列挙する（葉から kill する）。
 
-        ordered = sorted(depths.keys(), key=lambda p: depths[p], reverse=True)
-        return ordered
+        kill の直前に子が増えていることがあるので、tick のキャッシュは使わず毎回取り直す
+        （Linux は /proc を 1 周、それ以外は ps を 1 回）。
+        """
+        table = _process_table()
+        if table is None:
+            return [root_pid]
+        return table.descendants(root_pid)
 
     @staticmethod
     def _signal_pids(pids: list[int], sig: signal.Signals) -> None:
@@ -256,6 +256,10 @@ def _turn_hook_id(value: Any) -> str:
     return value
 
 
+def _turn_hook_wake_path(instance_id: str) -> Path:
+    return _TURN_HOOKS_DIR / _turn_hook_id(instance_id) / "wake"
+
+
 def _turn_hook_paths(instance_id: str, pane_id: str, dispatch_id: str = ""):
     root = _TURN_HOOKS_DIR / _turn_hook_id(instance_id)
     active = root / "active" / f"{_turn_hook_id(pane_id)}.json"
@@ -362,7 +366,7 @@ def record_turn_hook_event(*, adapter: str, status: str,
             instance_id, pane_id, str(active["dispatch_id"]),
         )
         assert event_path is not None
-        return _create_private_json(event_path, {
+        created = _create_private_json(event_path, {
             "version": 1,
             "instance_id": instance_id,
             "pane_id": pane_id,
@@ -373,6 +377,10 @@ def record_turn_hook_event(*, adapter: str, status: str,
             "native_event": str(native_event),
             "occurred_at": time.time(),
         })
+        if created:
+            # daemon の SlotMonitor が眠っていれば起こす（次の巡回を待たせない）
+            _ring_wake(_turn_hook_wake_path(instance_id), b"h")
+        return created
     except (KeyError, OSError, ValueError, TypeError, json.JSONDecodeError):
         return False
 
@@ -469,3 +477,105 @@ def clear_turn_hook_pane(instance_id: str, pane_id: str) -> None:
             clear_turn_hook(instance_id, pane_id, dispatch_id)
     except (OSError, ValueError, TypeError, json.JSONDecodeError):
         pass
+
+
+# ---------------------------------------------------------------------------
+# mailbox のドアベル（名前付きパイプ）
+# ---------------------------------------------------------------------------
+# mailbox（turn-hook の events/、send-responses/）はファイルを置くだけなので、待つ側は
+# 読みに行く周期ぶん遅れ、待つ数だけ読み直しが増える。そこで待つ側が FIFO を 1 本作って
+# select で眠り、書く側はファイルを置いたあと FIFO へ 1 バイト書いて起こす。
+# 合図は「見に来い」だけで、内容はこれまでどおりファイルから読む（合図を取りこぼしても
+# 次に読めば同じ結果になる）。mkfifo の無い環境では短い sleep に戻る。
+
+_WAKE_FALLBACK_INTERVAL = 0.2
+
+
+class _WakeChannel:
+    """FIFO 1 本ぶんの受け手。wait() で起こされるか timeout まで眠る。"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._rfd: int | None = None
+        self._wfd: int | None = None
+        if not hasattr(os, "mkfifo"):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+        try:
+            self.path.unlink()          # 前回落ちた受け手の残骸
+        except FileNotFoundError:
+            pass
+        os.mkfifo(self.path, 0o600)
+        self._rfd = os.open(self.path, os.O_RDONLY | os.O_NONBLOCK)
+        # 自分でも書き口を持っておく。書き手が 1 つも無いと、読み口は一度書かれて閉じられた
+        # あと EOF で即座に「読める」になり、select が眠らなくなる。
+        self._wfd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+
+    @property
+    def active(self) -> bool:
+        """FIFO で待てているか（False なら wait は短い sleep）。"""
+        return self._rfd is not None
+
+    def wait(self, timeout: float) -> bytes:
+        """起こされるまで眠り、受け取った合図（1 バイトずつ）を返す。timeout なら b""。"""
+        timeout = max(0.0, float(timeout))
+        if self._rfd is None:
+            time.sleep(min(timeout, _WAKE_FALLBACK_INTERVAL))
+            return b""
+        try:
+            ready, _, _ = select.select([self._rfd], [], [], timeout)
+        except (OSError, ValueError):
+            return b""
+        if not ready:
+            return b""
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self._rfd, 4096)
+            except BlockingIOError:
+                break
+            except OSError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def close(self) -> None:
+        for fd in (self._rfd, self._wfd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        if self._rfd is not None:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+        self._rfd = self._wfd = None
+
+    def __enter__(self) -> "_WakeChannel":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+def _ring_wake(path: Path, signal_byte: bytes = b".") -> bool:
+    """path で待っている _WakeChannel を起こす。待ち手がいなければ何もしない。"""
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:
+        return False            # ENOENT: 誰も待っていない / ENXIO: 読み手が閉じた
+    try:
+        if not stat.S_ISFIFO(os.fstat(fd).st_mode):
+            return False
+        os.write(fd, signal_byte)
+        return True
+    except BlockingIOError:
+        return True             # パイプが満杯 = 起こす合図はもう溜まっている
+    except OSError:
+        return False
+    finally:
+        os.close(fd)
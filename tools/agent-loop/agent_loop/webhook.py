@@ -4,6 +4,16 @@ from __future__ import annotations
 # ---------------------------------------------------------------------------
 # inbound webhook サーバ（provider 非依存）
 # ---------------------------------------------------------------------------
+import asyncio
+import concurrent.futures
+
+_WEBHOOK_DEFAULT_CONCURRENCY = 4        # hook を同時に走らせるワーカー数
+_WEBHOOK_DEFAULT_MAX_PENDING = 64       # hook の処理待ち上限（超過は 429）
+_WEBHOOK_DEFAULT_MAX_CONNECTIONS = 256  # 同時接続の上限（超過は 429 を返して閉じる）
+_WEBHOOK_READ_TIMEOUT = 10.0            # ヘッダ・ボディを読み切るまでの上限（秒）
+_WEBHOOK_HEADER_LIMIT = 64 * 1024       # 要求行＋ヘッダの上限（超過は 431）
+_WEBHOOK_DRAIN_MAX = 1_048_576          # 413 の前に読み捨てる超過分の上限
+_WEBHOOK_RETRY_AFTER = 1                # 429 の Retry-After（秒。ほぼ 1 tick でドレインされる）
 
 class _SafeDict(dict):
     """str.format_map 用。未定義キーは `{key}` のまま残し KeyError を出さない。"""
@@ -33,11 +43,26 @@ class WebhookServer:
     `POST <path_prefix>/<name>` を受け、<name> を PeriodicScheduler のエントリに
     解決し、hook（provider 固有）で payload を辞書化、エントリの prompt テンプレートへ
     注入して外部キューへ積む。GitLab 等の送信元固有知識はコアに持たない。
+
+    受信は専用スレッドの asyncio ループ 1 本で行う（接続ごとにスレッドを立てない）。
+    遅いクライアントや CI の一斉送信があっても、待たされるのはそのクライアントだけで、
+    ほかの受付とキューへの積み込みは止まらない。
+
+    - hook の無いルートはループの上でそのまま処理して 202 を返す（速い受付。
+      メモリ上のキューへ積むだけでディスクを待たない）
+    - hook のあるルートは `max_concurrency` 本のワーカースレッドで処理する。処理待ちが
+      `max_pending` を超えたら、ワーカーを待たずに 429 を返す
+    - 外部キューが満杯（`ExternalQueueFull`）・接続数が `max_connections` を超えたときも
+      429（`Retry-After` 付き）。送信元の再送に任せ、受信側で溜め込まない
     """
 
     def __init__(self, scheduler: PeriodicScheduler, host: str, port: int,
                  path_prefix: str, secret: str, secret_header: str | None,
-                 max_body_bytes: int) -> None:
+                 max_body_bytes: int,
+                 max_concurrency: int = _WEBHOOK_DEFAULT_CONCURRENCY,
+                 max_pending: int = _WEBHOOK_DEFAULT_MAX_PENDING,
+                 max_connections: int = _WEBHOOK_DEFAULT_MAX_CONNECTIONS,
+                 read_timeout: float = _WEBHOOK_READ_TIMEOUT) -> None:
         self._scheduler = scheduler
         self._host = host
         self._port = port
@@ -45,40 +70,229 @@ class WebhookServer:
         self._secret = secret or ""
         self._secret_header = (secret_header or "").lower()
         self._max_body = max_body_bytes
-        self._httpd: http.server.ThreadingHTTPServer | None = None
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._max_pending = max(self._max_concurrency, int(max_pending))
+        self._max_connections = max(1, int(max_connections))
+        self._read_timeout = max(0.1, float(read_timeout))
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._executor: concurrent.futures.ThreadPoolExecutor | None = None
         self._thread: threading.Thread | None = None
+        # 以下はループのスレッドだけが触る（ロック不要）。
+        self._connections = 0
+        self._pending_hooks = 0
 
     @property
     def port(self) -> int:
         return self._port
 
     def start(self) -> None:
-        handler_cls = self._make_handler()
-        try:
-            self._httpd = http.server.ThreadingHTTPServer((self._host, self._port), handler_cls)
-        except OSError as exc:
-            log.warning("[WebhookServer] 起動に失敗しました (%s:%s): %s。webhook を無効化して継続します。",
-                        self._host, self._port, exc)
-            self._httpd = None
-            return
-        self._port = int(self._httpd.server_address[1])
-        self._httpd.daemon_threads = True
+        ready = threading.Event()
+        failure: list[BaseException] = []
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self._max_concurrency, thread_name_prefix="webhook-hook")
         self._thread = threading.Thread(
-            target=self._httpd.serve_forever, name="webhook-server", daemon=True)
+            target=self._run_loop, args=(ready, failure), name="webhook-server", daemon=True)
         self._thread.start()
+        ready.wait()
+        if failure:
+            log.warning("[WebhookServer] 起動に失敗しました (%s:%s): %s。webhook を無効化して継続します。",
+                        self._host, self._port, failure[0])
+            self._thread.join(timeout=5)
+            self._thread = None
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            return
         log.info("[WebhookServer] 起動しました: http://%s:%s%s/<name>",
                  self._host, self._port, self._path_prefix)
         if not self._secret:
             log.warning("[WebhookServer] secret 未設定です。共有シークレット検証をスキップします（開発用）。")
 
+    def _run_loop(self, ready: threading.Event, failure: list[BaseException]) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            try:
+                self._server = loop.run_until_complete(asyncio.start_server(
+                    self._serve_connection, self._host, self._port,
+                    limit=_WEBHOOK_HEADER_LIMIT))
+            except OSError as exc:
+                failure.append(exc)
+                return
+            self._port = int(self._server.sockets[0].getsockname()[1])
+            self._loop = loop
+            ready.set()
+            loop.run_forever()
+            self._server.close()
+            # 読み途中の接続は待たずに打ち切る（停止は daemon の終了経路から呼ばれる）。
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(self._server.wait_closed())
+        finally:
+            ready.set()
+            self._loop = None
+            loop.close()
+
     def stop(self) -> None:
-        if self._httpd is not None:
+        loop, thread = self._loop, self._thread
+        if loop is not None:
             try:
-                self._httpd.shutdown()
-                self._httpd.server_close()
-            except Exception as exc:
+                loop.call_soon_threadsafe(loop.stop)
+            except RuntimeError as exc:
                 log.debug("[WebhookServer] 停止時エラー: %s", exc)
-            self._httpd = None
+        if thread is not None:
+            thread.join(timeout=5)
+        self._thread = None
+        self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    # -- 接続処理（asyncio） ----------------------------------------------------
+
+    async def _serve_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        if self._connections >= self._max_connections:
+            await self._reply(writer, 429, "too many connections", close=True)
+            writer.close()
+            return
+        self._connections += 1
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"),
+                                                  self._read_timeout)
+                except asyncio.LimitOverrunError:
+                    await self._reply(writer, 431, "request header too large", close=True)
+                    return
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return     # 切断・黙ったままのクライアント（ほかの接続は待たせない）
+                request = self._parse_head(head)
+                if request is None:
+                    await self._reply(writer, 400, "bad request", close=True)
+                    return
+                method, target, headers, keep_alive = request
+                status, msg, close = await self._handle(reader, method, target, headers)
+                keep_alive = keep_alive and not close
+                await self._reply(writer, status, msg, close=not keep_alive)
+        except ConnectionError:
+            pass
+        finally:
+            self._connections -= 1
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    def _parse_head(head: bytes) -> tuple[str, str, dict[str, str], bool] | None:
+        """要求行とヘッダを読む。(method, target, 小文字ヘッダ, keep-alive) か None。"""
+        try:
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            return None
+        if not version.startswith("HTTP/1."):
+            return None
+        headers: dict[str, str] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            key, sep, value = line.partition(":")
+            if not sep:
+                return None
+            headers[key.strip().lower()] = value.strip()
+        connection = headers.get("connection", "").lower()
+        keep_alive = (connection != "close") if version == "HTTP/1.1" else (connection == "keep-alive")
+        return method.upper(), target, headers, keep_alive
+
+    async def _handle(self, reader: asyncio.StreamReader, method: str, target: str,
+                      headers: dict[str, str]) -> tuple[int, str, bool]:
+        """1 要求を処理して (status, message, 接続を閉じるか) を返す。"""
+        parsed = urllib.parse.urlparse(target)
+        if method == "GET":
+            if parsed.path.rstrip("/") == self._path_prefix + "/_health":
+                return 200, "ok", False
+            return 405, "method not allowed", False
+        if method != "POST":
+            return 405, "method not allowed", False
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            return 411, "length required", True
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            return 400, "bad content-length", True
+        if length < 0:
+            return 400, "bad content-length", True
+        if length > self._max_body:
+            # 上限の少し先までは読み捨ててから断る（未読のまま閉じると RST で 413 が届かない）。
+            if length - self._max_body <= _WEBHOOK_DRAIN_MAX:
+                try:
+                    await asyncio.wait_for(reader.readexactly(length), self._read_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    pass
+            return 413, "payload too large", True
+        try:
+            raw = await asyncio.wait_for(reader.readexactly(length), self._read_timeout) \
+                if length > 0 else b""
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return 400, "incomplete body", True
+        name = self._route_name(parsed.path)
+        if name is None:
+            return 404, "not found", False
+        query = {k: (v[0] if len(v) == 1 else v)
+                 for k, v in urllib.parse.parse_qs(parsed.query).items()}
+        route = self._scheduler.resolve_webhook_route(name)
+        if route is None:
+            return 404, "unknown webhook route", False
+        if not route.get("hook"):
+            status, msg = self._process_route(name, route, "POST", headers, query, raw)
+            return status, msg, False
+        if self._pending_hooks >= self._max_pending:
+            return 429, "busy", False
+        self._pending_hooks += 1
+        try:
+            loop = asyncio.get_running_loop()
+            status, msg = await loop.run_in_executor(
+                self._executor, self._process_route, name, route, "POST", headers, query, raw)
+        finally:
+            self._pending_hooks -= 1
+        return status, msg, False
+
+    def _route_name(self, path: str) -> str | None:
+        path = path.rstrip("/")
+        prefix = self._path_prefix
+        if not path.startswith(prefix + "/"):
+            return None
+        name = path[len(prefix) + 1:]
+        if not name or "/" in name:
+            return None
+        return name
+
+    @staticmethod
+    async def _reply(writer: asyncio.StreamWriter, code: int, msg: str, *, close: bool) -> None:
+        body = msg.encode("utf-8")
+        try:
+            reason = http.HTTPStatus(code).phrase
+        except ValueError:
+            reason = ""
+        lines = [
+            f"HTTP/1.1 {code} {reason}",
+            "Content-Type: text/plain; charset=utf-8",
+            f"Content-Length: {len(body)}",
+        ]
+        if code == 429:
+            lines.append(f"Retry-After: {_WEBHOOK_RETRY_AFTER}")
+        if close:
+            lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
 
     # -- 受信処理（provider 非依存） -----------------------------------------
 
@@ -88,7 +302,12 @@ class WebhookServer:
         route = self._scheduler.resolve_webhook_route(name)
         if route is None:
             return 404, "unknown webhook route"
+        return self._process_route(name, route, method, headers, query, raw)
 
+    def _process_route(self, name: str, route: dict[str, Any], method: str,
+                       headers: dict[str, str], query: dict[str, Any],
+                       raw: bytes) -> tuple[int, str]:
+        """解決済みルートの認証→hook→テンプレート注入→enqueue。"""
         # 汎用共有シークレット検証（照合ヘッダ名は可変）。
         if self._secret or route.get("secret"):
             expected = route.get("secret") or self._secret
@@ -117,8 +336,11 @@ class WebhookServer:
             log.error("[WebhookServer] テンプレート注入エラー (%s): %s", name, exc, exc_info=True)
             return 500, "template error"
 
-        if not self._scheduler.enqueue_external(route["name"], prompt_text):
-            return 404, "route vanished"
+        try:
+            if not self._scheduler.enqueue_external(route["name"], prompt_text):
+                return 404, "route vanished"
+        except ExternalQueueFull:
+            return 429, "queue full"
         return 202, "accepted"
 
     def _invoke_hook(self, route: dict[str, Any], ctx: _WebhookContext) -> dict[str, Any] | None:
@@ -150,64 +372,3 @@ class WebhookServer:
         except (json.JSONDecodeError, UnicodeDecodeError):
             return {}
         return data if isinstance(data, dict) else {"_root": data}
-
-    def _make_handler(self) -> type:
-        server = self
-
-        class Handler(http.server.BaseHTTPRequestHandler):
-            protocol_version = "HTTP/1.1"
-
-            def log_message(self, *args: Any) -> None:  # noqa: D401 - stderr ノイズ抑制
-                pass
-
-            def _reply(self, code: int, msg: str) -> None:
-                body = msg.encode("utf-8")
-                self.send_response(code)
-                self.send_header("Content-Type", "text/plain; charset=utf-8")
-                self.send_header("Content-Length", str(len(body)))
-                self.end_headers()
-                try:
-                    self.wfile.write(body)
-                except Exception:
-                    pass
-
-            def _route_name(self) -> str | None:
-                parsed = urllib.parse.urlparse(self.path)
-                path = parsed.path.rstrip("/")
-                prefix = server._path_prefix
-                if not path.startswith(prefix + "/"):
-                    return None
-                name = path[len(prefix) + 1:]
-                if not name or "/" in name:
-                    return None
-                return name
-
-            def do_GET(self) -> None:
-                parsed = urllib.parse.urlparse(self.path)
-                if parsed.path.rstrip("/") == server._path_prefix + "/_health":
-                    self._reply(200, "ok")
-                else:
-                    self._reply(405, "method not allowed")
-
-            def do_POST(self) -> None:
-                name = self._route_name()
-                if name is None:
-                    self._reply(404, "not found")
-                    return
-                try:
-                    length = int(self.headers.get("Content-Length", "0"))
-                except ValueError:
-                    length = 0
-                if length > server._max_body:
-                    self._reply(413, "payload too large")
-                    return
-                raw = self.rfile.read(length) if length > 0 else b""
-                parsed = urllib.parse.urlparse(self.path)
-                query = {k: (v[0] if len(v) == 1 else v)
-                         for k, v in urllib.parse.parse_qs(parsed.query).items()}
-                headers = {k.lower(): v for k, v in self.headers.items()}
-                status, msg = server._process(name, "POST", headers, query, raw)
-                self._reply(status, msg)
-
-        return Handler
-
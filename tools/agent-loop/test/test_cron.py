@@ -0,0 +1,116 @@
+"""CronExpression の次回時刻計算のテスト。
+
+フィールドごとに飛ぶ計算（`_next_match`）と先読みキャッシュ（`next_run`）が、
+旧来の逐次走査（`_next_run_stepwise`）と同じ答えを返すことを乱数の式で確かめる。
+"""
+import datetime as dt
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import agent_loop as al  # noqa: E402
+
+
+def _random_field(rng: random.Random, lo: int, hi: int) -> str:
+    kind = rng.choice(["star", "star", "value", "range", "step", "list", "range_step"])
+    if kind == "star":
+        return "*"
+    if kind == "value":
+        return str(rng.randint(lo, hi))
+    if kind == "range":
+        a = rng.randint(lo, hi)
+        return f"{a}-{rng.randint(a, hi)}"
+    if kind == "step":
+        return f"*/{rng.randint(2, max(2, (hi - lo) // 2))}"
+    if kind == "list":
+        return ",".join(str(v) for v in sorted(rng.sample(range(lo, hi + 1), rng.randint(2, 4))))
+    a = rng.randint(lo, hi)
+    return f"{a}-{rng.randint(a, hi)}/{rng.randint(2, 5)}"
+
+
+def _random_expr(rng: random.Random) -> str:
+    return " ".join([
+        _random_field(rng, 0, 59),
+        _random_field(rng, 0, 23),
+        _random_field(rng, 1, 31),
+        _random_field(rng, 1, 12),
+        _random_field(rng, 0, 7),
+    ])
+
+
+def _random_moment(rng: random.Random) -> dt.datetime:
+    start = dt.datetime(2023, 1, 1)
+    return start + dt.timedelta(seconds=rng.randint(0, 4 * 366 * 86400))
+
+
+def _outcome(fn, after):
+    try:
+        return fn(after)
+    except ValueError:
+        return "ValueError"
+
+
+class CronClosedFormTests(unittest.TestCase):
+    def setUp(self):
+        al.CronExpression._upcoming.clear()
+
+    def test_matches_stepwise_on_random_expressions(self):
+        rng = random.Random(20261019)
+        for _ in range(400):
+            expr = _random_expr(rng)
+            cron = al.CronExpression(expr)
+            after = _random_moment(rng)
+            with self.subTest(expr=expr, after=after):
+                self.assertEqual(_outcome(cron._next_match, after),
+                                 _outcome(cron._next_run_stepwise, after))
+
+    def test_cached_sequence_matches_stepwise(self):
+        rng = random.Random(7)
+        for _ in range(60):
+            expr = _random_expr(rng)
+            cron = al.CronExpression(expr)
+            after = _random_moment(rng)
+            with self.subTest(expr=expr, after=after):
+                for _step in range(12):
+                    expected = _outcome(cron._next_run_stepwise, after)
+                    self.assertEqual(_outcome(al.CronExpression(expr).next_run, after), expected)
+                    if expected == "ValueError":
+                        break
+                    # 発火直後と、発火の途中（秒付き）の両方から問い直す
+                    after = expected + dt.timedelta(seconds=rng.choice([0, 0, 30]))
+
+    def test_sparse_expressions(self):
+        cases = {
+            "0 0 29 2 *": (dt.datetime(2025, 3, 1), dt.datetime(2028, 2, 29)),
+            "30 6 13 * 5": (dt.datetime(2026, 10, 19, 7), dt.datetime(2026, 10, 23, 6, 30)),
+            "0 12 1 1 *": (dt.datetime(2026, 1, 1, 12), dt.datetime(2027, 1, 1, 12)),
+            "59 23 31 12 *": (dt.datetime(2026, 12, 31, 23, 59), dt.datetime(2027, 12, 31, 23, 59)),
+        }
+        for expr, (after, expected) in cases.items():
+            with self.subTest(expr=expr):
+                self.assertEqual(al.CronExpression(expr).next_run(after), expected)
+
+    def test_impossible_date_raises(self):
+        with self.assertRaises(ValueError):
+            al.CronExpression("0 0 30 2 *").next_run(dt.datetime(2026, 1, 1))
+
+    def test_aware_datetime_keeps_tzinfo(self):
+        tz = dt.timezone(dt.timedelta(hours=9))
+        after = dt.datetime(2026, 10, 19, 8, 59, 30, tzinfo=tz)
+        nxt = al.CronExpression("0 9 * * 1-5").next_run(after)
+        self.assertEqual(nxt, dt.datetime(2026, 10, 19, 9, 0, tzinfo=tz))
+        self.assertEqual(nxt.utcoffset(), dt.timedelta(hours=9))
+
+    def test_upcoming_cache_is_shared_between_instances(self):
+        after = dt.datetime(2026, 10, 19, 9, 0)
+        al.CronExpression("*/15 * * * *").next_run(after)
+        fresh = al.CronExpression("*/15 * * * *")
+        fresh._next_match = None   # 先読みの範囲内なら計算し直さない
+        self.assertEqual(fresh.next_run(after + dt.timedelta(minutes=20)),
+                         dt.datetime(2026, 10, 19, 9, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,8 @@
 import os
 import sys
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
 from types import SimpleNamespace
@@ -85,5 +87,47 @@ class InboxDispatchTests(unittest.TestCase):
         on_complete.assert_called_once_with()
 
 
+class InboxArrivalLatencyTests(unittest.TestCase):
+    """受信箱へ書かれてから enqueue されるまでの遅れ（inotify / polling の両方）。"""
+
+    def _arrival_latency(self, backend: str, poll_interval: float) -> float:
+        scheduler = mock.Mock()
+        scheduler.has_pending_ack_path.return_value = False
+        enqueued = threading.Event()
+        scheduler.enqueue_request.side_effect = lambda req: enqueued.set() or True
+        original = al._filewatch.watch_dir
+
+        def pinned(*args, **kwargs):
+            kwargs["backend"] = backend
+            return original(*args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(al, "_AGENTS_DIR", Path(tmp)), \
+             mock.patch.object(al._filewatch, "watch_dir", pinned):
+            watcher = al.InboxWatcher("agent-a", mock.Mock(), scheduler,
+                                      poll_interval=poll_interval)
+            watcher.start()
+            try:
+                time.sleep(0.2)   # 初回走査を終えて待ちに入るのを待つ
+                written = time.monotonic()
+                (Path(tmp) / "agent-a" / "inbox" / "1_m1.json").write_text(
+                    '{"id": "m1", "from": "agent-b", "body": "hi"}', encoding="utf-8")
+                self.assertTrue(enqueued.wait(poll_interval + 2.0))
+                return time.monotonic() - written
+            finally:
+                watcher.stop()
+                watcher._thread.join(2.0)
+                self.assertFalse(watcher._thread.is_alive(), "stop で待ちから即座に抜ける")
+
+    @unittest.skipUnless(al._filewatch.inotify_available(), "inotify が使えない環境")
+    def test_inotify_delivers_without_waiting_for_the_interval(self):
+        latency = self._arrival_latency("inotify", poll_interval=30)
+        self.assertLess(latency, 0.5, f"inotify の遅れ {latency * 1000:.1f}ms")
+
+    def test_polling_fallback_still_delivers(self):
+        latency = self._arrival_latency("poll", poll_interval=0.5)
+        self.assertLess(latency, 1.5, f"polling の遅れ {latency * 1000:.1f}ms")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -188,6 +188,35 @@ class ControlLifecycleTests(unittest.TestCase):
         self.assertEqual(rec["effective"]["selection_source"], "control-workload")
         self.assertTrue(rec["effective"]["restart_required"])
 
+    def test_idle_hour_writes_drop_by_an_order_of_magnitude(self):
+        # 1 秒 tick を 1 時間ぶん回す。従来は毎 tick 本体を書き直していた（3600 回）。
+        clock = [0.0]
+        writes = []
+        real_write = al._statusdoc._write_atomic
+
+        def counting_write(path, data, indent):
+            writes.append(os.path.basename(path))
+            real_write(path, data, indent)
+
+        with mock.patch.object(al._statusdoc, "_write_atomic", counting_write), \
+                mock.patch.object(al._statusdoc.time, "monotonic", lambda: clock[0]):
+            for tick in range(3600):
+                clock[0] = float(tick)
+                al._write_status(lifecycle="pause" if tick == 1800 else "run")
+        target = f"agent-loop-{os.getpid()}"
+        documents = writes.count(target + ".json")
+        self.assertLessEqual(len(writes), 3600 // 10)
+        self.assertLessEqual(documents, 3600 // 120 + 3)   # 旧い読み手向けの時刻の書き直し＋変化 2 回
+        self.assertGreaterEqual(writes.count(target + ".beat"), 3600 // 30)
+
+        status_dir = os.path.join(self.dir, "status")
+        with open(os.path.join(status_dir, target + ".json"), encoding="utf-8") as f:
+            doc = json.load(f)
+        self.assertEqual(doc["version"], 3)                # 初回・pause・run に戻った回
+        merged = al._statusdoc.read_status(os.path.join(status_dir, target + ".json"))
+        with open(os.path.join(status_dir, target + ".beat"), encoding="utf-8") as f:
+            self.assertEqual(merged["ts"], max(doc["ts"], json.load(f)["ts"]))
+
     def test_stopped_reason_is_recorded(self):
         al._write_stopped_reason("node-budget")
         path = al._STATE_DIR / f"stopped-{os.getpid()}.json"
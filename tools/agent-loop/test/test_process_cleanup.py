@@ -31,7 +31,10 @@ class ProcessCleanupTests(unittest.TestCase):
 
     def test_enumerate_descendants_depth_order(self):
         ps_output = "  100   1\n  200 100\n  300 200\n"
-        with mock.patch.object(al.subprocess, "run", return_value=mock.Mock(returncode=0, stdout=ps_output)):
+        with (
+            mock.patch.object(al, "_proc_available", return_value=False),
+            mock.patch.object(al.subprocess, "run", return_value=mock.Mock(returncode=0, stdout=ps_output)),
+        ):
             ordered = al.SessionManager._enumerate_descendant_pids(100)
         self.assertEqual(ordered, [300, 200, 100])
 
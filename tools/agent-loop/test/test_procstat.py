@@ -0,0 +1,170 @@
+"""/proc 1 周のプロセス表と、それに載せたペイン資源の採取のテスト。
+
+偽の /proc（<pid>/stat だけを置いたディレクトリ）を `_PROC_ROOT` に差し込み、
+fork（ps / tmux）を呼ばずに木・RSS・CPU が取れることを確かめる。
+"""
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import agent_loop as al  # noqa: E402
+
+
+def _stat_line(pid: int, comm: str, ppid: int, utime: int, stime: int, rss_pages: int) -> str:
+    # proc(5): pid (comm) state ppid pgrp session tty tpgid flags minflt cminflt majflt
+    # cmajflt utime stime cutime cstime priority nice threads itrealvalue starttime vsize rss
+    fields = ["S", str(ppid)] + ["0"] * 9 + [str(utime), str(stime)] + ["0"] * 8 + [str(rss_pages)]
+    return f"{pid} ({comm}) " + " ".join(fields) + "\n"
+
+
+class _FakeProc:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def put(self, pid: int, ppid: int, *, comm: str = "sh", utime: int = 0, stime: int = 0,
+            rss_pages: int = 0) -> None:
+        directory = self.root / str(pid)
+        directory.mkdir(exist_ok=True)
+        (directory / "stat").write_text(
+            _stat_line(pid, comm, ppid, utime, stime, rss_pages), encoding="utf-8")
+
+
+class _FakeProcCase(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.proc = _FakeProc(Path(tmp.name))
+        (Path(tmp.name) / "self").mkdir()   # 数字でない項目は読み飛ばす
+        for patcher in (
+            mock.patch.object(al, "_PROC_ROOT", Path(tmp.name)),
+            mock.patch.object(al, "_proc_available", return_value=True),
+            mock.patch.object(al, "_PROC_PAGE_KB", 4.0),
+            mock.patch.object(al, "_PROC_CLK_TCK", 100.0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.run_mock = mock.patch.object(al.subprocess, "run").start()
+        self.addCleanup(mock.patch.stopall)
+
+
+class ProcessTableTests(_FakeProcCase):
+    def test_descendants_from_one_proc_pass_without_fork(self):
+        self.proc.put(100, 1)
+        self.proc.put(200, 100, comm="kiro cli (main)")   # 空白と括弧を含む comm
+        self.proc.put(300, 200)
+        self.proc.put(400, 1)
+        ordered = al.SessionManager._enumerate_descendant_pids(100)
+        self.assertEqual(ordered, [300, 200, 100])
+        self.run_mock.assert_not_called()
+
+    def test_tree_usage_sums_rss_and_cpu(self):
+        self.proc.put(100, 1, utime=50, stime=50, rss_pages=256)      # 1MB, 1 秒
+        self.proc.put(200, 100, utime=100, stime=100, rss_pages=512)  # 2MB, 2 秒
+        table = al._process_table()
+        self.assertEqual(table.source, "proc")
+        self.assertAlmostEqual(table.rss_mb(100), 1.0)
+        self.assertEqual(table.tree_usage(100), (3.0, 3.0))
+
+    def test_ps_fallback_off_linux(self):
+        self.run_mock.return_value = mock.Mock(returncode=0, stdout="  100 1 2048\n  200 100 1024\n")
+        with mock.patch.object(al, "_proc_available", return_value=False):
+            table = al._process_table()
+        self.assertEqual(table.source, "ps")
+        self.assertEqual(table.tree_usage(100), (3.0, None))
+        self.run_mock.assert_called_once()
+
+
+class PaneResourceSamplerTests(_FakeProcCase):
+    def _scheduler(self, panes: dict) -> "al.PeriodicScheduler":
+        session = mock.Mock()
+        session._lock = threading.Lock()
+        session._panes = panes
+        session.get_pane_pid.side_effect = lambda pane_id: {"%1": 100, "%2": 500}.get(pane_id)
+        scheduler = al.PeriodicScheduler.__new__(al.PeriodicScheduler)
+        scheduler._session_mgr = session
+        scheduler._health = {}
+        scheduler._pane_sampler = al.PaneResourceSampler()
+        scheduler._pane_pids = {}
+        return scheduler
+
+    def test_cpu_percent_and_history_across_ticks(self):
+        scheduler = self._scheduler({"p1": "%1"})
+        self.proc.put(100, 1, utime=0, rss_pages=256)
+        clock = [10.0]
+        with mock.patch.object(al.time, "monotonic", side_effect=lambda: clock[0]):
+            first = scheduler.sample_pane_resources()
+            self.proc.put(100, 1, utime=100, rss_pages=512)   # 2 秒で CPU 1 秒 = 50%
+            clock[0] = 12.0
+            second = scheduler.sample_pane_resources()
+        self.assertIsNone(first["p1"]["cpu_pct"], "初回は比べる相手がない")
+        self.assertEqual(second["p1"]["cpu_pct"], 50.0)
+        self.assertEqual(second["p1"]["rss_mb"], 2.0)
+        history = scheduler.pane_resources()["p1"]
+        self.assertEqual(history["pane"], "%1")
+        self.assertEqual([s["rss_mb"] for s in history["samples"]], [1.0, 2.0])
+
+    def test_pane_pid_is_cached_and_closed_panes_are_forgotten(self):
+        panes = {"p1": "%1", "p2": "%2"}
+        scheduler = self._scheduler(panes)
+        self.proc.put(100, 1)
+        self.proc.put(500, 1)
+        clock = [10.0]
+        with mock.patch.object(al.time, "monotonic", side_effect=lambda: clock[0]):
+            scheduler.sample_pane_resources()
+            clock[0] = 12.0
+            scheduler.sample_pane_resources()
+            self.assertEqual(scheduler._session_mgr.get_pane_pid.call_count, 2,
+                             "PID は pane ごとに 1 回だけ聞く")
+            del panes["p2"]
+            clock[0] = 14.0
+            scheduler.sample_pane_resources()
+        self.assertEqual(set(scheduler.pane_resources()), {"p1"})
+
+    def test_nothing_is_sampled_without_a_limit(self):
+        scheduler = self._scheduler({"p1": "%1"})
+        self.proc.put(100, 1)
+        for health in ({}, {"max_pane_rss_mb": 0}):
+            scheduler._health = health
+            with mock.patch.object(al, "_read_proc_table", wraps=al._read_proc_table) as read:
+                scheduler.check_pane_rss()
+            read.assert_not_called()
+        scheduler._session_mgr.get_pane_pid.assert_not_called()
+        self.assertEqual(scheduler.pane_resources(), {})
+
+    def test_history_is_kept_without_a_limit_when_asked(self):
+        scheduler = self._scheduler({"p1": "%1"})
+        scheduler._health = {"max_pane_rss_mb": 0, "pane_resources": True}
+        self.proc.put(100, 1, rss_pages=256)
+        scheduler.check_pane_rss()
+        self.assertEqual([s["rss_mb"] for s in scheduler.pane_resources()["p1"]["samples"]], [1.0])
+        scheduler._session_mgr.restart_pane.assert_not_called()
+
+    def test_snapshot_is_reused_within_a_tick(self):
+        sampler = al.PaneResourceSampler(max_age=1.0)
+        self.proc.put(100, 1)
+        with mock.patch.object(al, "_read_proc_table", wraps=al._read_proc_table) as read:
+            sampler.snapshot()
+            sampler.snapshot()
+            sampler.snapshot(fresh=True)
+        self.assertEqual(read.call_count, 2)
+
+    def test_check_pane_rss_restarts_ready_pane_over_limit(self):
+        scheduler = self._scheduler({"p1": "%1"})
+        scheduler._health = {"max_pane_rss_mb": 1}
+        self.proc.put(100, 1, rss_pages=1024)   # 4MB
+        with (
+            mock.patch.object(al, "_capture_pane", return_value=""),
+            mock.patch.object(al._CLI_PROFILE, "is_ready", return_value=True),
+        ):
+            scheduler.check_pane_rss()
+        scheduler._session_mgr.restart_pane.assert_called_once_with("p1")
+        self.run_mock.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
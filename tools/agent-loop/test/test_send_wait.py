@@ -1,8 +1,12 @@
 #!/usr/bin/env python3
 """send --wait exit codes（request 単位の完了状態）。"""
+import json
 import os
 import sys
+import subprocess
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
 from types import SimpleNamespace
@@ -82,5 +86,147 @@ class SendWaitTests(unittest.TestCase):
         self.assertEqual(code, 0)
 
 
+class _FakeTmux:
+    """list-panes / display-message / capture-pane だけを演じる tmux。呼ばれ方を数える。"""
+
+    def __init__(self, panes):
+        self.alive = set(panes)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, capture=True):
+        with self._lock:
+            self.calls.append(args[0])
+            alive = set(self.alive)
+        if args[0] == "list-panes":
+            out = "".join(f"{pane}\t0\n" for pane in sorted(alive))
+            return subprocess.CompletedProcess(args, 0, out, "")
+        target = args[args.index("-t") + 1]
+        code = 0 if target in alive else 1
+        return subprocess.CompletedProcess(args, code, "> \n" if code == 0 else "", "")
+
+    def count(self, verb):
+        with self._lock:
+            return self.calls.count(verb)
+
+
+class SendWaitWakeupTests(unittest.TestCase):
+    """待ち手は FIFO で眠り、状態の書き込みと共有の観測役に起こされる。"""
+
+    def _wait_in_thread(self, request_id, root, timeout=30):
+        result = {}
+
+        def run():
+            started = time.monotonic()
+            result["code"] = al._wait_for_send_completion(
+                request_id, response_timeout=timeout, failure_pattern=None, base_dir=root)
+            result["ended"] = time.monotonic()
+            result["started"] = started
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread, result
+
+    def _until(self, predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not predicate() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return predicate()
+
+    def test_response_write_wakes_the_waiter_immediately(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            al.write_send_response("mine", "queued", base_dir=root)
+            reads = []
+            real_read = al.read_send_response
+
+            def counted(request_id, base_dir=None):
+                if threading.current_thread() is not threading.main_thread():
+                    reads.append(request_id)
+                return real_read(request_id, base_dir)
+
+            with mock.patch.object(al, "read_send_response", counted):
+                thread, result = self._wait_in_thread("mine", root)
+                self.assertTrue(self._until(lambda: al.send_wake_path("mine", root).exists()))
+                time.sleep(0.6)                 # 旧実装なら 3 回は読み直している
+                written = time.monotonic()
+                al.write_send_response("mine", "completed", base_dir=root)
+                thread.join(5)
+
+        self.assertEqual(result["code"], 0)
+        self.assertLess(result["ended"] - written, 0.15)
+        self.assertLessEqual(len(reads), 2, "眠っている間は状態ファイルを読み直さない")
+
+    def test_status_rewrites_do_not_touch_tmux(self):
+        tmux = _FakeTmux({"%1"})
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(al, "_tmux_cmd", tmux):
+            root = Path(tmp)
+            al.write_send_response("mine", "processing", pane_id="%1", base_dir=root)
+            thread, result = self._wait_in_thread("mine", root)
+            self.assertTrue(self._until(lambda: tmux.count("display-message") == 1))
+            for step in range(5):
+                al.write_send_response("mine", "processing", pane_id="%1", step=step,
+                                       base_dir=root)
+                time.sleep(0.02)
+            al.write_send_response("mine", "completed", base_dir=root)
+            thread.join(5)
+
+        self.assertEqual(result["code"], 0)
+        self.assertEqual(tmux.count("display-message"), 1)
+
+    def test_one_observer_serves_all_waiters_and_reports_pane_death(self):
+        tmux = _FakeTmux({"%1", "%2"})
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(al, "_tmux_cmd", tmux), \
+             mock.patch.object(al, "_capture_pane", return_value="> "):
+            root = Path(tmp)
+            al.write_send_response("a", "processing", pane_id="%1", base_dir=root)
+            al.write_send_response("b", "processing", pane_id="%2", base_dir=root)
+            thread_a, result_a = self._wait_in_thread("a", root)
+            thread_b, result_b = self._wait_in_thread("b", root)
+            self.assertTrue(self._until(lambda: tmux.count("list-panes") >= 1))
+            before = tmux.count("list-panes")
+            time.sleep(1.6)
+            ticks = tmux.count("list-panes") - before
+            # 観測役は 1 つ（0.5 秒ごとに 1 回）。待ち手ごとに見ていれば倍になる。
+            self.assertLessEqual(ticks, 4)
+            self.assertGreaterEqual(ticks, 2)
+
+            with tmux._lock:
+                tmux.alive.discard("%1")
+            died = time.monotonic()
+            thread_a.join(5)
+            self.assertEqual(result_a["code"], 1)
+            self.assertLess(result_a["ended"] - died, 1.5)
+            self.assertTrue(thread_b.is_alive(), "他の待ち手は起こさない")
+
+            al.write_send_response("b", "completed", base_dir=root)
+            thread_b.join(5)
+            self.assertEqual(result_b["code"], 0)
+            self.assertFalse(list(root.glob(".*.watch.json")))
+            self.assertFalse(list(root.glob(".*.wake")))
+
+    def test_observer_reports_slot_release_to_pane_waiters(self):
+        # プロンプトは先に戻っていて、スロットの解放だけが後から来る（画面は変わらない）
+        busy = [True]
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(al, "_tmux_cmd", _FakeTmux({"%1"})), \
+             mock.patch.object(al, "_capture_pane", return_value="> "), \
+             mock.patch.object(al, "_pane_is_busy", lambda pane_id: busy[0]):
+            root = Path(tmp)
+            (root / ".w.watch.json").write_text(
+                json.dumps({"pid": os.getpid(), "pane_id": "%1", "ready": True}), encoding="utf-8")
+            with al._WakeChannel(al.send_wake_path("w", root)) as channel:
+                observer = al._PaneObserver(root)
+                observer.tick()
+                self.assertEqual(channel.wait(0), b"c")
+                observer.tick()
+                self.assertEqual(channel.wait(0), b"", "変化が無ければ起こさない")
+                busy[0] = False
+                observer.tick()
+                self.assertEqual(channel.wait(0), b"c")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -261,6 +261,48 @@ class TurnHookMailboxTest(unittest.TestCase):
         failure.assert_called_once_with()
         complete.assert_not_called()
 
+    def test_hook_event_wakes_the_sleeping_monitor(self):
+        semaphore = mock.Mock()
+        completed = al.threading.Event()
+        hook = {
+            "instance_id": "instance-1",
+            "dispatch_id": "dispatch-1",
+            "generation": 3,
+            "agent_cli": "claude",
+            "hook_token": "secret",
+        }
+        env = {
+            "AGENT_LOOP_INSTANCE_ID": "instance-1",
+            "AGENT_LOOP_HOOK_TOKEN": "secret",
+            "AGENT_LOOP_AGENT_CLI": "claude",
+            "TMUX_PANE": "%7",
+        }
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(al, "_TURN_HOOKS_DIR", Path(tmp)), \
+             mock.patch.object(al.SlotMonitor, "_POLL_INTERVAL", 30.0), \
+             mock.patch.object(al.subprocess, "run") as run:
+            monitor = al.SlotMonitor(semaphore)
+            monitor.track("%7", on_complete=completed.set, turn_hook=hook)
+            monitor.start()
+            try:
+                wake = al._turn_hook_wake_path("instance-1")
+                for _ in range(500):
+                    if wake.exists():
+                        break
+                    al.time.sleep(0.01)
+                with mock.patch.dict(os.environ, env):
+                    self.assertTrue(al.record_turn_hook_event(
+                        adapter="claude", status="complete", native_event="Stop",
+                    ))
+                # 巡回間隔（30 秒）を待たずに完了する
+                self.assertTrue(completed.wait(2.0))
+            finally:
+                monitor.stop()
+            self.assertFalse(wake.exists())
+
+        semaphore.release.assert_called_once_with("%7")
+        run.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,8 +2,10 @@
 """WebhookServer の実 HTTP E2E（標準ライブラリのみ）。"""
 from __future__ import annotations
 
+import http.client
 import json
 import os
+import socket
 import sys
 import threading
 import time
@@ -19,6 +21,7 @@ import agent_loop as al  # noqa: E402
 class _FakeScheduler:
     def __init__(self, route=None):
         self.route = route
+        self.full = False
         self.enqueued: list[tuple[str, str]] = []
         self._hook_cache = {}
         self._hook_cache_lock = threading.Lock()
@@ -29,6 +32,8 @@ class _FakeScheduler:
         return dict(self.route)
 
     def enqueue_external(self, name: str, prompt_text: str) -> bool:
+        if self.full:
+            raise al.ExternalQueueFull(name)
         self.enqueued.append((name, prompt_text))
         return True
 
@@ -134,6 +139,93 @@ class WebhookHttpE2ETests(unittest.TestCase):
         self.assertIn("ignored", body)
         self.assertEqual(self.scheduler.enqueued, [])
 
+    def test_queue_full_429_with_retry_after(self):
+        self.scheduler.full = True
+        req = urllib.request.Request(self._url("/demo"), data=b'{"x":1}',
+                                     headers={"X-Token": "s3cret"}, method="POST")
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(req, timeout=2)
+        self.assertEqual(cm.exception.code, 429)
+        self.assertEqual(cm.exception.headers.get("Retry-After"), "1")
+
+    def test_keep_alive_serves_several_requests_on_one_connection(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=2)
+        self.addCleanup(conn.close)
+        for i in range(3):
+            conn.request("POST", f"{self.prefix}/demo", body=json.dumps({"x": i}),
+                         headers={"X-Token": "s3cret"})
+            res = conn.getresponse()
+            self.assertEqual((res.status, res.read()), (202, b"accepted"))
+        self.assertEqual([t for _n, t in self.scheduler.enqueued], ["got 0", "got 1", "got 2"])
+
+    def test_slow_client_does_not_block_others(self):
+        slow = socket.create_connection(("127.0.0.1", self.port), timeout=2)
+        self.addCleanup(slow.close)
+        slow.sendall(b"POST /hooks/demo HTTP/1.1\r\nHost: x\r\n")   # ヘッダを書きかけて黙る
+        started = time.monotonic()
+        code, _ = self._post("/demo", b'{"x":"fast"}', headers={"X-Token": "s3cret"})
+        self.assertEqual(code, 202)
+        self.assertLess(time.monotonic() - started, 0.5)
+
+
+class WebhookBackpressureTests(unittest.TestCase):
+    """hook の処理待ちが上限を超えたら、ワーカーを待たずに 429 を返す。"""
+
+    def test_busy_hooks_are_refused_without_waiting(self):
+        release = threading.Event()
+        scheduler = _FakeScheduler({"name": "demo", "prompt_template": "got {x}",
+                                    "hook": "/nonexistent/hook.py", "secret": "",
+                                    "secret_header": None})
+        server = al.WebhookServer(scheduler=scheduler, host="127.0.0.1", port=0,
+                                  path_prefix="/hooks", secret="", secret_header=None,
+                                  max_body_bytes=1024, max_concurrency=1, max_pending=1)
+
+        def slow_hook(route, ctx):
+            release.wait(5)
+            return {"x": ctx.payload.get("x")}
+
+        with mock.patch.object(server, "_invoke_hook", side_effect=slow_hook):
+            server.start()
+            self.addCleanup(server.stop)
+            url = f"http://127.0.0.1:{server.port}/hooks/demo"
+            results: list[int] = []
+
+            def post(x):
+                req = urllib.request.Request(url, data=json.dumps({"x": x}).encode(), method="POST")
+                try:
+                    with urllib.request.urlopen(req, timeout=5) as resp:
+                        results.append(resp.status)
+                except urllib.error.HTTPError as exc:
+                    results.append(exc.code)
+
+            first = threading.Thread(target=post, args=(1,))
+            first.start()
+            deadline = time.monotonic() + 2
+            while server._pending_hooks < 1 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            started = time.monotonic()
+            post(2)
+            self.assertEqual(results, [429], "処理待ちが上限なので即 429")
+            self.assertLess(time.monotonic() - started, 0.5)
+            release.set()
+            first.join(5)
+        self.assertEqual(sorted(results), [202, 429])
+        self.assertEqual(scheduler.enqueued, [("demo", "got 1")])
+
+
+class SchedulerExternalQueueTests(unittest.TestCase):
+    def test_full_queue_raises_instead_of_dropping(self):
+        s = al.PeriodicScheduler.__new__(al.PeriodicScheduler)
+        s._lock = threading.Lock()
+        s._draining = False
+        s._entries = [{"id": "e1", "name": "demo", "webhook": {}}]
+        s._external_queues = {}
+        for i in range(al._WEBHOOK_QUEUE_MAX):
+            self.assertTrue(s.enqueue_external("demo", f"p{i}"))
+        with self.assertRaises(al.ExternalQueueFull):
+            s.enqueue_external("demo", "overflow")
+        self.assertEqual(s._external_queues["demo"][0], "p0", "古いものは捨てない")
+
 
 if __name__ == "__main__":
     unittest.main()
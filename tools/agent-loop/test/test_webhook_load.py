@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""webhook 受信の負荷テスト（標準ライブラリのみ）。
+
+asyncio の受信（現行）と、置き換える前の `ThreadingHTTPServer` 実装（比較用にここで
+再現する）へ同じ負荷を掛け、requests/sec と p99 遅延を出力する。CI の揺れで落ちない
+よう、合否は「全件が返ること」と「遅いクライアントが居ても p99 が崩れないこと」だけを
+見る。数値は `python test_webhook_load.py` で確認する。
+"""
+from __future__ import annotations
+
+import http.client
+import http.server
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import agent_loop as al  # noqa: E402
+
+CLIENTS = 8
+REQUESTS_PER_CLIENT = 60
+SLOW_CLIENTS = 32
+
+
+class _Scheduler:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def resolve_webhook_route(self, name):
+        return {"name": name, "prompt_template": "got {x}", "hook": None,
+                "secret": "", "secret_header": None}
+
+    def enqueue_external(self, name, prompt_text):
+        with self.lock:
+            self.count += 1
+        return True
+
+
+class _LegacyServer:
+    """置き換え前の受信（接続ごとにスレッド、`_process` は同じもの）。比較専用。"""
+
+    def __init__(self, scheduler):
+        self.core = al.WebhookServer(scheduler=scheduler, host="127.0.0.1", port=0,
+                                     path_prefix="/hooks", secret="", secret_header=None,
+                                     max_body_bytes=1 << 20)
+        core = self.core
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                name = urllib.parse.urlparse(self.path).path.rsplit("/", 1)[-1]
+                length = int(self.headers.get("Content-Length", "0"))
+                raw = self.rfile.read(length) if length > 0 else b""
+                headers = {k.lower(): v for k, v in self.headers.items()}
+                status, msg = core._process(name, "POST", headers, {}, raw)
+                body = msg.encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _hammer(port: int) -> dict:
+    """CLIENTS 本の keep-alive 接続から POST を浴びせ、件数・rps・p99 を返す。"""
+    latencies: list[float] = []
+    statuses: list[int] = []
+    lock = threading.Lock()
+
+    def client(cid: int) -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        mine: list[tuple[int, float]] = []
+        try:
+            for i in range(REQUESTS_PER_CLIENT):
+                body = json.dumps({"x": f"{cid}-{i}"})
+                started = time.perf_counter()
+                conn.request("POST", "/hooks/demo", body=body,
+                             headers={"Content-Type": "application/json"})
+                res = conn.getresponse()
+                res.read()
+                mine.append((res.status, time.perf_counter() - started))
+        finally:
+            conn.close()
+        with lock:
+            statuses.extend(code for code, _ in mine)
+            latencies.extend(lat for _, lat in mine)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(CLIENTS)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else float("nan")
+    return {"count": len(statuses), "ok": statuses.count(202),
+            "rps": len(statuses) / elapsed if elapsed else 0.0, "p99_ms": p99 * 1000}
+
+
+def _open_slow_clients(port: int, n: int) -> list[socket.socket]:
+    """ヘッダを書きかけて黙るクライアントを n 本つなぐ。"""
+    socks = []
+    for _ in range(n):
+        s = socket.create_connection(("127.0.0.1", port), timeout=5)
+        s.sendall(b"POST /hooks/demo HTTP/1.1\r\nHost: x\r\n")
+        socks.append(s)
+    return socks
+
+
+def _report(label: str, result: dict) -> None:
+    sys.stderr.write(f"\n  [{label}] {result['count']} req  {result['rps']:.0f} req/s  "
+                     f"p99 {result['p99_ms']:.1f}ms  ")
+
+
+class WebhookLoadTests(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = _Scheduler()
+        self.server = al.WebhookServer(scheduler=self.scheduler, host="127.0.0.1", port=0,
+                                       path_prefix="/hooks", secret="", secret_header=None,
+                                       max_body_bytes=1 << 20)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.legacy = _LegacyServer(_Scheduler())
+        self.addCleanup(self.legacy.stop)
+
+    def test_throughput_and_p99_against_legacy(self):
+        total = CLIENTS * REQUESTS_PER_CLIENT
+        legacy = _hammer(self.legacy.port)
+        current = _hammer(self.server.port)
+        _report("legacy ThreadingHTTPServer", legacy)
+        _report("asyncio ingress", current)
+        self.assertEqual(current["ok"], total)
+        self.assertEqual(legacy["ok"], total)
+        self.assertEqual(self.scheduler.count, total)
+
+    def test_slow_clients_do_not_inflate_p99(self):
+        socks = _open_slow_clients(self.server.port, SLOW_CLIENTS)
+        try:
+            result = _hammer(self.server.port)
+        finally:
+            for s in socks:
+                s.close()
+        _report(f"asyncio ingress + {SLOW_CLIENTS} slow clients", result)
+        self.assertEqual(result["ok"], CLIENTS * REQUESTS_PER_CLIENT)
+        self.assertLess(result["p99_ms"], 500.0)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -62,6 +62,9 @@ from agentcore import commands as _cmddrop  # noqa: E402
 # 板（agent-board）の入札選別規則とノード契約バージョン。agent-flow / agent-amigos が
 # 「同じ仕様・別実装」で持っていたものの集約先（repolocal と同型の問題）。
 from agentcore import board as _boardrules  # noqa: E402
+# 生存信号（status.json / status/<node>.json）を小さな心拍 `.beat` と、内容が変わったときだけ
+# 書き直す本体に分ける書き手・読み手。書く loop と読む coordination が同じ規則を通す。
+from agentcore import statusdoc as _statusdoc  # noqa: E402
 # リトライのバックオフ待ちの唯一の seam（agentcore.transport.backoff_sleep）。素の time.sleep を
 # 差し替えると stdlib の subprocess 内部（プロセス終了の 0.001s 倍々ポーリング）にも効いてしまい、
 # 高負荷時だけテストが壊れる。リトライ経路はこの名前を通す。
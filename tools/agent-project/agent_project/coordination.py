@@ -43,7 +43,7 @@ def _peer_nodes(cfg: "Config", at: "datetime | None" = None) -> "set[str]":
     status_dir = root / "status"
     for path in sorted(status_dir.glob("*.json")) if status_dir.is_dir() else []:
         try:
-            record = json.loads(path.read_text(encoding="utf-8"))
+            record = _read_status_record(path)
             updated = datetime.fromisoformat(str(record["updated_iso"]).replace("Z", "+00:00"))
             fresh = float(record.get("fresh_after_sec", 120.0) or 120.0)
             node = str(record.get("node", "") or "").strip()
@@ -737,11 +737,8 @@ def allocate_distributed_tasks(cfg: "Config", at: "datetime | None" = None) -> "
         enforce_default = _budget_summary_enforce(cfg)
         status_dir = root / "status"
         for path in sorted(status_dir.glob("*.json")) if status_dir.is_dir() else []:
-            try:
-                record = json.loads(path.read_text(encoding="utf-8"))
-                if not isinstance(record, dict):
-                    continue
-            except (OSError, ValueError, TypeError):
+            record = _read_status_record(path)
+            if record is None:
                 continue
             gate = status_budget_gate(record, at=now, enforce_default=enforce_default)
             if not gate["node"]:
@@ -181,7 +181,14 @@ def write_status(cfg: "Config") -> None:
     他ファイルの変更と同じコミットに相乗りする＝これ単体で追加の push を生まない。
 
     additive: `budget`（node-budget-summary）を同じ JSON へ埋め込む。追加 push は生まない。
-    旧 viewer は未知キーを読み捨てる前提（Phase0 fixture で固定済み）。"""
+    旧 viewer は未知キーを読み捨てる前提（Phase0 fixture で固定済み）。
+
+    本体は `updated_iso`（と budget の観測時刻）以外が変わったときだけ書き直し（`version` を
+    +1）、隣の `.beat`（`version` と `updated_iso` だけ）もそのときに書く。内容が同じ間の生存
+    信号は、鮮度窓の半分ごとの本体の時刻の書き直し（`version` 据え置き）だけにする——.beat は
+    state_git で同期しないので、リモートの viewer が見られるのは本体の時刻だけで、同じ時刻を
+    心拍にも重ねて書くのは書き込みを倍にするだけ。読み手は `_read_status_record` で両方を
+    重ねて読む。"""
     updated = _now_ts()
     rec = {
         "host": socket.gethostname(), "watch": cfg.watch, "level": cfg.level,
@@ -194,11 +201,10 @@ def write_status(cfg: "Config") -> None:
         **detect_runtime(),
         "budget": _budget_summary_block(cfg, updated),
     }
-    body = json.dumps(rec, ensure_ascii=False, indent=2)
+    fresh = rec["fresh_after_sec"]
     try:
-        p = status_path(cfg)                       # 従来の単一 status.json（後方互換）
-        p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(body, encoding="utf-8")
+        # 従来の単一 status.json（後方互換）
+        _status_writer(status_path(cfg), fresh).write(rec)
     except OSError:
         pass
     # ノード名があれば status/<node>.json にも書く。複数の名前付きエンジンが同じ状態リポジトリを
@@ -207,17 +213,40 @@ def write_status(cfg: "Config") -> None:
     np = node_status_path(cfg)
     if np is not None:
         try:
-            np.parent.mkdir(parents=True, exist_ok=True)
-            np.write_text(body, encoding="utf-8")
+            _status_writer(np, fresh).write(rec)
         except OSError:
             pass
 
 
+# 生存信号の書き手（パスごと。前回の内容ハッシュと version を持ち回る）と、読み手の
+# 本体キャッシュ（心拍の version が同じ間は本体をパースし直さない）。
+_STATUS_WRITERS: "dict[str, _statusdoc.StatusWriter]" = {}
+_STATUS_READ_CACHE: dict = {}
+
+
+def _status_writer(path: Path, fresh_after_sec: float) -> "_statusdoc.StatusWriter":
+    writer = _STATUS_WRITERS.get(str(path))
+    if writer is None:
+        writer = _STATUS_WRITERS[str(path)] = _statusdoc.StatusWriter(
+            str(path), stamp_key="updated_iso", volatile=[("budget", "observed_at")], indent=2)
+    # 心拍は内容が変わったときだけ。生存は鮮度窓の半分ごとの本体の時刻の書き直しが担う
+    # （state_git の同期遅延ぶんを残しても、リモートで窓を越える前に次の時刻が届く）
+    writer.beat_every = None
+    writer.refresh_every = fresh_after_sec / 2
+    return writer
+
+
+def _read_status_record(path: Path) -> "dict | None":
+    """status.json / status/<node>.json を心拍と重ねて読む（壊れ・欠損は None）。"""
+    return _statusdoc.read_status(str(path), _STATUS_READ_CACHE)
+
+
 def maybe_heartbeat_status(cfg: "Config") -> None:
     """watch アイドル中の任意の生存信号更新（`--status-interval`。既定 0＝無効）。
     無効時は status.json に一切触れない＝state_git の commit-if-diff で追加コミットを
     作らない（idle の git 負荷は今日と同じゼロ）。有効時も前回書き込みから
-    status_interval 秒経つまでは触らず、書き込み頻度を利用者の指定した間隔に抑える。"""
+    status_interval 秒経つまでは触らず、書き込み頻度を利用者の指定した間隔に抑える。
+    内容が同じ間は、呼んでも書き手が鮮度窓の半分ごとにしか本体を書き直さない。"""
     if cfg.status_interval <= 0:
         return
     try:
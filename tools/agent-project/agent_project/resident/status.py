@@ -25,7 +25,7 @@ _agentcore_dir = os.path.join(_tools_dir, "agent-tools", "agentcore")
 if _agentcore_dir not in sys.path:
     sys.path.insert(0, _agentcore_dir)
 
-from agentcore.protocol import safe_name, write_json_atomic  # noqa: E402
+from agentcore.protocol import DURABLE_BATCHED, safe_name, write_json_atomic  # noqa: E402
 
 # ノード契約バージョンと互換判定の**正典は `agentcore.board`**（P2-1）。ここは名前を
 # 通すだけで、値も判定も持たない——以前はこのファイルに同じ定数と同じ関数本体（docstring
@@ -83,7 +83,9 @@ class NodeCapability:
         「書いたのに読めない」名義が理屈の上で作れる（`node` は正規化済みなので
         現経路では同値だが、同値であることを規則ではなく偶然に依存させない）。"""
         path = os.path.join(board_root, "nodes", f"{safe_name(self.node)}.json")
-        write_json_atomic(path, self.to_dict())
+        # 毎 tick 上書きされる生存信号なので、ディレクトリの fsync は group commit に寄せる
+        # （AGENT_GROUP_COMMIT_MS。ファイルが半端に残ることはなく、失うのは最後の数十 ms だけ）。
+        write_json_atomic(path, self.to_dict(), durability=DURABLE_BATCHED)
         return path
 
 
@@ -168,5 +170,5 @@ class EngineStatus:
     def write(self, state_home: str) -> str:
         """`<state_home>/.agents/engine/status.json` へ原子的に書く。書いたパスを返す。"""
         path = os.path.join(state_home, ".agents", "engine", "status.json")
-        write_json_atomic(path, self.to_dict())
+        write_json_atomic(path, self.to_dict(), durability=DURABLE_BATCHED)
         return path
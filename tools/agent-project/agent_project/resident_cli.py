@@ -30,7 +30,7 @@ from __future__ import annotations
 from types import SimpleNamespace
 
 from agentcore.nodeid import normalize_node_id
-from agentcore.protocol import write_json_atomic
+from agentcore.protocol import DURABLE_BATCHED, write_json_atomic
 from agent_project.resident import (CONTRACT_VERSION, ChildSpec, ChildStatus, EngineStatus,
                                     NodeCapability, NodeWorkerPool, Scheduler, Supervisor,
                                     SyncHealth, Tick, WorkItem, graceful_shutdown, run_gc)
@@ -1074,7 +1074,7 @@ def _build_resident(host: "HostConfig", *, start_children: bool = True):
             for name, info in sup.status().items()]
         status.sync_health = _observe_sync_health(roots_by_name)
         status.running_runs = list(pool.status().get("inflight") or [])
-        write_json_atomic(str(status_path), status.to_dict())
+        write_json_atomic(str(status_path), status.to_dict(), durability=DURABLE_BATCHED)
 
     # ノード直轄ワーカー（設計 §4.2・実装計画 W1-5/W1-11）。上限は板と同じ語彙で解決する
     # （未宣言 = 既定 4 / `0` = 無制限 / `n` = n・P2-3）。板の `nodes/<id>.json` に宣言する
@@ -33,6 +33,10 @@ _STATE_WT_PREFIX = "agent-project-state-wt-"    # state コミット用 detached
 # 掃除して抑える。なお claims/ は bus/runs/<id>/claims/ の形でも segment 判定に掛かるので、
 # bus を対象にしても同期されない（遅延越しの排他は意味を持たないため、これは維持する）。
 _STATE_EXCLUDE_DIRS = {"flow-archive", "claims"}
+# 名前の末尾で外すファイル。`.beat` は status.json / status/<node>.json の心拍
+# （agentcore.statusdoc。同じホストの読み手向けの生存時刻）で、同期すると心拍のたびに
+# コミットが積もる。リモートの viewer は本体の `updated_iso`（鮮度窓の半分ごとに書き直す）で見る。
+_STATE_EXCLUDE_SUFFIXES = (".beat",)
 # 同時変更（ローカル・リモートの両方が base から変えた）の裁定。人の入力はリモート優先で
 # 取りこぼさず、機械状態（backlog/journal/decisions/…）は実行側＝ローカルを正とする。
 # repos.{json,yaml,yml} も人が書くレジストリ（charter ## repos の互換入力・手書きが正）なので
@@ -182,7 +186,8 @@ class DirectStateGit:
             return None
         parts = rel.parts
         if (not parts or any(part.startswith(".") for part in parts)
-                or any(part in _STATE_EXCLUDE_DIRS for part in parts)):
+                or any(part in _STATE_EXCLUDE_DIRS for part in parts)
+                or parts[-1].endswith(_STATE_EXCLUDE_SUFFIXES)):
             return None
         return str(rel)
 
@@ -348,7 +353,8 @@ class DirectStateGit:
             # 全要素を除外規則（ドット始まり・bus/claims）にかける（StateGit と同じ集合）。
             parts = rel.parts
             if any(s.startswith(".") for s in parts) or any(
-                    s in _STATE_EXCLUDE_DIRS for s in parts):
+                    s in _STATE_EXCLUDE_DIRS for s in parts) or (
+                    parts and parts[-1].endswith(_STATE_EXCLUDE_SUFFIXES)):
                 continue
             out.append(str(rel))
         return out
@@ -810,7 +816,7 @@ class DirectStateGit:
             return 0                      # 並行更新に競り負け → 次パスで再試行
         return self._materialize(old, new, top or str(self.root))
 
-    _EXCLUDE_PATTERNS = ("claims/", "flow-archive/", ".state-git*")
+    _EXCLUDE_PATTERNS = ("claims/", "flow-archive/", ".state-git*", "*.beat")
 
     def _ensure_exclude_patterns(self) -> None:
         """同期除外パスをリポジトリローカルの .git/info/exclude に宣言する（冪等）。
@@ -834,7 +840,7 @@ class DirectStateGit:
             pass
 
     def _untrack_excluded(self, branch: str) -> int:
-        """「追跡されてしまった同期除外パス」（claims/・flow-archive/・ドット始まり）を
+        """「追跡されてしまった同期除外パス」（claims/・flow-archive/・ドット始まり・*.beat）を
         追跡から外す（自己修復）。
 
         旧実装・他コミッタ（viewer / agent-flow の管理クローン残骸）がこれらを一度コミットすると、
@@ -857,7 +863,8 @@ class DirectStateGit:
             # いたが、その書き込みは削除済みで、今はホスト局所のキャッシュにすぎない
             # （2026-07-27 棚卸し §3-2。新規コミット側の _STATE_EXCLUDE_DIRS とも揃う）。
             if any(s.startswith(".") for s in parts) or any(
-                    s in _STATE_EXCLUDE_DIRS for s in parts[:-1]):
+                    s in _STATE_EXCLUDE_DIRS for s in parts[:-1]) or (
+                    parts and parts[-1].endswith(_STATE_EXCLUDE_SUFFIXES)):
                 tracked.append(path)
         self._ensure_exclude_patterns()
         if not tracked:
@@ -923,7 +930,8 @@ class DirectStateGit:
                 continue                     # 自分の名前空間の外（root がサブディレクトリの構成）
             parts = Path(rel).parts
             if any(s.startswith(".") for s in parts) or any(
-                    s in _STATE_EXCLUDE_DIRS for s in parts):
+                    s in _STATE_EXCLUDE_DIRS for s in parts) or (
+                    parts and parts[-1].endswith(_STATE_EXCLUDE_SUFFIXES)):
                 continue
             head = self._top_git("ls-tree", "HEAD", "--", path).stdout.strip()
             f = Path(self._top()) / path
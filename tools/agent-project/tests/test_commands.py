@@ -490,6 +490,42 @@ class TestStatusHeartbeat(unittest.TestCase):
             km.maybe_heartbeat_status(c)
             self.assertGreater((d / "status.json").stat().st_mtime, old)
 
+    def test_idle_status_rewrites_the_document_an_order_of_magnitude_less(self):
+        with tempfile.TemporaryDirectory() as d:
+            d = Path(d)
+            # 鮮度窓 600 秒（2 × state_git_interval）で 30 秒ごとに生存信号を更新する idle の 1 時間。
+            # 従来は status.json と status/pc-a.json を毎回全文で書き直していた（2 × 120 回）
+            c = cfg_for(d, node="pc-a", status_interval=30.0, state_git_interval=300.0)
+            writes = []
+            real_write = km._statusdoc._write_atomic
+
+            def counting_write(path, data, indent):
+                writes.append(os.path.relpath(path, d))
+                real_write(path, data, indent)
+
+            clock = [0.0]
+            with mock.patch.object(km._statusdoc, "_write_atomic", counting_write), \
+                    mock.patch.object(km._statusdoc.time, "monotonic", lambda: clock[0]):
+                km.write_status(c)                                  # idle に入る直前のパス
+                first = list(writes)
+                writes.clear()
+                for tick in range(1, 121):
+                    clock[0] = tick * 30.0
+                    km.write_status(c)
+            self.assertEqual(len(first), 4)                          # 本体と心拍 × 2 ファイル
+            # 本体と心拍を合わせた全書き込みで 1/10 以下。内容が同じ間は心拍を書かず、
+            # 鮮度窓の半分（300 秒）ごとの本体の時刻の書き直しだけが生存信号になる
+            self.assertLessEqual(len(writes), 2 * 120 // 10)
+            self.assertFalse([w for w in writes if w.endswith(".beat")])
+            for name in ("status.json", os.path.join("status", "pc-a.json")):
+                self.assertEqual(writes.count(name), 3600 // 300)
+            doc = json.loads((d / "status.json").read_text(encoding="utf-8"))
+            self.assertEqual(doc["version"], 1)                         # 内容は一度も変わっていない
+            rec = km._read_status_record(d / "status" / "pc-a.json")
+            node_doc = json.loads((d / "status" / "pc-a.json").read_text(encoding="utf-8"))
+            self.assertEqual(rec["updated_iso"], node_doc["updated_iso"])   # 心拍より新しい本体の時刻
+            self.assertEqual(rec["node"], "pc-a")
+
     def test_run_loop_piggybacks_status_write(self):
         with tempfile.TemporaryDirectory() as d:
             d = Path(d)
@@ -75,6 +75,30 @@ class TestStateSyncBatching(unittest.TestCase):
             sg.sync()                                          # push 済み HEAD は amend しない
             self.assertEqual(len(self._log(d)), 2)
 
+    def test_direct_keeps_status_beats_out_of_the_tree(self):
+        """status.beat / status/<node>.beat（同じホスト向けの心拍）は同期しない。
+        未追跡の status/ ディレクトリごと現れても、旧版が追跡してしまった心拍があっても同じ。"""
+        with tempfile.TemporaryDirectory() as d:
+            d = Path(d)
+            self._init_repo(d)
+            (d / "journal.md").write_text("a\n", encoding="utf-8")
+            (d / "status.beat").write_text('{"version": 1}', encoding="utf-8")
+            subprocess.run(["git", "-C", str(d), "add", "-A"], check=True)
+            subprocess.run(["git", "-C", str(d), "commit", "-qm", "old tree"], check=True)
+            sg = km.DirectStateGit(d, interval=0.0)
+            (d / "status.json").write_text('{"version": 1}', encoding="utf-8")
+            (d / "status.beat").write_text('{"version": 2}', encoding="utf-8")
+            (d / "status").mkdir()
+            (d / "status" / "pc-a.json").write_text('{"node": "pc-a"}', encoding="utf-8")
+            (d / "status" / "pc-a.beat").write_text('{"version": 1}', encoding="utf-8")
+            sg.sync()
+            tree = subprocess.run(["git", "-C", str(d), "ls-tree", "-r", "--name-only", "HEAD"],
+                                  capture_output=True, text=True).stdout.split()
+            self.assertEqual(sorted(tree), ["journal.md", "status.json", "status/pc-a.json"])
+            self.assertTrue((d / "status.beat").exists())      # 実ファイルは消さない
+            (d / "status" / "pc-a.beat").write_text('{"version": 2}', encoding="utf-8")
+            self.assertEqual(sg._changed_targets(), [])        # 心拍だけの変化はコミットを生まない
+
     @staticmethod
     def _worktree_names(d: Path) -> "list[str]":
         r = subprocess.run(["git", "-C", str(d), "worktree", "list", "--porcelain"],
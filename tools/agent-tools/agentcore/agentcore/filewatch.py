@@ -0,0 +1,248 @@
+"""ディレクトリの変化待ち — Linux は inotify、それ以外は従来の polling。
+
+## なぜ要るか
+
+ログの追尾（`ollama_events.follow_events`）と受信箱の監視（agent-loop の
+`InboxWatcher`）は、どちらも「一定間隔で眠って、起きたら読み直す」形だった。
+これだと新しいイベントが届くまで最大で 1 間隔ぶん遅れ、何も起きていない間も
+間隔ごとにプロセスが起きる。inotify で「書かれた」ことを教えてもらえば、
+届いた瞬間に起き、何も無ければ眠ったままでいられる。
+
+## 形
+
+`watch_dir()` が返す監視器の `wait(timeout)` は「変化があったかもしれない」で
+True を返す。**真偽は読み直して確かめる**のが呼び出し側の責任で、監視器は
+中身を解釈しない（取りこぼしより空振りに倒す: inotify のキュー溢れも True）。
+polling 版は間隔ごとに True を返すだけなので、呼び出し側の読み直しロジックは
+どちらの実装でも同じになる。
+
+inotify は ctypes で libc を直接呼ぶ（pip 依存なし）。使えない環境（Linux 以外・
+上限 `max_user_watches` 超過・監視対象がまだ無い）では黙って polling へ落ちる。
+`AGENT_FILEWATCH=poll` で polling を強制できる（現場で疑わしいときの切り戻し口）。
+"""
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+# inotify(7) の定数（<sys/inotify.h>）。
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+# 書き途中でも起きる（追記され続けるログの追尾向け）。
+WRITES = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+# 書き終わったときだけ起きる（丸ごと書いて閉じるメッセージファイル向け。
+# 作成直後の空ファイルを読んで JSON エラーを出さないため IN_CREATE を含めない）。
+COMPLETED = IN_CLOSE_WRITE | IN_MOVED_TO
+
+# 監視対象そのものが消えた・溢れた。どちらも「読み直せ」の合図として扱う。
+_ALWAYS = IN_Q_OVERFLOW | IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF
+
+_EVENT_HEADER = struct.Struct("iIII")   # wd, mask, cookie, len
+_READ_SIZE = 64 * 1024
+
+_libc = None
+_libc_lock = threading.Lock()
+
+
+def _load_libc():
+    global _libc
+    with _libc_lock:
+        if _libc is None:
+            name = ctypes.util.find_library("c") or "libc.so.6"
+            lib = ctypes.CDLL(name, use_errno=True)
+            lib.inotify_init1.argtypes = [ctypes.c_int]
+            lib.inotify_init1.restype = ctypes.c_int
+            lib.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            lib.inotify_add_watch.restype = ctypes.c_int
+            _libc = lib
+    return _libc
+
+
+def inotify_available() -> bool:
+    """この環境で inotify を使う余地があるか（Linux かつ libc に関数がある）。"""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        lib = _load_libc()
+    except OSError:
+        return False
+    return hasattr(lib, "inotify_init1")
+
+
+class _Waker:
+    """`wake()` で `wait()` を即座に解くための自己パイプ。"""
+
+    def __init__(self) -> None:
+        self._r, self._w = os.pipe()
+        os.set_blocking(self._r, False)
+        os.set_blocking(self._w, False)
+
+    def fileno(self) -> int:
+        return self._r
+
+    def wake(self) -> None:
+        try:
+            os.write(self._w, b"\0")
+        except OSError:
+            pass       # 既に起こしてある（パイプが満杯）か、閉じた後
+
+    def drain(self) -> None:
+        try:
+            while os.read(self._r, 4096):
+                pass
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        for fd in (self._r, self._w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class PollWatcher:
+    """従来どおりの間隔待ち。`wait` は間隔ごとに True（＝読み直せ）を返す。"""
+
+    backend = "poll"
+
+    def __init__(self, directory: "str | Path", *, poll_sec: float = 1.0) -> None:
+        self.directory = Path(directory)
+        self.poll_sec = max(0.01, float(poll_sec))
+        self._wake = threading.Event()
+
+    def wait(self, timeout: "float | None" = None) -> bool:
+        interval = self.poll_sec if timeout is None else min(self.poll_sec, max(0.0, timeout))
+        if self._wake.wait(interval):
+            self._wake.clear()
+            return False
+        return True
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def close(self) -> None:
+        self._wake.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+class InotifyWatcher:
+    """ディレクトリ 1 つを inotify で見る。`match(name)` が真の子の変化だけで起きる。"""
+
+    backend = "inotify"
+
+    def __init__(self, directory: "str | Path", *, mask: int = WRITES, match=None) -> None:
+        self.directory = Path(directory)
+        self.match = match
+        lib = _load_libc()
+        fd = lib.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        wd = lib.inotify_add_watch(fd, os.fsencode(str(self.directory)), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, os.strerror(err), str(self.directory))
+        self._fd = fd
+        self._waker = _Waker()
+
+    def _relevant(self, data: bytes) -> bool:
+        offset = 0
+        hit = False
+        while offset + _EVENT_HEADER.size <= len(data):
+            _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            raw = data[offset:offset + length]
+            offset += length
+            if mask & _ALWAYS:
+                hit = True
+                continue
+            name = os.fsdecode(raw.split(b"\0", 1)[0])
+            if self.match is None or self.match(name):
+                hit = True
+        return hit
+
+    def wait(self, timeout: "float | None" = None) -> bool:
+        """変化（らしきもの）が来たら True、時間切れ・`wake()` なら False。"""
+        deadline = None if timeout is None else time.monotonic() + max(0.0, timeout)
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                ready, _w, _x = select.select([self._fd, self._waker], [], [], remaining)
+            except (OSError, ValueError):
+                return True      # 閉じられた——読み直させて呼び出し側に終わりを判断させる
+            if not ready:
+                return False
+            if self._waker in ready:
+                self._waker.drain()
+                return False
+            try:
+                data = os.read(self._fd, _READ_SIZE)
+            except OSError as exc:
+                if exc.errno in (errno.EAGAIN, errno.EINTR):
+                    continue
+                return True
+            if self._relevant(data):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def wake(self) -> None:
+        self._waker.wake()
+
+    def close(self) -> None:
+        fd, self._fd = self._fd, -1
+        if fd >= 0:
+            self._waker.wake()
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+            self._waker.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+def watch_dir(directory: "str | Path", *, mask: int = WRITES, match=None,
+              poll_sec: float = 1.0, backend: "str | None" = None):
+    """`directory` の変化待ちを作る。inotify が使えなければ polling へ落ちる。
+
+    `backend` は None（自動）/ "inotify" / "poll"。環境変数 `AGENT_FILEWATCH=poll` は
+    自動選択のときだけ効く（明示はテストが両方の実装を通すための口）。
+    """
+    if backend is None:
+        backend = "poll" if os.environ.get("AGENT_FILEWATCH", "").strip().lower() == "poll" \
+            else "inotify"
+    if backend == "inotify" and inotify_available() and Path(directory).is_dir():
+        try:
+            return InotifyWatcher(directory, mask=mask, match=match)
+        except OSError:
+            pass
+    return PollWatcher(directory, poll_sec=poll_sec)
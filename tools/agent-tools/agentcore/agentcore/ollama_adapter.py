@@ -38,7 +38,7 @@ import urllib.parse
 import urllib.request
 from pathlib import Path
 
-from agentcore import ollama_context, ollama_events, ollama_loop, ollama_skills
+from agentcore import ollama_context, ollama_events, ollama_http, ollama_loop, ollama_skills
 
 USAGE = """使い方: agent-ollama [オプション] <model>
 
@@ -61,6 +61,8 @@ USAGE = """使い方: agent-ollama [オプション] <model>
                           （repeat は同じ設定を何回引くか＝自己一貫性の測定）
     --replay-limit N      再生する件数の上限（新しい実行から順に採る）
     --replay-out PATH     記録（JSONL）の書き出し先。既定はログ置き場
+    --jobs N              同時に再生する本数（既定 1。サーバの OLLAMA_NUM_PARALLEL に
+                          合わせる。集計と戻りの並びは N によらず同じ）
                           ※再生は常に道具なしで行う（記録されたコマンドは再実行しない）
 
   推論:
@@ -105,7 +107,7 @@ _FLAGS = {"--tools", "--tui", "--no-skills", "--no-log", "--context", "-h", "--h
 _VALUED = {"--think", "--skill", "--stall-timeout", "--first-token-timeout",
            "--max-rounds", "--command-timeout", "--cwd", "--log", "--model",
            "--context-limit", "--context-warn-pct", "--format",
-           "--arm", "--replay-limit", "--replay-out"}
+           "--arm", "--replay-limit", "--replay-out", "--jobs"}
 _OPTIONAL_VALUED = {"--follow", "--status", "--replay"}
 # `--tools` の後ろに続いてよい語。未実装セット（edit）も**名前としては受ける**——
 # 受けないと positional なモデル名として解釈され、原因の分からない失敗になる。
@@ -263,7 +265,7 @@ def parse_args(tokens: "list[str]") -> dict:
         "context_limit": 0, "context_warn_pct": ollama_context.DEFAULT_WARN_PCT,
         "context_query": False,
         "replay": False, "replay_target": None, "arms": [],
-        "replay_limit": 0, "replay_out": None,
+        "replay_limit": 0, "replay_out": None, "jobs": 1,
     }
     index = 0
     while index < len(tokens):
@@ -350,6 +352,8 @@ def parse_args(tokens: "list[str]") -> dict:
                 opts["replay_limit"] = max(0, int(_as_float(value, name)))
             elif name == "--replay-out":
                 opts["replay_out"] = value
+            elif name == "--jobs":
+                opts["jobs"] = max(1, int(_as_float(value, name)))
         elif token.startswith("-") and token != "-":
             raise ArgError(f"知らないオプションです: {token}")
         elif not opts["model"]:
@@ -394,7 +398,7 @@ def generate(model: str, prompt: str, *, think: "bool | None" = None) -> dict:
         f"{host}/api/generate", data=json.dumps(payload).encode(),
         headers={"Content-Type": "application/json"}, method="POST")
     try:
-        with urllib.request.urlopen(req, timeout=_request_timeout_sec()) as res:
+        with ollama_http.urlopen(req, timeout=_request_timeout_sec()) as res:
             data = json.load(res)
     except urllib.error.HTTPError as exc:
         detail = exc.read().decode("utf-8", "replace")
@@ -533,7 +537,9 @@ def run_replay(opts: dict, *, generate=None, out=None, err=None) -> int:
 
     record_path = opts.get("replay_out") or ollama_replay.new_record_path()
     total = len(cases) * sum(int(arm.get("repeat") or 1) for arm in arms)
-    print(f"@agent-note 再生 {len(cases)} 件 × 腕 {len(arms)} = {total} 回。"
+    jobs = max(1, int(opts.get("jobs") or 1))
+    print(f"@agent-note 再生 {len(cases)} 件 × 腕 {len(arms)} = {total} 回"
+          f"{f'（同時 {jobs} 本）' if jobs > 1 else ''}。"
           "道具は使いません（記録されたコマンドは再実行しません）。", file=err)
 
     done = 0
@@ -556,7 +562,8 @@ def run_replay(opts: dict, *, generate=None, out=None, err=None) -> int:
         print(f"再生記録を書けません: {exc}", file=err)
         return 1
     try:
-        records = ollama_replay.replay(cases, arms, generate=generate, on_record=emit_record)
+        records = ollama_replay.replay(cases, arms, generate=generate, on_record=emit_record,
+                                       jobs=jobs)
     finally:
         handle.close()
 
@@ -25,11 +25,15 @@
 """
 from __future__ import annotations
 
+import http.client
 import json
 import os
+import threading
 import urllib.error
 import urllib.request
 
+from agentcore import ollama_http
+
 # 上限へ近づいたと見なす割合（既定）。ここを超えたら 1 回だけ警告する。
 DEFAULT_WARN_PCT = 90.0
 
@@ -45,6 +49,10 @@ DEFAULT_RESERVE_TOKENS = 512
 _META_TIMEOUT_SEC = 3.0
 
 _limit_cache: "dict[tuple, tuple[int, str]]" = {}
+# 解決は 1 つずつ行う。再生の並列実行（`--jobs`）で同じモデルの上限を複数スレッドが
+# 同時に引くと、キャッシュが埋まる前の全員が `/api/ps`・`/api/show` を撃つ。
+# 直列にすれば 2 人目以降はキャッシュを読むだけで済む（問い合わせは短い上限付き）。
+_limit_lock = threading.Lock()
 
 
 def estimate_tokens(text: str) -> int:
@@ -78,16 +86,20 @@ def _host(host: str = "") -> str:
 
 
 def _get_json(host: str, path: str, body: "dict | None" = None) -> "dict | None":
-    """メタ情報を 1 回問い合わせる。**失敗は None**（上限が分からないだけで実行は続く）。"""
+    """メタ情報を 1 回問い合わせる。**失敗は None**（上限が分からないだけで実行は続く）。
+
+    接続は推論呼び出しと同じ共有プール（`ollama_http`）から借りる。
+    """
     try:
         data = json.dumps(body).encode() if body is not None else None
         req = urllib.request.Request(
             f"{_host(host)}{path}", data=data,
             headers={"Content-Type": "application/json"} if data else {},
             method="POST" if data is not None else "GET")
-        with urllib.request.urlopen(req, timeout=_meta_timeout()) as res:
+        with ollama_http.urlopen(req, timeout=_meta_timeout()) as res:
             parsed = json.load(res)
-    except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, OSError, ValueError):
+    except (urllib.error.URLError, urllib.error.HTTPError, http.client.HTTPException,
+            TimeoutError, OSError, ValueError):
         return None
     return parsed if isinstance(parsed, dict) else None
 
@@ -147,21 +159,22 @@ def resolve_limit(model: str, *, options: "dict | None" = None, explicit: int =
         return num_ctx, "options"
 
     key = (host, model)
-    if use_cache and key in _limit_cache:
-        return _limit_cache[key]
-
-    value = _from_ps(host, model)
-    source = "server"
-    if value <= 0:
-        value = _from_show(host, model)
-        source = "model"
-    if value <= 0:
-        # **失敗はキャッシュしない**。TUI のような長命プロセスで一度取れなかっただけで、
-        # 以後ずっと文脈表示が死ぬのは割に合わない（次の実行で取れるかもしれない）。
-        return 0, "unknown"
-    if use_cache:
-        _limit_cache[key] = (value, source)
-    return value, source
+    with _limit_lock:
+        if use_cache and key in _limit_cache:
+            return _limit_cache[key]
+
+        value = _from_ps(host, model)
+        source = "server"
+        if value <= 0:
+            value = _from_show(host, model)
+            source = "model"
+        if value <= 0:
+            # **失敗はキャッシュしない**。TUI のような長命プロセスで一度取れなかっただけで、
+            # 以後ずっと文脈表示が死ぬのは割に合わない（次の実行で取れるかもしれない）。
+            return 0, "unknown"
+        if use_cache:
+            _limit_cache[key] = (value, source)
+        return value, source
 
 
 class ContextTracker:
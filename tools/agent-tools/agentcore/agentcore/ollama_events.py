@@ -21,6 +21,8 @@ import os
 import time
 from pathlib import Path
 
+from agentcore import filewatch
+
 # 進捗が無いときでも「生きている」ことを示すため、この間隔で heartbeat を打つ。
 # read_status() の生存判定もこの値を基準にする（一致させるためここに 1 つ置く）。
 HEARTBEAT_INTERVAL_SEC = 5.0
@@ -215,6 +217,11 @@ def follow_events(path: "str | Path", *, from_start: bool = True, poll_sec: floa
 
     まだ存在しないファイルも待てる（ヘッドレス実行の開始前にアタッチできる）。
     `stop` は「そろそろ止めるか」を返す callable（None なら Ctrl-C まで続ける）。
+
+    追記の待ちは `filewatch`（Linux は inotify）に任せる。書かれた瞬間に起き、
+    書かれない間は眠ったままでいる。`stop` があるときだけ `poll_sec` ごとに起きて
+    それを確かめる（callable は外から起こせないため）。inotify が使えなければ
+    従来どおり `poll_sec` 間隔で読み直す。
     """
     target = Path(path).expanduser()
     offset = 0
@@ -224,28 +231,34 @@ def follow_events(path: "str | Path", *, from_start: bool = True, poll_sec: floa
         except OSError:
             offset = 0
     buffer = ""
-    while stop is None or not stop():
-        try:
-            with target.open("rb") as fh:
-                fh.seek(offset)
-                chunk = fh.read()
-                offset = fh.tell()
-        except OSError:
-            chunk = b""
-        if chunk:
-            buffer += chunk.decode("utf-8", "replace")
-            while "\n" in buffer:
-                line, buffer = buffer.split("\n", 1)
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    event = json.loads(line)
-                except ValueError:
-                    continue
-                if isinstance(event, dict):
-                    yield event
-                    if str(event.get("kind") or "") in _TERMINAL_KINDS:
-                        return
-        else:
-            time.sleep(poll_sec)
+    # 監視は読む前に張る（読んでから張ると、その隙間の追記を取りこぼして眠り続ける）。
+    watcher = filewatch.watch_dir(target.parent, match=lambda name: name == target.name,
+                                  poll_sec=poll_sec)
+    try:
+        while stop is None or not stop():
+            try:
+                with target.open("rb") as fh:
+                    fh.seek(offset)
+                    chunk = fh.read()
+                    offset = fh.tell()
+            except OSError:
+                chunk = b""
+            if chunk:
+                buffer += chunk.decode("utf-8", "replace")
+                while "\n" in buffer:
+                    line, buffer = buffer.split("\n", 1)
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(event, dict):
+                        yield event
+                        if str(event.get("kind") or "") in _TERMINAL_KINDS:
+                            return
+            else:
+                watcher.wait(None if stop is None else poll_sec)
+    finally:
+        watcher.close()
@@ -0,0 +1,182 @@
+"""推論サーバへの HTTP 転送 — 接続を使い回す `urlopen` の代役。
+
+## なぜ要るか
+
+`urllib.request.urlopen` は呼ぶたびに TCP 接続を張って閉じる。ストリーミング 1 本・
+メタ情報（`/api/ps`・`/api/show`）・非ストリーミングの 1 発が、それぞれ別の接続に
+なり、再生（`--replay`）のように同じサーバへ何百回も当てる使い方では、接続の
+確立と後始末が呼び出しの数だけ積まれる。ここで `http.client` の keep-alive 接続を
+(scheme, host) ごとにプールし、プロセス内の全呼び出しで共有する。
+
+## 何を保つか
+
+- **呼び出し側の形を変えない**: 受けるのは `urllib.request.Request`、返すのは
+  `http.client.HTTPResponse`、失敗は `urllib.error.URLError` / `HTTPError`。
+  既存の例外処理（「接続できません」「API error (code)」）はそのまま効く。
+- **打ち切りの経路を変えない**: 応答は `http.client` の実物なので、`ollama_loop` の
+  ソケット直接 shutdown（`_abort_response`）がそのまま効く。打ち切った接続は
+  プールへ戻さない（読み切っていない接続は次の要求の応答と混ざる）。
+- **プロキシを通さない**: ollama のホストはアダプターが NO_PROXY へ常に足している
+  （プロキシへ流れて 504 になる事故の対策）。ここは最初から直結する。
+
+プールへ戻るのは「本文を読み切って close された応答」の接続だけ。`with` で使えば
+close は自動で呼ばれる。サーバ側が keep-alive を切っていた（待機中に閉じられた）
+接続は、送信時か応答頭の読み取りで気付いた時点で 1 回だけ張り直す。
+
+標準ライブラリのみ（pip 依存なし）。
+"""
+from __future__ import annotations
+
+import http.client
+import io
+import threading
+import urllib.error
+import urllib.request
+
+# (scheme, host) あたりに待機させておく接続の上限。再生の並列数（`--jobs`）より
+# 多く持っても使われないので、上限を超えて返ってきた接続は閉じる。
+DEFAULT_MAX_IDLE = 8
+
+# 再利用した接続がサーバ側で既に閉じられていたときに出る例外。これらは
+# 「要求が届く前に切れていた」ことを示すので、新しい接続で 1 回だけやり直してよい。
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, BrokenPipeError, ConnectionAbortedError)
+
+
+class _PooledResponse(http.client.HTTPResponse):
+    """close されたときに接続をプールへ返す応答。"""
+
+    _on_close = None
+
+    def close(self) -> None:
+        # fp が無い = 本文を終端まで読み切った（http.client が自分で閉じた）。
+        # 途中で close された応答の接続には未読の本文が残るので使い回せない。
+        reusable = self.fp is None and not self.will_close
+        callback, self._on_close = self._on_close, None
+        super().close()
+        if callback is not None:
+            callback(reusable)
+
+
+class KeepAliveTransport:
+    """(scheme, host) ごとの keep-alive 接続プール。スレッド安全。
+
+    `opened` / `reused` / `requests` は観測用の累計（テストと診断が読む）。
+    """
+
+    def __init__(self, max_idle: int = DEFAULT_MAX_IDLE) -> None:
+        self.max_idle = max(0, int(max_idle))
+        self._idle: "dict[tuple[str, str], list[http.client.HTTPConnection]]" = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.requests = 0
+
+    # -- プール ------------------------------------------------------------
+    def _acquire(self, key: "tuple[str, str]", timeout) -> "tuple[http.client.HTTPConnection, bool]":
+        with self._lock:
+            idle = self._idle.get(key) or []
+            if idle:
+                conn = idle.pop()
+                self.reused += 1
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+            self.opened += 1
+        scheme, host = key
+        factory = (http.client.HTTPSConnection if scheme == "https"
+                   else http.client.HTTPConnection)
+        conn = factory(host, timeout=timeout)
+        conn.response_class = _PooledResponse
+        return conn, False
+
+    def _give_back(self, key: "tuple[str, str]", conn: http.client.HTTPConnection,
+                   reusable: bool) -> None:
+        if reusable and conn.sock is not None:
+            with self._lock:
+                idle = self._idle.setdefault(key, [])
+                if len(idle) < self.max_idle:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(conns) for conns in self._idle.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"opened": self.opened, "reused": self.reused,
+                    "requests": self.requests,
+                    "idle": sum(len(conns) for conns in self._idle.values())}
+
+    def close(self) -> None:
+        """待機中の接続をすべて閉じる（使用中の接続には触らない）。"""
+        with self._lock:
+            conns = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+    # -- 要求 ----------------------------------------------------------------
+    def urlopen(self, req: urllib.request.Request, timeout=None) -> http.client.HTTPResponse:
+        """`urllib.request.urlopen(req, timeout)` と同じ形で 1 回要求する。
+
+        `timeout=None` はソケットに上限を掛けない（ストリーミングの待ちは呼び出し側の
+        watchdog が持つ）。4xx/5xx は本文を読み切って接続を返したうえで `HTTPError`。
+        """
+        key = (req.type, req.host)
+        headers = dict(req.header_items())
+        with self._lock:
+            self.requests += 1
+        for attempt in (1, 2):
+            conn, reused = self._acquire(key, timeout)
+            try:
+                conn.request(req.get_method(), req.selector, body=req.data, headers=headers)
+            except OSError as exc:
+                conn.close()
+                if reused and attempt == 1:
+                    continue
+                raise urllib.error.URLError(exc) from exc
+            try:
+                res = conn.getresponse()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused and attempt == 1:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            break
+        res._on_close = lambda reusable, conn=conn: self._give_back(key, conn, reusable)
+        if res.status >= 400:
+            body = res.read()
+            res.close()
+            raise urllib.error.HTTPError(req.full_url, res.status, res.reason, res.headers,
+                                         io.BytesIO(body))
+        return res
+
+
+_shared = KeepAliveTransport()
+
+
+def shared() -> KeepAliveTransport:
+    """プロセス内で共有する転送（`ollama_loop` / `ollama_adapter` / `ollama_context`）。"""
+    return _shared
+
+
+def urlopen(req: urllib.request.Request, timeout=None) -> http.client.HTTPResponse:
+    """共有プール経由の `urlopen`。差し替え口（テスト）もここ 1 か所に置く。"""
+    return _shared.urlopen(req, timeout=timeout)
+
+
+def release(res) -> None:
+    """読み終えた応答を閉じる（読み切っていれば接続はプールへ戻る）。"""
+    if res is None:
+        return
+    try:
+        res.close()
+    except Exception:
+        pass
@@ -37,6 +37,7 @@ import time
 import urllib.error
 import urllib.request
 
+from agentcore import ollama_http
 from agentcore.ollama_events import HEARTBEAT_INTERVAL_SEC, PROGRESS_INTERVAL_SEC
 
 # 既定値。すべて環境変数で上書きできる（バックアップ運転の現場で調整する余地を残す）。
@@ -305,9 +306,10 @@ def _reader(req, holder: dict, mailbox: "queue.Queue") -> None:
     本体（呼び出し側スレッド）を絶対にブロックさせないのが役目。ソケットに
     タイムアウトを掛けない（prefill が何分でも待てる）代わりに、待ちの上限判断と
     打ち切りは呼び出し側の watchdog が持つ——`res.close()` でこのスレッドを解く。
+    接続は `ollama_http` の共有プールから借りる（読み切れば次の呼び出しへ回る）。
     """
     try:
-        res = urllib.request.urlopen(req, timeout=None)
+        res = ollama_http.urlopen(req, timeout=None)
         holder["res"] = res
         mailbox.put(("open", None))
         for raw in res:
@@ -386,6 +388,10 @@ def stream_call(endpoint: str, body: dict, *, delta_of, emit=None, round_no: int
     def abort() -> None:
         _abort_response(holder.get("res"))
 
+    # 終端まで読み切った応答だけ接続をプールへ返す。打ち切り・失敗の応答は
+    # 未読の本文を抱えているので、ソケットごと捨てる（次の要求へ混ぜない）。
+    finished = False
+
     if emit is not None:
         emit("llm_start", round=round_no, phase=phase, model=str(body.get("model") or ""))
     thread.start()
@@ -421,6 +427,7 @@ def stream_call(endpoint: str, body: dict, *, delta_of, emit=None, round_no: int
                 phase_started = time.monotonic()
                 continue
             if kind == "eof":
+                finished = True
                 break
 
             line = payload.decode("utf-8", "replace").strip() if isinstance(payload, bytes) else str(payload).strip()
@@ -460,7 +467,10 @@ def stream_call(endpoint: str, body: dict, *, delta_of, emit=None, round_no: int
             if chunk.get("done"):
                 final = chunk
     finally:
-        abort()
+        if finished:
+            ollama_http.release(holder.get("res"))
+        else:
+            abort()
 
     tokens_in = int(final.get("prompt_eval_count") or 0)
     measured_out = int(final.get("eval_count") or 0) or tokens_out
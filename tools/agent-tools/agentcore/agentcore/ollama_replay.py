@@ -36,7 +36,9 @@
 """
 from __future__ import annotations
 
+import concurrent.futures
 import json
+import threading
 import time
 from pathlib import Path
 
@@ -263,18 +265,49 @@ def replay_case(case: dict, arm: dict, *, generate=None, attempt: int = 1) -> di
     return record
 
 
-def replay(cases: "list[dict]", arms: "list[dict]", *, generate=None, on_record=None
-           ) -> "list[dict]":
-    """全件 × 全腕を再生する。`on_record` があれば 1 件ごとに渡す（逐次書き出し用）。"""
-    records: "list[dict]" = []
-    for case in cases:
-        for arm in arms:
-            for attempt in range(1, int(arm.get("repeat") or 1) + 1):
-                record = replay_case(case, arm, generate=generate, attempt=attempt)
-                records.append(record)
-                if on_record is not None:
-                    on_record(record)
-    return records
+def _trials(cases: "list[dict]", arms: "list[dict]") -> "list[tuple[dict, dict, int]]":
+    """再生する (件, 腕, 試行番号) を、記録の並び順どおりに並べる。"""
+    return [(case, arm, attempt)
+            for case in cases
+            for arm in arms
+            for attempt in range(1, int(arm.get("repeat") or 1) + 1)]
+
+
+def replay(cases: "list[dict]", arms: "list[dict]", *, generate=None, on_record=None,
+           jobs: int = 1) -> "list[dict]":
+    """全件 × 全腕を再生する。`on_record` があれば 1 件ごとに渡す（逐次書き出し用）。
+
+    `jobs` > 1 なら最大 `jobs` 本を同時に走らせる（サーバ側の `OLLAMA_NUM_PARALLEL` に
+    合わせる口。それ以上並べてもサーバの待ち行列に積まれるだけ）。`on_record` は
+    終わった順に 1 件ずつ（同時には呼ばない）渡すが、**戻り値は jobs によらず同じ並び**
+    （件 → 腕 → 試行の順）にする——記録の順で集計や比較が揺れないように。
+    """
+    trials = _trials(cases, arms)
+    jobs = max(1, int(jobs or 1))
+    if jobs == 1 or len(trials) <= 1:
+        records: "list[dict]" = []
+        for case, arm, attempt in trials:
+            record = replay_case(case, arm, generate=generate, attempt=attempt)
+            records.append(record)
+            if on_record is not None:
+                on_record(record)
+        return records
+
+    slots: "list[dict | None]" = [None] * len(trials)
+    lock = threading.Lock()
+
+    def run(index: int) -> None:
+        case, arm, attempt = trials[index]
+        record = replay_case(case, arm, generate=generate, attempt=attempt)
+        with lock:
+            slots[index] = record
+            if on_record is not None:
+                on_record(record)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(jobs, len(trials))) as pool:
+        for future in [pool.submit(run, index) for index in range(len(trials))]:
+            future.result()
+    return [record for record in slots if record is not None]
 
 
 # ---------------------------------------------------------------------------
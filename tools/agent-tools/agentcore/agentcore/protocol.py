@@ -17,6 +17,7 @@ sync 後の決定的タイブレーク＋lease が担う。転送（push/pull）
 """
 from __future__ import annotations
 
+import atexit
 import contextlib
 import hashlib
 import json
@@ -40,8 +41,10 @@ from .heartbeat import now_iso
 
 __all__ = [
     "unique_ts", "read_json", "write_json_atomic",
+    "DURABLE_IMMEDIATE", "DURABLE_BATCHED", "GROUP_COMMIT_ENV", "set_group_commit",
+    "flush_pending",
     "list_claims", "winner", "write_claim", "try_claim",
-    "extend_claim", "renew_lease", "release_claim",
+    "extend_claim", "renew_lease", "release_claim", "ClaimLog",
 ]
 
 _ts_lock = threading.Lock()
@@ -69,7 +72,100 @@ def read_json(path: str):
         return None
 
 
-def write_json_atomic(path: str, data) -> None:
+# --- group commit（ディレクトリ fsync のまとめ打ち・任意） ---------------------------------
+# write_json_atomic は 1 回ごとに「中身の fsync」と「ディレクトリの fsync」を払う。遅いディスク
+# では、status・心拍のように 1 tick に何本も書く記録がこの fsync 待ちで詰まり、ノードが 1 秒に
+# こなせる状態遷移の数を決めてしまう。
+# group commit を有効にすると、durability=DURABLE_BATCHED の書き込みだけはディレクトリの
+# fsync をその場で打たず、窓（GROUP_COMMIT_ENV ミリ秒 / set_group_commit）の終わりに
+# ディレクトリごと 1 回にまとめる。ファイル単位のクラッシュ整合は変わらない——中身の fsync は
+# rename の前に必ず打つので、落ちても残るのは「旧い版か新しい版のどちらか」で、空や途中までの
+# ファイルにはならない。緩むのは「窓の間に落ちると新しい版が旧い版へ戻りうる」ことだけで、
+# 次の tick に書き直される status・心拍には実害が無い。
+# claim・result のように「書けた」と返した後に戻ってはいけないものは既定の DURABLE_IMMEDIATE
+# のまま（group commit の有無に関わらず、返る前にディレクトリまで fsync する）。
+DURABLE_IMMEDIATE = "immediate"
+DURABLE_BATCHED = "batched"
+GROUP_COMMIT_ENV = "AGENT_GROUP_COMMIT_MS"
+
+_gc_cond = threading.Condition()
+_gc_flush_lock = threading.Lock()     # fsync 中のまとめ打ちを flush_pending が追い越さないため
+_gc_window: "Optional[float]" = None  # 秒。None は未決定（初回に GROUP_COMMIT_ENV を読む）
+_gc_dirty: "dict[str, float]" = {}    # まだ fsync していないディレクトリ → 最初に汚れた時刻
+_gc_thread: "Optional[threading.Thread]" = None
+
+
+def set_group_commit(window_sec: "Optional[float]") -> None:
+    """group commit の窓（秒）を設定する。0 / None で無効（既定は GROUP_COMMIT_ENV）。
+
+    切り替える前に、溜まっているまとめ打ちは flush する。"""
+    global _gc_window
+    flush_pending()
+    with _gc_cond:
+        _gc_window = _as_float(window_sec) or 0.0
+        _gc_window = max(0.0, _gc_window)
+        _gc_cond.notify_all()
+
+
+def _group_window() -> float:
+    global _gc_window
+    if _gc_window is None:
+        ms = _as_float(os.environ.get(GROUP_COMMIT_ENV)) or 0.0
+        _gc_window = max(0.0, ms / 1000.0)
+    return _gc_window
+
+
+def flush_pending() -> None:
+    """まとめ打ち待ちのディレクトリ fsync をいま打つ。返った時点で、それまでに返った
+    DURABLE_BATCHED の書き込みはすべて永続化されている（プロセス終了時にも呼ばれる）。"""
+    with _gc_flush_lock:
+        with _gc_cond:
+            dirs = list(_gc_dirty)
+            _gc_dirty.clear()
+        for d in dirs:
+            _sync_directory(d)
+
+
+def _defer_dir_fsync(path: str) -> None:
+    global _gc_thread
+    with _gc_cond:
+        _gc_dirty.setdefault(os.path.dirname(path) or ".", time.monotonic())
+        if _gc_thread is None or not _gc_thread.is_alive():
+            _gc_thread = threading.Thread(target=_group_flusher, name="agentcore-group-commit",
+                                          daemon=True)
+            _gc_thread.start()
+        _gc_cond.notify_all()
+
+
+def _group_flusher() -> None:
+    """最初に汚れたディレクトリが窓を過ぎたら、その時点で汚れている分をまとめて fsync する。"""
+    while True:
+        with _gc_cond:
+            while not _gc_dirty:
+                _gc_cond.wait()
+            wait = min(_gc_dirty.values()) + _group_window() - time.monotonic()
+            if wait > 0:
+                _gc_cond.wait(wait)
+                continue
+        flush_pending()
+
+
+def _reset_group_commit_in_child() -> None:
+    # fork した子は親の flusher スレッドを持たず、ロックが取られたままの可能性もある。
+    # 汚れたディレクトリは親が打つので、子は空から始める。
+    global _gc_cond, _gc_flush_lock, _gc_thread, _gc_dirty
+    _gc_cond = threading.Condition()
+    _gc_flush_lock = threading.Lock()
+    _gc_thread = None
+    _gc_dirty = {}
+
+
+atexit.register(flush_pending)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_group_commit_in_child)
+
+
+def write_json_atomic(path: str, data, durability: str = DURABLE_IMMEDIATE) -> None:
     """JSON を「tmp へ書く → fsync → rename」で置き換える。
 
     rename だけでは**電源断でサイズ 0 のファイルが残る**: rename のメタデータが先に永続化され、
@@ -82,7 +178,12 @@ def write_json_atomic(path: str, data) -> None:
     一時名は `<path>.tmp.<pid>.<unique>`。PID だけでは同一プロセス内の並行書き込みが衝突し、
     一方 `mkstemp` の別名（`.name.XXXX.tmp`）だと agent-flow の残骸掃除（`.tmp.<pid>`）と
     権限（0600 固定）がずれるので、従来の接頭辞を保ったまま一意接尾辞を足す。
+
+    durability=DURABLE_BATCHED は、group commit が有効なときだけディレクトリの fsync を窓の
+    終わりへ回す（上の「group commit」。無効なら DURABLE_IMMEDIATE と同じ）。
     """
+    if durability not in (DURABLE_IMMEDIATE, DURABLE_BATCHED):
+        raise ValueError(f"unknown durability: {durability!r}")
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
     tmp = f"{path}.tmp.{os.getpid()}.{time.time_ns()}"
     try:
@@ -95,10 +196,22 @@ def write_json_atomic(path: str, data) -> None:
         with contextlib.suppress(OSError):
             os.remove(tmp)
         raise
-    # ディレクトリエントリ（rename）の永続化。Windows は O_RDONLY でディレクトリを開けず、
-    # そもそも rename のジャーナリング挙動が異なるので失敗は黙って許容する。
+    if durability == DURABLE_BATCHED and _group_window() > 0:
+        _defer_dir_fsync(path)
+    else:
+        _fsync_dir(path)
+
+
+def _fsync_dir(path: str) -> None:
+    """path を置いたディレクトリエントリ（rename・新規作成）の永続化。"""
+    _sync_directory(os.path.dirname(path) or ".")
+
+
+def _sync_directory(directory: str) -> None:
+    # Windows は O_RDONLY でディレクトリを開けず、そもそも rename のジャーナリング挙動が
+    # 異なるので失敗は黙って許容する。
     try:
-        dfd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        dfd = os.open(directory, os.O_RDONLY)
     except OSError:
         return
     try:
@@ -189,9 +302,14 @@ def winner(claim_dir: str, now: "Optional[float]" = None) -> "Optional[str]":
 
     `ts` / `lease_until` が数値として読めない claim は無視する（壊れた 1 ファイルが
     比較例外で勝者判定そのものを止め、そのロール/委譲が誰にも取れなくなるのを防ぐ）。"""
+    return _pick_winner(list_claims(claim_dir), now)
+
+
+def _pick_winner(claims: "dict[str, dict]", now: "Optional[float]" = None) -> "Optional[str]":
+    """winner の本体（claim の置き場所に依らない）。ClaimLog も同じ規則で選ぶ。"""
     now = now if now is not None else time.time()
     live = []
-    for who, info in list_claims(claim_dir).items():
+    for who, info in claims.items():
         lease_until = _as_float(info.get("lease_until"))
         ts = _as_float(info.get("ts"))
         if lease_until is None or ts is None or lease_until < now:
@@ -208,6 +326,11 @@ def write_claim(claim_dir: str, who: str, lease_sec: float,
     """`<claim_dir>/<who>.json` を新規の ts で書く（既存を上書き。タイブレークの根拠が
     動くため、延長したいだけなら extend_claim / renew_lease を使うこと）。"""
     os.makedirs(claim_dir, exist_ok=True)
+    write_json_atomic(os.path.join(claim_dir, f"{safe_name(who)}.json"),
+                      _new_claim(who, lease_sec, extra))
+
+
+def _new_claim(who: str, lease_sec: float, extra: "Optional[dict]") -> dict:
     rec = {}
     if extra:
         # 予約キーは後段の正規フィールドが勝つ——extra で who/ts/lease を差し替えると
@@ -215,7 +338,7 @@ def write_claim(claim_dir: str, who: str, lease_sec: float,
         rec.update({k: v for k, v in extra.items() if k not in _CLAIM_RESERVED})
     rec.update({"who": who, "ts": unique_ts(), "claimed_at": now_iso(),
                 "lease_until": time.time() + lease_sec})
-    write_json_atomic(os.path.join(claim_dir, f"{safe_name(who)}.json"), rec)
+    return rec
 
 
 def try_claim(claim_dir: str, who: str, lease_sec: float,
@@ -283,31 +406,264 @@ def renew_lease(claim_dir: str, who: str, lease_sec: float,
     必ず False で呼ぶこと。"""
     path = os.path.join(claim_dir, f"{safe_name(who)}.json")
     with _file_lock(_lock_path(claim_dir)):
-        cur = read_json(path)
-        now = time.time()
-        if not isinstance(cur, dict) and not create_if_missing:
+        rec = _renewed_claim(read_json(path), who, lease_sec, extra, create_if_missing)
+        if rec is None:
             return False
-        if isinstance(cur, dict):
-            # winner() と同じく壊れた数値は 0 扱い——float() 直呼びは ValueError で心拍全体を止める。
-            lease_until = _as_float(cur.get("lease_until")) or 0.0
-            if lease_until - now > lease_sec / 2.0:
-                return False  # まだ十分残っている → 今回は延長不要
-            ts = cur.get("ts", now)
-            claimed_at = cur.get("claimed_at", now_iso())
-        else:
-            ts = now
-            claimed_at = now_iso()
-        rec = {}
-        if extra:
-            rec.update({k: v for k, v in extra.items() if k not in _CLAIM_RESERVED})
-        rec.update({"who": who, "ts": ts, "claimed_at": claimed_at,
-                    "lease_until": now + lease_sec})
         write_json_atomic(path, rec)
     return True
 
 
+def _renewed_claim(cur, who: str, lease_sec: float, extra: "Optional[dict]",
+                   create_if_missing: bool) -> "Optional[dict]":
+    """renew_lease が書くべきレコード。書かなくてよい（書いてはいけない）なら None。"""
+    now = time.time()
+    if not isinstance(cur, dict) and not create_if_missing:
+        return None
+    if isinstance(cur, dict):
+        # winner() と同じく壊れた数値は 0 扱い——float() 直呼びは ValueError で心拍全体を止める。
+        lease_until = _as_float(cur.get("lease_until")) or 0.0
+        if lease_until - now > lease_sec / 2.0:
+            return None  # まだ十分残っている → 今回は延長不要
+        ts = cur.get("ts", now)
+        claimed_at = cur.get("claimed_at", now_iso())
+    else:
+        ts = now
+        claimed_at = now_iso()
+    rec = {}
+    if extra:
+        rec.update({k: v for k, v in extra.items() if k not in _CLAIM_RESERVED})
+    rec.update({"who": who, "ts": ts, "claimed_at": claimed_at,
+                "lease_until": now + lease_sec})
+    return rec
+
+
 def release_claim(claim_dir: str, who: str) -> None:
     """自分の claim ファイルを消して手放す。呼び出し側は心拍を停止してから呼ぶこと
     ——停止前に消すと直後の心拍が claim を書き戻す。"""
     with contextlib.suppress(OSError):
         os.remove(os.path.join(claim_dir, f"{safe_name(who)}.json"))
+
+
+# --- 追記ログ 1 本の claim ストア（任意） -----------------------------------------------
+# 上の関数群は claim 1 件 = ファイル 1 本で、勝者判定のたびにディレクトリを列挙して全件を
+# 読み、書き込みのたびに tmp → fsync → rename → ディレクトリ fsync を払う。git で転送する
+# バス（ファイル名が衝突しない disjoint 書き込み）にはこの形が要るが、同じホストの中だけで
+# 回る claim 名前空間が、1 回の claim に fsync 2 回とディレクトリ走査 2 回を払う理由は無い。
+# ClaimLog は名前空間（ノード id 等）ごとのディレクトリの代わりに 1 本の追記ログへ書き、
+# 勝者表はログを前回の位置から読み足してメモリ上に保つ（読み手の勝者判定はファイル 1 本の
+# stat と新着行の読み込みだけ）。勝者の規則（_pick_winner）・先着優先（ロックの中で勝者を
+# 確かめてから書く）・lease の失効は関数版と同じ。ロックはログ 1 本につき 1 本。
+CLAIM_LOG_COMPACT_MIN = 1024     # ログの行数がこれ以上で…
+CLAIM_LOG_COMPACT_RATIO = 4      # …生きているレコード数のこの倍を超えたら畳み直す
+
+
+class ClaimLog:
+    """追記ログ 1 本に複数の claim 名前空間を持つ claim ストア。
+
+    ログの 1 行は 1 操作: `{"k": 名前空間, "w": who, "c": レコード}`（書く）・
+    `{"k": 名前空間, "w": who}`（消す）・`{"k": 名前空間}`（名前空間ごと消す）。書き込みは
+    すべてロックの中で末尾へ 1 回の write で足し（fsync=True なら fsync も）、読み手は改行まで
+    書き終えた行だけを取り込む。畳み直し（compact）は生きているレコードだけのログを一時名で
+    書いて rename で差し替え、読み手は inode の変化で読み直す。
+
+    複数ノードが同じファイルへ追記することになるので、git 等でファイル単位に転送するバスには
+    使えない（そちらは関数版の `<claim_dir>/<who>.json`）。"""
+
+    def __init__(self, path: str, fsync: bool = True):
+        self.path = path
+        self.fsync = fsync
+        self._mutex = threading.Lock()   # 同じインスタンスを使うスレッド間で表を守る
+        self._reset(None)
+
+    def _reset(self, ident) -> None:
+        self._ident = ident
+        self._offset = 0
+        self._lines = 0
+        self._table: "dict[str, dict[str, dict]]" = {}
+
+    # --- 読み取り ---
+    def refresh(self) -> None:
+        """前回の位置から後ろに足された行を取り込む（差し替わっていれば最初から読み直す）。"""
+        with self._mutex:
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                self._reset(None)
+                return
+            with f:
+                st = os.fstat(f.fileno())
+                ident = (st.st_dev, st.st_ino)
+                if ident != self._ident or st.st_size < self._offset:
+                    self._reset(ident)
+                if st.st_size == self._offset:
+                    return
+                f.seek(self._offset)
+                data = f.read(st.st_size - self._offset)
+            done = data.rfind(b"\n") + 1
+            for line in data[:done].split(b"\n")[:-1]:
+                self._apply(line)
+            self._offset += done
+
+    def _apply(self, line: bytes) -> None:
+        try:
+            op = json.loads(line)
+        except ValueError:
+            return      # 途中で落ちた書き込みの断片
+        if not isinstance(op, dict) or not isinstance(op.get("k"), str):
+            return
+        self._lines += 1
+        key = op["k"]
+        if "w" not in op:
+            self._table.pop(key, None)
+            return
+        claims = self._table.setdefault(key, {})
+        if isinstance(op.get("c"), dict):
+            claims[str(op["w"])] = op["c"]
+        else:
+            claims.pop(str(op["w"]), None)
+            if not claims:
+                del self._table[key]
+
+    def keys(self) -> "list[str]":
+        """claim が 1 件以上ある名前空間。"""
+        self.refresh()
+        with self._mutex:
+            return sorted(self._table)
+
+    def list_claims(self, key: str) -> "dict[str, dict]":
+        self.refresh()
+        with self._mutex:
+            return {who: dict(rec) for who, rec in self._table.get(key, {}).items()}
+
+    def winner(self, key: str, now: "Optional[float]" = None) -> "Optional[str]":
+        """関数版 winner と同じ規則で、名前空間 key の勝者を選ぶ。"""
+        return _pick_winner(self.list_claims(key), now)
+
+    # --- 書き込み（すべてロックの中） ---
+    @contextlib.contextmanager
+    def _locked(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with _file_lock(_lock_path(self.path)):
+            yield
+
+    def _append(self, *ops: dict) -> None:
+        data = b"".join(json.dumps(op, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                        + b"\n" for op in ops)
+        created = not os.path.exists(self.path)
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                data = b"\n" + data    # 途中で落ちた書き込みの断片に続けて書かない
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        if created and self.fsync:
+            _fsync_dir(self.path)
+        self.refresh()
+        live = sum(len(claims) for claims in self._table.values())
+        if self._lines >= CLAIM_LOG_COMPACT_MIN and self._lines > live * CLAIM_LOG_COMPACT_RATIO:
+            self._compact()
+
+    def _compact(self) -> None:
+        with self._mutex:
+            ops = [{"k": key, "w": who, "c": rec}
+                   for key, claims in sorted(self._table.items())
+                   for who, rec in sorted(claims.items())]
+        tmp = f"{self.path}.tmp.{os.getpid()}.{time.time_ns()}"
+        try:
+            with open(tmp, "wb") as f:
+                for op in ops:
+                    f.write(json.dumps(op, ensure_ascii=False, separators=(",", ":"))
+                            .encode("utf-8") + b"\n")
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except Exception:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+            raise
+        if self.fsync:
+            _fsync_dir(self.path)
+        self.refresh()
+
+    def compact(self) -> None:
+        """生きているレコードだけのログへ畳み直す（通常は追記のたびに自動で判断する）。"""
+        with self._locked():
+            self.refresh()
+            self._compact()
+
+    def write_claim(self, key: str, who: str, lease_sec: float,
+                    extra: "Optional[dict]" = None) -> None:
+        with self._locked():
+            self._append({"k": key, "w": who, "c": _new_claim(who, lease_sec, extra)})
+
+    def try_claim(self, key: str, who: str, lease_sec: float,
+                  on_write: "Optional[Callable[[], None]]" = None,
+                  on_sync: "Optional[Callable[[], None]]" = None,
+                  on_withdraw: "Optional[Callable[[], None]]" = None,
+                  extra: "Optional[dict]" = None) -> bool:
+        """関数版 try_claim と同じ手順・同じ勝敗（負けたら自分の claim を消してから on_withdraw）。
+
+        ロックを取る前に表を読み足し、lease 内の他者が既に勝っていればそのまま負けを返す
+        （奪い合いの大半は敗者なので、ログ 1 本のロックに全員が並ばずに済む）。勝者が消えるのは
+        release・失効だけで、その直前の景色で負けを返すのは「少し遅れて来た」のと変わらない。"""
+        w = self.winner(key)
+        if w is not None and w != who:
+            return False
+        with self._locked():
+            w = self.winner(key)
+            if w is not None and w != who:
+                return False
+            self._append({"k": key, "w": who, "c": _new_claim(who, lease_sec, extra)})
+            if on_write:
+                on_write()
+            if on_sync:
+                on_sync()
+            if self.winner(key) == who:
+                return True
+            self._append({"k": key, "w": who})
+            if on_withdraw:
+                on_withdraw()
+            return False
+
+    def extend_claim(self, key: str, who: str, lease_sec: float) -> bool:
+        """関数版 extend_claim と同じ（lease_until だけを延長。失った claim は延長しない）。"""
+        with self._locked():
+            claims = self.list_claims(key)
+            cur = claims.get(who)
+            if not cur:
+                return False
+            w = _pick_winner(claims)
+            if w is not None and w != who:
+                return False
+            cur["lease_until"] = time.time() + lease_sec
+            self._append({"k": key, "w": who, "c": cur})
+        return True
+
+    def renew_lease(self, key: str, who: str, lease_sec: float,
+                    extra: "Optional[dict]" = None, create_if_missing: bool = True) -> bool:
+        """関数版 renew_lease と同じ（残 lease が半分未満のときだけ延長し、ts は温存）。"""
+        with self._locked():
+            rec = _renewed_claim(self.list_claims(key).get(who), who, lease_sec, extra,
+                                 create_if_missing)
+            if rec is None:
+                return False
+            self._append({"k": key, "w": who, "c": rec})
+        return True
+
+    def release_claim(self, key: str, who: str) -> None:
+        with self._locked():
+            if who in self.list_claims(key):
+                self._append({"k": key, "w": who})
+
+    def drop(self, key: str) -> None:
+        """名前空間 key の claim を全部消す（関数版でのディレクトリ削除に当たる）。"""
+        with self._locked():
+            if self.list_claims(key):
+                self._append({"k": key})
@@ -0,0 +1,180 @@
+"""agentcore.statusdoc — 状況ファイルを「心拍」と「本体」に分けて書く・読む。
+
+## なぜ要るか
+
+agent-loop の `status/<tool>-<pid>.json` は 1 秒 tick ごとに、agent-project の `status.json` /
+`status/<node>.json` はパスごとに、状況の全文を組み立てて原子書換していた。中身のほとんどは
+設定・適用状況で、tick 間で変わるのは時刻だけ。それでも毎回まるごと書き直すので、何も起きて
+いない 1 時間に数千回の書き込みが出て、dashboard や `status` 系の読み手も毎回全文を読み直して
+パースし直す。
+
+## 形
+
+- 本体 `<name>.json` … 従来どおりの文書に `version`（内容が変わるたびに +1 する単調な整数）を
+  足したもの。時刻などの揮発キーを除いた内容のハッシュが前回と同じなら**書かない**。
+- 心拍 `<name>.beat` … `{"version": N, <stamp_key>: 時刻}` だけの小さなレコード。生存の根拠は
+  こちらで、`beat_every` 秒に 1 回しか書かない（鮮度窓に対して十分に細かければよい）。
+  `beat_every=None` なら内容が変わったときだけ書き、生存は本体の時刻の書き直しに任せる。
+
+読み手は `read_status()` で本体に心拍の時刻を重ねて読む。心拍の `version` が前回読んだ本体と
+同じで、本体の mtime も変わっていなければ本体はパースし直さない。拡張子を `.json` にしないのは、
+`status/*.json` を列挙する既存の読み手に心拍を「別のノード」と数えさせないため。
+
+心拍を知らない旧い読み手は本体の時刻だけで鮮度を見る。そのため本体は、内容が同じでも
+`refresh_every` 秒経ったら時刻だけ書き直す（`version` は据え置き。新しい読み手は mtime の
+変化でそれと分かる）。`refresh_every` は書き手が自分の鮮度窓から決める。
+
+書き込みは best-effort の状況報告なので fsync しない（従来どおり。失っても次の心拍で戻る）。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+
+BEAT_SUFFIX = ".beat"
+
+# write() の戻り値（何を書いたか）。書き込み回数を数える呼び出し側・テスト向け。
+WROTE_DOCUMENT = "document"
+WROTE_BEAT = "beat"
+WROTE_NOTHING = "skip"
+
+
+def beat_path(path: str) -> str:
+    """本体 `<name>.json` に対応する心拍ファイルのパス。"""
+    root, _ = os.path.splitext(str(path))
+    return root + BEAT_SUFFIX
+
+
+def content_digest(doc: dict, volatile=()) -> str:
+    """揮発キーを除いた doc のハッシュ。volatile はキーの経路のタプル列
+    （`("ts",)` や入れ子の `("budget", "observed_at")`）。`version` は常に除く。"""
+    trimmed = json.loads(json.dumps(doc, ensure_ascii=False))
+    trimmed.pop("version", None)
+    for keys in volatile:
+        node = trimmed
+        for key in keys[:-1]:
+            node = node.get(key) if isinstance(node, dict) else None
+        if isinstance(node, dict):
+            node.pop(keys[-1], None)
+    body = json.dumps(trimmed, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: str, data: dict, indent) -> None:
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp, path)
+
+
+def _mtime_ns(path: str) -> "int | None":
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class StatusWriter:
+    """1 本の状況ファイル（本体＋心拍）の書き手。同じパスには同じインスタンスを使い続ける
+    （前回の内容ハッシュと書いた時刻をメモリに持つ）。
+
+    stamp_key … 生存時刻のキー（agent-loop は `ts`、agent-project は `updated_iso`）。
+    volatile … 内容の比較から外すキーの経路（stamp_key は常に含まれる）。
+    beat_every / refresh_every … 心拍の最短間隔と、内容不変でも本体の時刻を書き直す間隔（秒。
+    None はそれぞれ「内容が変わったときだけ書く」「書き直さない」）。
+    indent … 本体の JSON の字下げ（従来の書式に合わせる）。"""
+
+    def __init__(self, path: str, *, stamp_key: str = "ts", volatile=(),
+                 beat_every: "float | None" = 0.0, refresh_every: "float | None" = None,
+                 indent=None):
+        self.path = str(path)
+        self.stamp_key = stamp_key
+        self.volatile = ((stamp_key,),) + tuple(tuple(k) for k in volatile)
+        self.beat_every = beat_every
+        self.refresh_every = refresh_every
+        self.indent = indent
+        self._version: "int | None" = None
+        self._digest: "str | None" = None
+        self._doc_at = self._beat_at = float("-inf")
+        self._doc_mtime: "int | None" = None
+
+    @property
+    def version(self) -> "int | None":
+        return self._version
+
+    def write(self, doc: dict, now: "float | None" = None) -> str:
+        """doc（stamp_key に現在時刻を入れた全文）を反映する。内容が変わっていれば本体と心拍、
+        変わっていなければ間隔に応じて心拍と、旧い読み手向けの本体の時刻だけを書く。
+        本体が前回書いたときから差し替わっていれば（消えた・mtime が変わった）内容が同じでも書き直す。
+        何を書いたか（本体を書いたら WROTE_DOCUMENT）を返す。
+        OSError はそのまま上げる（呼び出し側の best-effort 方針に任せる）。"""
+        now = time.monotonic() if now is None else now
+        if self._version is None:
+            # 同じパスを前のプロセスが書いていれば、その続きから数える（単調性を再起動で崩さない）
+            prior = _read_json(self.path)
+            prior_version = prior.get("version") if isinstance(prior, dict) else None
+            self._version = prior_version if isinstance(prior_version, int) else 0
+        digest = content_digest(doc, self.volatile)
+        changed = digest != self._digest
+        # 手元の内容ハッシュは「本体は前回書いたまま」が前提。state_git の取り込み・人の手・
+        # 他プロセスで差し替わったら、その前提が崩れているので書き直して戻す（version は据え置き）
+        replaced = self._doc_mtime is not None and _mtime_ns(self.path) != self._doc_mtime
+        stale = replaced or (
+            self.refresh_every is not None and now - self._doc_at >= self.refresh_every)
+        wrote = WROTE_NOTHING
+        if changed or stale:
+            version = self._version + 1 if changed else self._version
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            _write_atomic(self.path, {**doc, "version": version}, self.indent)
+            self._version, self._digest, self._doc_at = version, digest, now
+            self._doc_mtime = _mtime_ns(self.path)
+            wrote = WROTE_DOCUMENT
+        # 内容が変わったら心拍も必ず書く（読み手は心拍の version で本体の読み直しを決める）
+        if changed or (self.beat_every is not None and now - self._beat_at >= self.beat_every):
+            _write_atomic(beat_path(self.path),
+                          {"version": self._version, self.stamp_key: doc.get(self.stamp_key)}, None)
+            self._beat_at = now
+            wrote = wrote if wrote == WROTE_DOCUMENT else WROTE_BEAT
+        return wrote
+
+
+def read_status(path: str, cache: "dict | None" = None) -> "dict | None":
+    """本体に心拍の時刻を重ねた dict を返す。本体が無い・壊れていれば None。
+
+    cache（呼び出し側が持ち回る dict）を渡すと、心拍の `version` が前回読んだ本体と同じで、
+    本体の mtime も変わっていない間は本体を読み直さない（内容不変の時刻の書き直しは version を
+    上げないので、mtime で拾う）。心拍が無い（旧い書き手）ときは本体だけを毎回読む。
+    時刻は本体と心拍の新しい方を採る（同じ書式の ISO8601 なので文字列の大小で比べられる）。"""
+    path = str(path)
+    beat = _read_json(beat_path(path))
+    beat = beat if isinstance(beat, dict) else None
+    mtime = _mtime_ns(path)
+    if mtime is None:
+        return None
+    cached = cache.get(path) if cache is not None else None
+    if beat is not None and cached is not None and cached[0] == mtime \
+            and cached[1].get("version") == beat.get("version"):
+        doc = dict(cached[1])
+    else:
+        doc = _read_json(path)
+        if not isinstance(doc, dict):
+            return None
+        if cache is not None and beat is not None:
+            cache[path] = (mtime, dict(doc))
+    for key, value in (beat or {}).items():
+        if key == "version" or not isinstance(value, str):
+            continue
+        current = doc.get(key)
+        if not isinstance(current, str) or value > current:
+            doc[key] = value
+    return doc
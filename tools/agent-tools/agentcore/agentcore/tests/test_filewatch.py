@@ -0,0 +1,122 @@
+"""ディレクトリの変化待ち（inotify / polling）と、それに載せたログ追尾のテスト。
+
+到着の遅れ（書いてから起きるまで）を両方の実装で測る。inotify は間隔に縛られない
+ことを、polling は従来どおり間隔の中で届くことを確かめる。
+"""
+from __future__ import annotations
+
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from agentcore import filewatch, ollama_events
+
+_HAS_INOTIFY = filewatch.inotify_available()
+
+
+def _write_later(path: Path, text: str, delay: float, stamp: dict) -> threading.Thread:
+    def run():
+        time.sleep(delay)
+        stamp["written"] = time.monotonic()
+        with path.open("a", encoding="utf-8") as fh:
+            fh.write(text)
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestBackendSelection(unittest.TestCase):
+    def test_poll_is_forced_by_env(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.dict("os.environ", {"AGENT_FILEWATCH": "poll"}):
+            watcher = filewatch.watch_dir(tmp)
+            self.assertEqual(watcher.backend, "poll")
+            watcher.close()
+
+    def test_missing_directory_falls_back_to_polling(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            watcher = filewatch.watch_dir(Path(tmp) / "まだ無い", backend="inotify")
+            self.assertEqual(watcher.backend, "poll")
+            watcher.close()
+
+
+@unittest.skipUnless(_HAS_INOTIFY, "inotify が使えない環境")
+class TestInotifyWatcher(unittest.TestCase):
+    def test_wakes_only_for_matching_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            with filewatch.watch_dir(directory, match=lambda n: n.endswith(".json"),
+                                     backend="inotify") as watcher:
+                self.assertEqual(watcher.backend, "inotify")
+                (directory / "other.txt").write_text("x", encoding="utf-8")
+                self.assertFalse(watcher.wait(0.2), "関係ない名前では起きない")
+                (directory / "m.json").write_text("{}", encoding="utf-8")
+                self.assertTrue(watcher.wait(2.0))
+
+    def test_completed_mask_ignores_bare_creation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            with filewatch.watch_dir(directory, mask=filewatch.COMPLETED,
+                                     backend="inotify") as watcher:
+                fh = (directory / "m.json").open("w", encoding="utf-8")
+                fh.write("{")
+                fh.flush()
+                self.assertFalse(watcher.wait(0.2), "書き終わるまで起きない")
+                fh.write("}")
+                fh.close()
+                self.assertTrue(watcher.wait(2.0))
+
+    def test_idle_wait_blocks_until_woken(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with filewatch.watch_dir(tmp, backend="inotify") as watcher:
+                threading.Timer(0.2, watcher.wake).start()
+                started = time.monotonic()
+                self.assertFalse(watcher.wait(None), "wake は変化ではない")
+                self.assertGreaterEqual(time.monotonic() - started, 0.15)
+
+
+class TestFollowLatency(unittest.TestCase):
+    """`follow_events` が追記を受け取るまでの遅れを両方の実装で測る。"""
+
+    POLL_SEC = 0.5
+
+    def _latency(self, backend: str) -> float:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "run.jsonl"
+            path.write_text(json.dumps({"ts": 1.0, "kind": "run_start"}) + "\n", encoding="utf-8")
+            stamp: dict = {}
+            original = filewatch.watch_dir
+
+            def pinned(*args, **kwargs):
+                kwargs["backend"] = backend
+                return original(*args, **kwargs)
+
+            with mock.patch.object(filewatch, "watch_dir", pinned):
+                events = ollama_events.follow_events(path, poll_sec=self.POLL_SEC)
+                self.assertEqual(next(events)["kind"], "run_start")
+                # 次の読みが空振りして待ちに入ってから書く（待ちからの起床を測る）。
+                writer = _write_later(path, json.dumps({"ts": 2.0, "kind": "run_end"}) + "\n",
+                                      0.3, stamp)
+                event = next(events)
+                received = time.monotonic()
+                writer.join()
+            self.assertEqual(event["kind"], "run_end")
+            return received - stamp["written"]
+
+    @unittest.skipUnless(_HAS_INOTIFY, "inotify が使えない環境")
+    def test_inotify_delivers_within_milliseconds(self):
+        latency = self._latency("inotify")
+        self.assertLess(latency, 0.1, f"inotify の遅れ {latency * 1000:.1f}ms")
+
+    def test_polling_delivers_within_the_interval(self):
+        latency = self._latency("poll")
+        self.assertLess(latency, self.POLL_SEC + 0.2,
+                        f"polling の遅れ {latency * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    unittest.main()
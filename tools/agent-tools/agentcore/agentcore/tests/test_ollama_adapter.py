@@ -36,7 +36,7 @@ class TestOllamaAdapter(_NoServerMixin, unittest.TestCase):
         }).encode())
         response.__enter__ = lambda self: self
         response.__exit__ = lambda *args: None
-        with mock.patch.object(ollama_adapter.urllib.request, "urlopen", return_value=response) as call:
+        with mock.patch.object(ollama_adapter.ollama_http, "urlopen", return_value=response) as call:
             result = ollama_adapter.generate("qwen3", "hello")
         sent = json.loads(call.call_args.args[0].data)
         self.assertEqual(sent, {"model": "qwen3", "prompt": "hello", "stream": False,
@@ -84,7 +84,7 @@ class TestResolveLimit(unittest.TestCase):
 
     def test_metadata_failures_never_raise(self):
         """上限が分からないだけで実行は続く（ここで落とすと本末転倒）。"""
-        with mock.patch.object(ollama_context.urllib.request, "urlopen",
+        with mock.patch.object(ollama_context.ollama_http, "urlopen",
                                side_effect=OSError("boom")):
             self.assertEqual(ollama_context.resolve_limit("m"), (0, "unknown"))
 
@@ -0,0 +1,217 @@
+"""keep-alive 転送と並列再生のテスト。
+
+偽の ollama（HTTP/1.1・chunked のストリーミング）をローカルに立て、**張られた接続の数**を
+サーバ側で数える。守りたいのは 3 つ:
+
+1. ストリーミング・非ストリーミング・メタ情報の呼び出しが 1 本の接続を使い回すこと
+2. 打ち切った接続をプールへ戻さないこと（未読の本文を次の要求へ混ぜない）
+3. `--jobs` の並列再生が同時に走り、記録の並びは直列と同じであること
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from agentcore import ollama_adapter, ollama_context, ollama_http, ollama_loop, ollama_replay
+
+
+class _FakeOllama:
+    """接続数・同時実行数を数える偽の ollama。"""
+
+    def __init__(self, *, delay: float = 0.0, stall_prompt: str = "",
+                 drop_after_response: bool = False) -> None:
+        self.connections = 0
+        self.requests: "list[str]" = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *_a):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake.lock:
+                    fake.connections += 1
+
+            def _json(self, payload: dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                self._maybe_drop()
+
+            def _maybe_drop(self) -> None:
+                # keep-alive を名乗ったまま切る（待機中にサーバが接続を畳んだ状況）。
+                if drop_after_response:
+                    self.close_connection = True
+
+            def _chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                fake.requests.append(self.path)
+                self._json({"models": [{"name": "m:latest", "context_length": 4096}]})
+
+            def do_POST(self):
+                fake.requests.append(self.path)
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+                if self.path == "/api/show":
+                    self._json({"model_info": {"llama.context_length": 8192}})
+                    return
+                prompt = str(body.get("prompt") or "")
+                answer = f"echo:{prompt}"
+                if not body.get("stream"):
+                    self._json({"response": answer, "prompt_eval_count": 3, "eval_count": 2})
+                    return
+                with fake.lock:
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    self._chunk(json.dumps({"response": answer, "done": False}).encode() + b"\n")
+                    if prompt == stall_prompt:
+                        time.sleep(3)   # 1 トークン出したあと黙る（打ち切られる側）
+                        return
+                    time.sleep(delay)
+                    self._chunk(json.dumps({"response": "", "done": True, "done_reason": "stop",
+                                            "prompt_eval_count": 3,
+                                            "eval_count": 1}).encode() + b"\n")
+                    self._chunk(b"")
+                    self._maybe_drop()
+                finally:
+                    with fake.lock:
+                        fake.in_flight -= 1
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.host = f"http://127.0.0.1:{self.server.server_port}"
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _FakeServerCase(unittest.TestCase):
+    delay = 0.0
+    stall_prompt = ""
+    drop_after_response = False
+
+    def setUp(self):
+        self.fake = _FakeOllama(delay=self.delay, stall_prompt=self.stall_prompt,
+                                drop_after_response=self.drop_after_response)
+        self.addCleanup(self.fake.close)
+        transport = ollama_http.KeepAliveTransport()
+        self.addCleanup(transport.close)
+        self.transport = transport
+        for patcher in (mock.patch.object(ollama_http, "_shared", transport),
+                        mock.patch.dict(os.environ, {"OLLAMA_HOST": self.fake.host,
+                                                     "AGENT_OLLAMA_OPTIONS": ""}),
+                        mock.patch.dict(ollama_context._limit_cache, clear=True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class TestKeepAlive(_FakeServerCase):
+    def test_streaming_calls_reuse_one_connection(self):
+        texts = [ollama_loop.run_plain("m", f"q{i}", heartbeat=0.05)["text"] for i in range(5)]
+        self.assertEqual(texts, [f"echo:q{i}" for i in range(5)])
+        self.assertEqual(self.fake.connections, 1, "5 回の呼び出しで接続は 1 本")
+        self.assertEqual(self.transport.stats()["reused"], 4)
+
+    def test_generate_and_metadata_share_the_pool(self):
+        limit = ollama_context.resolve_limit("m")
+        data = ollama_adapter.generate("m", "hi")
+        ollama_loop.run_plain("m", "again", heartbeat=0.05)
+        self.assertEqual(limit, (4096, "server"))
+        self.assertEqual(data["response"], "echo:hi")
+        self.assertEqual(self.fake.connections, 1)
+
+    def test_model_limit_is_fetched_once(self):
+        for _ in range(3):
+            ollama_context.resolve_limit("m")
+        self.assertEqual(self.fake.requests.count("/api/ps"), 1, "上限はキャッシュから返す")
+
+
+class TestServerClosedIdleConnection(_FakeServerCase):
+    drop_after_response = True
+
+    def test_idle_connection_closed_by_the_server_is_reopened(self):
+        ollama_loop.run_plain("m", "first", heartbeat=0.05)
+        time.sleep(0.1)
+        result = ollama_loop.run_plain("m", "second", heartbeat=0.05)
+        self.assertEqual(result["text"], "echo:second", "切られた接続は張り直して送る")
+        self.assertEqual(self.fake.connections, 2)
+
+
+class TestAbortedStreamIsNotPooled(_FakeServerCase):
+    stall_prompt = "stall"
+
+    def test_stalled_connection_is_discarded(self):
+        with self.assertRaises(ollama_loop.StallError):
+            ollama_loop.run_plain("m", "stall", stall_timeout=0.3, heartbeat=0.05)
+        self.assertEqual(self.transport.idle_count(), 0, "打ち切った接続は戻さない")
+        result = ollama_loop.run_plain("m", "next", heartbeat=0.05)
+        self.assertEqual(result["text"], "echo:next", "次の呼び出しは新しい接続で通る")
+        self.assertEqual(self.fake.connections, 2)
+
+
+class TestParallelReplay(_FakeServerCase):
+    delay = 0.1
+
+    def _cases(self, n: int) -> "list[dict]":
+        return [{"log": f"case-{i}.jsonl", "prompt": f"p{i}", "origin_model": "m"}
+                for i in range(n)]
+
+    def test_jobs_run_concurrently_with_bounded_connections(self):
+        arms = [ollama_replay.parse_arm("model=m,repeat=2")]
+        seen = []
+        records = ollama_replay.replay(self._cases(6), arms, jobs=3,
+                                       on_record=lambda record: seen.append(record))
+        self.assertEqual(len(records), 12)
+        self.assertTrue(all(record["ok"] for record in records))
+        self.assertGreater(self.fake.max_in_flight, 1, "同時に走っている")
+        self.assertLessEqual(self.fake.max_in_flight, 3, "上限 jobs 本を超えない")
+        self.assertLessEqual(self.fake.connections, 3, "接続は並列数ぶんだけ")
+        self.assertEqual(len(seen), 12)
+
+    def test_record_order_and_summary_do_not_depend_on_jobs(self):
+        arms = [ollama_replay.parse_arm("model=m"), ollama_replay.parse_arm("model=m,label=b")]
+        serial = ollama_replay.replay(self._cases(4), arms, jobs=1)
+        parallel = ollama_replay.replay(self._cases(4), arms, jobs=4)
+        key = [(r["log"], r["arm"], r["attempt"], r["text"]) for r in serial]
+        self.assertEqual(key, [(r["log"], r["arm"], r["attempt"], r["text"]) for r in parallel])
+
+        def timeless(summary: dict) -> dict:
+            # 所要秒は実測なので比べない（それ以外は並びも値も一致する）。
+            for arm in summary["arms"]:
+                arm.pop("duration_median_sec")
+            return summary
+
+        self.assertEqual(timeless(ollama_replay.summarize(serial)),
+                         timeless(ollama_replay.summarize(parallel)))
+
+    def test_cli_reads_jobs(self):
+        self.assertEqual(ollama_adapter.parse_args(["--replay", "--jobs", "4"])["jobs"], 4)
+        self.assertEqual(ollama_adapter.parse_args(["--replay"])["jobs"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -45,7 +45,7 @@ class _FakeResponse:
 
 
 def _patch_urlopen(response):
-    return mock.patch.object(ollama_loop.urllib.request, "urlopen",
+    return mock.patch.object(ollama_loop.ollama_http, "urlopen",
                              lambda req, timeout=None: response)
 
 
@@ -114,7 +114,7 @@ class TestStreamCall(unittest.TestCase):
     def test_connection_failure_is_reported_as_ollama_error(self):
         def boom(_req, timeout=None):
             raise urllib.error.URLError("Connection refused")
-        with mock.patch.object(ollama_loop.urllib.request, "urlopen", boom):
+        with mock.patch.object(ollama_loop.ollama_http, "urlopen", boom):
             with self.assertRaises(ollama_loop.OllamaError) as caught:
                 ollama_loop.run_plain("qwen3", "hello", heartbeat=0.05)
         self.assertIn("接続できません", str(caught.exception))
@@ -164,11 +164,11 @@ class TestStreamCall(unittest.TestCase):
             captured.update(json.loads(req.data))
             return _FakeResponse(_gen_lines("あ"))
 
-        with mock.patch.object(ollama_loop.urllib.request, "urlopen", capture):
+        with mock.patch.object(ollama_loop.ollama_http, "urlopen", capture):
             ollama_loop.run_plain("qwen3", "hello", heartbeat=0.05)
         self.assertNotIn("think", captured, "未宣言なら送らない（モデル既定に委ねる）")
 
-        with mock.patch.object(ollama_loop.urllib.request, "urlopen", capture):
+        with mock.patch.object(ollama_loop.ollama_http, "urlopen", capture):
             ollama_loop.run_plain("qwen3", "hello", think=False, heartbeat=0.05)
         self.assertIs(captured["think"], False)
         self.assertTrue(captured["stream"])
@@ -181,12 +181,12 @@ class TestStreamCall(unittest.TestCase):
             captured.update(json.loads(req.data))
             return _FakeResponse(_gen_lines("あ"))
 
-        with mock.patch.object(ollama_loop.urllib.request, "urlopen", capture):
+        with mock.patch.object(ollama_loop.ollama_http, "urlopen", capture):
             ollama_loop.run_plain("qwen3", "hello", heartbeat=0.05)
         self.assertNotIn("system", captured)
 
         with mock.patch.dict(os.environ, {"AGENT_OLLAMA_SYSTEM_PROMPT": "Be precise."}), \
-                mock.patch.object(ollama_loop.urllib.request, "urlopen", capture):
+                mock.patch.object(ollama_loop.ollama_http, "urlopen", capture):
             ollama_loop.run_plain("qwen3", "hello", heartbeat=0.05)
         self.assertEqual(captured["system"], "Be precise.")
 
@@ -203,7 +203,7 @@ class TestStreamCall(unittest.TestCase):
             return _FakeResponse(_gen_lines("あ"))
 
         for think in (True, None):
-            with mock.patch.object(ollama_loop.urllib.request, "urlopen", capture):
+            with mock.patch.object(ollama_loop.ollama_http, "urlopen", capture):
                 ollama_loop.run_plain("qwen3", "hello", think=think, fmt="json", heartbeat=0.05)
             self.assertIs(captured["think"], False, f"think={think} でも off を明示する")
             self.assertEqual(captured["format"], "json")
@@ -226,7 +226,7 @@ class TestThinkPromptMode(unittest.TestCase):
             captured.update(json.loads(req.data))
             return _FakeResponse(_gen_lines("あ"))
 
-        with mock.patch.object(ollama_loop.urllib.request, "urlopen", capture):
+        with mock.patch.object(ollama_loop.ollama_http, "urlopen", capture):
             ollama_loop.run_plain("gemma4:e4b", "hello", heartbeat=0.05, **kwargs)
         return captured
 
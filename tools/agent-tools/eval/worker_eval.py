@@ -11,11 +11,12 @@
   - 上限: agent-flow の agent_timeout 既定 600 秒。超過は fail
 
 使い方: python3 worker_eval.py [--model qwen3.5:9b] [--repeat 3]
-        [--tasks T1,T2,T3] [--wall 600]
+        [--tasks T1,T2,T3] [--wall 600] [--iter N]
 """
 from __future__ import annotations
 
 import argparse
+import fcntl
 import hashlib
 import json
 import os
@@ -655,15 +656,19 @@ def run_steps(task: dict, wt: Path) -> "tuple[list[dict], str, str]":
 def run_one(tid: str, i: int) -> dict:
     task = TASKS[tid]
     wt = WORK / f"{tid}-{i}"
-    if wt.exists():
-        subprocess.run(["git", "worktree", "remove", "--force", str(wt)],
-                       cwd=REPO, capture_output=True)
-        shutil.rmtree(wt, ignore_errors=True)
-    # 登録だけ残った worktree を掃除してから足す。WORK ごと消して測り直すのは普通の
-    # 手順なので、その次の run が「already registered」で死ぬのを毎回踏む。
-    subprocess.run(["git", "worktree", "prune"], cwd=REPO, capture_output=True)
-    subprocess.run(["git", "worktree", "add", "--detach", str(wt), "HEAD"],
-                   cwd=REPO, capture_output=True, text=True, check=True)
+    # run_suite --jobs は試行ごとに別プロセスでここを呼ぶ。prune が隣の試行の
+    # 作りかけの worktree を消さないよう、同じリポジトリへの出し入れは 1 本ずつにする。
+    with open(Path(tempfile.gettempdir()) / "agent-worker-eval.lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if wt.exists():
+            subprocess.run(["git", "worktree", "remove", "--force", str(wt)],
+                           cwd=REPO, capture_output=True)
+            shutil.rmtree(wt, ignore_errors=True)
+        # 登録だけ残った worktree を掃除してから足す。WORK ごと消して測り直すのは普通の
+        # 手順なので、その次の run が「already registered」で死ぬのを毎回踏む。
+        subprocess.run(["git", "worktree", "prune"], cwd=REPO, capture_output=True)
+        subprocess.run(["git", "worktree", "add", "--detach", str(wt), "HEAD"],
+                       cwd=REPO, capture_output=True, text=True, check=True)
     task["seed"](wt)
     # aider は自前のシステムプロンプトと編集ループを持つので、flow-worker の
     # プロンプト（報告契約・worktree 規約）は渡さない——渡すと道具の作法と二重になる。
@@ -712,6 +717,8 @@ def main() -> None:
                     help="測るモデル。別モデルの判定はここだけ変えればよい")
     ap.add_argument("--repeat", type=int, default=3)
     ap.add_argument("--tasks", default="T1,T2,T3")
+    ap.add_argument("--iter", type=int, default=None,
+                    help="この反復だけを回す（run_suite が課題×反復を 1 試行に割るとき用）")
     ap.add_argument("--wall", type=float, default=WALL_LIMIT,
                     help="1 run の壁時計上限（既定は agent_timeout の 600 秒）")
     ap.add_argument("--cli", default=CLI, choices=("agent-ollama", "aider"),
@@ -778,7 +785,7 @@ def main() -> None:
 
     rows = []
     for tid in tids:
-        for i in range(1, args.repeat + 1):
+        for i in ([args.iter] if args.iter is not None else range(1, args.repeat + 1)):
             rec = run_one(tid, i)
             rows.append(rec)
             with ledger.open("a", encoding="utf-8") as f:
@@ -19,6 +19,7 @@ GitLab 負荷を抑える工夫（§3.7）:
   - GitLab の HEAD 確認は軽量な `git ls-remote <ref>` のみ（履歴を転送しない）。
     キャッシュした SHA と一致すれば object の fetch をしない。
   - fetch は対象 ref だけに限定（全 ref 総なめ禁止）。
+  - 全 ref の照合（--once / cron バックストップ）は片側 1 回の ls-remote / fetch / push にまとめる。
   - 連続イベントは debounce_seconds でまとめる。429/5xx は指数バックオフ。
 
 依存:
@@ -37,6 +38,7 @@ from __future__ import annotations
 import argparse
 import fnmatch
 import hashlib
+import heapq
 import hmac
 import json
 import os
@@ -215,15 +217,187 @@ class GitError(RuntimeError):
     pass
 
 
-def run_git(args, cwd=None, timeout=120, check=True):
-    """git を単発・有界で実行する。stdout を返す。"""
+def run_git(args, cwd=None, timeout=120, check=True, full=False):
+    """git を単発・有界で実行する。stdout を返す（full=True なら CompletedProcess ごと）。"""
     proc = subprocess.run(
         ["git"] + args, cwd=cwd, timeout=timeout,
         stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
     )
     if check and proc.returncode != 0:
         raise GitError(f"git {' '.join(args)} failed ({proc.returncode}): {proc.stderr.strip()}")
-    return proc.stdout
+    return proc if full else proc.stdout
+
+
+ARGS_LIMIT = 24000   # 1 回の git に載せる refspec の合計文字数（Windows のコマンド行上限 32K 未満）
+
+
+def _chunks(specs, limit=ARGS_LIMIT):
+    """refspec の列を、コマンド行に収まる塊に分ける（普通は 1 塊で済む）。"""
+    chunk, size = [], 0
+    for spec in specs:
+        if chunk and size + len(spec) + 1 > limit:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(spec)
+        size += len(spec) + 1
+    if chunk:
+        yield chunk
+
+
+class ObjectQuery:
+    """ミラーへの読み取り問い合わせ（rev / merge-base）を常駐 `git cat-file` で捌く。
+
+    allowlist に数千の ref（タグ含む）がある構成では、reconcile_ref が ref ごとに呼ぶ
+    rev-parse / merge-base の起動コストが同期 1 回の大半を占める。ここでは 2 本だけ起動して
+    使い回す:
+      --batch-check … ref 名や SHA を解決する（rev-parse --verify の代わり）
+      --batch       … コミットの親と日時を読み、merge-base を git と同じ走査で手元で求める。
+                      読んだコミットはキャッシュし、同じ履歴を共有する ref で使い回す。
+    fetch で増えた ref / オブジェクトも次の問い合わせから見える。
+    """
+
+    _P1, _P2, _STALE, _RESULT = 1, 2, 4, 8
+
+    def __init__(self, cwd):
+        self.cwd = cwd
+        self._lock = threading.Lock()
+        self._procs = {}
+        self._commits = {}          # sha -> (親の一覧, committer の epoch 秒)
+
+    def _proc(self, mode):
+        proc = self._procs.get(mode)
+        if proc is not None and proc.poll() is not None:
+            self._discard(proc)
+            proc = None
+        if proc is None:
+            proc = subprocess.Popen(["git", "cat-file", mode], cwd=self.cwd,
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL)
+            self._procs[mode] = proc
+        return proc
+
+    def _discard(self, proc):
+        for mode in [m for m, p in self._procs.items() if p is proc]:
+            del self._procs[mode]
+        if proc.poll() is None:
+            proc.kill()
+        code = proc.wait()
+        for pipe in (proc.stdin, proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        return code
+
+    def close(self):
+        with self._lock:
+            for proc in list(self._procs.values()):
+                try:
+                    proc.stdin.close()
+                    proc.wait(timeout=10)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+                self._discard(proc)
+
+    def _ask(self, proc, line):
+        try:
+            proc.stdin.write(f"{line}\n".encode())
+            proc.stdin.flush()
+            header = proc.stdout.readline()
+        except OSError:
+            header = b""
+        if not header:
+            raise GitError(f"git cat-file が応答しません（終了コード {self._discard(proc)}）")
+        return header.decode("utf-8", "replace").split()
+
+    def resolve(self, name):
+        """ref 名や SHA を SHA に解決する。無ければ None。"""
+        with self._lock:
+            parts = self._ask(self._proc("--batch-check"), name)
+        return parts[0] if len(parts) == 3 else None
+
+    def _read(self, name):
+        """(解決後の SHA, 種別, 中身) を返す。無ければ (None, None, b"")。"""
+        proc = self._proc("--batch")
+        header = self._ask(proc, name)
+        if len(header) != 3:
+            return None, None, b""
+        size = int(header[2])
+        return header[0], header[1], proc.stdout.read(size + 1)[:size]
+
+    def _parse_commit(self, sha, body):
+        parents, when = [], 0
+        for line in body.split(b"\n"):
+            if not line:
+                break                                   # ヘッダの終わり
+            if line.startswith(b"parent "):
+                parents.append(line[7:].decode("ascii"))
+            elif line.startswith(b"committer "):
+                try:
+                    when = int(line.rsplit(b" ", 2)[1])
+                except (IndexError, ValueError):
+                    when = 0
+        self._commits[sha] = (parents, when)
+        return self._commits[sha]
+
+    def _commit(self, sha):
+        """(親の一覧, 日時) を返す。コミットでなければ None。"""
+        cached = self._commits.get(sha)
+        if cached is not None:
+            return cached
+        sha, kind, body = self._read(sha)
+        return self._parse_commit(sha, body) if kind == "commit" else None
+
+    def _peel(self, name):
+        """タグをコミットまで剥がした SHA。コミットに行き着かなければ None。"""
+        for _ in range(16):
+            if name in self._commits:
+                return name
+            sha, kind, body = self._read(name)
+            if kind == "commit":
+                self._parse_commit(sha, body)
+                return sha
+            if kind != "tag" or not body.startswith(b"object "):
+                return None
+            name = body.split(b"\n", 1)[0][7:].decode("ascii")
+        return None
+
+    def merge_base(self, a, b):
+        """a と b の merge-base（片方が他方の祖先ならその SHA）。無ければ None。
+
+        交差マージで最良の候補が複数あるときは git と別の候補を選ぶことがあるが、
+        decide_action が見るのは「どちらかの側と一致するか」だけなので判定は変わらない。
+        """
+        with self._lock:
+            a, b = self._peel(a), self._peel(b)
+            if a is None or b is None:
+                return None
+            if a == b:
+                return a
+            flags = {a: self._P1, b: self._P2}
+            queue, results = [], []
+            for sha in (a, b):
+                heapq.heappush(queue, (-self._commit(sha)[1], sha))
+            while any(not flags[sha] & self._STALE for _, sha in queue):
+                _, sha = heapq.heappop(queue)
+                mark = flags[sha] & (self._P1 | self._P2 | self._STALE)
+                if mark == self._P1 | self._P2:
+                    if not flags[sha] & self._RESULT:
+                        flags[sha] |= self._RESULT
+                        results.append(sha)
+                    mark |= self._STALE
+                for parent in self._commit(sha)[0]:
+                    if flags.get(parent, 0) & mark == mark:
+                        continue
+                    commit = self._commit(parent)
+                    if commit is None:
+                        continue
+                    flags[parent] = flags.get(parent, 0) | mark
+                    heapq.heappush(queue, (-commit[1], parent))
+            for sha in (a, b):
+                if sha in results:
+                    return sha
+            return results[0] if results else None
 
 
 class LocalMirror:
@@ -237,9 +411,22 @@ class LocalMirror:
         self.repo = repo
         self.timeout = timeout
         self.dir = repo.workdir
+        self._query = None
 
-    def _git(self, args, check=True):
-        return run_git(args, cwd=self.dir, timeout=self.timeout, check=check)
+    @property
+    def query(self):
+        if self._query is None:
+            self._query = ObjectQuery(self.dir)
+        return self._query
+
+    def close(self):
+        """常駐させた cat-file を止める。"""
+        if self._query is not None:
+            self._query.close()
+            self._query = None
+
+    def _git(self, args, check=True, full=False):
+        return run_git(args, cwd=self.dir, timeout=self.timeout, check=check, full=full)
 
     def ensure(self):
         """ローカルディレクトリと 2 つの remote を用意する（冪等）。"""
@@ -276,17 +463,59 @@ class LocalMirror:
         local = local.replace("refs/tags/", f"refs/{remote}/tags/", 1)
         self._git(["fetch", "--no-tags", "-q", remote, f"+{ref}:{local}"])
 
+    def ls_remote_all(self, remote):
+        """リモートの全 ref を 1 回の ls-remote で {ref: sha} にする（接続 1 回・履歴は転送しない）。
+
+        ls_remote と違い、接続できなければ GitError を上げる（空の一覧を「ref が無い」と
+        取り違えて作成 push に進まないため）。
+        """
+        heads = {}
+        for line in self._git(["ls-remote", remote]).splitlines():
+            parts = line.split()
+            if len(parts) == 2 and not parts[1].endswith("^{}"):
+                heads[parts[1]] = parts[0]
+        return heads
+
+    def fetch_refs(self, remote, refs):
+        """指定した ref だけをまとめて 1 回で fetch する（refspec 限定は fetch_ref と同じ）。"""
+        specs = [f"+{ref}:{self.local_ref(remote, ref)}" for ref in refs]
+        for chunk in _chunks(specs):
+            self._git(["fetch", "--no-tags", "-q", remote] + chunk)
+
+    def push_many(self, remote, specs, dry_run=False):
+        """(src_local_ref, dst_ref) の列を 1 回の push で送る。{dst_ref: (成否, git の要約)} を返す。
+
+        push と同じく --force も `+` も付けない。非 ff の ref は git がその ref だけ拒否し、
+        残りは通る（--atomic にしないのは、1 本の競合で他の ff まで止めないため）。
+        結果は --porcelain の行から ref ごとに読む。1 行も返らないのは接続自体の失敗なので
+        GitError にして、呼び出し側のバックオフに任せる。
+        """
+        results = {}
+        for chunk in _chunks([f"{src}:{dst}" for src, dst in specs]):
+            args = ["push", "--porcelain", remote] + chunk
+            if dry_run:
+                args.insert(1, "--dry-run")
+            proc = self._git(args, check=False, full=True)
+            got = {}
+            for line in proc.stdout.splitlines():
+                parts = line.split("\t")
+                if len(parts) >= 3 and ":" in parts[1]:
+                    got[parts[1].split(":", 1)[1]] = (parts[0] != "!", parts[2])
+            if not got and proc.returncode != 0:
+                raise GitError(f"git {' '.join(args)} failed ({proc.returncode}): "
+                               f"{proc.stderr.strip()}")
+            results.update(got)
+        return results
+
     def local_ref(self, remote, ref):
         return (ref.replace("refs/heads/", f"refs/{remote}/heads/", 1)
                    .replace("refs/tags/", f"refs/{remote}/tags/", 1))
 
     def rev(self, local_ref):
-        out = self._git(["rev-parse", "--verify", "-q", local_ref], check=False).strip()
-        return out or None
+        return self.query.resolve(local_ref)
 
     def merge_base(self, a, b):
-        out = self._git(["merge-base", a, b], check=False).strip()
-        return out or None
+        return self.query.merge_base(a, b)
 
     def push(self, remote, src_local_ref, dst_ref, dry_run=False):
         """ff push（--force なし）。dst が非 ff なら git 側が拒否して失敗する = 安全。"""
@@ -317,7 +546,12 @@ class State:
         return self._data.get(f"{repo}\t{ref}")
 
     def set(self, repo, ref, sha):
-        self._data[f"{repo}\t{ref}"] = sha
+        self.update(repo, {ref: sha})
+
+    def update(self, repo, heads):
+        """複数 ref をまとめて記録し、ファイルは 1 回だけ書き直す（リポジトリ単位の調停用）。"""
+        for ref, sha in heads.items():
+            self._data[f"{repo}\t{ref}"] = sha
         tmp = self.path + ".tmp"
         with open(tmp, "w", encoding="utf-8") as f:
             json.dump(self._data, f, ensure_ascii=False, indent=2)
@@ -382,28 +616,103 @@ def reconcile_ref(mirror: LocalMirror, cfg: Config, state: State, ref: str,
     return action
 
 
+def integration_branch(cfg: Config, ref: str, gitlab_sha):
+    """分岐時に上流コミットを置く統合ブランチ名を返す（sync/* は allowlist 外）。"""
+    branch_name = ref.replace("refs/heads/", "")
+    return f"{cfg.integration_branch_prefix}-upstream-{branch_name}-{short(gitlab_sha)}"
+
+
 def handle_diverged(mirror: LocalMirror, cfg: Config, ref: str, gitea_sha, gitlab_sha, dry_run=False):
     """分岐時: マスター(上流)側コミットを作業側に統合ブランチとして取り込み、MR を起票する（§3.4）。
 
     どちらのコミットも消さない。マスター側へは push しない（人手のマージ結果を待つ）。
     作業側 forge が gitea なら PR、gitlab なら MR を起票する（案A ではローカル GitLab に MR）。
     """
-    branch_name = ref.replace("refs/heads/", "")
-    integ = f"{cfg.integration_branch_prefix}-upstream-{branch_name}-{short(gitlab_sha)}"
-    integ_ref = f"refs/heads/{integ}"
+    integ = integration_branch(cfg, ref, gitlab_sha)
     log(f"  DIVERGED: 統合ブランチ {integ} を作業側に作成（上流 {short(gitlab_sha)} を取り込み）")
     # 上流のコミットを作業側に統合用ブランチとして push（sync/* は allowlist 外なのでマスターへは伝播しない）
-    mirror.push("gitea", mirror.local_ref("gitlab", ref), integ_ref, dry_run=dry_run)
-    if cfg.create_pr and not dry_run:
-        try:
-            create_pull_request(mirror.repo, cfg, head=integ, base=branch_name,
-                                title=f"[sync] {branch_name} の分岐を統合",
-                                body=("上流の分岐コミット " + gitlab_sha +
-                                      " を取り込みました。競合を解決してマージしてください。"
-                                      "\n\n(gitea-sync-bot が自動起票)"))
-            log(f"  作業側 forge({cfg.forge})に統合 MR/PR を起票（{integ} → {branch_name}）")
-        except Exception as e:  # noqa: BLE001  API 失敗で同期全体を止めない
-            log(f"  警告: MR/PR 起票に失敗（手動で作成してください）: {e}")
+    mirror.push("gitea", mirror.local_ref("gitlab", ref), f"refs/heads/{integ}", dry_run=dry_run)
+    if not dry_run:
+        open_integration_pr(mirror, cfg, ref, integ, gitlab_sha)
+
+
+def open_integration_pr(mirror: LocalMirror, cfg: Config, ref: str, integ, gitlab_sha):
+    """統合ブランチ → 元ブランチの MR/PR を作業側 forge に起票する（API 失敗は警告に留める）。"""
+    if not cfg.create_pr:
+        return
+    branch_name = ref.replace("refs/heads/", "")
+    try:
+        create_pull_request(mirror.repo, cfg, head=integ, base=branch_name,
+                            title=f"[sync] {branch_name} の分岐を統合",
+                            body=("上流の分岐コミット " + gitlab_sha +
+                                  " を取り込みました。競合を解決してマージしてください。"
+                                  "\n\n(gitea-sync-bot が自動起票)"))
+        log(f"  作業側 forge({cfg.forge})に統合 MR/PR を起票（{integ} → {branch_name}）")
+    except Exception as e:  # noqa: BLE001  API 失敗で同期全体を止めない
+        log(f"  警告: MR/PR 起票に失敗（手動で作成してください）: {e}")
+
+
+def reconcile_repo(mirror: LocalMirror, cfg: Config, state: State, dry_run=False):
+    """allowlist 内の全 ref をリポジトリ単位で調停する（--once / cron バックストップ用）。
+
+    reconcile_ref を ref の数だけ回すと、ref ごと・片側ごとに ls-remote と fetch で接続する。
+    ここでは片側ずつ:
+      1. ls-remote を 1 回（全 ref の HEAD）
+      2. ミラーと食い違う ref だけを 1 回の fetch で取る
+      3. 全 ref のアクションを手元で決める（merge-base は常駐 cat-file）
+      4. ff / 作成 / 統合ブランチをまとめて 1 回の push で送る
+    判定と安全弁は reconcile_ref と同じ（decide_action・--force なし・分岐は統合ブランチ＋MR）。
+    {ref: アクション} を返す。
+    """
+    repo = mirror.repo.name
+    heads = {remote: {ref: sha for ref, sha in mirror.ls_remote_all(remote).items()
+                      if ref_in_scope(ref, cfg.include, cfg.exclude)}
+             for remote in ("gitlab", "gitea")}
+    refs = sorted(set(heads["gitlab"]) | set(heads["gitea"]))
+
+    # --- ミラーと食い違う ref だけを取りに行く（GitLab は「進んだ」ときだけ・§3.7）---
+    local = {}
+    for remote in ("gitlab", "gitea"):
+        local[remote] = {ref: mirror.rev(mirror.local_ref(remote, ref)) for ref in refs}
+        stale = [ref for ref, sha in heads[remote].items() if sha != local[remote][ref]]
+        if stale:
+            mirror.fetch_refs(remote, stale)
+            for ref in stale:
+                local[remote][ref] = mirror.rev(mirror.local_ref(remote, ref))
+    state.update(repo, {ref: heads["gitlab"].get(ref) or "" for ref in refs})
+
+    # --- 判定 ---
+    actions, pushes, diverged = {}, {"gitlab": [], "gitea": []}, {}
+    for ref in refs:
+        g, l = local["gitea"][ref], local["gitlab"][ref]
+        base = mirror.merge_base(g, l) if (g and l) else None
+        action = actions[ref] = decide_action(g, l, base)
+        if action == NOOP:
+            continue
+        log(f"{repo} {ref}: gitea={short(g)} gitlab={short(l)} → {action}")
+        if action == PUSH_FF_TO_GITLAB or action == CREATE_ON_GITLAB:
+            pushes["gitlab"].append((mirror.local_ref("gitea", ref), ref))
+        elif action == PUSH_FF_TO_GITEA or action == CREATE_ON_GITEA:
+            pushes["gitea"].append((mirror.local_ref("gitlab", ref), ref))
+        elif action == DIVERGED:
+            integ = integration_branch(cfg, ref, l)
+            log(f"  DIVERGED: 統合ブランチ {integ} を作業側に作成（上流 {short(l)} を取り込み）")
+            diverged[f"refs/heads/{integ}"] = (ref, integ, l)
+            pushes["gitea"].append((mirror.local_ref("gitlab", ref), f"refs/heads/{integ}"))
+
+    # --- 片側 1 回の push。拒否された ref は警告して次回の照合へ回す ---
+    for remote in ("gitlab", "gitea"):
+        if not pushes[remote]:
+            continue
+        results = mirror.push_many(remote, pushes[remote], dry_run=dry_run)
+        for _, dst in pushes[remote]:
+            ok, summary = results.get(dst, (False, "結果なし"))
+            if not ok:
+                log(f"警告: {repo} {dst} の {remote} への push が拒否されました: {summary}")
+            elif dst in diverged and not dry_run:
+                ref, integ, gitlab_sha = diverged[dst]
+                open_integration_pr(mirror, cfg, ref, integ, gitlab_sha)
+    return actions
 
 
 def _project_path_from_url(url):
@@ -454,32 +763,24 @@ def create_pull_request(repo: RepoConfig, cfg: Config, head, base, title, body):
         return json.loads(resp.read().decode())
 
 
-def resolve_refs(mirror: LocalMirror, cfg: Config):
-    """allowlist に一致する現存 ref（Gitea/GitLab 両側の和集合）を列挙する。"""
-    refs = set()
-    for remote in ("gitea", "gitlab"):
-        out = mirror._git(["ls-remote", remote], check=False)
-        for line in out.splitlines():
-            parts = line.split()
-            if len(parts) == 2:
-                refs.add(parts[1])
-    return sorted(r for r in refs if ref_in_scope(r, cfg.include, cfg.exclude))
-
-
 def sync_repo(cfg: Config, repo: RepoConfig, state: State, only_ref=None, dry_run=False):
     mirror = LocalMirror(repo, timeout=cfg.git_timeout)
     mirror.ensure()
-    if only_ref:
-        targets = [only_ref] if ref_in_scope(only_ref, cfg.include, cfg.exclude) else []
-        if not targets:
+    try:
+        if not only_ref:
+            # 全 ref はリポジトリ単位で（片側 ls-remote / fetch / push 各 1 回）。
+            # 接続の失敗は GitError のまま上げ、sync_all のバックオフに任せる。
+            return reconcile_repo(mirror, cfg, state, dry_run=dry_run)
+        if not ref_in_scope(only_ref, cfg.include, cfg.exclude):
             log(f"{repo.name} {only_ref}: allowlist 外のためスキップ（§3.6）")
-    else:
-        targets = resolve_refs(mirror, cfg)
-    for ref in targets:
+            return {}
         try:
-            reconcile_ref(mirror, cfg, state, ref, dry_run=dry_run)
+            return {only_ref: reconcile_ref(mirror, cfg, state, only_ref, dry_run=dry_run)}
         except GitError as e:
-            log(f"警告: {repo.name} {ref} の同期に失敗: {e}")
+            log(f"警告: {repo.name} {only_ref} の同期に失敗: {e}")
+            return {}
+    finally:
+        mirror.close()
 
 
 def sync_all(cfg: Config, state: State, only_repo=None, only_ref=None, dry_run=False):
@@ -609,7 +910,11 @@ def serve(cfg: Config, state: State):
             return
         mirror = LocalMirror(r, timeout=cfg.git_timeout)
         mirror.ensure()
-        with_backoff(lambda: reconcile_ref(mirror, cfg, state, ref, known_gitlab_sha=gitlab_sha))
+        try:
+            with_backoff(lambda: reconcile_ref(mirror, cfg, state, ref,
+                                               known_gitlab_sha=gitlab_sha))
+        finally:
+            mirror.close()
 
     debouncer = Debouncer(cfg.debounce_seconds, worker)
 
@@ -5,6 +5,8 @@
 - 判定コア（decide_action / ref_in_scope）を純粋関数として網羅。
 - reconcile_ref を「Gitea/GitLab を模した 2 つのローカル bare repo」で end-to-end 検証
   （fast-forward の双方向 / allowlist 除外 / 分岐時に GitLab へ push しない）。
+- reconcile_repo が片側 1 回の ls-remote / fetch / push で、ref ごとの調停と同じ結果になること。
+- 常駐 cat-file（ObjectQuery）の rev / merge-base が、git を都度起動したときと同じ答えを返すこと。
 
 依存は stdlib と git のみ。実行: python3 -m pytest（または python3 tests/test_gitea_sync_bot.py）。
 """
@@ -13,6 +15,7 @@ import subprocess
 import sys
 import tempfile
 import unittest
+from unittest import mock
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -145,7 +148,9 @@ def head(bare, ref="refs/heads/main"):
     return out.split()[0] if out else None
 
 
-class TestReconcileE2E(unittest.TestCase):
+class _BareRemotes:
+    """Gitea/GitLab を模した 2 つの bare repo と作業クローン（共通祖先 1 コミット）。"""
+
     def setUp(self):
         self.tmp = tempfile.mkdtemp()
         # Gitea/GitLab を模した bare repo
@@ -184,8 +189,11 @@ class TestReconcileE2E(unittest.TestCase):
     def _mirror(self):
         m = bot.LocalMirror(self.repo)
         m.ensure()
+        self.addCleanup(m.close)
         return m
 
+
+class TestReconcileE2E(_BareRemotes, unittest.TestCase):
     def test_gitea_ahead_pushes_to_gitlab(self):
         # Gitea を 1 コミット進める
         self._commit("feat-a")
@@ -234,5 +242,171 @@ class TestReconcileE2E(unittest.TestCase):
                           "feature ブランチが GitLab へ push されてしまった")
 
 
+class TestReconcileRepo(_BareRemotes, unittest.TestCase):
+    """リポジトリ単位の調停。ff の両方向・作成・分岐・allowlist 外を 1 回で混ぜる。"""
+
+    def _push(self, bare, branch, base="main", msg=None):
+        git(["checkout", "-q", "-B", branch, f"origin/{base}" if base else "HEAD"], cwd=self.work)
+        self._commit(msg or f"{branch}-{os.path.basename(bare)}".replace("/", "-"), branch=branch)
+        git(["push", "-q", "-f", bare, f"{branch}:{branch}"], cwd=self.work)
+
+    def _scenario(self):
+        git(["fetch", "-q", "origin"], cwd=self.work)
+        self._push(self.gitea, "main")                       # Gitea だけ進行
+        self._push(self.gitlab, "release/1")                 # GitLab にだけある
+        self._push(self.gitea, "release/2")                  # Gitea にだけある
+        self._push(self.gitlab, "release/3")                 # 両側で別々に進む（分岐）
+        self._push(self.gitea, "release/3")
+        git(["push", "-q", self.gitlab, "origin/main:refs/heads/release/4"], cwd=self.work)
+        git(["push", "-q", self.gitea, "origin/main:refs/heads/release/4"], cwd=self.work)
+        self._push(self.gitlab, "release/4")                 # GitLab だけ進行
+        self._push(self.gitea, "feature/x")                  # allowlist 外
+
+    def _counting(self):
+        calls = []
+        real = bot.run_git
+
+        def counted(args, *a, **kw):
+            calls.append(tuple(arg for arg in args if not arg.startswith("-"))[:2])
+            return real(args, *a, **kw)
+
+        patcher = mock.patch.object(bot, "run_git", counted)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return calls
+
+    def test_one_round_trip_per_remote_and_same_outcome(self):
+        self._scenario()
+        before = {ref: head(self.gitlab, ref) for ref in ("refs/heads/release/3",)}
+        mirror = self._mirror()
+        calls = self._counting()
+
+        actions = bot.reconcile_repo(mirror, self.cfg, self.state)
+
+        self.assertEqual(actions, {
+            "refs/heads/main": bot.PUSH_FF_TO_GITLAB,
+            "refs/heads/release/1": bot.CREATE_ON_GITEA,
+            "refs/heads/release/2": bot.CREATE_ON_GITLAB,
+            "refs/heads/release/3": bot.DIVERGED,
+            "refs/heads/release/4": bot.PUSH_FF_TO_GITEA,
+        })
+        for verb in ("ls-remote", "fetch", "push"):
+            for remote in ("gitea", "gitlab"):
+                self.assertEqual(calls.count((verb, remote)), 1, (verb, remote, calls))
+
+        for ref in ("main", "release/1", "release/2", "release/4"):
+            self.assertEqual(head(self.gitea, f"refs/heads/{ref}"),
+                             head(self.gitlab, f"refs/heads/{ref}"), ref)
+        # 分岐は GitLab を動かさず、Gitea に統合ブランチを作るだけ
+        self.assertEqual(head(self.gitlab, "refs/heads/release/3"), before["refs/heads/release/3"])
+        self.assertNotEqual(head(self.gitea, "refs/heads/release/3"),
+                            before["refs/heads/release/3"])
+        integ = [l for l in git(["ls-remote", self.gitea], cwd=".").stdout.splitlines()
+                 if "refs/heads/sync/integrate-upstream-release/3-" in l]
+        self.assertEqual(len(integ), 1)
+        self.assertIsNone(head(self.gitlab, "refs/heads/feature/x"))
+        self.assertEqual(self.state.get("p", "refs/heads/release/2"), "")
+
+        # 2 回目は何も動かない: fetch も push もしない
+        del calls[:]
+        again = bot.reconcile_repo(mirror, self.cfg, self.state)
+        self.assertEqual(again["refs/heads/release/3"], bot.DIVERGED)
+        self.assertEqual({r: a for r, a in again.items() if a != bot.NOOP},
+                         {"refs/heads/release/3": bot.DIVERGED})
+        self.assertFalse([c for c in calls if c[0] == "fetch"], calls)
+        self.assertEqual(calls.count(("push", "gitlab")), 0)
+
+    def test_dry_run_plans_the_same_and_changes_nothing(self):
+        self._scenario()
+        remote_before = {bare: git(["ls-remote", bare], cwd=".").stdout
+                         for bare in (self.gitea, self.gitlab)}
+        planned = bot.reconcile_repo(self._mirror(), self.cfg, self.state, dry_run=True)
+        for bare, listing in remote_before.items():
+            self.assertEqual(git(["ls-remote", bare], cwd=".").stdout, listing)
+        self.assertEqual(planned, bot.sync_repo(self.cfg, self.repo, self.state))
+
+    def test_rejected_ref_does_not_stop_the_others(self):
+        self._scenario()
+        mirror = self._mirror()
+        real = mirror.push_many
+
+        def racing(remote, specs, dry_run=False):
+            # ls-remote の後に GitLab の main が別の誰かに進められた
+            if remote == "gitlab":
+                self._push(self.gitlab, "main", msg="race")
+            return real(remote, specs, dry_run=dry_run)
+
+        raced = None
+        with mock.patch.object(mirror, "push_many", racing):
+            bot.reconcile_repo(mirror, self.cfg, self.state)
+            raced = head(self.gitlab)
+        self.assertEqual(head(self.gitlab), raced, "非 ff は上書きしない")
+        self.assertNotEqual(head(self.gitea), raced)
+        self.assertEqual(head(self.gitea, "refs/heads/release/2"),
+                         head(self.gitlab, "refs/heads/release/2"))
+        self.assertEqual(head(self.gitea, "refs/heads/release/4"),
+                         head(self.gitlab, "refs/heads/release/4"))
+
+
+class TestObjectQuery(unittest.TestCase):
+    """ミラー内の履歴で、常駐 cat-file の答えを rev-parse / merge-base と突き合わせる。"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.repo = os.path.join(self.tmp, "r")
+        git(["init", "-q", "-b", "main", self.repo], cwd=self.tmp)
+        self.query = bot.ObjectQuery(self.repo)
+        self.addCleanup(self.query.close)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _commit(self, name):
+        git(["commit", "-q", "--allow-empty", "-m", name], cwd=self.repo)
+        return git(["rev-parse", "HEAD"], cwd=self.repo).stdout.strip()
+
+    def test_answers_match_git(self):
+        import random
+        rng = random.Random(41)
+        shas = [self._commit("root")]
+        for i in range(60):
+            git(["checkout", "-q", "--detach", rng.choice(shas)], cwd=self.repo)
+            if i % 5 == 4 and len(shas) > 2:
+                git(["merge", "-q", "--no-ff", "--no-edit", "-m", f"m{i}", rng.choice(shas)],
+                    cwd=self.repo, check=False)
+                sha = git(["rev-parse", "HEAD"], cwd=self.repo).stdout.strip()
+            else:
+                sha = self._commit(f"c{i}")
+            git(["branch", "-f", f"b{i}", sha], cwd=self.repo)
+            shas.append(sha)
+        git(["tag", "-a", "-m", "t", "v1", shas[10]], cwd=self.repo)
+        git(["checkout", "-q", "--orphan", "lonely"], cwd=self.repo)
+        lonely = self._commit("lonely")
+
+        for ref in ("refs/heads/b3", "refs/tags/v1", "refs/heads/missing", shas[7]):
+            expected = git(["rev-parse", "--verify", "-q", ref], cwd=self.repo,
+                           check=False).stdout.strip() or None
+            self.assertEqual(self.query.resolve(ref), expected, ref)
+        for _ in range(200):
+            a, b = rng.choice(shas + [lonely]), rng.choice(shas + [lonely])
+            expected = git(["merge-base", a, b], cwd=self.repo, check=False).stdout.strip() or None
+            got = self.query.merge_base(a, b)
+            self.assertEqual((got == a, got == b, got is None),
+                             (expected == a, expected == b, expected is None), (a, b))
+        tag = self.query.resolve("refs/tags/v1")
+        self.assertEqual(self.query.merge_base(tag, shas[10]), shas[10])
+
+    def test_refs_moved_after_start_are_seen(self):
+        first = self._commit("one")
+        self.assertEqual(self.query.resolve("refs/heads/main"), first)
+        second = self._commit("two")
+        self.assertEqual(self.query.resolve("refs/heads/main"), second)
+        git(["pack-refs", "--all"], cwd=self.repo)
+        third = self._commit("three")
+        self.assertEqual(self.query.resolve("refs/heads/main"), third)
+        self.assertEqual(self.query.merge_base(first, third), first)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
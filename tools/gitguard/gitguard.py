@@ -21,6 +21,7 @@ from __future__ import annotations
 
 import hashlib
 import json
+import math
 import os
 import re
 import subprocess
@@ -81,6 +82,8 @@ def _cfg() -> dict:
         "threshold": int(_f("GITGUARD_THRESHOLD", 5)),     # 連続インフラ障害で開く回数
         "cooldown": _f("GITGUARD_COOLDOWN", 60.0),         # open → half_open までの秒
         "window": _f("GITGUARD_WINDOW", 120.0),            # 連続カウントを束ねる窓（秒）
+        "segment_bytes": int(_f("GITGUARD_SEGMENT_BYTES", 4 << 20)),  # 監視ログを閉じる大きさ
+        "segments": max(1, int(_f("GITGUARD_SEGMENTS", 16))),          # 残す閉じたセグメント数
     }
 
 
@@ -101,9 +104,14 @@ def _state_path(endpoint: str) -> str:
 
 
 def _events_path() -> str:
+    """書き込み中のセグメント。閉じたセグメントは events/ 以下へ移る。"""
     return os.path.join(_root(), "events.ndjson")
 
 
+def _segments_dir() -> str:
+    return os.path.join(_root(), "events")
+
+
 @contextmanager
 def _lock(endpoint: str):
     d = os.path.join(_root(), "locks")
@@ -123,14 +131,42 @@ def _lock(endpoint: str):
             f.close()
 
 
-def _read_state(endpoint: str) -> dict:
+# 状態ファイルの読み取りキャッシュ（プロセス内）。path → ((ino, mtime_ns, size), 状態)。
+# 書き込みは必ず別 inode への os.replace なので、stat が同じなら中身も同じ。
+_STATE_CACHE: "dict[str, tuple[tuple, dict]]" = {}
+
+
+def _default_state(endpoint: str) -> dict:
+    return {"endpoint": endpoint, "state": CLOSED, "consecutive": 0,
+            "opened_at": 0.0, "probe_inflight": False,
+            "updated_at": 0.0, "last_error": ""}
+
+
+def _peek_state(endpoint: str) -> "dict | None":
+    """状態ファイルをロック無しで読む（無い・壊れていれば None）。返り値は書き換えてよい写し。"""
+    path = _state_path(endpoint)
     try:
-        with open(_state_path(endpoint), encoding="utf-8") as f:
-            return json.load(f)
+        sig = os.stat(path)
+        key = (sig.st_ino, sig.st_mtime_ns, sig.st_size)
+        cached = _STATE_CACHE.get(path)
+        if cached is None or cached[0] != key:
+            with open(path, encoding="utf-8") as f:
+                cached = (key, json.load(f))
+            _STATE_CACHE[path] = cached
+        return dict(cached[1])
     except (OSError, ValueError):
-        return {"endpoint": endpoint, "state": CLOSED, "consecutive": 0,
-                "opened_at": 0.0, "probe_inflight": False,
-                "updated_at": 0.0, "last_error": ""}
+        return None
+
+
+def _read_state(endpoint: str) -> dict:
+    st = _peek_state(endpoint)
+    return st if st is not None else _default_state(endpoint)
+
+
+def _idle(st: "dict | None") -> bool:
+    """閉じていて連続カウントもプローブも無い＝成功・アプリ失敗を記録しても何も変わらない。"""
+    return (st is not None and st.get("state", CLOSED) == CLOSED
+            and not st.get("consecutive") and not st.get("probe_inflight"))
 
 
 def _write_state(st: dict) -> None:
@@ -148,6 +184,9 @@ def _emit(event: dict) -> None:
         os.makedirs(_root(), exist_ok=True)
         with open(_events_path(), "a", encoding="utf-8") as f:
             f.write(json.dumps(event, ensure_ascii=False) + "\n")
+            size = f.tell()
+        if size >= _cfg()["segment_bytes"]:
+            _rotate_events()
     except OSError:  # 監視ログの失敗で本処理を止めない
         pass
 
@@ -171,6 +210,11 @@ def decide(endpoint: str) -> "tuple[bool, str]":
     if _cfg()["disabled"]:
         return True, CLOSED
     cfg = _cfg()
+    # 速い経路: 閉じていれば遷移は無いので、ロックを取らずに通す。読んだ瞬間に閉じていた
+    # ことは確かなので、並行する report より先にこの decide が起きた順序と区別できない。
+    peeked = _peek_state(endpoint)
+    if peeked is None or peeked.get("state", CLOSED) == CLOSED:
+        return True, CLOSED
     with _lock(endpoint):
         st = _read_state(endpoint)
         state = st.get("state", CLOSED)
@@ -195,7 +239,10 @@ def report(endpoint: str, outcome: str, op: str = "",
     """結果を記録して状態遷移し、監視イベントを 1 件吐く。遷移後の state を返す。"""
     cfg = _cfg()
     new_state = CLOSED
-    if not cfg["disabled"]:
+    # 速い経路: 閉じて連続カウントも無い状態への成功・アプリ失敗は何も変えないので、
+    # ロックも書き込みもしない（忙しいホストの大半の呼び出しはここを通る）。状態ファイルが
+    # まだ無いエンドポイントは、status に載るよう 1 度だけ遅い経路で作る。
+    if not cfg["disabled"] and not (outcome != INFRA_FAIL and _idle(_peek_state(endpoint))):
         with _lock(endpoint):
             st = _read_state(endpoint)
             state = st.get("state", CLOSED)
@@ -400,9 +447,61 @@ def list_states() -> "list[dict]":
     return out
 
 
-def read_events(since: float = 0.0, limit: int = 0) -> "list[dict]":
-    path = _events_path()
-    out: "list[dict]" = []
+# 監視ログはセグメントに割る。書き込み中の events.ndjson が GITGUARD_SEGMENT_BYTES を
+# 越えたら events/<閉じた時刻 ms>-<pid>.ndjson へ移し、古いものは GITGUARD_SEGMENTS 本まで
+# 残す。閉じたセグメントには分ごとの集計（件数とレイテンシのヒストグラム）を横に置き、
+# stats はそれを足し合わせる——生のイベントを読むのは書き込み中のセグメントだけになる。
+_EVENTS_LOCK = "__events__"
+# レイテンシのヒストグラムは 2^(1/8) 刻み（隣の桶と約 9% 違い）。桶 i は (2^((i-1)/8), 2^(i/8)] ms。
+_LAT_STEPS_PER_OCTAVE = 8
+
+
+def _lat_bucket(ms: float) -> int:
+    return math.ceil(math.log2(ms) * _LAT_STEPS_PER_OCTAVE)
+
+
+def _lat_upper(bucket: int) -> float:
+    return round(2 ** (bucket / _LAT_STEPS_PER_OCTAVE), 1)
+
+
+def _rotate_events() -> None:
+    with _lock(_EVENTS_LOCK):
+        path = _events_path()
+        try:
+            if os.path.getsize(path) < _cfg()["segment_bytes"]:
+                return          # 他のプロセスが先に回した
+        except OSError:
+            return
+        os.makedirs(_segments_dir(), exist_ok=True)
+        sealed = os.path.join(_segments_dir(), f"{int(_now() * 1000):015d}-{os.getpid()}.ndjson")
+        os.replace(path, sealed)
+        segments = _sealed_segments()
+        for _, old in segments[:-_cfg()["segments"]]:
+            for victim in (old, old + ".hist.json"):
+                try:
+                    os.remove(victim)
+                except OSError:
+                    pass
+    _segment_histogram(sealed)
+
+
+def _sealed_segments() -> "list[tuple[float, str]]":
+    """閉じたセグメントを古い順に (閉じた時刻, パス)。"""
+    d = _segments_dir()
+    try:
+        names = sorted(n for n in os.listdir(d) if n.endswith(".ndjson"))
+    except OSError:
+        return []
+    out = []
+    for name in names:
+        try:
+            out.append((int(name.split("-", 1)[0]) / 1000.0, os.path.join(d, name)))
+        except ValueError:
+            continue
+    return out
+
+
+def _iter_events(path: str):
     try:
         with open(path, encoding="utf-8") as f:
             for line in f:
@@ -410,36 +509,105 @@ def read_events(since: float = 0.0, limit: int = 0) -> "list[dict]":
                 if not line:
                     continue
                 try:
-                    ev = json.loads(line)
+                    yield json.loads(line)
                 except ValueError:
                     continue
-                if ev.get("ts", 0) >= since:
-                    out.append(ev)
     except OSError:
-        return out
+        return
+
+
+def _histogram(path: str) -> dict:
+    """セグメント 1 本を分ごと・endpoint ごとに数える。{分の epoch: {endpoint: 集計}}。"""
+    minutes: "dict[str, dict[str, dict]]" = {}
+    for ev in _iter_events(path):
+        minute = str(int(float(ev.get("ts", 0)) // 60 * 60))
+        a = minutes.setdefault(minute, {}).setdefault(ev.get("endpoint", "?"), {"total": 0, "lat": {}})
+        a["total"] += 1
+        outcome = ev.get("outcome", APP_FAIL)
+        a[outcome] = a.get(outcome, 0) + 1
+        if outcome == SUCCESS and ev.get("latency_ms"):
+            b = str(_lat_bucket(float(ev["latency_ms"])))
+            a["lat"][b] = a["lat"].get(b, 0) + 1
+    return minutes
+
+
+def _segment_histogram(path: str) -> dict:
+    """閉じたセグメントの分ごとの集計。横に置いた .hist.json を使い、無いか古ければ作り直す
+    （回した直後に古い fd から追記が届くことがあるので、覚えた大きさと比べる）。"""
+    side = path + ".hist.json"
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return {}
+    try:
+        with open(side, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("size") == size:
+            return cached["minutes"]
+    except (OSError, ValueError, KeyError):
+        pass
+    minutes = _histogram(path)
+    try:
+        tmp = f"{side}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"size": size, "minutes": minutes}, f)
+        os.replace(tmp, side)
+    except OSError:
+        pass
+    return minutes
+
+
+def read_events(since: float = 0.0, limit: int = 0) -> "list[dict]":
+    out: "list[dict]" = []
+    paths = [p for closed_at, p in _sealed_segments() if closed_at >= since]
+    for path in paths + [_events_path()]:
+        out.extend(ev for ev in _iter_events(path) if ev.get("ts", 0) >= since)
     return out[-limit:] if limit else out
 
 
 def aggregate(since: float = 0.0) -> "dict[str, dict]":
-    """endpoint 毎に件数・エラー率・レイテンシ percentile を集計する。"""
+    """endpoint 毎に件数・エラー率・レイテンシ percentile を集計する。
+
+    分ごとの集計を足すので `since` は分単位に切り下げて扱い、p50/p95 はヒストグラムの
+    桶の上端（誤差は 9% 以内）で返す。
+    """
+    floor = int(since // 60 * 60)
+    parts = [_segment_histogram(p) for closed_at, p in _sealed_segments() if closed_at >= floor]
+    parts.append(_histogram(_events_path()))
     by: "dict[str, dict]" = {}
-    for ev in read_events(since):
-        ep = ev.get("endpoint", "?")
-        a = by.setdefault(ep, {"total": 0, SUCCESS: 0, INFRA_FAIL: 0,
-                               APP_FAIL: 0, BLOCKED: 0, "lat": []})
-        a["total"] += 1
-        a[ev.get("outcome", APP_FAIL)] = a.get(ev.get("outcome", APP_FAIL), 0) + 1
-        if ev.get("outcome") == SUCCESS and ev.get("latency_ms"):
-            a["lat"].append(float(ev["latency_ms"]))
+    for minutes in parts:
+        for minute, endpoints in minutes.items():
+            if int(minute) < floor:
+                continue
+            for ep, counts in endpoints.items():
+                a = by.setdefault(ep, {"total": 0, SUCCESS: 0, INFRA_FAIL: 0,
+                                       APP_FAIL: 0, BLOCKED: 0, "lat": {}})
+                for name, value in counts.items():
+                    if name == "lat":
+                        for b, n in value.items():
+                            a["lat"][int(b)] = a["lat"].get(int(b), 0) + n
+                    else:
+                        a[name] = a.get(name, 0) + value
     for a in by.values():
-        lat = sorted(a.pop("lat"))
-        a["p50_ms"] = lat[len(lat) // 2] if lat else 0.0
-        a["p95_ms"] = lat[min(len(lat) - 1, int(len(lat) * 0.95))] if lat else 0.0
+        lat = sorted(a.pop("lat").items())
+        n = sum(c for _, c in lat)
+        a["p50_ms"] = _percentile(lat, n // 2) if n else 0.0
+        a["p95_ms"] = _percentile(lat, min(n - 1, int(n * 0.95))) if n else 0.0
         net = a["total"] - a[BLOCKED]
         a["infra_rate"] = round(a[INFRA_FAIL] / net, 3) if net else 0.0
     return by
 
 
+def _percentile(buckets: "list[tuple[int, int]]", rank: int) -> float:
+    """昇順の (桶, 件数) から rank 番目（0 始まり）の値が入る桶の上端。"""
+    seen = 0
+    for bucket, count in buckets:
+        seen += count
+        if rank < seen:
+            return _lat_upper(bucket)
+    return _lat_upper(buckets[-1][0])
+
+
 def reset(endpoint: "str | None" = None) -> int:
     """ブレーカー状態をクリアする（endpoint 指定で 1 つ、None で全部）。削除数を返す。"""
     d = os.path.join(_root(), "state")
@@ -472,7 +640,8 @@ _CLI_HELP = """git-guard — git/GitLab アクセスの横断サーキットブ
   git-guard reset [endpoint]           ブレーカー状態をクリア
 
 環境変数: GITGUARD_ENFORCE(1で fail-fast) GITGUARD_DISABLE GITGUARD_THRESHOLD
-          GITGUARD_COOLDOWN GITGUARD_WINDOW GITGUARD_DIR"""
+          GITGUARD_COOLDOWN GITGUARD_WINDOW GITGUARD_DIR
+          GITGUARD_SEGMENT_BYTES GITGUARD_SEGMENTS"""
 
 
 def _cli(argv: "list[str]") -> int:
@@ -24,7 +24,7 @@ class _Clock:
         return self.t
 
 
-class BreakerTests(unittest.TestCase):
+class _GuardCase(unittest.TestCase):
     def setUp(self):
         self.dir = tempfile.mkdtemp(prefix="gg-test-")
         os.environ["GITGUARD_DIR"] = self.dir
@@ -43,6 +43,8 @@ class BreakerTests(unittest.TestCase):
                   "GITGUARD_WINDOW", "GITGUARD_ENFORCE", "GITGUARD_DISABLE"):
             os.environ.pop(k, None)
 
+
+class BreakerTests(_GuardCase):
     def test_opens_after_threshold_consecutive_infra_failures(self):
         for _ in range(2):
             self.assertEqual(gg.report(EP, gg.INFRA_FAIL), gg.CLOSED)   # しきい値未満は閉じたまま
@@ -139,6 +141,106 @@ class BreakerTests(unittest.TestCase):
         self.assertTrue(gg.decide(EP)[0])
 
 
+class FastPathTests(_GuardCase):
+    """閉じていて何も変わらない呼び出しは、ロックも状態の書き込みもしない。"""
+
+    def _state_sig(self):
+        st = os.stat(gg._state_path(EP))
+        return (st.st_ino, st.st_mtime_ns)
+
+    def test_success_while_closed_does_not_rewrite_state(self):
+        gg.report(EP, gg.SUCCESS)                                      # 初回は status 用に作る
+        sig = self._state_sig()
+        real_lock = gg._lock
+        gg._lock = lambda ep: self.fail("閉じている間の成功でロックを取った")
+        try:
+            for _ in range(20):
+                self.assertTrue(gg.decide(EP)[0])
+                self.assertEqual(gg.report(EP, gg.SUCCESS), gg.CLOSED)
+                gg.report(EP, gg.APP_FAIL)
+        finally:
+            gg._lock = real_lock
+        self.assertEqual(self._state_sig(), sig)
+        self.assertEqual(len(gg.read_events()), 41, "監視イベントは毎回残る")
+
+    def test_pending_failures_still_take_the_slow_path(self):
+        gg.report(EP, gg.SUCCESS)
+        gg.report(EP, gg.INFRA_FAIL)
+        sig = self._state_sig()
+        gg.report(EP, gg.SUCCESS)                                      # 連続カウントを戻す
+        self.assertNotEqual(self._state_sig(), sig)
+        self.assertEqual(gg._read_state(EP)["consecutive"], 0)
+
+    def test_state_written_by_another_process_is_seen(self):
+        gg.report(EP, gg.SUCCESS)
+        gg.decide(EP)                                                  # キャッシュに載せる
+        st = gg._read_state(EP)
+        st.update(state=gg.OPEN, opened_at=self.clock.t)
+        gg._write_state(st)                                            # 別プロセスの書き込み相当
+        self.assertFalse(gg.decide(EP)[0])
+
+
+class SegmentedEventLogTests(_GuardCase):
+    def setUp(self):
+        super().setUp()
+        os.environ["GITGUARD_SEGMENT_BYTES"] = "2000"
+        os.environ["GITGUARD_SEGMENTS"] = "3"
+
+    def tearDown(self):
+        os.environ.pop("GITGUARD_SEGMENT_BYTES", None)
+        os.environ.pop("GITGUARD_SEGMENTS", None)
+        super().tearDown()
+
+    def _fill(self, n, latency=lambda i: 10.0 + i):
+        for i in range(n):
+            self.clock.t += 1
+            gg.report(EP, gg.SUCCESS, op="fetch", latency_ms=latency(i))
+
+    def test_rotates_and_keeps_a_bounded_number_of_segments(self):
+        self._fill(100)
+        segments = gg._sealed_segments()
+        self.assertEqual(len(segments), 3)
+        self.assertLess(os.path.getsize(gg._events_path()), 2000 + 400)
+        for _, path in segments:
+            self.assertTrue(os.path.exists(path + ".hist.json"))
+
+    def test_aggregate_uses_histograms_of_sealed_segments(self):
+        os.environ["GITGUARD_SEGMENTS"] = "100"
+        self._fill(60)
+        self.clock.t += 1
+        gg.report(EP, gg.INFRA_FAIL, op="fetch")
+        expected_total = len(gg.read_events())
+        real_iter = gg._iter_events
+        opened = []
+        gg._iter_events = lambda path: (opened.append(path), real_iter(path))[1]
+        try:
+            agg = gg.aggregate()[EP]
+        finally:
+            gg._iter_events = real_iter
+        self.assertEqual(opened, [gg._events_path()], "閉じたセグメントの生イベントは読まない")
+        self.assertEqual(agg["total"], expected_total)
+        self.assertEqual(agg[gg.INFRA_FAIL], 1)
+        self.assertAlmostEqual(agg["p50_ms"], 10.0 + 30, delta=(10.0 + 30) * 0.1)
+        self.assertAlmostEqual(agg["p95_ms"], 10.0 + 57, delta=(10.0 + 57) * 0.1)
+
+    def test_since_filters_by_minute(self):
+        self.clock.t = 6000.0
+        self._fill(30)
+        self.clock.t = 6600.0
+        self._fill(5)
+        self.assertEqual(gg.aggregate(since=6600.0 + 30)[EP]["total"], 5)
+        self.assertEqual(len(gg.read_events(since=6600.0)), 5)
+
+    def test_late_append_to_sealed_segment_refreshes_its_histogram(self):
+        self._fill(40)
+        _, path = gg._sealed_segments()[-1]
+        before = gg.aggregate()[EP]["total"]
+        with open(path, "a", encoding="utf-8") as f:                   # 回す前に開いた fd からの追記
+            f.write('{"ts": %f, "endpoint": "%s", "outcome": "success", "latency_ms": 5}\n'
+                    % (self.clock.t, EP))
+        self.assertEqual(gg.aggregate()[EP]["total"], before + 1)
+
+
 class GitClassifyTests(unittest.TestCase):
     def test_classify(self):
         self.assertEqual(gg.classify_git(0, ""), gg.SUCCESS)
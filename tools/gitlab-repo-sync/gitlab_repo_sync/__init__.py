@@ -14,6 +14,7 @@
   gitlab-repo-sync sync                     # 設定内の全ペアを同期
   gitlab-repo-sync sync --pair app          # 1 組だけ
   gitlab-repo-sync sync --dry-run           # 予定だけ表示（リモートを変えない）
+  gitlab-repo-sync sync --changed-only      # 変化のあったペアだけ（毎分の cron 向け）
   gitlab-repo-sync status                   # 前回結果と未解決の分岐
   gitlab-repo-sync list                     # ペア・リポジトリ・共有ストアの対応
 """
@@ -57,6 +58,8 @@ def _build_parser():
     p_sync = sub.add_parser("sync", help="ペアを同期する")
     p_sync.add_argument("--pair", "-p", default=None, help="このペアだけ処理する")
     p_sync.add_argument("--dry-run", action="store_true", help="push せず、予定だけ表示する")
+    p_sync.add_argument("--changed-only", action="store_true",
+                        help="前回から変化のあったペアだけを処理・報告する")
 
     sub.add_parser("status", help="前回結果と未解決の分岐を表示する")
     sub.add_parser("list", help="ペア・リポジトリ・共有ストアの対応を表示する")
@@ -102,4 +105,5 @@ def main(argv=None):
             # 外部スケジューラが前回の実行中に次を撃った場合。失敗ではないので 0 で戻る。
             log.info("別の同期が実行中のため、今回はスキップします（%s）。" % lock_path)
             return 0
-        return run(cfg, log, only=args.pair, dry_run=args.dry_run)
+        return run(cfg, log, only=args.pair, dry_run=args.dry_run,
+                   changed_only=args.changed_only)
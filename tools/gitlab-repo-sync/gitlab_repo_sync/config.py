@@ -179,6 +179,9 @@ class Config:
     git_timeout: int = 900
     lock_timeout_minutes: int = 180
     fail_on_diverged: bool = False
+    jobs: int = 4                 # 同時に進めるグループ（共有ストア）の数
+    per_host_jobs: int = 4        # 1 ホストへ同時に出す git（ls-remote / fetch / push）の数
+    host_jobs: dict = field(default_factory=dict)   # ホスト glob -> 上限（per_host_jobs の上書き）
 
     def pair(self, name):
         for p in self.pairs:
@@ -309,6 +312,13 @@ def build_config(data):
     cfg.git_timeout = int(data.get("git_timeout", cfg.git_timeout))
     cfg.lock_timeout_minutes = int(data.get("lock_timeout_minutes", cfg.lock_timeout_minutes))
     cfg.fail_on_diverged = bool(data.get("fail_on_diverged", cfg.fail_on_diverged))
+    cfg.jobs = _positive(data, "jobs", cfg.jobs)
+    cfg.per_host_jobs = _positive(data, "per_host_jobs", cfg.per_host_jobs)
+    raw_host_jobs = data.get("host_jobs") or {}
+    if not isinstance(raw_host_jobs, dict):
+        raise ConfigError("host_jobs はマップ（ホスト glob: 上限）である必要があります。")
+    cfg.host_jobs = {str(host): _positive(raw_host_jobs, host, 1, "host_jobs.")
+                     for host in raw_host_jobs}
 
     cfg.credentials = CredentialStore(_build_credentials(data.get("credentials")))
 
@@ -332,6 +342,16 @@ def build_config(data):
     return cfg
 
 
+def _positive(raw, key, default, prefix=""):
+    try:
+        value = int(raw.get(key, default))
+    except (TypeError, ValueError):
+        value = 0
+    if value < 1:
+        raise ConfigError("%s%s は 1 以上の整数である必要があります。" % (prefix, key))
+    return value
+
+
 def _build_credentials(raw):
     """credentials はリスト形式（順に評価）とマップ形式（host: token）の両方を受ける。"""
     creds = []
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""並列実行 — ネットワークに出る git を、ホストごとの上限つきで並べる。
+
+グループ（共有ストア）は build_groups の作りから互いに独立しているので、同時に進めてよい。
+グループの中でも ls-remote / fetch / push はリポジトリごとに別の接続なので、並べて待ち時間を
+重ねられる。直列だと 1 実行が「全リモートの遅延の合計」になるのを、「いちばん遅いリモート」
+程度まで縮めるのが目的。
+
+並べすぎると同じ GitLab へ同時接続が集中して、レート制限や 429 で全体が遅くなる。
+そこでホスト単位のセマフォで同時実行数を抑える（グループをまたいで共有する）。判定・衝突検出・
+状態の書き込みは今までどおりグループのスレッドの中で順に行い、並べるのは I/O だけにする。
+"""
+from __future__ import annotations
+
+import fnmatch
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .config import split_url
+
+LOCAL_HOST = "local"            # ローカルパスのリモート（テストや NAS 上の bare）
+
+
+def host_of(url):
+    """同時実行数を数える単位。ホスト名（ポートは区別しない）、ローカルパスは LOCAL_HOST。"""
+    _, host, _, _ = split_url(url)
+    return host or LOCAL_HOST
+
+
+class HostLimiter:
+    """ホストごとの同時実行数の上限と、実際に到達したピークを持つ。
+
+    host_jobs はホスト名の glob → 上限（上から順に最初に一致したもの）。どれにも一致しなければ
+    per_host_jobs。
+    """
+
+    def __init__(self, per_host_jobs=4, host_jobs=None):
+        self.per_host_jobs = max(1, int(per_host_jobs))
+        self.host_jobs = dict(host_jobs or {})
+        self._lock = threading.Lock()
+        self._sems = {}
+        self._running = {}
+        self.peak = {}
+
+    def limit_for(self, host):
+        for pattern, limit in self.host_jobs.items():
+            if fnmatch.fnmatch(host, pattern.lower()):
+                return max(1, int(limit))
+        return self.per_host_jobs
+
+    @contextmanager
+    def slot(self, url):
+        host = host_of(url)
+        with self._lock:
+            sem = self._sems.get(host)
+            if sem is None:
+                sem = self._sems[host] = threading.BoundedSemaphore(self.limit_for(host))
+        with sem:
+            with self._lock:
+                self._running[host] = self._running.get(host, 0) + 1
+                self.peak[host] = max(self.peak.get(host, 0), self._running[host])
+            try:
+                yield
+            finally:
+                with self._lock:
+                    self._running[host] -= 1
+
+    def describe(self):
+        """レポートへ載せる形（設定した上限と、この実行で到達したピーク）。"""
+        return {"per_host_jobs": self.per_host_jobs, "host_jobs": dict(self.host_jobs),
+                "peak": dict(sorted(self.peak.items()))}
+
+
+class PhaseTimer:
+    """段階ごとの経過秒を積み上げる（グループのスレッドからだけ使う）。"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.seconds[name] = round(self.seconds.get(name, 0.0)
+                                       + time.monotonic() - started, 3)
+
+
+def map_remote(fn, items, url_of, limiter):
+    """items の各要素に fn を並列に当て、{item: (ok, 結果または例外)} を返す。
+
+    ネットワークに出る呼び出しだけに使う。同時実行数は limiter のホスト上限で抑え、
+    スレッド数は要素数までしか作らない。例外は握らずに呼び出し側へ返すので、
+    「1 つ失敗したら全体を止める」か「失敗を記録して続ける」かは呼び出し側が決める。
+    """
+    items = list(items)
+    if not items:
+        return {}
+
+    def call(item):
+        with limiter.slot(url_of(item)):
+            return fn(item)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(items)) as pool:
+        futures = {item: pool.submit(call, item) for item in items}
+        for item, future in futures.items():
+            try:
+                results[item] = (True, future.result())
+            except Exception as exc:  # noqa: BLE001 — 呼び出し側で種類を見て扱う
+                results[item] = (False, exc)
+    return results
@@ -11,15 +11,22 @@
   4. merge-base で ff を決着させ、ルールの戦略を当てる
   5. ペアをまたいだ書き込み衝突を検出して、衝突した ref は両方止める
   6. リポジトリごとにまとめて push する
+
+1・3・6 はリモートへ出る I/O なので、リポジトリごとに並列に走らせる（ホストごとの上限つき）。
+グループ同士も独立なので run() が並列に進める。並べ方は executor.py を参照。
 """
 from __future__ import annotations
 
 import datetime
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from . import planner
 from .config import build_groups
+from .executor import HostLimiter, PhaseTimer, map_remote
 from .planner import RefPlan
+from .snapshots import SnapshotStore, ref_digest, side_digests
 from .store import GitError, Store, sync_ref
 from .util import read_json, safe_name, write_json
 
@@ -39,11 +46,44 @@ def load_snapshot(cfg, pair):
     共有する別のペアが先に走ったときに「観測済み＝同期済み」と誤認して、まだ一度も
     突き合わせていない組を飛ばしてしまう。
     """
-    snapshot = read_json(pair_state_path(cfg, pair.name)).get("snapshot", {}) or {}
+    snapshot, _ = _load_snapshot(cfg, pair, read_json(pair_state_path(cfg, pair.name)))
     return (snapshot.get(planner.SIDE_A, {}) or {},
             snapshot.get(planner.SIDE_B, {}) or {})
 
 
+def _load_snapshot(cfg, pair, state):
+    """(スナップショット, 保存先と食い違いが無いか) を返す。
+
+    本体は snapshots.py の追記式ストアにあり、状態ファイルにはそのダイジェストだけを持つ。
+    読み直した本体がダイジェストと合わなければ（ジャーナルの追記中に落ちたなど）信用せず、
+    空として扱う — 前回の記録が無いときと同じで、削除を推測しない安全側に倒れる。
+    旧形式（状態ファイルに本体をまるごと持つ）はそのまま読む。次の保存で新形式へ移る。
+    """
+    if "snapshot" in state:
+        return state.get("snapshot") or {}, False
+    snapshot = SnapshotStore(cfg.state_dir).load(pair.name)
+    recorded = state.get("digest")
+    if recorded is None:
+        return {}, not snapshot
+    if side_digests(_sides(snapshot)) != recorded:
+        return {}, False
+    return snapshot, True
+
+
+def _sides(snapshot):
+    return {planner.SIDE_A: snapshot.get(planner.SIDE_A, {}) or {},
+            planner.SIDE_B: snapshot.get(planner.SIDE_B, {}) or {}}
+
+
+def _recorded_digests(state):
+    """「変化なし」判定に使う、前回記録した両側のダイジェスト。旧形式なら本体から計算する。"""
+    if "digest" in state:
+        return state["digest"]
+    if "snapshot" in state:
+        return side_digests(_sides(state.get("snapshot") or {}))
+    return None
+
+
 def _now():
     return datetime.datetime.now().isoformat(timespec="seconds")
 
@@ -83,21 +123,27 @@ def fetch_needs(pair, raw, a_refs, b_refs, a_slug, b_slug, store):
     """
     rule = pair.rule
     needs = {a_slug: set(), b_slug: set()}
+    # 有無の確認は先にまとめて 1 回で聞く（ref ごとに git を起動しない）
+    candidates = []
+    for ref, kind in raw:
+        if kind != planner.NOOP:
+            candidates += [a_refs.get(ref), b_refs.get(ref)]
+    present = store.has_objects(candidates)
     for ref, kind in raw:
         if kind == planner.NOOP:
             continue
         if kind == planner.COMPARE:
             # ff 判定には両側のコミットが要る（片方だけでは merge-base を出せない）
-            if not store.has_object(a_refs.get(ref)):
+            if a_refs.get(ref) not in present:
                 needs[a_slug].add(ref)
-            if not store.has_object(b_refs.get(ref)):
+            if b_refs.get(ref) not in present:
                 needs[b_slug].add(ref)
             continue
         action = planner.apply_strategy(kind, rule.strategy,
                                         rule.allow_force, rule.propagate_deletes)
         plan = RefPlan(ref=ref, action=action, a_sha=a_refs.get(ref), b_sha=b_refs.get(ref))
         sha = plan.target_sha()
-        if sha is None or store.has_object(sha):
+        if sha is None or sha in present:
             continue                       # 削除アクション、または既に手元に在る
         # 書き込み先の反対側が送り元。その ref はそちらに必ず存在する。
         source = b_slug if plan.target_side() == planner.SIDE_A else a_slug
@@ -112,9 +158,10 @@ def resolve_pair(pair, raw, a_refs, b_refs, store):
     for ref, kind in raw:
         a_sha, b_sha = a_refs.get(ref), b_refs.get(ref)
         if kind == planner.COMPARE:
-            base = store.merge_base(a_sha, b_sha)
-            kind = planner.resolve_compare(a_sha, b_sha, base,
-                                           is_tag=ref.startswith("refs/tags/"))
+            is_tag = ref.startswith("refs/tags/")
+            # タグは指し先が違えば merge-base に依らず分岐扱いなので、履歴を辿らない
+            base = None if is_tag else store.merge_base(a_sha, b_sha)
+            kind = planner.resolve_compare(a_sha, b_sha, base, is_tag=is_tag)
         action = planner.apply_strategy(kind, rule.strategy,
                                         rule.allow_force, rule.propagate_deletes)
         plans.append(RefPlan(ref=ref, action=action, a_sha=a_sha, b_sha=b_sha))
@@ -157,13 +204,29 @@ def build_refspecs(pair_plans, slug_of):
 # グループ 1 つぶんの同期
 # --------------------------------------------------------------------------- #
 
-def sync_group(cfg, group, pairs, log, dry_run=False):
-    """1 グループ（＝1 共有ストア）を同期して、ペアごとのレポートを返す。"""
+def sync_group(cfg, group, pairs, log, dry_run=False, limiter=None, timer=None,
+               changed_only=False):
+    """1 グループ（＝1 共有ストア）を同期して、ペアごとのレポートを返す。
+
+    limiter はホストごとの同時実行数の上限（run() がグループをまたいで共有するものを渡す）。
+    timer を渡すと段階ごとの経過秒をそこへ積む。changed_only なら、変化なしのペアは
+    レポートにも載せない（状態ファイルのダイジェストを見るだけで終える）。
+    """
+    limiter = limiter or HostLimiter(cfg.per_host_jobs, cfg.host_jobs)
+    timer = timer or PhaseTimer()
     store = Store(os.path.join(cfg.store_dir, group.gid), log, timeout=cfg.git_timeout)
     if store.ensure():
         log.info("共有ストアを作成しました: %s（リポジトリ %d 件）"
                  % (store.path, len(group.repos)))
+    try:
+        return _sync_store(cfg, group, pairs, log, dry_run, limiter, timer, changed_only, store)
+    finally:
+        store.close()
+
 
+def _sync_store(cfg, group, pairs, log, dry_run, limiter, timer, changed_only, store):
+    url_of = lambda slug: group.repos[slug]
+    authed = lambda slug: cfg.credentials.authenticated_url(group.repos[slug])
     slug_of = lambda pair, side: (pair.slugs()[0] if side == planner.SIDE_A
                                   else pair.slugs()[1])
 
@@ -173,27 +236,110 @@ def sync_group(cfg, group, pairs, log, dry_run=False):
         needed_slugs.update(pair.slugs())
 
     observed, unreachable = {}, {}
-    for slug in sorted(needed_slugs):
-        url = group.repos[slug]
-        try:
-            observed[slug] = store.ls_remote(cfg.credentials.authenticated_url(url))
-        except GitError as exc:
-            unreachable[slug] = str(exc)
-            log.error("[%s] ref 一覧の取得に失敗しました: %s" % (slug, exc))
+    with timer.phase("ls_remote"):
+        listed = map_remote(lambda slug: store.ls_remote(authed(slug)),
+                            needed_slugs, url_of, limiter)
+    for slug in sorted(listed):
+        ok, value = listed[slug]
+        if not ok:
+            if not isinstance(value, GitError):
+                raise value
+            unreachable[slug] = str(value)
+            log.error("[%s] ref 一覧の取得に失敗しました: %s" % (slug, value))
             continue
-        log.debug("[%s] ref %d 件" % (slug, len(observed[slug])))
+        observed[slug] = value
+        log.debug("[%s] ref %d 件" % (slug, len(value)))
+    # リポジトリごとに 1 回だけ畳む。同じリポジトリを見るペアが何組あっても比較は文字列 1 回。
+    digests = {slug: ref_digest(refs) for slug, refs in observed.items()}
 
     # --- 2. ペアごとに素の判定を出す ---------------------------------------- #
-    reports, active, raws = [], [], {}
+    with timer.phase("classify"):
+        reports, active, raws, prevs = _classify_all(cfg, pairs, observed, digests,
+                                                     unreachable, log, changed_only)
+
+    if not active:
+        return reports
+
+    # --- 3. 足りないオブジェクトをリポジトリごとにまとめて取る ---------------- #
+    with timer.phase("fetch"):
+        _fetch_missing(active, raws, observed, store, authed, url_of, limiter, log)
+
+    # --- 4. ff を決着させて戦略を当て、5. ペアをまたいだ書き込み衝突を止める ---- #
+    with timer.phase("resolve"):
+        pair_plans = []
+        for pair in active:
+            a_slug, b_slug = pair.slugs()
+            plans = resolve_pair(pair, raws[pair.name], observed[a_slug], observed[b_slug],
+                                 store)
+            pair_plans.append((pair, plans))
+        _stop_conflicting_writes(pair_plans, slug_of, log)
+
+    # --- 6. リポジトリごとにまとめて push ----------------------------------- #
+    specs = build_refspecs(pair_plans, slug_of)
+    for slug in sorted(specs):
+        log.info("[%s] %d 件を push します%s"
+                 % (slug, len(specs[slug]), "（dry-run）" if dry_run else ""))
+    with timer.phase("push"):
+        pushed = map_remote(lambda slug: store.push(authed(slug), specs[slug], dry_run=dry_run),
+                            specs, url_of, limiter)
+    push_results = {}
+    for slug in sorted(pushed):
+        ok, value = pushed[slug]
+        if not ok:
+            if not isinstance(value, GitError):
+                raise value
+            log.error("[%s] push に失敗しました: %s" % (slug, value))
+            value = {}
+        push_results[slug] = value
+
+    applied = {slug: dict(refs) for slug, refs in observed.items()}
+    for pair, plans in pair_plans:
+        for plan in plans:
+            side = plan.target_side()
+            if side is None:
+                continue
+            slug = slug_of(pair, side)
+            plan.ok, plan.detail = push_results.get(slug, {}).get(
+                plan.ref, (False, "push 結果に対応する行がありません"))
+            if plan.ok and not dry_run:
+                if plan.action in planner.DELETE_ACTIONS:
+                    applied[slug].pop(plan.ref, None)
+                else:
+                    applied[slug][plan.ref] = plan.target_sha()
+
+    # --- 7. 記録とレポート -------------------------------------------------- #
+    with timer.phase("record"):
+        for pair, plans in pair_plans:
+            a_slug, b_slug = pair.slugs()
+            # 観測結果ではなく「push 後の姿」を保存する。次回の「変化なし」判定と
+            # 削除検出の基準になるので、実際に書けたぶんだけを反映する。
+            snapshot = {planner.SIDE_A: applied[a_slug], planner.SIDE_B: applied[b_slug]}
+            reports.append(_finish_pair(cfg, pair, plans, snapshot, prevs[pair.name],
+                                        log, dry_run))
+    return reports
+
+
+def _classify_all(cfg, pairs, observed, digests, unreachable, log, changed_only=False):
+    """2. の本体。変化なし・到達不能のペアはレポートへ、判定が要るペアは active へ振り分ける。
+
+    戻り値: (reports, active, {ペア名: 素の判定}, {ペア名: (前回のスナップショット, 信用できるか)})
+
+    「変化なし」は両側のダイジェストを前回の記録と比べるだけで決める。スナップショット本体を
+    読んで ref ごとに比べるのは、どちらかが変わったペアだけ。
+    """
+    reports, active, raws, prevs = [], [], {}, {}
     for pair in pairs:
         a_slug, b_slug = pair.slugs()
         broken = [s for s in (a_slug, b_slug) if s in unreachable]
         if broken:
             reports.append(_report(pair, "failed", error=unreachable[broken[0]]))
             continue
-        prev_a, prev_b = load_snapshot(cfg, pair)
-        if observed[a_slug] == prev_a and observed[b_slug] == prev_b:
-            state = read_json(pair_state_path(cfg, pair.name))
+        state = read_json(pair_state_path(cfg, pair.name))
+        current = {planner.SIDE_A: digests[a_slug], planner.SIDE_B: digests[b_slug]}
+        if _recorded_digests(state) == current:
+            if changed_only:
+                log.debug("[%s] 前回から変化なし。" % pair.name)
+                continue
             carried = state.get("diverged", []) or []
             carried_conflicts = state.get("conflicts", []) or []
             log.info("[%s] 前回から変化なし。転送を省略します。" % pair.name)
@@ -203,36 +349,45 @@ def sync_group(cfg, group, pairs, log, dry_run=False):
             reports.append(_report(pair, "unchanged", diverged=carried,
                                    conflicts=carried_conflicts))
             continue
+        prev, trusted = _load_snapshot(cfg, pair, state)
+        prev = _sides(prev)
+        prevs[pair.name] = (prev, trusted)
         raws[pair.name] = classify_pair(pair, observed[a_slug], observed[b_slug],
-                                        prev_a, prev_b)
+                                        prev[planner.SIDE_A], prev[planner.SIDE_B])
         active.append(pair)
+    return reports, active, raws, prevs
 
-    if not active:
-        return reports
 
-    # --- 3. 足りないオブジェクトをリポジトリごとにまとめて取る ---------------- #
+def _fetch_missing(active, raws, observed, store, authed, url_of, limiter, log):
+    """3. の本体。取りに行くリポジトリ同士は並列に走らせ、1 つでも失敗したらグループを止める。
+
+    fetch の失敗を握りつぶすと、オブジェクトが無いまま merge-base に進んで誤判定するので、
+    直列のときと同じく例外のまま上へ返す（全部が終わるのを待ってから、slug 順で最初のもの）。
+    """
     merged_needs = {}
     for pair in active:
         a_slug, b_slug = pair.slugs()
         needs = fetch_needs(pair, raws[pair.name], observed[a_slug], observed[b_slug],
                             a_slug, b_slug, store)
         for slug, refs in needs.items():
-            merged_needs.setdefault(slug, set()).update(refs)
+            if refs:
+                merged_needs.setdefault(slug, set()).update(refs)
     for slug in sorted(merged_needs):
-        refs = merged_needs[slug]
-        if not refs:
-            continue
-        log.info("[%s] %d 件の ref を取得します" % (slug, len(refs)))
-        store.fetch(cfg.credentials.authenticated_url(group.repos[slug]), slug, sorted(refs))
-
-    # --- 4. ff を決着させて戦略を当てる ------------------------------------- #
-    pair_plans = []
-    for pair in active:
-        a_slug, b_slug = pair.slugs()
-        plans = resolve_pair(pair, raws[pair.name], observed[a_slug], observed[b_slug], store)
-        pair_plans.append((pair, plans))
-
-    # --- 5. ペアをまたいだ書き込み衝突を止める ------------------------------ #
+        log.info("[%s] %d 件の ref を取得します" % (slug, len(merged_needs[slug])))
+    concurrent = len(merged_needs) > 1
+    fetched = map_remote(lambda slug: store.fetch(authed(slug), slug, sorted(merged_needs[slug]),
+                                                  concurrent=concurrent),
+                         merged_needs, url_of, limiter)
+    for slug in sorted(fetched):
+        ok, value = fetched[slug]
+        if not ok:
+            raise value
+    if concurrent:
+        store.gc_auto()
+
+
+def _stop_conflicting_writes(pair_plans, slug_of, log):
+    """5. ペアをまたいだ書き込み衝突を検出して、衝突した ref は両方止める。"""
     writes = []
     for pair, plans in pair_plans:
         for plan in plans:
@@ -240,53 +395,16 @@ def sync_group(cfg, group, pairs, log, dry_run=False):
             if side is not None:
                 writes.append((slug_of(pair, side), plan.ref, plan.target_sha(), pair.name))
     conflicts = planner.detect_write_conflicts(writes)
-    if conflicts:
-        for (slug, ref), names in sorted(conflicts.items()):
-            log.error("書き込みが衝突しました: %s の %s に対して %s が別々の内容を書こうとしています"
-                      % (slug, ref, " / ".join(sorted(set(names)))))
-        for pair, plans in pair_plans:
-            for plan in plans:
-                side = plan.target_side()
-                if side is not None and (slug_of(pair, side), plan.ref) in conflicts:
-                    plan.action = planner.CONFLICT
-
-    # --- 6. リポジトリごとにまとめて push ----------------------------------- #
-    specs = build_refspecs(pair_plans, slug_of)
-    push_results = {}
-    for slug in sorted(specs):
-        log.info("[%s] %d 件を push します%s"
-                 % (slug, len(specs[slug]), "（dry-run）" if dry_run else ""))
-        try:
-            push_results[slug] = store.push(
-                cfg.credentials.authenticated_url(group.repos[slug]), specs[slug],
-                dry_run=dry_run)
-        except GitError as exc:
-            log.error("[%s] push に失敗しました: %s" % (slug, exc))
-            push_results[slug] = {}
-
-    applied = {slug: dict(refs) for slug, refs in observed.items()}
+    if not conflicts:
+        return
+    for (slug, ref), names in sorted(conflicts.items()):
+        log.error("書き込みが衝突しました: %s の %s に対して %s が別々の内容を書こうとしています"
+                  % (slug, ref, " / ".join(sorted(set(names)))))
     for pair, plans in pair_plans:
         for plan in plans:
             side = plan.target_side()
-            if side is None:
-                continue
-            slug = slug_of(pair, side)
-            plan.ok, plan.detail = push_results.get(slug, {}).get(
-                plan.ref, (False, "push 結果に対応する行がありません"))
-            if plan.ok and not dry_run:
-                if plan.action in planner.DELETE_ACTIONS:
-                    applied[slug].pop(plan.ref, None)
-                else:
-                    applied[slug][plan.ref] = plan.target_sha()
-
-    # --- 7. 記録とレポート -------------------------------------------------- #
-    for pair, plans in pair_plans:
-        a_slug, b_slug = pair.slugs()
-        # 観測結果ではなく「push 後の姿」を保存する。次回の「変化なし」判定と
-        # 削除検出の基準になるので、実際に書けたぶんだけを反映する。
-        snapshot = {planner.SIDE_A: applied[a_slug], planner.SIDE_B: applied[b_slug]}
-        reports.append(_finish_pair(cfg, pair, plans, snapshot, log, dry_run))
-    return reports
+            if side is not None and (slug_of(pair, side), plan.ref) in conflicts:
+                plan.action = planner.CONFLICT
 
 
 def _report(pair, status, changed=0, diverged=None, skipped=None,
@@ -299,7 +417,7 @@ def _report(pair, status, changed=0, diverged=None, skipped=None,
     return report
 
 
-def _finish_pair(cfg, pair, plans, snapshot, log, dry_run):
+def _finish_pair(cfg, pair, plans, snapshot, previous, log, dry_run):
     diverged = [p.ref for p in plans if p.action == planner.DIVERGED]
     skipped = [p.ref for p in plans if p.action == planner.SKIPPED]
     conflicts = [p.ref for p in plans if p.action == planner.CONFLICT]
@@ -326,15 +444,26 @@ def _finish_pair(cfg, pair, plans, snapshot, log, dry_run):
         status = "ok"
 
     if not dry_run:
+        path = pair_state_path(cfg, pair.name)
         state = {"last_run_at": _now(), "status": status, "diverged": diverged,
                  "conflicts": conflicts, "changed": len(changed)}
         # push に失敗した ref があるときはスナップショットを更新しない。更新すると
         # 次回に「変化なし」と判定され、失敗したまま再試行されなくなる。
         if not failed:
-            state["snapshot"] = snapshot
+            prev, trusted = previous
+            snapshots = SnapshotStore(cfg.state_dir)
+            # 本体を先に書き、ダイジェストは後。間で落ちても食い違いとして検出される。
+            if trusted:
+                snapshots.save(pair.name, snapshot, previous=prev)
+            else:
+                snapshots.compact(pair.name, snapshot)
+            state["digest"] = side_digests(snapshot)
         else:
-            state["snapshot"] = read_json(pair_state_path(cfg, pair.name)).get("snapshot", {})
-        write_json(pair_state_path(cfg, pair.name), state)
+            old = read_json(path)
+            for key in ("digest", "snapshot"):
+                if key in old:
+                    state[key] = old[key]
+        write_json(path, state)
     log.info("[%s] 完了: %s（更新 %d 件 / 分岐 %d 件）"
              % (pair.name, status, len(changed), len(diverged)))
     return _report(pair, status, len(changed), diverged, skipped, conflicts, failed)
@@ -344,8 +473,13 @@ def _finish_pair(cfg, pair, plans, snapshot, log, dry_run):
 # 全体の実行
 # --------------------------------------------------------------------------- #
 
-def run(cfg, log, only=None, dry_run=False):
-    """設定内のペアを同期する。戻り値は終了コード。"""
+def run(cfg, log, only=None, dry_run=False, changed_only=False):
+    """設定内のペアを同期する。戻り値は終了コード。
+
+    changed_only: 前回から両側とも変わっていないペアはレポートにも載せない（毎分の cron 向け）。
+    何も変わっていなければ last-report.json も書き換えない。変わったペアのぶんだけを
+    前回のレポートへ差し込むので、監視から見える内容は通常の実行と同じ形のまま。
+    """
     # グループは**常に全ペア**から組む。--pair で絞ったときにストアの単位が変わると、
     # 同じリポジトリを別の場所へもう一度 clone することになるため。
     groups = build_groups(cfg.pairs)
@@ -353,29 +487,53 @@ def run(cfg, log, only=None, dry_run=False):
         log.error("設定に無いペアです: %s" % only)
         return 1
 
-    reports = []
+    work = []
     for group in groups:
         selected = [p for p in group.pairs
                     if p.enabled and (only is None or p.name == only)]
         disabled = [p for p in group.pairs if not p.enabled and (only is None or p.name == only)]
         for pair in disabled:
             log.debug("[%s] enabled: false のためスキップします" % pair.name)
-        if not selected:
-            continue
+        if selected:
+            work.append((group, selected))
+
+    # ホストの上限はグループをまたいで 1 つ。グループごとに持つと、同じ GitLab を見る
+    # グループが jobs 個並んだときに per_host_jobs × jobs 本の接続が同時に出てしまう。
+    limiter = HostLimiter(cfg.per_host_jobs, cfg.host_jobs)
+
+    def one_group(item):
+        group, selected = item
+        timer = PhaseTimer()
+        started = time.monotonic()
         try:
-            reports.extend(sync_group(cfg, group, selected, log, dry_run=dry_run))
+            group_reports = sync_group(cfg, group, selected, log, dry_run=dry_run,
+                                       limiter=limiter, timer=timer,
+                                       changed_only=changed_only)
         except (GitError, OSError) as exc:
             log.error("グループ %s の同期に失敗しました: %s" % (group.gid, exc))
-            for pair in selected:
-                reports.append(_report(pair, "failed", error=log.redact(exc)))
+            group_reports = [_report(pair, "failed", error=log.redact(exc))
+                             for pair in selected]
+        return group_reports, {"gid": group.gid,
+                               "pairs": [pair.name for pair in selected],
+                               "seconds": round(time.monotonic() - started, 3),
+                               "timings": timer.seconds}
+
+    # レポートの並びはグループの順（＝直列のときと同じ）に揃える。終わった順にすると
+    # 実行ごとに last-report.json の差分が出て、監視側の比較が無意味になる。
+    with ThreadPoolExecutor(max_workers=max(1, min(cfg.jobs, len(work) or 1))) as pool:
+        outcomes = list(pool.map(one_group, work))
+    reports = [r for group_reports, _ in outcomes for r in group_reports]
+    group_stats = [stats for _, stats in outcomes]
 
     if not reports:
-        log.info("同期対象のペアがありません。")
+        log.info("前回から変化のあったペアはありません。" if changed_only and work
+                 else "同期対象のペアがありません。")
         return 0
 
     failed = [r for r in reports if r["status"] == "failed"]
     attention = [r for r in reports if r["diverged"] or r["conflicts"]]
-    write_report(cfg, reports, dry_run=dry_run)
+    write_report(cfg, reports, dry_run=dry_run, groups=group_stats,
+                 concurrency=dict(limiter.describe(), jobs=cfg.jobs), merge=changed_only)
 
     log.info("サマリ: %d ペア / 更新 %d 件 / 失敗 %d / 要対応 %d"
              % (len(reports), sum(r["changed"] for r in reports), len(failed), len(attention)))
@@ -391,12 +549,27 @@ def run(cfg, log, only=None, dry_run=False):
     return 0
 
 
-def write_report(cfg, reports, dry_run=False):
-    """最新の実行結果を残す（監視や通知から拾えるように）。"""
+def write_report(cfg, reports, dry_run=False, groups=None, concurrency=None, merge=False):
+    """最新の実行結果を残す（監視や通知から拾えるように）。
+
+    groups はグループごとの段階別の所要秒、concurrency は並列度の設定とホストごとの
+    実際のピーク。遅くなったときに「どのリモートの、どの段階か」をここから辿れる。
+    merge なら、今回載っていないペアは前回のレポートの行を設定の順に残す。
+    """
     if dry_run:
         return
-    write_json(os.path.join(cfg.state_dir, "last-report.json"),
-               {"finished_at": _now(), "pairs": reports})
+    path = os.path.join(cfg.state_dir, "last-report.json")
+    if merge:
+        fresh = {r["pair"]: r for r in reports}
+        kept = {r.get("pair"): r for r in read_json(path).get("pairs", []) or []}
+        reports = [fresh.get(p.name) or kept[p.name] for p in cfg.pairs
+                   if p.name in fresh or p.name in kept]
+    payload = {"finished_at": _now(), "pairs": reports}
+    if groups is not None:
+        payload["groups"] = groups
+    if concurrency is not None:
+        payload["concurrency"] = concurrency
+    write_json(path, payload)
 
 
 # --------------------------------------------------------------------------- #
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""ペアごとのスナップショット — 追記式の保存と、ref 一覧の要約（ダイジェスト）。
+
+スナップショットは「そのペアが最後に突き合わせた両側の ref 一覧」で、削除の検出と
+「前回から変化なし」の判定の基準になる。ref が数千あるリポジトリでは、これを毎回まるごと
+読み書きするのが実行時間の大半になる（特に cron で毎分呼ぶ構成では、ほとんどの実行が
+「何も変わっていない」ことを確かめるだけで終わる）。
+
+そこで 2 つに分ける:
+  - ダイジェスト … ref 一覧を 1 本のハッシュに畳んだもの。ペアの状態ファイル（小さい）に
+    持たせ、ls-remote の結果のダイジェストと 1 回比べるだけで「変化なし」を決める。
+    スナップショット本体は読まない。
+  - 本体 … ベース（JSON）＋差分ジャーナル（1 行 1 回ぶんの JSON）。保存は前回との差分を
+    ジャーナルへ追記するだけにし、差分が溜まったらベースへ畳み直す。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+
+from .util import read_json, safe_name, write_json
+
+COMPACT_MIN_ENTRIES = 256       # 差分がこれだけ溜まったら…
+COMPACT_RATIO = 0.5             # …かつベースの ref 数のこの割合を超えたら、ベースへ畳む
+
+
+def ref_digest(refs):
+    """ref 一覧（{ref: sha}）の要約。並び順に依らず、1 件でも違えば別の値になる。"""
+    h = hashlib.sha1()
+    for ref in sorted(refs):
+        h.update(("%s %s\n" % (ref, refs[ref])).encode("utf-8"))
+    return h.hexdigest()
+
+
+def side_digests(snapshot):
+    return {side: ref_digest(refs) for side, refs in snapshot.items()}
+
+
+class SnapshotStore:
+    """state_dir/snapshots/<ペア名>.json（ベース）と .log（差分ジャーナル）。
+
+    ジャーナルの 1 行は 1 回の保存ぶん: {"side": {"set": {ref: sha}, "del": [ref]}}。
+    途中で落ちて最後の行が欠けても、その行を読み飛ばすだけで済む（呼び出し側は状態ファイルの
+    ダイジェストと突き合わせて、食い違えばスナップショットを信用しない）。
+    """
+
+    def __init__(self, state_dir):
+        self.root = os.path.join(state_dir, "snapshots")
+
+    def _paths(self, name):
+        base = os.path.join(self.root, safe_name(name))
+        return base + ".json", base + ".log"
+
+    def load(self, name):
+        """{side: {ref: sha}} を返す。無ければ空。"""
+        base_path, log_path = self._paths(name)
+        snapshot = {side: dict(refs or {}) for side, refs in read_json(base_path).items()}
+        for change in self._journal(log_path):
+            _apply(snapshot, change)
+        return snapshot
+
+    def save(self, name, snapshot, previous=None):
+        """snapshot を保存する。previous（直前に load した内容）との差分だけを追記する。
+
+        previous を渡さないときは読み直して比べる。
+        """
+        base_path, log_path = self._paths(name)
+        if previous is None:
+            previous = self.load(name)
+        if not any(previous.values()):
+            self.compact(name, snapshot)         # 初回（前回が空）はベースとして書く
+            return
+        change = _diff(previous, snapshot)
+        if not change:
+            return
+        entries = self._journal_size(log_path) + sum(
+            len(delta["set"]) + len(delta["del"]) for delta in change.values())
+        size = sum(len(refs) for refs in snapshot.values())
+        if entries >= COMPACT_MIN_ENTRIES and entries > size * COMPACT_RATIO:
+            self.compact(name, snapshot)
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with open(log_path, "a+", encoding="utf-8") as f:
+            # 前回の追記が途中で切れていたら、次の行をそこへ繋げないよう改行を補う
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(f.tell() - 1)
+                if f.read(1) != "\n":
+                    f.write("\n")
+            f.write(json.dumps(change, ensure_ascii=False, sort_keys=True) + "\n")
+
+    def compact(self, name, snapshot):
+        """ベースを書き直してジャーナルを空にする（順序が逆だと、落ちたときに差分を失う）。"""
+        base_path, log_path = self._paths(name)
+        write_json(base_path, snapshot)
+        try:
+            os.remove(log_path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _journal(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+        changes = []
+        for line in lines:
+            try:
+                change = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(change, dict):
+                changes.append(change)
+        return changes
+
+    @classmethod
+    def _journal_size(cls, path):
+        return sum(len(delta.get("set", {})) + len(delta.get("del", []))
+                   for change in cls._journal(path) for delta in change.values())
+
+
+def _diff(old, new):
+    change = {}
+    for side in sorted(set(old) | set(new)):
+        before, after = old.get(side, {}), new.get(side, {})
+        set_ = {ref: sha for ref, sha in after.items() if before.get(ref) != sha}
+        del_ = sorted(ref for ref in before if ref not in after)
+        if set_ or del_ or side not in old:
+            change[side] = {"set": set_, "del": del_}
+    return change
+
+
+def _apply(snapshot, change):
+    for side, delta in change.items():
+        refs = snapshot.setdefault(side, {})
+        refs.update(delta.get("set", {}))
+        for ref in delta.get("del", []):
+            refs.pop(ref, None)
@@ -8,11 +8,16 @@ clone もオブジェクトも 1 つで済む。merge-base も同一リポジト
 
 ネットワークに出るのは ls_remote / fetch / push の 3 つだけ。いずれも refspec を
 まとめて 1 コマンドで叩くので、リポジトリあたりの接続回数は 1 実行につき最大 3 回に収まる。
+
+手元で済む問い合わせ（オブジェクトの有無・merge-base）は ref の数だけ発生するので、
+1 回ごとに git を起動せず、常駐させた `git cat-file` 越しに答える（ObjectQuery）。
 """
 from __future__ import annotations
 
+import heapq
 import os
 import subprocess
+import threading
 
 
 class GitError(RuntimeError):
@@ -91,6 +96,200 @@ def parse_push_porcelain(output):
     return results
 
 
+class ObjectQuery:
+    """ストアへの読み取り専用の問い合わせを、常駐させた `git cat-file` で捌く。
+
+    ref が数千あるリポジトリでは、ref ごとに `git cat-file -e` / `git merge-base` を起動する
+    コストが同期 1 回の大半を占める。ここでは 2 本だけ起動して使い回す:
+
+      --batch-check … 有無の確認。問い合わせをまとめて書き込み、答えをまとめて読む
+                      （1 件ごとに往復しない）。
+      --batch       … コミットの中身（親と日時）を読む。merge-base は git と同じ
+                      「日時の新しい順に両側から塗り進める」走査を手元で行い、読んだコミットは
+                      使い回す（同じ履歴を共有する ref が多いほど 2 本目以降が安い）。
+
+    走査を始めたあとに fetch で増えたオブジェクトも見える（cat-file は見つからないとき
+    パックを読み直してから答える）。1 つのストアを 1 スレッドから使う前提だが、念のため
+    問い合わせごとに排他する。
+    """
+
+    CHUNK = 256             # 一度に書き込む問い合わせの数（パイプが詰まって相互待ちしないように）
+    _P1, _P2, _STALE, _RESULT = 1, 2, 4, 8
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._procs = {}
+        self._commits = {}          # sha -> (parents, committer の epoch 秒)
+
+    def _proc(self, mode):
+        proc = self._procs.get(mode)
+        if proc is not None and proc.poll() is not None:
+            self._discard(proc)                 # 前回のうちに落ちていた。起動し直す
+            proc = None
+        if proc is None:
+            try:
+                proc = subprocess.Popen(
+                    ["git", "cat-file", mode], cwd=self.path, env=git_env(),
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+            except FileNotFoundError:
+                raise GitError("git コマンドが見つかりません。PATH を確認してください。")
+            self._procs[mode] = proc
+        return proc
+
+    def close(self):
+        with self._lock:
+            for proc in self._procs.values():
+                try:
+                    proc.stdin.close()
+                    proc.wait(timeout=10)
+                except (OSError, subprocess.TimeoutExpired):
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+            self._procs.clear()
+
+    def _discard(self, proc):
+        """落ちた（または応答しない）プロセスを片付ける。次の問い合わせで起動し直す。"""
+        for mode in [m for m, p in self._procs.items() if p is proc]:
+            del self._procs[mode]
+        if proc.poll() is None:
+            proc.kill()
+        code = proc.wait()
+        for pipe in (proc.stdin, proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        return code
+
+    def _write(self, proc, text):
+        try:
+            proc.stdin.write(text.encode("utf-8"))
+            proc.stdin.flush()
+        except OSError:
+            raise GitError("git cat-file が応答しません（終了コード %s）" % self._discard(proc))
+
+    def _readline(self, proc):
+        line = proc.stdout.readline()
+        if not line:
+            raise GitError("git cat-file が応答しません（終了コード %s）" % self._discard(proc))
+        return line.decode("utf-8", "replace").rstrip("\n")
+
+    def info(self, names):
+        """{名前: (sha, 種別) または None} を返す。名前は SHA でも ref でもよい。"""
+        names = [n for n in dict.fromkeys(names) if n]
+        answers = {}
+        with self._lock:
+            proc = self._proc("--batch-check")
+            for start in range(0, len(names), self.CHUNK):
+                chunk = names[start:start + self.CHUNK]
+                self._write(proc, "".join(n + "\n" for n in chunk))
+                for name in chunk:
+                    parts = self._readline(proc).split()
+                    # 見つからなければ "<名前> missing"（曖昧なら "ambiguous"）
+                    answers[name] = (parts[0], parts[1]) if len(parts) == 3 else None
+        return answers
+
+    def exists(self, shas):
+        """手元に在るオブジェクトの集合を返す。"""
+        return {sha for sha, found in self.info(shas).items() if found}
+
+    def _read(self, name):
+        """(解決後の SHA, 種別, 中身) を返す。無ければ (None, None, b"")。"""
+        proc = self._proc("--batch")
+        self._write(proc, name + "\n")
+        header = self._readline(proc).split()
+        if len(header) != 3:
+            return None, None, b""
+        size = int(header[2])
+        body = proc.stdout.read(size + 1)[:size]       # 末尾の改行を読み捨てる
+        return header[0], header[1], body
+
+    def _parse_commit(self, sha, body):
+        parents, when = [], 0
+        for line in body.split(b"\n"):
+            if not line:
+                break                                   # ヘッダの終わり
+            if line.startswith(b"parent "):
+                parents.append(line[7:].decode("ascii"))
+            elif line.startswith(b"committer "):
+                try:
+                    when = int(line.rsplit(b" ", 2)[1])
+                except (IndexError, ValueError):
+                    when = 0
+        self._commits[sha] = (parents, when)
+        return self._commits[sha]
+
+    def _commit(self, sha):
+        """(親の一覧, 日時) を返す。コミットでなければ None。"""
+        cached = self._commits.get(sha)
+        if cached is not None:
+            return cached
+        sha, kind, body = self._read(sha)
+        return self._parse_commit(sha, body) if kind == "commit" else None
+
+    def _peel(self, name):
+        """タグをコミットまで剥がす（git merge-base と同じく、タグ同士も比べられるように）。"""
+        for _ in range(16):
+            if name in self._commits:
+                return name
+            sha, kind, body = self._read(name)
+            if kind == "commit":
+                self._parse_commit(sha, body)
+                return sha
+            if kind != "tag" or not body.startswith(b"object "):
+                return None
+            name = body.split(b"\n", 1)[0][7:].decode("ascii")
+        return None
+
+    def merge_base(self, a, b):
+        """a と b の merge-base を 1 つ返す。共通祖先が無い・コミットでなければ None。
+
+        一方が他方の祖先ならその SHA を返す（ff 判定が見るのはここだけ）。どちらも祖先でない
+        ときは最良の共通祖先のうち 1 つを返す。交差マージで候補が複数あるときに
+        `git merge-base` と別のものを選ぶことはあるが、どちらも「a でも b でもない」ので
+        判定は変わらない。
+        """
+        with self._lock:
+            a, b = self._peel(a), self._peel(b)
+            if a is None or b is None:
+                return None
+            if a == b:
+                return a
+            return self._paint_down(a, b)
+
+    def _paint_down(self, a, b):
+        """git の paint_down_to_common と同じ走査。両側から届いたコミットが共通祖先の候補。"""
+        flags = {a: self._P1, b: self._P2}
+        queue, results = [], []
+        for sha in (a, b):
+            commit = self._commit(sha)
+            if commit is None:
+                return None
+            heapq.heappush(queue, (-commit[1], sha))
+        while any(not flags[sha] & self._STALE for _, sha in queue):
+            _, sha = heapq.heappop(queue)
+            mark = flags[sha] & (self._P1 | self._P2 | self._STALE)
+            if mark == self._P1 | self._P2:
+                if not flags[sha] & self._RESULT:
+                    flags[sha] |= self._RESULT
+                    results.append(sha)
+                mark |= self._STALE         # 候補より先の祖先は、もう答えにならない
+            for parent in self._commit(sha)[0]:
+                if flags.get(parent, 0) & mark == mark:
+                    continue
+                parent_commit = self._commit(parent)
+                if parent_commit is None:
+                    continue                # shallow / 欠けたオブジェクト — その先は辿らない
+                flags[parent] = flags.get(parent, 0) | mark
+                heapq.heappush(queue, (-parent_commit[1], parent))
+        for sha in (a, b):
+            if sha in results:
+                return sha
+        return results[0] if results else None
+
+
 class Store:
     """1 グループぶんの共有ストア。"""
 
@@ -98,6 +297,19 @@ class Store:
         self.path = path
         self.log = log
         self.timeout = timeout
+        self._objects = None
+
+    @property
+    def objects(self):
+        if self._objects is None:
+            self._objects = ObjectQuery(self.path)
+        return self._objects
+
+    def close(self):
+        """常駐させた問い合わせ用の git を止める。"""
+        if self._objects is not None:
+            self._objects.close()
+            self._objects = None
 
     def _git(self, args, check=True):
         self.log.debug("git %s" % " ".join(args))
@@ -121,20 +333,36 @@ class Store:
         """そのオブジェクトが既にストアにあるか（あれば fetch しない）。"""
         if not sha:
             return False
-        rc, _, _ = self._git(["cat-file", "-e", "%s^{object}" % sha], check=False)
-        return rc == 0
+        return sha in self.objects.exists([sha])
+
+    def has_objects(self, shas):
+        """has_object の一括版。手元に在るものの集合を 1 往復ぶんの書き込みで返す。"""
+        return self.objects.exists(shas)
 
-    def fetch(self, url, slug, refs):
-        """指定 ref だけを 1 コマンドでまとめて取得する（全 ref 総なめはしない）。"""
+    def fetch(self, url, slug, refs, concurrent=False):
+        """指定 ref だけを 1 コマンドでまとめて取得する（全 ref 総なめはしない）。
+
+        concurrent: 同じストアへ別のリモートからの fetch が同時に走っている。書き込む ref は
+        slug ごとに名前空間が分かれているので衝突しないが、共有の FETCH_HEAD と fetch 後の
+        自動 gc だけは取り合いになるので止める（gc は呼び出し側が全部終わってから gc_auto で
+        1 回だけ走らせる）。-c で渡すのは、古い git でも未知の設定として無視されるため。
+        """
         refs = list(refs)
         if not refs:
             return
         refspecs = ["+%s:%s" % (r, sync_ref(slug, r)) for r in refs]
-        self._git(["fetch", "--no-tags", "-q", url] + refspecs)
+        options = []
+        if concurrent:
+            options = ["-c", "fetch.writeFetchHEAD=false", "-c", "gc.auto=0",
+                       "-c", "maintenance.auto=false"]
+        self._git(options + ["fetch", "--no-tags", "-q", url] + refspecs)
+
+    def gc_auto(self):
+        """閾値を超えていれば gc する（fetch が毎回やっている判定を、並列 fetch の後で 1 回だけ）。"""
+        self._git(["gc", "--auto", "--quiet"], check=False)
 
     def merge_base(self, a_sha, b_sha):
-        rc, out, _ = self._git(["merge-base", a_sha, b_sha], check=False)
-        return out.strip() if rc == 0 else None
+        return self.objects.merge_base(a_sha, b_sha)
 
     def push(self, url, refspecs, dry_run=False):
         """まとめて push し、refspec ごとの成否を返す。
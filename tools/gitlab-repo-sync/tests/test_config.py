@@ -196,6 +196,20 @@ class TestBuildConfig(unittest.TestCase):
         with self.assertRaises(cfgmod.ConfigError):
             cfgmod.build_config(self.base(pairs=[]))
 
+    def test_parallelism_settings(self):
+        cfg = cfgmod.build_config(self.base())
+        self.assertEqual((cfg.jobs, cfg.per_host_jobs, cfg.host_jobs), (4, 4, {}))
+        cfg = cfgmod.build_config(self.base(jobs=2, per_host_jobs=3,
+                                            host_jobs={"*.example.com": 1}))
+        self.assertEqual((cfg.jobs, cfg.per_host_jobs, cfg.host_jobs),
+                         (2, 3, {"*.example.com": 1}))
+
+    def test_non_positive_parallelism_is_rejected(self):
+        for bad in ({"jobs": 0}, {"per_host_jobs": "x"}, {"host_jobs": {"h": 0}},
+                    {"host_jobs": ["h"]}):
+            with self.assertRaises(cfgmod.ConfigError, msg=bad):
+                cfgmod.build_config(self.base(**bad))
+
 
 class TestGrouping(unittest.TestCase):
     """clone を重複させないためのグループ分け。"""
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""スナップショットの追記式ストアとダイジェストの単体テスト。"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gitlab_repo_sync import snapshots  # noqa: E402
+from gitlab_repo_sync.snapshots import SnapshotStore, ref_digest  # noqa: E402
+
+
+def refs(n, sha="1" * 40, prefix="refs/heads/b"):
+    return {"%s%04d" % (prefix, i): sha for i in range(n)}
+
+
+class TestDigest(unittest.TestCase):
+    def test_order_does_not_matter(self):
+        a = {"refs/heads/main": "a" * 40, "refs/tags/v1": "b" * 40}
+        self.assertEqual(ref_digest(a), ref_digest(dict(reversed(list(a.items())))))
+
+    def test_any_difference_changes_the_digest(self):
+        base = {"refs/heads/main": "a" * 40}
+        self.assertNotEqual(ref_digest(base), ref_digest({"refs/heads/main": "b" * 40}))
+        self.assertNotEqual(ref_digest(base), ref_digest(dict(base, **{"refs/tags/v": "a" * 40})))
+        self.assertNotEqual(ref_digest({}), ref_digest(base))
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="grs-snap-")
+        self.store = SnapshotStore(self.tmp)
+        self.base_path, self.log_path = self.store._paths("app")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_save_appends_only_the_difference(self):
+        first = {"a": refs(50), "b": refs(50)}
+        self.store.compact("app", first)
+        second = {"a": dict(first["a"], **{"refs/heads/new": "2" * 40}), "b": dict(first["b"])}
+        del second["b"]["refs/heads/b0001"]
+
+        self.store.save("app", second, previous=first)
+
+        self.assertEqual(self.store.load("app"), second)
+        with open(self.log_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertLess(len(lines[0]), 200, "ベースは書き直さず、差分だけを 1 行で足す")
+
+    def test_unchanged_snapshot_writes_nothing(self):
+        first = {"a": refs(3), "b": refs(3)}
+        self.store.compact("app", first)
+        self.store.save("app", {"a": dict(first["a"]), "b": dict(first["b"])})
+        self.assertFalse(os.path.exists(self.log_path))
+
+    def test_journal_is_folded_into_the_base_when_it_grows(self):
+        current = {"a": refs(300), "b": {}}
+        self.store.save("app", current, previous={})
+        self.assertFalse(os.path.exists(self.log_path), "初回の大きな差分はそのままベースに")
+        for round_ in range(3):
+            nxt = {"a": refs(300, sha=str(round_ + 2) * 40), "b": {}}
+            self.store.save("app", nxt, previous=current)
+            current = nxt
+        self.assertEqual(self.store.load("app"), current)
+        self.assertFalse(os.path.exists(self.log_path))
+
+    def test_torn_last_line_is_skipped_and_not_glued_to_the_next(self):
+        first = {"a": {"refs/heads/main": "1" * 40}, "b": {}}
+        self.store.save("app", first, previous={})
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.write('{"a": {"set": {"refs/heads/x"')           # 追記の途中で落ちた
+        self.assertEqual(self.store.load("app"), first)
+
+        second = {"a": dict(first["a"], **{"refs/heads/y": "2" * 40}), "b": {}}
+        self.store.save("app", second, previous=first)
+        self.assertEqual(self.store.load("app"), second)
+
+    def test_compaction_threshold_is_relative_to_the_snapshot(self):
+        self.assertGreater(snapshots.COMPACT_MIN_ENTRIES, 0)
+        big = {"a": refs(5000), "b": {}}
+        self.store.compact("app", big)
+        moved = {"a": dict(big["a"], **refs(300, sha="9" * 40)), "b": {}}
+        self.store.save("app", moved, previous=big)
+        self.assertTrue(os.path.exists(self.log_path), "大きなスナップショットの一部だけなら追記")
+
+
+if __name__ == "__main__":
+    unittest.main()
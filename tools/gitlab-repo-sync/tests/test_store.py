@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""常駐させた cat-file（ObjectQuery）の契約テストとベンチ。
+
+有無の確認と merge-base が、ref ごとに git を起動していたときと同じ答えを返すこと。
+最後の 1 本は ref 5k 本の合成リポジトリで resolve_pair まで通すベンチで、所要時間を出力する
+（合否は計画の一致だけを見る。起動し直す方式は時間がかかるので抜き取りで比べる）。
+"""
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gitlab_repo_sync import planner, runner  # noqa: E402
+from gitlab_repo_sync.config import Pair, Rule  # noqa: E402
+from gitlab_repo_sync.store import ObjectQuery, Store, run_git  # noqa: E402
+from gitlab_repo_sync.util import Logger  # noqa: E402
+
+from test_sync import GIT_ENV  # noqa: E402
+
+
+def fast_import(path, commands):
+    """fast-import の入力を流し込んで、{ref: sha} を返す。"""
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=path, env=GIT_ENV, check=True,
+                   input="".join(commands).encode("utf-8"))
+    out = subprocess.run(["git", "for-each-ref", "--format=%(refname) %(objectname)"],
+                         cwd=path, env=GIT_ENV, check=True, stdout=subprocess.PIPE, text=True)
+    return dict(line.split() for line in out.stdout.splitlines())
+
+
+class _Commits:
+    """fast-import のコマンド列を組み立てる小さな手助け。"""
+
+    def __init__(self):
+        self.commands = []
+        self.mark = 0
+        self.clock = 1700000000
+
+    def commit(self, ref, parents=(), message="c"):
+        self.mark += 1
+        self.clock += 1
+        data = "%s %d\n" % (message, self.mark)
+        lines = ["commit %s\n" % ref, "mark :%d\n" % self.mark,
+                 "committer t <t@example.com> %d +0000\n" % self.clock,
+                 "data %d\n%s" % (len(data.encode("utf-8")), data)]
+        if parents:
+            lines.append("from :%d\n" % parents[0])
+            lines += ["merge :%d\n" % p for p in parents[1:]]
+        lines.append("M 644 inline f\ndata %d\n%s\n" % (len(data.encode("utf-8")), data))
+        self.commands += lines
+        return self.mark
+
+    def tag(self, name, mark):
+        self.commands.append("tag %s\nfrom :%d\ntagger t <t@example.com> %d +0000\ndata 1\nt\n"
+                             % (name, mark, self.clock))
+
+
+class OneShotStore:
+    """置き換え前の問い合わせ方（1 回ごとに git を起動する）。比較専用。"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def has_objects(self, shas):
+        return {sha for sha in set(shas) if sha and run_git(
+            ["cat-file", "-e", "%s^{object}" % sha], cwd=self.path, check=False)[0] == 0}
+
+    def merge_base(self, a, b):
+        rc, out, _ = run_git(["merge-base", a, b], cwd=self.path, check=False)
+        return out.strip() if rc == 0 else None
+
+
+class ObjectQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="grs-oq-")
+        self.repo = os.path.join(self.tmp, "store.git")
+        run_git(["init", "--bare", "-q", self.repo])
+        self.query = ObjectQuery(self.repo)
+
+    def tearDown(self):
+        self.query.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_merge_base_matches_git_on_a_random_history(self):
+        rng = random.Random(41)
+        c = _Commits()
+        marks = [c.commit("refs/heads/trunk")]
+        for i in range(300):
+            parents = [rng.choice(marks[-30:])]
+            if rng.random() < 0.2:
+                parents.append(rng.choice(marks))
+            marks.append(c.commit("refs/heads/n%03d" % i, parents))
+        c.commit("refs/heads/orphan")
+        c.tag("v-old", marks[3])
+        refs = fast_import(self.repo, c.commands)
+        shas = sorted(set(refs.values()))
+        oneshot = OneShotStore(self.repo)
+        for _ in range(400):
+            a, b = rng.choice(shas), rng.choice(shas)
+            expected = oneshot.merge_base(a, b)
+            got = self.query.merge_base(a, b)
+            # 交差マージで候補が複数あるときは別の候補を選んでよい。判定に効く所だけ比べる。
+            self.assertEqual((got == a, got == b, got is None),
+                             (expected == a, expected == b, expected is None), (a, b))
+        self.assertIsNone(self.query.merge_base(refs["refs/heads/orphan"],
+                                                refs["refs/heads/n299"]))
+        self.assertEqual(self.query.merge_base(refs["refs/tags/v-old"], refs["refs/heads/n000"]),
+                         oneshot.merge_base(refs["refs/tags/v-old"], refs["refs/heads/n000"]))
+
+    def test_existence_is_answered_in_bulk_and_sees_later_fetches(self):
+        c = _Commits()
+        c.commit("refs/heads/main")
+        refs = fast_import(self.repo, c.commands)
+        main = refs["refs/heads/main"]
+        missing = "0123456789abcdef0123456789abcdef01234567"
+        self.assertEqual(self.query.exists([main, missing, main, None, ""]), {main})
+
+        # 走査用のプロセスが生きたまま、別の git がオブジェクトを足す
+        more = _Commits()
+        more.mark, more.clock = 10, c.clock
+        more.commands.append("commit refs/heads/next\nmark :11\n"
+                             "committer t <t@example.com> %d +0000\ndata 2\nn\nfrom %s\n"
+                             % (c.clock + 5, main))
+        later = fast_import(self.repo, more.commands)["refs/heads/next"]
+        self.assertEqual(self.query.exists([later]), {later})
+        self.assertEqual(self.query.merge_base(later, main), main)
+
+    def test_a_dead_helper_is_replaced(self):
+        c = _Commits()
+        c.commit("refs/heads/main")
+        main = fast_import(self.repo, c.commands)["refs/heads/main"]
+        self.assertEqual(self.query.exists([main]), {main})
+        dead = self.query._procs["--batch-check"]
+        dead.kill()
+        dead.wait()
+        self.assertEqual(self.query.exists([main]), {main})
+        self.assertIsNot(self.query._procs["--batch-check"], dead)
+
+
+class SyntheticBenchTest(unittest.TestCase):
+    """ref 5k 本の合成リポジトリで、fetch_needs と resolve_pair を両方式で比べる。"""
+
+    REFS = 5000
+    SAMPLE = 300
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp(prefix="grs-bench-")
+        self.repo = os.path.join(self.tmp, "store.git")
+        run_git(["init", "--bare", "-q", self.repo])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def build(self):
+        """ref ごとに「同じ / a が先行 / b が先行 / 分岐 / タグの付け替え」のどれかを作る。"""
+        rng = random.Random(5000)
+        c = _Commits()
+        trunk = [c.commit("refs/heads/trunk")]
+        for _ in range(200):
+            trunk.append(c.commit("refs/heads/trunk", [trunk[-1]]))
+        marks = []
+        for i in range(self.REFS):
+            x = c.commit("refs/heads/x/%d" % i, [rng.choice(trunk)])
+            y = c.commit("refs/heads/y/%d" % i, [x])
+            z = c.commit("refs/heads/z/%d" % i, [x])
+            marks.append((x, y, z))
+        shas = fast_import(self.repo, c.commands)
+        a_refs, b_refs = {}, {}
+        for i in range(self.REFS):
+            x, y, z = (shas["refs/heads/%s/%d" % (k, i)] for k in "xyz")
+            kind = i % 5
+            ref = "refs/%s/r%04d" % ("tags" if kind == 4 else "heads", i)
+            a_refs[ref], b_refs[ref] = [(x, x), (y, x), (x, y), (y, z), (y, z)][kind]
+        # 片側にしか無い ref と、まだストアに無いオブジェクトも混ぜる
+        a_refs["refs/heads/only-a"] = shas["refs/heads/trunk"]
+        b_refs["refs/heads/unfetched"] = "f" * 40
+        return a_refs, b_refs
+
+    def plans(self, store, pair, raw, a_refs, b_refs):
+        needs = runner.fetch_needs(pair, raw, a_refs, b_refs, "a", "b", store)
+        plans = runner.resolve_pair(pair, [(r, k) for r, k in raw if r != "refs/heads/unfetched"],
+                                    a_refs, b_refs, store)
+        return needs, [(p.ref, p.action) for p in plans]
+
+    def test_bench_5k_refs(self):
+        a_refs, b_refs = self.build()
+        pair = Pair(name="bench", a_url="a", b_url="b",
+                    rule=Rule(include=["refs/heads/*", "refs/tags/*"], exclude=[]))
+        raw = runner.classify_pair(pair, a_refs, b_refs, {}, {})
+
+        store = Store(self.repo, Logger("", quiet=True))
+        try:
+            started = time.perf_counter()
+            needs, plans = self.plans(store, pair, raw, a_refs, b_refs)
+            batched_sec = time.perf_counter() - started
+        finally:
+            store.close()
+
+        self.assertEqual(needs, {"a": set(), "b": {"refs/heads/unfetched"}})
+        actions = dict(plans)
+        self.assertEqual(actions["refs/heads/r0000"], planner.NOOP)
+        self.assertEqual(actions["refs/heads/r0001"], planner.PUSH_TO_B)
+        self.assertEqual(actions["refs/heads/r0002"], planner.PUSH_TO_A)
+        self.assertEqual(actions["refs/heads/r0003"], planner.DIVERGED)
+        self.assertEqual(actions["refs/tags/r0004"], planner.DIVERGED)
+
+        sample = sorted(random.Random(1).sample(sorted(a_refs), self.SAMPLE))
+        sample_raw = [(r, k) for r, k in raw if r in sample]
+        oneshot = OneShotStore(self.repo)
+        started = time.perf_counter()
+        expected = self.plans(oneshot, pair, sample_raw, a_refs, b_refs)
+        oneshot_sec = time.perf_counter() - started
+
+        fresh = Store(self.repo, Logger("", quiet=True))
+        try:
+            self.assertEqual(self.plans(fresh, pair, sample_raw, a_refs, b_refs), expected)
+        finally:
+            fresh.close()
+        self.assertEqual([p for p in plans if p[0] in sample], expected[1])
+        with_all = oneshot_sec * len(raw) / max(1, len(sample_raw))
+        print("\n  [store] %d refs  persistent %.2fs  one-shot ~%.1fs (%d-ref sample %.2fs)"
+              % (len(raw), batched_sec, with_all, len(sample_raw), oneshot_sec),
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
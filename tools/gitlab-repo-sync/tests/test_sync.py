@@ -9,6 +9,7 @@ fetch / push まで通す（ネットワークは不要）。検証したいの
   - 分岐・タグ付け替え・戦略外の ref では**どちらのリモートも動かない**こと
   - 同じリポジトリが複数のペアに出てきても clone（共有ストア）が 1 つで済むこと
   - 複数ペアが同じ ref を別内容で書こうとしたら、両方止まること
+  - グループとリモートを並列に進めても、直列と同じ結果になること
 """
 import os
 import shutil
@@ -21,6 +22,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from gitlab_repo_sync import planner, runner  # noqa: E402
 from gitlab_repo_sync.config import build_config, repo_slug  # noqa: E402
+from gitlab_repo_sync.executor import LOCAL_HOST, HostLimiter, host_of  # noqa: E402
 from gitlab_repo_sync.util import Lock, Logger  # noqa: E402
 
 GIT_ENV = dict(os.environ, **{
@@ -424,6 +426,223 @@ class LockTest(SyncTestCase):
         self.assertTrue(Lock(path, timeout_minutes=1, log=self.log).acquire())
 
 
+class ParallelTest(SyncTestCase):
+    """独立したグループを並列に進め、ホストごとの上限とタイミングをレポートに残す。"""
+
+    remotes = ("a", "b", "c", "d", "e", "f")
+
+    def pair_specs(self):
+        # 3 組とも別々のリポジトリ同士なので、グループ（共有ストア）も 3 つになる
+        return [{"name": "ab", "a": self.remote["a"], "b": self.remote["b"]},
+                {"name": "cd", "a": self.remote["c"], "b": self.remote["d"]},
+                {"name": "ef", "a": self.remote["e"], "b": self.remote["f"]}]
+
+    def seed(self):
+        self.push("c")
+        self.push("e")
+        self.commit("ahead-on-f")
+        self.push("f", "main:refs/heads/release/1")
+
+    def run_with(self, **overrides):
+        self.cfg = self.make_config(**overrides)
+        code, reports = self.run_sync()
+        report = runner.read_json(os.path.join(self.cfg.state_dir, "last-report.json"))
+        return code, reports, report
+
+    def test_groups_sync_in_parallel_and_report_timings(self):
+        self.seed()
+        code, reports, report = self.run_with(jobs=3, per_host_jobs=2)
+
+        self.assertEqual(code, 0)
+        for a, b in (("a", "b"), ("c", "d"), ("e", "f")):
+            self.assertEqual(self.head(b), self.head(a))
+        self.assertEqual(self.head("e", "refs/heads/release/1"),
+                         self.head("f", "refs/heads/release/1"))
+        self.assertEqual(len(os.listdir(self.cfg.store_dir)), 3)
+
+        self.assertEqual([g["pairs"] for g in report["groups"]],
+                         [[r["pair"]] for r in reports], "レポートはグループの順に並ぶ")
+        for group in report["groups"]:
+            self.assertTrue({"ls_remote", "classify", "fetch", "resolve", "push", "record"}
+                            <= set(group["timings"]), group)
+        concurrency = report["concurrency"]
+        self.assertEqual((concurrency["jobs"], concurrency["per_host_jobs"]), (3, 2))
+        self.assertLessEqual(concurrency["peak"][LOCAL_HOST], 2)
+
+    def test_parallel_run_matches_serial_run(self):
+        self.seed()
+        serial = self.run_with(jobs=1, per_host_jobs=1)
+        self.assertEqual(serial[2]["concurrency"]["peak"], {LOCAL_HOST: 1})
+
+        self.tearDown()
+        self.setUp()
+        self.seed()
+        parallel = self.run_with(jobs=4, per_host_jobs=8)
+
+        self.assertEqual(parallel[:2], serial[:2])
+
+    def test_unchanged_groups_only_spend_time_listing_refs(self):
+        self.seed()
+        self.run_with()
+        _, reports, report = self.run_with()
+        self.assertEqual({r["status"] for r in reports}, {"unchanged"})
+        self.assertEqual({tuple(sorted(g["timings"])) for g in report["groups"]},
+                         {("classify", "ls_remote")})
+
+    def test_failure_in_one_group_does_not_stop_the_others(self):
+        self.seed()
+        shutil.rmtree(self.remote["d"])
+        code, reports, _ = self.run_with(jobs=3)
+        self.assertEqual(code, 1)
+        self.assertEqual({r["pair"]: r["status"] for r in reports},
+                         {"ab": "ok", "cd": "failed", "ef": "ok"})
+
+    def test_host_limits(self):
+        limiter = HostLimiter(3, {"*.example.com": 1})
+        self.assertEqual(limiter.limit_for("gitlab.example.com"), 1)
+        self.assertEqual(limiter.limit_for("gitlab.local"), 3)
+        self.assertEqual(host_of("https://oauth2:t@GitLab.Example.com:8443/g/p.git"),
+                         "gitlab.example.com")
+        self.assertEqual(host_of(self.remote["a"]), LOCAL_HOST)
+
+
+class SnapshotDigestTest(SyncTestCase):
+    """変化なしはダイジェスト 1 回の比較で決め、スナップショット本体は差分だけを追記する。"""
+
+    def count_calls(self, owner, name):
+        calls = []
+        real = getattr(owner, name)
+
+        def counting(*args, **kwargs):
+            calls.append(args)
+            return real(*args, **kwargs)
+
+        setattr(owner, name, counting)
+        self.addCleanup(setattr, owner, name, real)
+        return calls
+
+    def test_unchanged_pair_reads_neither_snapshot_nor_refs(self):
+        self.run_sync()
+        loads = self.count_calls(runner.SnapshotStore, "load")
+        classified = self.count_calls(planner, "classify_ref")
+        code, reports = self.run_sync()
+        self.assertEqual((code, self.report_for(reports, "app")["status"]), (0, "unchanged"))
+        self.assertEqual((loads, classified), ([], []))
+
+    def test_state_file_holds_digests_and_the_snapshot_is_journaled(self):
+        self.run_sync()
+        state = runner.read_json(runner.pair_state_path(self.cfg, "app"))
+        self.assertNotIn("snapshot", state)
+        self.assertEqual(set(state["digest"]), {planner.SIDE_A, planner.SIDE_B})
+
+        self.commit("second")
+        self.push("b")
+        self.run_sync()
+        self.assertEqual(self.head("a"), self.head("b"))
+        _, journal = runner.SnapshotStore(self.cfg.state_dir)._paths("app")
+        with open(journal, encoding="utf-8") as f:
+            self.assertEqual(len(f.read().splitlines()), 1, "2 回目は差分 1 行の追記だけ")
+        prev_a, prev_b = runner.load_snapshot(self.cfg, self.cfg.pair("app"))
+        self.assertEqual(prev_a, {"refs/heads/main": self.head("a")})
+        self.assertEqual(prev_b, prev_a)
+
+    def test_snapshot_that_disagrees_with_the_digest_is_not_trusted(self):
+        self.run_sync()
+        snapshots = runner.SnapshotStore(self.cfg.state_dir)
+        snapshots.compact("app", {planner.SIDE_A: {}, planner.SIDE_B: {}})
+        self.assertEqual(runner.load_snapshot(self.cfg, self.cfg.pair("app")), ({}, {}))
+        self.commit("second")
+        self.push("a")
+        self.run_sync()                         # 食い違いはベースの書き直しで回復する
+        self.assertEqual(self.head("b"), self.head("a"))
+        self.assertEqual(runner.load_snapshot(self.cfg, self.cfg.pair("app"))[1],
+                         {"refs/heads/main": self.head("a")})
+
+    def test_old_state_format_is_read_and_migrated(self):
+        self.run_sync()
+        path = runner.pair_state_path(self.cfg, "app")
+        state = runner.read_json(path)
+        snapshot = {planner.SIDE_A: {"refs/heads/main": self.head("a")},
+                    planner.SIDE_B: {"refs/heads/main": self.head("b")}}
+        del state["digest"]
+        state["snapshot"] = snapshot
+        runner.write_json(path, state)
+        shutil.rmtree(os.path.join(self.cfg.state_dir, "snapshots"))
+
+        _, reports = self.run_sync()
+        self.assertEqual(self.report_for(reports, "app")["status"], "unchanged")
+        self.commit("second")
+        self.push("a")
+        self.run_sync()
+        state = runner.read_json(path)
+        self.assertNotIn("snapshot", state)
+        self.assertEqual(runner.load_snapshot(self.cfg, self.cfg.pair("app"))[0],
+                         {"refs/heads/main": self.head("a")})
+
+
+class ChangedOnlyTest(SyncTestCase):
+    """--changed-only は変化したペアだけを処理し、計画は通常の実行と同じになる。"""
+
+    remotes = ("a", "b", "c", "d")
+
+    def pair_specs(self):
+        return [{"name": "ab", "a": self.remote["a"], "b": self.remote["b"]},
+                {"name": "cd", "a": self.remote["c"], "b": self.remote["d"]}]
+
+    def record_plans(self):
+        plans = []
+        real = runner.resolve_pair
+
+        def recording(pair, *args):
+            result = real(pair, *args)
+            plans.append((pair.name, [(p.ref, p.action, p.a_sha, p.b_sha) for p in result]))
+            return result
+
+        runner.resolve_pair = recording
+        self.addCleanup(setattr, runner, "resolve_pair", real)
+        return plans
+
+    def setUp(self):
+        super().setUp()
+        self.push("c")
+        self.run_sync()
+        self.commit("moved-on-d")
+        self.push("d")
+        self.push("d", "main:refs/heads/release/2")
+
+    def test_changed_only_plans_match_a_full_run(self):
+        plans = self.record_plans()
+        runner.run(self.cfg, self.log, dry_run=True)
+        full = list(plans)
+        del plans[:]
+        runner.run(self.cfg, self.log, dry_run=True, changed_only=True)
+
+        self.assertEqual(plans, full)
+        self.assertEqual([name for name, _ in full], ["cd"])
+        self.assertIn(("refs/heads/release/2", planner.CREATE_ON_A),
+                      [(ref, action) for ref, action, _, _ in full[0][1]])
+
+    def test_changed_only_reports_only_changed_pairs_but_keeps_the_rest(self):
+        code = runner.run(self.cfg, self.log, changed_only=True)
+        self.assertEqual(code, 0)
+        self.assertEqual(self.head("c"), self.head("d"))
+        report = runner.read_json(os.path.join(self.cfg.state_dir, "last-report.json"))
+        self.assertEqual([(r["pair"], r["status"]) for r in report["pairs"]],
+                         [("ab", "ok"), ("cd", "ok")], "ab は前回のレポートの行が残る")
+        self.assertEqual(self.report_for(report["pairs"], "cd")["changed"], 2)
+
+    def test_nothing_changed_leaves_the_report_alone(self):
+        runner.run(self.cfg, self.log, changed_only=True)
+        path = os.path.join(self.cfg.state_dir, "last-report.json")
+        with open(path, encoding="utf-8") as f:
+            before = f.read()
+        plans = self.record_plans()
+        self.assertEqual(runner.run(self.cfg, self.log, changed_only=True), 0)
+        with open(path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), before)
+        self.assertEqual(plans, [])
+
+
 class CliTest(SyncTestCase):
     def test_status_and_list_render(self):
         self.run_sync()
@@ -11,6 +11,12 @@ issue-mailbox.py — GitLab リポジトリのイシューを定期ポーリン
 動作環境: WSL (Ubuntu) / Linux
 終了方法: Ctrl+C または SIGTERM
 
+ポーリング:
+  全リポジトリを 1 本のスケジューラで回す（間隔に ±jitter の揺らぎ）。ふだんは前回見た
+  updated_at 以降に更新されたイシューだけを取り、full_sync_minutes ごとに全件で突き合わせる。
+  状態ファイルは変化があったときだけ書き直す。webhook を設定すると GitLab の Webhook を
+  受けたプロジェクトをその場でポーリングする。
+
 使い方:
   python issue-mailbox.py                           # 設定ファイルを自動検出して起動
   python issue-mailbox.py --config ~/issue-mailbox.yaml
@@ -25,9 +31,12 @@ issue-mailbox.py — GitLab リポジトリのイシューを定期ポーリン
 
 import argparse
 import datetime
+import heapq
+import hmac
 import json
 import logging
 import os
+import random
 import re
 import shutil
 import signal
@@ -35,6 +44,9 @@ import subprocess
 import sys
 import threading
 import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 from typing import Any, Optional
 
@@ -113,12 +125,30 @@ def load_config(path: Optional[Path]) -> dict:
 
 # ── GitLab API クライアント ──────────────────────────────────────────────────
 
+_sessions = threading.local()
+
+
+def _session_for(gitlab_url: str, private_token: str) -> "requests.Session":
+    """同じ (GitLab, トークン) のリポジトリは HTTP セッション（keep-alive 接続）を共有する。
+
+    requests.Session はスレッド間で共有しない前提なので、ポーリングのワーカースレッドごとに持つ。
+    """
+    cache = getattr(_sessions, "by_key", None)
+    if cache is None:
+        cache = _sessions.by_key = {}
+    key = (gitlab_url.rstrip("/"), private_token)
+    session = cache.get(key)
+    if session is None:
+        session = cache[key] = requests.Session()
+        session.headers["PRIVATE-TOKEN"] = private_token
+    return session
+
+
 class GitLabClient:
     def __init__(self, gitlab_url: str, project_id: int, private_token: str) -> None:
         self.base = gitlab_url.rstrip("/")
         self.project_id = project_id
-        self._session = requests.Session()
-        self._session.headers["PRIVATE-TOKEN"] = private_token
+        self._token = private_token
 
     def get_issues(
         self,
@@ -126,7 +156,13 @@ class GitLabClient:
         labels: Optional[list] = None,
         assignee_username: Optional[str] = None,
         per_page: int = 100,
+        updated_after: Optional[str] = None,
     ) -> list[dict]:
+        """イシュー一覧を全ページ取得する。updated_after を渡すとその時刻以降に更新されたものだけ。
+
+        途中のページで失敗したら requests.RequestException をそのまま上げる。欠けた一覧を
+        「消えたイシュー」や「ここまで見た」と取り違えないよう、部分的な結果は返さない。
+        """
         url = f"{self.base}/api/v4/projects/{self.project_id}/issues"
         params: dict[str, Any] = {
             "state": state,
@@ -138,17 +174,16 @@ class GitLabClient:
             params["labels"] = ",".join(labels)
         if assignee_username:
             params["assignee_username"] = assignee_username
+        if updated_after:
+            params["updated_after"] = updated_after
 
+        session = _session_for(self.base, self._token)
         issues: list[dict] = []
         page = 1
         while True:
             params["page"] = page
-            try:
-                r = self._session.get(url, params=params, timeout=30)
-                r.raise_for_status()
-            except requests.RequestException as e:
-                log.error("GitLab API エラー (project=%s): %s", self.project_id, e)
-                return issues
+            r = session.get(url, params=params, timeout=30)
+            r.raise_for_status()
 
             batch: list[dict] = r.json()
             if not batch:
@@ -180,9 +215,18 @@ def _load_state(state_dir: Path, repo_name: str) -> dict:
 
 
 def _save_state(state_dir: Path, repo_name: str, state: dict) -> None:
-    _state_path(state_dir, repo_name).write_text(
-        json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    p = _state_path(state_dir, repo_name)
+    tmp = p.with_name(p.name + ".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, p)   # status が書きかけを読まないよう置き換えで更新する
+
+
+def _touch_state(state_dir: Path, repo_name: str) -> None:
+    """変化なしのポーリングは中身を書き直さず、更新時刻だけ進める（status の最終ポーリング表示用）。"""
+    try:
+        os.utime(_state_path(state_dir, repo_name))
+    except OSError:
+        pass
 
 
 def _to_snapshot(issue: dict) -> dict:
@@ -199,18 +243,75 @@ def _to_snapshot(issue: dict) -> dict:
     }
 
 
+def _high_water(snapshots: Any, current: str = "") -> str:
+    """見たイシューの updated_at の最大値。GitLab は同じ書式・UTC で返すので文字列で比べられる。"""
+    return max([current] + [s.get("updated_at") or "" for s in snapshots])
+
+
+def _matches_filter(issue: dict, filter_state: str, labels: list, assignee: Optional[str]) -> bool:
+    """一覧 API のフィルタ（state / labels=AND / assignee_username）を手元で再現する。"""
+    if filter_state != "all" and issue.get("state") != filter_state:
+        return False
+    if labels and not set(labels) <= set(issue.get("labels") or []):
+        return False
+    if assignee:
+        names = {a.get("username") for a in issue.get("assignees") or [] if a}
+        names.add((issue.get("assignee") or {}).get("username"))
+        if assignee not in names:
+            return False
+    return True
+
+
 # ── 変更検出 ────────────────────────────────────────────────────────────────
 
+def _issue_notifications(old: Optional[dict], snap: dict, watch: dict) -> list[str]:
+    """1 イシューの前回スナップショットと今回を比べた通知（old=None は新規）。"""
+    if old is None:
+        if not watch.get("new_issues", True):
+            return []
+        labels_part = f" [{', '.join(snap['labels'])}]" if snap["labels"] else ""
+        assignee_part = f" @{snap['assignee']}" if snap["assignee"] else ""
+        return [f"[NEW] #{snap['iid']} {snap['title']}{labels_part}{assignee_part}"]
+
+    notifications: list[str] = []
+    if watch.get("state_changes", True) and old["state"] != snap["state"]:
+        notifications.append(
+            f"[UPD] #{snap['iid']} state:{old['state']}→{snap['state']}  {snap['title']}"
+        )
+
+    if watch.get("title_changes", False) and old["title"] != snap["title"]:
+        notifications.append(
+            f"[UPD] #{snap['iid']} title changed  {snap['title']}"
+        )
+
+    if watch.get("label_changes", False) and old["labels"] != snap["labels"]:
+        added = sorted(set(snap["labels"]) - set(old["labels"]))
+        removed = sorted(set(old["labels"]) - set(snap["labels"]))
+        parts = []
+        if added:
+            parts.append(f"+{','.join(added)}")
+        if removed:
+            parts.append(f"-{','.join(removed)}")
+        notifications.append(
+            f"[UPD] #{snap['iid']} labels:{' '.join(parts)}  {snap['title']}"
+        )
+
+    if watch.get("assignee_changes", True) and old["assignee"] != snap["assignee"]:
+        old_a = old["assignee"] or "(未割り当て)"
+        new_a = snap["assignee"] or "(未割り当て)"
+        notifications.append(
+            f"[UPD] #{snap['iid']} assignee:{old_a}→{new_a}  {snap['title']}"
+        )
+    return notifications
+
+
 def detect_changes(
-    repo_name: str,
-    state_dir: Path,
+    old_map: dict[str, dict],
     current_issues: list[dict],
     watch: dict,
     filter_state: str,
-) -> list[str]:
-    """前回との差分を検出して通知メッセージのリストを返す。"""
-    old_state = _load_state(state_dir, repo_name)
-    old_map: dict[str, dict] = old_state.get("issues", {})
+) -> tuple[dict[str, dict], list[str]]:
+    """全件の一覧と前回スナップショットを比べ、(新しいスナップショット, 通知) を返す。"""
     new_map: dict[str, dict] = {}
     notifications: list[str] = []
 
@@ -218,47 +319,7 @@ def detect_changes(
         snap = _to_snapshot(issue)
         iid_str = str(snap["iid"])
         new_map[iid_str] = snap
-
-        if iid_str not in old_map:
-            # 新規イシュー
-            if watch.get("new_issues", True):
-                labels_part = f" [{', '.join(snap['labels'])}]" if snap["labels"] else ""
-                assignee_part = f" @{snap['assignee']}" if snap["assignee"] else ""
-                notifications.append(
-                    f"[NEW] #{snap['iid']} {snap['title']}{labels_part}{assignee_part}"
-                )
-            continue
-
-        old = old_map[iid_str]
-
-        if watch.get("state_changes", True) and old["state"] != snap["state"]:
-            notifications.append(
-                f"[UPD] #{snap['iid']} state:{old['state']}→{snap['state']}  {snap['title']}"
-            )
-
-        if watch.get("title_changes", False) and old["title"] != snap["title"]:
-            notifications.append(
-                f"[UPD] #{snap['iid']} title changed  {snap['title']}"
-            )
-
-        if watch.get("label_changes", False) and old["labels"] != snap["labels"]:
-            added = sorted(set(snap["labels"]) - set(old["labels"]))
-            removed = sorted(set(old["labels"]) - set(snap["labels"]))
-            parts = []
-            if added:
-                parts.append(f"+{','.join(added)}")
-            if removed:
-                parts.append(f"-{','.join(removed)}")
-            notifications.append(
-                f"[UPD] #{snap['iid']} labels:{' '.join(parts)}  {snap['title']}"
-            )
-
-        if watch.get("assignee_changes", True) and old["assignee"] != snap["assignee"]:
-            old_a = old["assignee"] or "(未割り当て)"
-            new_a = snap["assignee"] or "(未割り当て)"
-            notifications.append(
-                f"[UPD] #{snap['iid']} assignee:{old_a}→{new_a}  {snap['title']}"
-            )
+        notifications += _issue_notifications(old_map.get(iid_str), snap, watch)
 
     # state="opened" フィルタ時にリストから消えたイシューはクローズされた
     if filter_state == "opened" and watch.get("state_changes", True):
@@ -268,13 +329,39 @@ def detect_changes(
                     f"[CLOSED] #{old['iid']} {old['title']}"
                 )
 
-    # 状態ファイルを更新
-    new_state = {
-        "issues": new_map,
-        "last_poll": datetime.datetime.now().isoformat(timespec="seconds"),
-    }
-    _save_state(state_dir, repo_name, new_state)
-    return notifications
+    return new_map, notifications
+
+
+def merge_updates(
+    old_map: dict[str, dict],
+    updated_issues: list[dict],
+    watch: dict,
+    filter_state: str,
+    labels: list,
+    assignee: Optional[str],
+) -> tuple[dict[str, dict], list[str]]:
+    """updated_after で取った「変わったイシューだけ」を前回スナップショットへ合流させる。
+
+    増分の問い合わせはフィルタを付けずに取り（state=all）、フィルタは手元で当てる。
+    こうするとクローズやラベル外しでフィルタから外れたイシューも見えるので、全件取得で
+    「一覧から消えた」と推測していた [CLOSED] を、実際にクローズされたものにだけ出せる。
+    フィルタから外れただけのイシューは通知せずスナップショットから外す。
+    """
+    new_map = dict(old_map)
+    notifications: list[str] = []
+    for issue in updated_issues:
+        snap = _to_snapshot(issue)
+        iid_str = str(snap["iid"])
+        old = old_map.get(iid_str)
+        if _matches_filter(issue, filter_state, labels, assignee):
+            new_map[iid_str] = snap
+            notifications += _issue_notifications(old, snap, watch)
+        elif old is not None:
+            del new_map[iid_str]
+            if filter_state == "opened" and snap["state"] != "opened" \
+                    and watch.get("state_changes", True):
+                notifications.append(f"[CLOSED] #{old['iid']} {old['title']}")
+    return new_map, notifications
 
 
 # ── 通知配信 ────────────────────────────────────────────────────────────────
@@ -306,60 +393,253 @@ def deliver(
             log.warning("tmux send-keys 失敗 (target=%s): %s", tmux_target, r.stderr.strip())
 
 
-# ── ポーリングスレッド ───────────────────────────────────────────────────────
+# ── ポーリング ──────────────────────────────────────────────────────────────
 
-def _poll_repo(
-    repo_cfg: dict,
-    state_dir: Path,
-    log_file: Path,
-    tmux_target: Optional[str],
-    send_enter: bool,
-    stop_event: threading.Event,
-    first_run_silent: bool,
-) -> None:
-    name = repo_cfg["name"]
-    client = GitLabClient(
-        gitlab_url=repo_cfg["gitlab_url"],
-        project_id=int(repo_cfg["project_id"]),
-        private_token=repo_cfg["private_token"],
-    )
-    filter_state: str = repo_cfg.get("state", "opened")
-    labels: list = repo_cfg.get("labels_filter") or []
-    assignee: Optional[str] = repo_cfg.get("assignee_username") or None
-    interval_sec: int = int(repo_cfg.get("poll_interval_minutes", 5)) * 60
-    watch: dict = repo_cfg.get("watch", {})
+_DEFAULT_FULL_SYNC_MINUTES = 60
+_MAX_BACKOFF_SEC = 30 * 60   # 失敗が続いたときに間隔を延ばす上限（間隔の方が長ければ間隔）
 
-    log.info("[%s] ポーリング開始 (interval=%d分)", name, interval_sec // 60)
-    is_first = True
 
-    while not stop_event.is_set():
-        try:
-            issues = client.get_issues(
-                state=filter_state,
-                labels=labels or None,
-                assignee_username=assignee,
-            )
-            if is_first and first_run_silent:
-                # 初回は状態を保存するだけで通知しない（既存イシューをノイズにしない）
-                snap_map = {str(_to_snapshot(i)["iid"]): _to_snapshot(i) for i in issues}
-                _save_state(state_dir, name, {
-                    "issues": snap_map,
-                    "last_poll": datetime.datetime.now().isoformat(timespec="seconds"),
-                })
-                log.info("[%s] 初回ポーリング完了: %d 件を記録", name, len(issues))
-            else:
-                changes = detect_changes(name, state_dir, issues, watch, filter_state)
-                if changes:
-                    log.info("[%s] %d 件の変化を検出", name, len(changes))
-                for msg in changes:
-                    deliver(f"[{name}] {msg}", log_file, tmux_target, send_enter)
-        except Exception as e:
-            log.error("[%s] ポーリングエラー: %s", name, e)
+class RepoPoller:
+    """1 リポジトリ分のポーリング状態（スナップショットと high-water mark）をメモリに持つ。
 
-        is_first = False
-        stop_event.wait(interval_sec)
+    通常は前回見た updated_at の最大値（high-water mark）以降に更新されたイシューだけを取り、
+    スナップショットへ合流させる。削除されたイシューは updated_after では見えないので、
+    full_sync_minutes ごとに従来どおりの全件取得で突き合わせ直す。状態ファイルは起動時に
+    1 回読み、スナップショットか high-water mark が変わったときだけ書き直す。
+    """
 
-    log.info("[%s] ポーリング終了", name)
+    def __init__(
+        self,
+        repo_cfg: dict,
+        state_dir: Path,
+        log_file: Path,
+        tmux_target: Optional[str],
+        send_enter: bool,
+        first_run_silent: bool,
+    ) -> None:
+        self.name: str = repo_cfg["name"]
+        self.gitlab_url: str = repo_cfg["gitlab_url"].rstrip("/")
+        self.project_id = int(repo_cfg["project_id"])
+        self.client = GitLabClient(
+            gitlab_url=self.gitlab_url,
+            project_id=self.project_id,
+            private_token=repo_cfg["private_token"],
+        )
+        self.filter_state: str = repo_cfg.get("state", "opened")
+        self.labels: list = repo_cfg.get("labels_filter") or []
+        self.assignee: Optional[str] = repo_cfg.get("assignee_username") or None
+        self.interval_sec: int = int(repo_cfg.get("poll_interval_minutes", 5)) * 60
+        self.full_sync_sec: float = float(
+            repo_cfg.get("full_sync_minutes", _DEFAULT_FULL_SYNC_MINUTES)) * 60
+        self.watch: dict = repo_cfg.get("watch", {})
+        self.state_dir = state_dir
+        self.log_file = log_file
+        self.tmux_target = tmux_target
+        self.send_enter = send_enter
+        self.first_run_silent = first_run_silent
+        self.state = _load_state(state_dir, self.name)
+        self._last_full_sync = 0.0
+        self._is_first = True
+
+    def _full_sync_due(self) -> bool:
+        return (not self.state.get("high_water")
+                or time.monotonic() - self._last_full_sync >= self.full_sync_sec)
+
+    def poll(self) -> None:
+        old_map: dict[str, dict] = self.state.get("issues", {})
+        high_water: str = self.state.get("high_water", "")
+        if self._is_first and self.first_run_silent:
+            issues = self.client.get_issues(
+                state=self.filter_state, labels=self.labels or None,
+                assignee_username=self.assignee,
+            )
+            # 初回は状態を保存するだけで通知しない（既存イシューをノイズにしない）
+            new_map = {str(_to_snapshot(i)["iid"]): _to_snapshot(i) for i in issues}
+            changes: list[str] = []
+            self._last_full_sync = time.monotonic()
+            mode = "初回"
+        elif self._full_sync_due():
+            issues = self.client.get_issues(
+                state=self.filter_state, labels=self.labels or None,
+                assignee_username=self.assignee,
+            )
+            new_map, changes = detect_changes(old_map, issues, self.watch, self.filter_state)
+            self._last_full_sync = time.monotonic()
+            mode = "全件"
+        else:
+            issues = self.client.get_issues(state="all", updated_after=high_water)
+            new_map, changes = merge_updates(
+                old_map, issues, self.watch, self.filter_state, self.labels, self.assignee)
+            mode = "増分"
+        # フィルタ外のイシューも updated_at は見ている。印を進めて次回の問い合わせを小さく保つ
+        new_high_water = _high_water(
+            [{"updated_at": i.get("updated_at")} for i in issues], high_water)
+        first = self._is_first
+        self._is_first = False
+
+        if new_map != old_map or new_high_water != high_water or first:
+            self.state = {
+                "issues": new_map,
+                "high_water": new_high_water,
+                "last_poll": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+            _save_state(self.state_dir, self.name, self.state)
+        else:
+            _touch_state(self.state_dir, self.name)
+
+        if first and self.first_run_silent:
+            log.info("[%s] 初回ポーリング完了: %d 件を記録", self.name, len(new_map))
+            return
+        log.debug("[%s] %sポーリング: %d 件取得", self.name, mode, len(issues))
+        if changes:
+            log.info("[%s] %d 件の変化を検出", self.name, len(changes))
+        for msg in changes:
+            deliver(f"[{self.name}] {msg}", self.log_file, self.tmux_target, self.send_enter)
+
+
+class PollScheduler:
+    """全リポジトリのポーリングを 1 本のスケジューラで回す。
+
+    リポジトリごとのスレッドの代わりに「次に回す時刻」のヒープを 1 つ持ち、期限が来たものを
+    小さなワーカープールへ渡す。次回の時刻は間隔に ±jitter の揺らぎを掛けて決め、同じホストへ
+    のリクエストが毎回同じ瞬間に固まらないようにする。trigger() は期限を今にして即座に回す
+    （webhook 受信時）。実行中のリポジトリへの trigger は、終わった直後にもう 1 回回す。
+    ポーリングが失敗し続けるリポジトリは、間隔を失敗のたびに倍にして（上限 _MAX_BACKOFF_SEC）
+    落ちている GitLab を叩き続けない。1 回成功すれば元の間隔に戻る。
+    """
+
+    def __init__(self, pollers: list, stop_event: threading.Event,
+                 workers: int = 4, jitter: float = 0.1) -> None:
+        self.pollers = pollers
+        self.stop_event = stop_event
+        self.jitter = max(0.0, min(jitter, 0.9))
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="poll")
+        now = time.monotonic()
+        # 起動直後の初回も一斉に叩かないよう、最初の数秒に散らす
+        self._due = [now + random.uniform(0, min(5.0, p.interval_sec)) for p in pollers]
+        self._heap = [(due, i) for i, due in enumerate(self._due)]
+        heapq.heapify(self._heap)
+        self._running: set[int] = set()
+        self._pending: set[int] = set()
+        self._failures = [0] * len(pollers)
+
+    def _next_interval(self, i: int) -> float:
+        interval = self.pollers[i].interval_sec
+        if self._failures[i]:
+            cap = max(interval, _MAX_BACKOFF_SEC)
+            interval = min(interval * 2 ** min(self._failures[i], 16), cap)
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _schedule(self, i: int, due: float) -> None:
+        self._due[i] = due
+        heapq.heappush(self._heap, (due, i))
+        self._cond.notify()
+
+    def trigger(self, project_id: int, host: Optional[str] = None) -> int:
+        """project_id（と分かれば GitLab ホスト）が一致するリポジトリを今すぐ回す。件数を返す。"""
+        count = 0
+        with self._cond:
+            for i, p in enumerate(self.pollers):
+                if p.project_id != project_id:
+                    continue
+                if host and (urllib.parse.urlsplit(p.gitlab_url).hostname or "") != host:
+                    continue
+                count += 1
+                if i in self._running:
+                    self._pending.add(i)
+                else:
+                    self._schedule(i, time.monotonic())
+        return count
+
+    def _run_one(self, i: int) -> None:
+        poller = self.pollers[i]
+        try:
+            poller.poll()
+            failed = False
+        except Exception as e:
+            log.error("[%s] ポーリングエラー: %s", poller.name, e)
+            failed = True
+        with self._cond:
+            self._running.discard(i)
+            self._failures[i] = self._failures[i] + 1 if failed else 0
+            if i in self._pending:
+                self._pending.discard(i)
+                self._schedule(i, time.monotonic())
+            else:
+                self._schedule(i, time.monotonic() + self._next_interval(i))
+
+    def run(self) -> None:
+        for p in self.pollers:
+            log.info("[%s] ポーリング開始 (interval=%d分)", p.name, p.interval_sec // 60)
+        while not self.stop_event.is_set():
+            with self._cond:
+                now = time.monotonic()
+                ready = []
+                while self._heap and self._heap[0][0] <= now:
+                    due, i = heapq.heappop(self._heap)
+                    if due != self._due[i] or i in self._running:
+                        continue    # trigger で前倒しされた古い予定
+                    self._running.add(i)
+                    ready.append(i)
+                if not ready:
+                    wait = self._heap[0][0] - now if self._heap else 1.0
+                    # 停止シグナルに気づけるよう 1 秒より長くは眠らない
+                    self._cond.wait(timeout=max(0.0, min(wait, 1.0)))
+                    continue
+            for i in ready:
+                self._pool.submit(self._run_one, i)
+        self._pool.shutdown(wait=False)
+        for p in self.pollers:
+            log.info("[%s] ポーリング終了", p.name)
+
+
+def start_webhook_receiver(webhook_cfg: dict, scheduler: PollScheduler) -> ThreadingHTTPServer:
+    """GitLab の Webhook（Issue events など）を受けて、該当プロジェクトを即時ポーリングさせる。
+
+    Webhook の本文は通知に使わず、あくまで「このプロジェクトを今見に行け」という合図として扱う
+    （取りこぼしはふだんのポーリングで埋まる）。secret を設定した場合は X-Gitlab-Token と照合する。
+    """
+    listen = str(webhook_cfg.get("listen", "127.0.0.1:8765"))
+    bind_host, _, port = listen.rpartition(":")
+    secret = str(webhook_cfg.get("secret") or "")
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt: str, *args: Any) -> None:
+            log.debug("webhook: " + fmt, *args)
+
+        def _reply(self, code: int, body: dict) -> None:
+            raw = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_POST(self) -> None:
+            token = self.headers.get("X-Gitlab-Token", "")
+            if secret and not hmac.compare_digest(token.encode(), secret.encode()):
+                self._reply(401, {"error": "invalid token"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                project = payload.get("project") or {}
+                project_id = int(project.get("id") or payload.get("project_id"))
+            except (TypeError, ValueError, AttributeError):
+                self._reply(400, {"error": "project id not found"})
+                return
+            host = urllib.parse.urlsplit(project.get("web_url") or "").hostname
+            triggered = scheduler.trigger(project_id, host)
+            log.info("webhook 受信: project_id=%s → %d リポジトリを即時ポーリング",
+                     project_id, triggered)
+            self._reply(202 if triggered else 404, {"triggered": triggered})
+
+    server = ThreadingHTTPServer((bind_host or "127.0.0.1", int(port)), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="webhook").start()
+    log.info("webhook 受信待ち: http://%s:%d/", *server.server_address[:2])
+    return server
 
 
 # ── view モード ─────────────────────────────────────────────────────────────
@@ -413,11 +693,15 @@ def cmd_status(config: dict, state_dir: Path) -> None:
         name = repo["name"]
         enabled = repo.get("enabled", True)
         state = _load_state(state_dir, name)
-        last = state.get("last_poll", "未ポーリング")
+        path = _state_path(state_dir, name)
+        # 変化のないポーリングは状態ファイルの更新時刻だけを進めるので、最終ポーリングは mtime で見る
+        last = (datetime.datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec="seconds")
+                if path.exists() else "未ポーリング")
         count = len(state.get("issues", {}))
         status_mark = "○" if enabled else "✕"
         print(f"  {status_mark} {name}")
-        print(f"      最終ポーリング: {last}  イシュー数: {count}")
+        print(f"      最終ポーリング: {last}  イシュー数: {count}"
+              f"  high-water: {state.get('high_water') or '-'}")
         print(f"      GitLab: {repo['gitlab_url']}  project_id={repo['project_id']}")
         print(f"      state={repo.get('state','opened')}  interval={repo.get('poll_interval_minutes',5)}分")
 
@@ -500,21 +784,23 @@ def main() -> None:
     except AttributeError:
         pass  # Windows では SIGHUP が存在しない
 
-    threads = []
-    for repo_cfg in repos:
-        t = threading.Thread(
-            target=_poll_repo,
-            args=(repo_cfg, state_dir, log_file, tmux_target, send_enter,
-                  stop_event, first_run_silent),
-            daemon=True,
-            name=f"poll-{repo_cfg['name']}",
-        )
-        t.start()
-        threads.append(t)
+    pollers = [
+        RepoPoller(repo_cfg, state_dir, log_file, tmux_target, send_enter, first_run_silent)
+        for repo_cfg in repos
+    ]
+    sched_cfg = config.get("scheduler") or {}
+    scheduler = PollScheduler(
+        pollers, stop_event,
+        workers=int(sched_cfg.get("workers", 4)),
+        jitter=float(sched_cfg.get("jitter", 0.1)),
+    )
+    webhook_cfg = config.get("webhook") or {}
+    server = start_webhook_receiver(webhook_cfg, scheduler) if webhook_cfg.get("enabled", True) \
+        and webhook_cfg.get("listen") else None
 
     log.info(
         "issue-mailbox 起動完了: %d リポジトリ監視中  ログ=%s",
-        len(threads),
+        len(pollers),
         log_file,
     )
     if tmux_target:
@@ -522,9 +808,9 @@ def main() -> None:
     if first_run_silent:
         log.info("初回ポーリングは通知なし（--no-silent-first で変更可）")
 
-    stop_event.wait()
-    for t in threads:
-        t.join(timeout=5)
+    scheduler.run()   # stop_event が立つまで戻らない
+    if server is not None:
+        server.shutdown()
     log.info("issue-mailbox 終了")
 
 
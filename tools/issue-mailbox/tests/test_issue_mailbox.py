@@ -0,0 +1,550 @@
+# -*- coding: utf-8 -*-
+"""issue-mailbox の単体テスト（標準ライブラリ unittest・GitLab/tmux へは繋がない）。
+
+増分ポーリングの合流（merge_updates / _matches_filter）、high-water mark の進み方、
+スケジューラの順序と失敗時の間隔延長（偽の時計）、webhook の認証と即時ポーリング、
+状態ファイルの保存・読み込みを検証する。
+
+    python -m unittest discover -s tools/issue-mailbox/tests
+"""
+import importlib.util
+import json
+import logging
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import types
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+from unittest import mock
+
+
+class FakeResponse:
+    def __init__(self, body, status=200):
+        self.body = body
+        self.status_code = status
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise _requests.HTTPError(f"{self.status_code} Server Error")
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """requests.Session の代わり。get を記録し、用意した応答を順に返す（ネットワークには出ない）。"""
+
+    def __init__(self, *responses):
+        self.headers = {}
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append((url, dict(params or {})))
+        return self.responses.pop(0)
+
+
+_requests = types.ModuleType("requests")
+_requests.RequestException = type("RequestException", (OSError,), {})
+_requests.HTTPError = type("HTTPError", (_requests.RequestException,), {})
+_requests.Session = FakeSession
+
+# 本体は import 時に tmux と requests の有無を確かめ、無ければ終了する。テストは tmux にも
+# GitLab にも繋がないので、どちらも差し替えて読み込む（素の checkout でも全部走る）。
+_MOD = Path(__file__).resolve().parent.parent / "issue-mailbox.py"
+_spec = importlib.util.spec_from_file_location("issue_mailbox", _MOD)
+im = importlib.util.module_from_spec(_spec)
+sys.modules["issue_mailbox"] = im
+with mock.patch.object(shutil, "which", return_value="/usr/bin/tmux"), \
+        mock.patch.dict(sys.modules, {"requests": _requests}):
+    _spec.loader.exec_module(im)
+im.log.setLevel(logging.CRITICAL)   # ポーリングエラー等のログでテスト出力を埋めない
+
+WATCH = {"new_issues": True, "state_changes": True, "assignee_changes": True,
+         "label_changes": True}
+
+
+def issue(iid, state="opened", labels=(), assignee=None, updated="2026-10-19T00:00:00Z",
+          title=None):
+    return {
+        "iid": iid,
+        "title": title or f"issue {iid}",
+        "state": state,
+        "labels": list(labels),
+        "assignee": {"username": assignee} if assignee else None,
+        "assignees": [{"username": assignee}] if assignee else [],
+        "updated_at": updated,
+        "web_url": f"https://gitlab.example.com/team/app/-/issues/{iid}",
+    }
+
+
+def snapshots(*issues):
+    return {str(i["iid"]): im._to_snapshot(i) for i in issues}
+
+
+class FakeClock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def monotonic(self):
+        return self.t
+
+    def advance(self, dt):
+        self.t += max(0.0, dt)
+
+
+class FakeClient:
+    """get_issues の呼び出しを記録し、用意した一覧を順に返す。"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get_issues(self, **kwargs):
+        self.calls.append(kwargs)
+        return self.responses.pop(0)
+
+
+class TestMatchesFilter(unittest.TestCase):
+    def test_state_filter(self):
+        self.assertTrue(im._matches_filter(issue(1), "opened", [], None))
+        self.assertFalse(im._matches_filter(issue(1, state="closed"), "opened", [], None))
+        self.assertTrue(im._matches_filter(issue(1, state="closed"), "all", [], None))
+
+    def test_labels_are_anded(self):
+        it = issue(1, labels=["bug", "ui"])
+        self.assertTrue(im._matches_filter(it, "opened", ["bug"], None))
+        self.assertTrue(im._matches_filter(it, "opened", ["ui", "bug"], None))
+        self.assertFalse(im._matches_filter(it, "opened", ["bug", "backend"], None))
+
+    def test_assignee_matches_any_of_the_assignees(self):
+        it = issue(1, assignee="alice")
+        it["assignees"].append({"username": "bob"})
+        self.assertTrue(im._matches_filter(it, "opened", [], "bob"))
+        self.assertTrue(im._matches_filter(it, "opened", [], "alice"))
+        self.assertFalse(im._matches_filter(it, "opened", [], "carol"))
+        self.assertFalse(im._matches_filter(issue(2), "opened", [], "alice"))
+
+
+class TestMergeUpdates(unittest.TestCase):
+    def test_new_and_updated_issues_are_merged_and_the_rest_kept(self):
+        old = snapshots(issue(1), issue(2, assignee="alice"))
+        new_map, notes = im.merge_updates(
+            old, [issue(2, assignee="bob"), issue(3, labels=["bug"])],
+            WATCH, "opened", [], None)
+        self.assertEqual(sorted(new_map), ["1", "2", "3"])
+        self.assertEqual(new_map["1"], old["1"])
+        self.assertEqual(new_map["2"]["assignee"], "bob")
+        self.assertEqual(notes, ["[UPD] #2 assignee:alice→bob  issue 2",
+                                 "[NEW] #3 issue 3 [bug]"])
+
+    def test_closed_issue_is_reported_and_dropped(self):
+        old = snapshots(issue(1), issue(2))
+        new_map, notes = im.merge_updates(old, [issue(1, state="closed")],
+                                          WATCH, "opened", [], None)
+        self.assertEqual(sorted(new_map), ["2"])
+        self.assertEqual(notes, ["[CLOSED] #1 issue 1"])
+
+    def test_closed_issue_under_state_all_is_a_state_change(self):
+        old = snapshots(issue(1))
+        new_map, notes = im.merge_updates(old, [issue(1, state="closed")],
+                                          WATCH, "all", [], None)
+        self.assertEqual(new_map["1"]["state"], "closed")
+        self.assertEqual(notes, ["[UPD] #1 state:opened→closed  issue 1"])
+
+    def test_reopened_issue_comes_back_as_new(self):
+        # クローズでスナップショットから外れたイシューが再オープンされたら、また見える
+        old = snapshots(issue(2))
+        new_map, notes = im.merge_updates(old, [issue(1, state="opened")],
+                                          WATCH, "opened", [], None)
+        self.assertIn("1", new_map)
+        self.assertEqual(notes, ["[NEW] #1 issue 1"])
+
+    def test_issue_leaving_the_filter_is_dropped_silently(self):
+        old = snapshots(issue(1, labels=["bug"]), issue(2, labels=["bug"], assignee="alice"))
+        new_map, notes = im.merge_updates(
+            old, [issue(1, labels=[]), issue(2, labels=["bug"], assignee="bob")],
+            WATCH, "opened", ["bug"], "alice")
+        self.assertEqual(new_map, {})
+        self.assertEqual(notes, [])
+
+    def test_filtered_out_issue_that_was_never_seen_is_ignored(self):
+        new_map, notes = im.merge_updates({}, [issue(5, state="closed"), issue(6, labels=["ui"])],
+                                          WATCH, "opened", ["bug"], None)
+        self.assertEqual((new_map, notes), ({}, []))
+
+    def test_unchanged_issue_returned_again_is_silent(self):
+        # updated_after は境界を含むので、最後に見たイシューは次回も返ってくる
+        old = snapshots(issue(1))
+        new_map, notes = im.merge_updates(old, [issue(1)], WATCH, "opened", [], None)
+        self.assertEqual((new_map, notes), (old, []))
+
+
+class TestDetectChanges(unittest.TestCase):
+    def test_full_listing_reports_new_updated_and_vanished(self):
+        old = snapshots(issue(1), issue(2))
+        new_map, notes = im.detect_changes(
+            old, [issue(2, state="opened", assignee="bob"), issue(3)], WATCH, "opened")
+        self.assertEqual(sorted(new_map), ["2", "3"])
+        self.assertEqual(notes, ["[UPD] #2 assignee:(未割り当て)→bob  issue 2",
+                                 "[NEW] #3 issue 3",
+                                 "[CLOSED] #1 issue 1"])
+
+
+class TestHighWater(unittest.TestCase):
+    def test_takes_the_latest_updated_at(self):
+        snaps = [{"updated_at": "2026-10-19T00:05:00Z"}, {"updated_at": "2026-10-19T00:07:00Z"},
+                 {"updated_at": None}, {}]
+        self.assertEqual(im._high_water(snaps), "2026-10-19T00:07:00Z")
+
+    def test_never_moves_backwards(self):
+        self.assertEqual(im._high_water([{"updated_at": "2026-10-19T00:01:00Z"}],
+                                        "2026-10-19T00:02:00Z"),
+                         "2026-10-19T00:02:00Z")
+        self.assertEqual(im._high_water([], "2026-10-19T00:02:00Z"), "2026-10-19T00:02:00Z")
+        self.assertEqual(im._high_water([]), "")
+
+
+class GitLabClientTests(unittest.TestCase):
+    def _client(self, session):
+        patcher = mock.patch.object(im, "_session_for", return_value=session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return im.GitLabClient("https://gitlab.example.com/", 7, "t")
+
+    def test_pages_until_a_short_page(self):
+        session = FakeSession(FakeResponse([issue(1), issue(2)]), FakeResponse([issue(3)]))
+        got = self._client(session).get_issues(state="all", per_page=2,
+                                               updated_after="2026-10-19T00:01:00Z")
+        self.assertEqual([i["iid"] for i in got], [1, 2, 3])
+        url, params = session.calls[0]
+        self.assertEqual(url, "https://gitlab.example.com/api/v4/projects/7/issues")
+        self.assertEqual(params, {"state": "all", "per_page": 2, "order_by": "updated_at",
+                                  "sort": "desc", "updated_after": "2026-10-19T00:01:00Z",
+                                  "page": 1})
+        self.assertEqual([p["page"] for _, p in session.calls], [1, 2])
+
+    def test_failed_page_raises_instead_of_returning_a_partial_list(self):
+        session = FakeSession(FakeResponse([issue(1), issue(2)]), FakeResponse([], status=502))
+        with self.assertRaises(im.requests.RequestException):
+            self._client(session).get_issues(per_page=2)
+
+    def test_session_is_shared_per_host_and_token_within_a_thread(self):
+        a = im._session_for("https://gitlab.example.com/", "t")
+        self.assertIs(im._session_for("https://gitlab.example.com", "t"), a)
+        self.assertIsNot(im._session_for("https://gitlab.example.com", "u"), a)
+        self.assertEqual(a.headers["PRIVATE-TOKEN"], "t")
+        other = []
+        worker = threading.Thread(
+            target=lambda: other.append(im._session_for("https://gitlab.example.com", "t")))
+        worker.start()
+        worker.join()
+        self.assertIsNot(other[0], a)
+
+
+class DeliverTests(unittest.TestCase):
+    def test_appends_to_the_log_and_sends_keys_to_the_pane(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(im, "_tmux",
+                                  return_value=subprocess.CompletedProcess([], 0, "", "")) as tmux:
+            log_file = Path(tmp) / "logs" / "notifications.log"
+            im.deliver("[team/app] [NEW] #1 issue 1", log_file, "%3", True)
+            im.deliver("[team/app] [CLOSED] #1 issue 1", log_file, None, False)
+            lines = log_file.read_text(encoding="utf-8").splitlines()
+        self.assertEqual([line.split("  ", 1)[1] for line in lines],
+                         ["[team/app] [NEW] #1 issue 1", "[team/app] [CLOSED] #1 issue 1"])
+        tmux.assert_called_once_with("send-keys", "-t", "%3", "--", lines[0], "Enter")
+
+
+class RepoPollerTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state_dir = Path(tmp.name) / "state"
+        self.clock = FakeClock()
+        self.delivered = []
+        for patcher in (
+            mock.patch.object(im, "time", types.SimpleNamespace(monotonic=self.clock.monotonic)),
+            mock.patch.object(im, "deliver", lambda msg, *a: self.delivered.append(msg)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _poller(self, client, **cfg):
+        repo_cfg = {"name": "team/app", "gitlab_url": "https://gitlab.example.com/",
+                    "project_id": 7, "private_token": "t", "watch": WATCH,
+                    "full_sync_minutes": 60, **cfg}
+        poller = im.RepoPoller(repo_cfg, self.state_dir, Path("unused.log"), None, False, True)
+        poller.client = client
+        return poller
+
+    def _saved(self):
+        return json.loads(im._state_path(self.state_dir, "team/app").read_text(encoding="utf-8"))
+
+    def test_cursor_advances_across_polls(self):
+        client = FakeClient(
+            [issue(1, updated="2026-10-19T00:01:00Z"), issue(2, updated="2026-10-19T00:03:00Z")],
+            [issue(2, state="closed", updated="2026-10-19T00:05:00Z"),
+             issue(9, labels=["x"], state="closed", updated="2026-10-19T00:06:00Z")],
+            [],
+        )
+        poller = self._poller(client)
+        poller.poll()
+        self.assertEqual(client.calls[0]["state"], "opened")
+        self.assertNotIn("updated_after", client.calls[0])
+        self.assertEqual(self._saved()["high_water"], "2026-10-19T00:03:00Z")
+        self.assertEqual(self.delivered, [])             # 初回は記録だけ
+
+        self.clock.advance(60)
+        poller.poll()
+        self.assertEqual(client.calls[1], {"state": "all",
+                                           "updated_after": "2026-10-19T00:03:00Z"})
+        self.assertEqual(self.delivered, ["[team/app] [CLOSED] #2 issue 2"])
+        # フィルタ外（見たこともないクローズ済み）のイシューでも印は進む
+        self.assertEqual(self._saved()["high_water"], "2026-10-19T00:06:00Z")
+        self.assertEqual(sorted(self._saved()["issues"]), ["1"])
+
+        self.clock.advance(60)
+        poller.poll()
+        self.assertEqual(client.calls[2]["updated_after"], "2026-10-19T00:06:00Z")
+
+    def test_state_file_is_rewritten_only_on_change(self):
+        client = FakeClient([issue(1, updated="2026-10-19T00:01:00Z")],
+                            [issue(1, updated="2026-10-19T00:01:00Z")])
+        poller = self._poller(client)
+        poller.poll()
+        with mock.patch.object(im, "_save_state") as save, \
+                mock.patch.object(im, "_touch_state") as touch:
+            self.clock.advance(60)
+            poller.poll()
+        save.assert_not_called()
+        touch.assert_called_once()
+
+    def test_full_sync_runs_after_the_interval(self):
+        client = FakeClient([issue(1, updated="2026-10-19T00:01:00Z")], [],
+                            [issue(2, updated="2026-10-19T00:09:00Z")])
+        poller = self._poller(client, full_sync_minutes=10)
+        poller.poll()
+        self.clock.advance(300)
+        poller.poll()
+        self.assertEqual(client.calls[1]["state"], "all")
+        self.clock.advance(300)
+        poller.poll()
+        self.assertEqual(client.calls[2], {"state": "opened", "labels": None,
+                                           "assignee_username": None})
+        self.assertEqual(self.delivered, ["[team/app] [NEW] #2 issue 2",
+                                          "[team/app] [CLOSED] #1 issue 1"])
+
+    def test_restart_resumes_from_the_saved_cursor(self):
+        self._poller(FakeClient([issue(1, updated="2026-10-19T00:01:00Z")])).poll()
+        client = FakeClient([issue(1, updated="2026-10-19T00:04:00Z", assignee="bob")])
+        poller = self._poller(client)
+        self.assertEqual(poller.state["high_water"], "2026-10-19T00:01:00Z")
+        poller.first_run_silent = False
+        poller._last_full_sync = self.clock.t      # 起動直後の全件突き合わせは済んだ扱い
+        poller.poll()
+        self.assertEqual(client.calls[0]["updated_after"], "2026-10-19T00:01:00Z")
+        self.assertEqual(self.delivered,
+                         ["[team/app] [UPD] #1 assignee:(未割り当て)→bob  issue 1"])
+
+
+class StateFileTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state_dir = Path(tmp.name) / "state"
+        self.state = {"issues": snapshots(issue(1, labels=["バグ"])),
+                      "high_water": "2026-10-19T00:01:00Z", "last_poll": "2026-10-19T09:01:00"}
+
+    def test_round_trip(self):
+        im._save_state(self.state_dir, "team/app", self.state)
+        self.assertEqual(im._load_state(self.state_dir, "team/app"), self.state)
+        self.assertEqual(im._load_state(self.state_dir, "other"), {"issues": {}})
+
+    def test_interrupted_write_keeps_the_previous_state(self):
+        im._save_state(self.state_dir, "team/app", self.state)
+        newer = {**self.state, "high_water": "2026-10-19T00:09:00Z"}
+        with mock.patch.object(im.os, "replace", side_effect=OSError("killed")):
+            with self.assertRaises(OSError):
+                im._save_state(self.state_dir, "team/app", newer)
+        self.assertEqual(im._load_state(self.state_dir, "team/app"), self.state)
+
+        # 書きかけの一時ファイルが残っていても、次の保存はそれを上書きして進む
+        path = im._state_path(self.state_dir, "team/app")
+        path.with_name(path.name + ".tmp").write_text('{"issues": {"1": ', encoding="utf-8")
+        self.assertEqual(im._load_state(self.state_dir, "team/app"), self.state)
+        im._save_state(self.state_dir, "team/app", newer)
+        self.assertEqual(im._load_state(self.state_dir, "team/app"), newer)
+
+    def test_corrupt_state_file_starts_over(self):
+        path = im._state_path(self.state_dir, "team/app")
+        path.write_text('{"issues": {"1": ', encoding="utf-8")
+        self.assertEqual(im._load_state(self.state_dir, "team/app"), {"issues": {}})
+
+
+class FakePoller:
+    def __init__(self, name, interval_sec, clock, log, project_id=1,
+                 gitlab_url="https://gitlab.example.com", fail=0, hook=None):
+        self.name = name
+        self.interval_sec = interval_sec
+        self.project_id = project_id
+        self.gitlab_url = gitlab_url
+        self.clock = clock
+        self.log = log
+        self.fail = fail
+        self.hook = hook
+
+    def poll(self):
+        self.log.append((self.clock.t, self.name))
+        if self.hook:
+            self.hook(self)
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("502 Bad Gateway")
+
+
+class InlinePool:
+    def submit(self, fn, *args):
+        fn(*args)
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class PollSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.log = []
+        for patcher in (
+            mock.patch.object(im, "time", types.SimpleNamespace(monotonic=self.clock.monotonic)),
+            # 揺らぎは区間の下端に固定する（jitter=0 と組み合わせて間隔どおりになる）
+            mock.patch.object(im, "random", types.SimpleNamespace(uniform=lambda a, b: a)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _scheduler(self, pollers, until):
+        """ワーカーをその場で実行し、待ちは偽の時計を進めるだけにしたスケジューラ。"""
+        stop = threading.Event()
+        sched = im.PollScheduler(pollers, stop, jitter=0.0)
+        sched._pool.shutdown()
+        sched._pool = InlinePool()
+
+        def wait(timeout=None):
+            if self.clock.t >= until:
+                stop.set()
+            self.clock.advance(timeout)
+
+        sched._cond.wait = wait
+        return sched
+
+    def test_due_pollers_run_in_time_order(self):
+        pollers = [FakePoller("a", 60, self.clock, self.log),
+                   FakePoller("b", 150, self.clock, self.log)]
+        self._scheduler(pollers, until=1300).run()
+        self.assertEqual(self.log, [
+            (1000, "a"), (1000, "b"), (1060, "a"), (1120, "a"), (1150, "b"), (1180, "a"),
+            (1240, "a"), (1300, "a"), (1300, "b"),
+        ])
+
+    def test_failures_back_off_and_success_resets(self):
+        pollers = [FakePoller("a", 60, self.clock, self.log, fail=3)]
+        self._scheduler(pollers, until=1900).run()
+        # 60 → 失敗で 120, 240, 480 → 成功したら 60 に戻る
+        self.assertEqual([t for t, _ in self.log],
+                         [1000, 1120, 1360, 1840, 1900])
+
+    def test_backoff_is_capped(self):
+        sched = self._scheduler([FakePoller("a", 60, self.clock, self.log)], until=0)
+        sched._failures[0] = 30
+        self.assertEqual(sched._next_interval(0), im._MAX_BACKOFF_SEC)
+        sched.pollers[0].interval_sec = 2 * im._MAX_BACKOFF_SEC
+        self.assertEqual(sched._next_interval(0), 2 * im._MAX_BACKOFF_SEC)
+
+    def test_trigger_moves_the_matching_repository_to_now(self):
+        pollers = [FakePoller("a", 600, self.clock, self.log, project_id=7),
+                   FakePoller("b", 600, self.clock, self.log, project_id=7,
+                              gitlab_url="https://other.example.com"),
+                   FakePoller("c", 600, self.clock, self.log, project_id=8)]
+        sched = self._scheduler(pollers, until=1000)
+        sched.run()
+        self.clock.t = 1100
+        self.assertEqual(sched.trigger(7, "gitlab.example.com"), 1)
+        self.assertEqual(sched.trigger(9), 0)
+        sched.stop_event.clear()
+        sched._cond.wait = lambda timeout=None: sched.stop_event.set()
+        sched.run()
+        self.assertEqual(self.log[3:], [(1100, "a")])
+        self.assertEqual(sched._due[0], 1700)        # 前倒しした分から間隔を数え直す
+
+    def test_trigger_while_running_polls_again_right_after(self):
+        sched = None
+
+        def webhook_arrives(poller):
+            if len(self.log) == 1:
+                self.assertEqual(sched.trigger(7), 1)
+
+        pollers = [FakePoller("a", 600, self.clock, self.log, project_id=7,
+                              hook=webhook_arrives)]
+        sched = self._scheduler(pollers, until=1000)
+        sched.run()
+        self.assertEqual(self.log, [(1000, "a"), (1000, "a")])
+        self.assertEqual(sched._due[0], 1600)
+
+
+class WebhookTests(unittest.TestCase):
+    def _serve(self, secret=""):
+        scheduler = mock.Mock()
+        scheduler.trigger.return_value = 1
+        server = im.start_webhook_receiver({"listen": "127.0.0.1:0", "secret": secret}, scheduler)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return scheduler, "http://%s:%d/" % server.server_address[:2]
+
+    def _post(self, url, body, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token is not None:
+            headers["X-Gitlab-Token"] = token
+        req = urllib.request.Request(url, data=json.dumps(body).encode(), headers=headers,
+                                     method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=5) as r:
+                return r.status, json.loads(r.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def test_event_triggers_the_project_on_its_host(self):
+        scheduler, url = self._serve()
+        body = {"object_kind": "issue",
+                "project": {"id": 7, "web_url": "https://gitlab.example.com/team/app"}}
+        self.assertEqual(self._post(url, body), (202, {"triggered": 1}))
+        scheduler.trigger.assert_called_once_with(7, "gitlab.example.com")
+
+    def test_secret_is_checked(self):
+        scheduler, url = self._serve(secret="s3cret")
+        body = {"project": {"id": 7}}
+        self.assertEqual(self._post(url, body)[0], 401)
+        self.assertEqual(self._post(url, body, token="wrong")[0], 401)
+        scheduler.trigger.assert_not_called()
+        self.assertEqual(self._post(url, body, token="s3cret")[0], 202)
+        scheduler.trigger.assert_called_once_with(7, None)
+
+    def test_payload_without_a_project_is_rejected(self):
+        scheduler, url = self._serve()
+        self.assertEqual(self._post(url, {"object_kind": "issue"})[0], 400)
+        self.assertEqual(self._post(url, ["not", "an", "object"])[0], 400)
+        scheduler.trigger.assert_not_called()
+
+    def test_unknown_project_is_not_found(self):
+        scheduler, url = self._serve()
+        scheduler.trigger.return_value = 0
+        self.assertEqual(self._post(url, {"project_id": 99}), (404, {"triggered": 0}))
+
+
+if __name__ == "__main__":
+    unittest.main()